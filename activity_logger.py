@@ -4,6 +4,7 @@ This module handles tracking user activities for the dashboard's recent activity
 """
 
 import sqlite3
+from query_instrumentation import connect as db_connect
 from datetime import datetime
 import os
 
@@ -12,7 +13,7 @@ DATABASE = 'restaurant_calculator.db'
 
 def get_db_connection():
     """Get database connection using the same pattern as main app"""
-    conn = sqlite3.connect(DATABASE)
+    conn = db_connect(DATABASE)
     conn.row_factory = sqlite3.Row
     return conn
 
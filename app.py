@@ -1,14 +1,47 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, make_response, flash
+import time
+boot_started = time.perf_counter()  # worker boot time, reported on /health
+
+from flask import Flask, render_template, request, jsonify, redirect, url_for, make_response, flash, stream_template, send_file
 import sqlite3
 import os
 import sys
+import gc
+from functools import lru_cache
 sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
 from unit_converter import UnitConverter
 from activity_logger import get_recent_activities, log_activity, init_activity_table
+from pagination import (parse_listing_args, parse_listing_filters, paginate_query, order_by_clause,
+                        page_to_json, where_clause, with_where, LazyRows)
+from response_cache import ResponseCache
+from dashboard_stats import install_dashboard_stats, get_dashboard_stats
+from query_instrumentation import (QueryInstrumentation, REPEATED_QUERY_THRESHOLD, connect as db_connect,
+                                   connection_stats)
+from metrics import RequestMetrics, stats_collector
+from sales_mix import ensure_sales_mix_schema
+from cost_history import record_snapshot, history, trend, value_as_of, KINDS
+from changeset_sync import install_change_log, apply_pending
+from db_backup import BackupScheduler
+from request_profiler import RequestProfiler, list_profiles, load_profile, profile_path, TOKEN_HEADER
+from catalog_snapshot import get_catalog, install_catalog_triggers
+from menu_assignments import (ensure_assignment_index, ensure_master_menu_assignment, apply_menu_changes,
+                              add_to_menu, remove_assignments, MenuAssignmentError)
+from railway_volume_config import (startup_lock, startup_schema_current, mark_startup_schema, warm_start,
+                                   STARTUP_SCHEMA_VERSION)
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
 
+# Per-request query count/DB time (Server-Timing header, /debug/queries, slow-query log)
+query_instrumentation = QueryInstrumentation(app)
+
+# cProfile + collapsed stacks for requests carrying the profile token (/admin/profiles)
+request_profiler = RequestProfiler(app)
+
+# Prometheus metrics at /metrics: route latency, status counts, queries per request, jobs
+request_metrics = RequestMetrics(app)
+request_metrics.registry.add_collector(stats_collector('sqlite_connections', connection_stats,
+                                                       counters=('opened', 'closed'), gauges=('open',)))
+
 # Import and register inventory staging blueprint
 try:
     from inventory_staging_admin import inventory_staging_bp
@@ -426,41 +459,102 @@ def init_database():
         raise
 
 def get_db():
-    conn = sqlite3.connect(DATABASE)
+    conn = db_connect(DATABASE)
     conn.row_factory = sqlite3.Row
     return conn
 
+# Rendered-page cache for read-only GET routes, keyed on per-table data versions
+response_cache = ResponseCache(get_db)
+
+# Reference data (inventory, vendors, units, recipe graph, menus) read once and
+# reloaded when its data versions change; routes and the scenario engine share it
+catalog = get_catalog(DATABASE)
+
+request_metrics.registry.add_collector(stats_collector('response_cache', response_cache.stats,
+                                                       counters=('hits', 'misses', 'not_modified'),
+                                                       gauges=('entries', 'hit_ratio')))
+request_metrics.registry.add_collector(stats_collector(
+    'catalog', lambda: {'loads': catalog.loads,
+                        'load_seconds': catalog.snapshot.load_seconds if catalog.snapshot else 0},
+    counters=('loads',), gauges=('load_seconds',)))
+
+# The costing engines below are built on first use (or by the warm start
+# thread): their modules pull in numpy and calculation_rebuilder, which a
+# worker should not pay for before it can answer its first request
+
+@lru_cache(maxsize=None)
+def get_scenario_engine():
+    """What-if costing over an in-memory snapshot, reloaded when data versions change"""
+    from scenario_engine import ScenarioEngine
+    return ScenarioEngine(DATABASE)
+
+@lru_cache(maxsize=None)
+def get_vendor_optimizer():
+    """Cheapest-vendor order guides over normalized vendor_products offers"""
+    from vendor_optimizer import VendorOptimizer
+    return VendorOptimizer(DATABASE)
+
+@lru_cache(maxsize=None)
+def get_menu_price_optimizer():
+    """Whole-menu repricing to blended food-cost targets"""
+    from menu_price_optimizer import MenuPriceOptimizer
+    return MenuPriceOptimizer(DATABASE)
+
+@lru_cache(maxsize=None)
+def get_menu_engineering():
+    """Stars/Plowhorses/Puzzles/Dogs per menu and sales period"""
+    from menu_engineering import MenuEngineering
+    return MenuEngineering(DATABASE)
+
 def get_theme():
     """Get the current theme from cookies or query parameter"""
     theme = request.args.get('theme') or request.cookies.get('theme', 'modern')
     return theme if theme in ['modern', 'neo', 'fam'] else 'modern'
 
-def ensure_master_menu_assignment(conn, menu_item_id):
-    """Ensure a menu item is assigned to the Master Menu"""
-    cursor = conn.cursor()
-    
-    # Get Master Menu ID
-    cursor.execute("SELECT id FROM menus WHERE menu_name = 'Master Menu'")
-    result = cursor.fetchone()
-    if not result:
-        return False
-    
-    master_menu_id = result[0]
-    
-    # Check if already assigned
-    cursor.execute("""
-        SELECT id FROM menu_menu_items 
-        WHERE menu_id = ? AND menu_item_id = ?
-    """, (master_menu_id, menu_item_id))
-    
-    if not cursor.fetchone():
-        # Add to Master Menu
-        cursor.execute("""
-            INSERT INTO menu_menu_items (menu_id, menu_item_id, sort_order)
-            VALUES (?, ?, 0)
-        """, (master_menu_id, menu_item_id))
-    
-    return True
+def wants_stream():
+    """Whether the caller asked for the full listing streamed instead of one page"""
+    return request.args.get('stream', '').lower() in ['1', 'true', 'yes']
+
+def get_listing_page(query, sort_columns, default_sort, params=(), count_query=None,
+                     default_order='asc', tiebreaker=None, search_columns=(), filter_columns=None):
+    """Run one server-side page of a listing query using the request's page/sort/search args"""
+    listing_args = parse_listing_args(request.args, sort_columns, default_sort, default_order,
+                                      filter_columns)
+    with get_db() as conn:
+        return paginate_query(conn, query, params, sort_columns,
+                              count_query=count_query, tiebreaker=tiebreaker,
+                              search_columns=search_columns, filter_columns=filter_columns,
+                              **listing_args)
+
+def get_listing_rows(query, sort_columns, default_sort, params=(), count_query=None,
+                     default_order='asc', tiebreaker=None, search_columns=(), filter_columns=None):
+    """Lazily stream every row of a listing query matching the request's search, in its sort order"""
+    listing_args = parse_listing_args(request.args, sort_columns, default_sort, default_order,
+                                      filter_columns)
+    where, where_params = where_clause(listing_args['q'], listing_args['filters'],
+                                       search_columns, filter_columns)
+    order_sql = order_by_clause(sort_columns, listing_args['sort'], listing_args['order'], tiebreaker)
+    return LazyRows(get_db, f"{with_where(query, where)} ORDER BY {order_sql}",
+                    tuple(params) + where_params, count_query=None if where else count_query)
+
+def get_listing_stats(stats_query, search_columns=(), filter_columns=None, **_):
+    """One aggregate row over every listing row matching the request's search and filters"""
+    listing_filters = parse_listing_filters(request.args, filter_columns)
+    where, params = where_clause(listing_filters['q'], listing_filters['filters'],
+                                 search_columns, filter_columns)
+    with get_db() as conn:
+        return conn.execute(with_where(stats_query, where), params).fetchone()
+
+def get_options(query):
+    """Values for a filter dropdown: the first column of every row"""
+    with get_db() as conn:
+        return [row[0] for row in conn.execute(query)]
+
+def render_listing(template_name, **context):
+    """Render a listing template, streaming it when ?stream=1 was requested"""
+    if wants_stream():
+        return app.response_class(stream_template(template_name, **context))
+    return render_template(template_name, **context)
 
 @app.route('/health')
 def health():
@@ -489,7 +583,8 @@ def health():
             'database': DATABASE,
             'tables': table_names,
             'table_count': len(table_names),
-            'volume': volume_info
+            'volume': volume_info,
+            'boot': boot_info
         })
     except Exception as e:
         return jsonify({
@@ -562,23 +657,22 @@ def get_recent_changes_from_db():
     return activities[:5]
 
 @app.route('/')
+@response_cache.cached('inventory', 'recipes', 'menu_items', 'vendors', 'activity_log', max_age=60)
 def index():
     """Dashboard with enhanced statistics and real activity data"""
     # Initialize activity table if it doesn't exist
     init_activity_table()
     
     with get_db() as conn:
-        inventory_count = conn.execute('SELECT COUNT(*) as count FROM inventory').fetchone()['count']
-        recipe_count = conn.execute('SELECT COUNT(*) as count FROM recipes').fetchone()['count']
-        menu_count = conn.execute('SELECT COUNT(*) as count FROM menu_items').fetchone()['count']
-        vendor_count = conn.execute('SELECT COUNT(*) as count FROM vendors').fetchone()['count']
-    
-    stats = {
-        'inventory_count': inventory_count,
-        'recipe_count': recipe_count,
-        'menu_count': menu_count,
-        'vendor_count': vendor_count
-    }
+        # Trigger-maintained counters; fall back to counting if not installed
+        stats = get_dashboard_stats(conn)
+        if stats is None:
+            stats = {
+                'inventory_count': conn.execute('SELECT COUNT(*) as count FROM inventory').fetchone()['count'],
+                'recipe_count': conn.execute('SELECT COUNT(*) as count FROM recipes').fetchone()['count'],
+                'menu_count': conn.execute('SELECT COUNT(*) as count FROM menu_items').fetchone()['count'],
+                'vendor_count': conn.execute('SELECT COUNT(*) as count FROM vendors').fetchone()['count']
+            }
     
     # Get real recent activities
     recent_activities = get_recent_activities(limit=5)
@@ -590,23 +684,77 @@ def index():
     theme = get_theme()
     return render_template(f'index_{theme}.html', stats=stats, recent_activities=recent_activities)
 
+INVENTORY_LISTING_QUERY = '''
+    SELECT i.*, 
+           v.vendor_name as primary_vendor_name,
+           vp.vendor_item_code,
+           vp.vendor_price as vendor_current_price,
+           vd.vendor_description
+    FROM inventory i 
+    LEFT JOIN vendor_products vp ON i.id = vp.inventory_id AND vp.is_primary = 1
+    LEFT JOIN vendors v ON vp.vendor_id = v.id
+    LEFT JOIN vendor_descriptions vd ON i.id = vd.inventory_id AND (vd.vendor_name = v.vendor_name OR vd.vendor_name = i.vendor_name)
+    {where}
+'''
+
+INVENTORY_SORT_COLUMNS = {
+    'description': 'i.item_description',
+    'code': 'i.item_code',
+    'vendor': 'primary_vendor_name',
+    'category': 'i.product_categories',
+    'price': 'i.current_price',
+    'updated': 'i.updated_date'
+}
+
+INVENTORY_SEARCH_COLUMNS = ('i.item_description', 'i.item_code', 'i.product_categories',
+                            'COALESCE(v.vendor_name, i.vendor_name)')
+
+INVENTORY_FILTER_COLUMNS = {
+    'category': "i.product_categories LIKE '%' || ? || '%'",
+    'vendor': 'COALESCE(v.vendor_name, i.vendor_name) = ?'
+}
+
+INVENTORY_VENDOR_OPTIONS_QUERY = '''
+    SELECT DISTINCT COALESCE(v.vendor_name, i.vendor_name) as vendor
+    FROM inventory i
+    LEFT JOIN vendor_products vp ON i.id = vp.inventory_id AND vp.is_primary = 1
+    LEFT JOIN vendors v ON vp.vendor_id = v.id
+    WHERE COALESCE(v.vendor_name, i.vendor_name, '') != ''
+    ORDER BY vendor
+'''
+
+INVENTORY_CATEGORY_OPTIONS_QUERY = '''
+    SELECT DISTINCT product_categories FROM inventory
+    WHERE COALESCE(product_categories, '') != ''
+    ORDER BY product_categories
+'''
+
+def _inventory_listing_args():
+    return dict(query=INVENTORY_LISTING_QUERY, sort_columns=INVENTORY_SORT_COLUMNS,
+                default_sort='description', tiebreaker='i.id',
+                search_columns=INVENTORY_SEARCH_COLUMNS, filter_columns=INVENTORY_FILTER_COLUMNS)
+
+def _inventory_filter_options():
+    return dict(vendor_options=get_options(INVENTORY_VENDOR_OPTIONS_QUERY),
+                category_options=get_options(INVENTORY_CATEGORY_OPTIONS_QUERY))
+
 @app.route('/inventory')
+@response_cache.cached('inventory', 'vendor_products', 'vendors', 'vendor_descriptions')
 def inventory():
-    with get_db() as conn:
-        items = conn.execute('''
-            SELECT i.*, 
-                   v.vendor_name as primary_vendor_name,
-                   vp.vendor_item_code,
-                   vp.vendor_price as vendor_current_price,
-                   vd.vendor_description
-            FROM inventory i 
-            LEFT JOIN vendor_products vp ON i.id = vp.inventory_id AND vp.is_primary = 1
-            LEFT JOIN vendors v ON vp.vendor_id = v.id
-            LEFT JOIN vendor_descriptions vd ON i.id = vd.inventory_id AND (vd.vendor_name = v.vendor_name OR vd.vendor_name = i.vendor_name)
-            ORDER BY i.item_description
-        ''').fetchall()
     theme = get_theme()
-    return render_template(f'inventory_{theme}.html', items=items)
+    if wants_stream():
+        return render_listing(f'inventory_{theme}.html',
+                              items=get_listing_rows(**_inventory_listing_args()),
+                              pagination=None, **_inventory_filter_options())
+    page = get_listing_page(**_inventory_listing_args())
+    return render_listing(f'inventory_{theme}.html', items=page['items'], pagination=page,
+                          **_inventory_filter_options())
+
+@app.route('/api/inventory')
+@response_cache.cached('inventory', 'vendor_products', 'vendors', 'vendor_descriptions')
+def api_inventory():
+    """Paginated, sortable inventory listing as JSON"""
+    return jsonify(page_to_json(get_listing_page(**_inventory_listing_args())))
 
 @app.route('/inventory/add', methods=['GET', 'POST'])
 def add_inventory():
@@ -641,9 +789,8 @@ def add_inventory():
         
         return redirect(url_for('inventory'))
     
-    # Get vendors for dropdown
-    with get_db() as conn:
-        vendors = conn.execute('SELECT DISTINCT vendor_name FROM vendors ORDER BY vendor_name').fetchall()
+    # Vendors for the dropdown
+    vendors = catalog.current().vendors
     
     theme = get_theme()
     return render_template(f'add_inventory_{theme}.html', vendors=vendors)
@@ -671,6 +818,7 @@ def edit_inventory(item_id):
                 item_id
             ))
             conn.commit()
+            record_snapshot(conn, 'inventory_edit')
         
         return redirect(url_for('inventory'))
     
@@ -684,7 +832,7 @@ def edit_inventory(item_id):
             WHERE i.id = ?
             GROUP BY i.id
         ''', (item_id,)).fetchone()
-        vendors = conn.execute('SELECT DISTINCT vendor_name as name FROM vendors ORDER BY vendor_name').fetchall()
+    vendors = catalog.current().vendors
     
     if not item:
         return redirect(url_for('inventory'))
@@ -723,20 +871,22 @@ def delete_inventory(item_id):
             ''', (recipe_id, recipe_id, recipe_id))
         
         conn.commit()
+        record_snapshot(conn, 'inventory_delete')
     
     return redirect(url_for('inventory'))
 
 @app.route('/inventory/vendors/<int:item_id>')
+@response_cache.cached('inventory', 'vendor_products', 'vendors')
 def inventory_vendors(item_id):
     """Manage vendors for an inventory item"""
     with get_db() as conn:
-        # Get inventory item
-        item = conn.execute('SELECT * FROM inventory WHERE id = ?', (item_id,)).fetchone()
+        catalog_snapshot = catalog.current()
+        item = catalog_snapshot.items.get(item_id)
         if not item:
             return "Item not found", 404
         
-        # Get all vendors for dropdown
-        vendors = conn.execute('SELECT * FROM vendors ORDER BY vendor_name').fetchall()
+        # All vendors for the dropdown
+        vendors = catalog_snapshot.vendors
         
         # Get vendor products for this item
         vendor_products = conn.execute('''
@@ -821,18 +971,70 @@ def toggle_vendor_active(item_id, vp_id):
     
     return redirect(url_for('inventory_vendors', item_id=item_id))
 
+RECIPES_LISTING_QUERY = '''
+    SELECT r.*, COUNT(ri.id) as ingredient_count 
+    FROM recipes r 
+    LEFT JOIN recipe_ingredients ri ON r.id = ri.recipe_id 
+    {where}
+    GROUP BY r.id
+'''
+
+RECIPES_SORT_COLUMNS = {
+    'group': 'r.recipe_group, r.recipe_name',
+    'name': 'r.recipe_name',
+    'status': 'r.status',
+    'food_cost': 'r.food_cost',
+    'ingredients': 'ingredient_count'
+}
+
+RECIPES_SEARCH_COLUMNS = ('r.recipe_name', 'r.recipe_group')
+
+RECIPES_FILTER_COLUMNS = {
+    'group': 'r.recipe_group = ?',
+    'status': 'r.status = ?'
+}
+
+# Stat cards cover every matching recipe, not just the page shown
+RECIPES_STATS_QUERY = '''
+    SELECT COUNT(*) as total,
+           COALESCE(SUM(r.status = 'Active'), 0) as active,
+           COALESCE(SUM(r.status = 'Draft'), 0) as draft,
+           COALESCE(AVG(NULLIF(r.food_cost, 0)), 0) as avg_food_cost
+    FROM recipes r
+    {where}
+'''
+
+RECIPES_GROUP_OPTIONS_QUERY = '''
+    SELECT DISTINCT recipe_group FROM recipes
+    WHERE COALESCE(recipe_group, '') != ''
+    ORDER BY recipe_group
+'''
+
+def _recipes_listing_args():
+    return dict(query=RECIPES_LISTING_QUERY, sort_columns=RECIPES_SORT_COLUMNS,
+                default_sort='group', count_query='SELECT COUNT(*) FROM recipes',
+                tiebreaker='r.id', search_columns=RECIPES_SEARCH_COLUMNS,
+                filter_columns=RECIPES_FILTER_COLUMNS)
+
 @app.route('/recipes')
+@response_cache.cached('recipes', 'recipe_ingredients')
 def recipes():
-    with get_db() as conn:
-        recipes = conn.execute('''
-            SELECT r.*, COUNT(ri.id) as ingredient_count 
-            FROM recipes r 
-            LEFT JOIN recipe_ingredients ri ON r.id = ri.recipe_id 
-            GROUP BY r.id 
-            ORDER BY r.recipe_group, r.recipe_name
-        ''').fetchall()
     theme = get_theme()
-    return render_template(f'recipes_{theme}.html', recipes=recipes)
+    stats = get_listing_stats(RECIPES_STATS_QUERY, **_recipes_listing_args())
+    group_options = get_options(RECIPES_GROUP_OPTIONS_QUERY)
+    if wants_stream():
+        return render_listing(f'recipes_{theme}.html',
+                              recipes=get_listing_rows(**_recipes_listing_args()),
+                              pagination=None, stats=stats, group_options=group_options)
+    page = get_listing_page(**_recipes_listing_args())
+    return render_listing(f'recipes_{theme}.html', recipes=page['items'], pagination=page,
+                          stats=stats, group_options=group_options)
+
+@app.route('/api/recipes')
+@response_cache.cached('recipes', 'recipe_ingredients')
+def api_recipes():
+    """Paginated, sortable recipe listing as JSON"""
+    return jsonify(page_to_json(get_listing_page(**_recipes_listing_args())))
 
 @app.route('/recipes/add', methods=['GET', 'POST'])
 def add_recipe():
@@ -868,29 +1070,14 @@ def add_recipe():
         
         return redirect(url_for('recipes'))
     
-    # Get unique inventory items for dropdown
-    with get_db() as conn:
-        inventory = conn.execute('''
-            WITH RankedInventory AS (
-                SELECT *,
-                    ROW_NUMBER() OVER (
-                        PARTITION BY item_description 
-                        ORDER BY 
-                            CASE WHEN last_purchased_date IS NOT NULL THEN 1 ELSE 2 END,
-                            last_purchased_date DESC,
-                            current_price DESC
-                    ) as rn
-                FROM inventory
-            )
-            SELECT * FROM RankedInventory 
-            WHERE rn = 1
-            ORDER BY item_description
-        ''').fetchall()
+    # Unique inventory items for the dropdown
+    inventory = catalog.current().ingredient_choices
     
     theme = get_theme()
     return render_template(f'add_recipe_{theme}.html', inventory=inventory)
 
 @app.route('/recipes/<int:recipe_id>')
+@response_cache.cached('recipes', 'recipe_ingredients', 'inventory')
 def view_recipe(recipe_id):
     """View recipe details with enhanced information"""
     with get_db() as conn:
@@ -963,6 +1150,7 @@ def edit_recipe(recipe_id):
                     SET food_cost = ?, food_cost_percentage = ?, gross_margin = ?
                     WHERE id = ?
                 ''', (food_cost, food_cost_percentage, gross_margin, recipe_id))
+                record_snapshot(conn, 'recipe_edit')
                 
                 # flash('Recipe updated successfully!', 'success')
                 return redirect(url_for('view_recipe', recipe_id=recipe_id))
@@ -1012,8 +1200,7 @@ def add_recipe_ingredient(recipe_id):
             cursor = conn.cursor()
             
             # Get ingredient info for cost calculation
-            ingredient = cursor.execute('SELECT * FROM inventory WHERE id = ?', 
-                                      (request.form['ingredient_id'],)).fetchone()
+            ingredient = catalog.current().items.get(int(request.form['ingredient_id']))
             
             quantity = float(request.form['quantity'])
             unit = request.form.get('unit') or ingredient['unit_measure']
@@ -1021,7 +1208,7 @@ def add_recipe_ingredient(recipe_id):
             # Calculate cost using proper unit conversion
             converter = UnitConverter(DATABASE)
             cost = converter.calculate_ingredient_cost(
-                dict(ingredient),  # Convert Row to dict
+                dict(ingredient),  # a copy, the catalog's row is shared
                 quantity,
                 unit
             )
@@ -1043,29 +1230,15 @@ def add_recipe_ingredient(recipe_id):
             ''', (recipe_id, recipe_id, recipe_id))
             
             conn.commit()
+            record_snapshot(conn, 'recipe_ingredients')
         
         return redirect(url_for('view_recipe', recipe_id=recipe_id))
     
     # Get recipe and inventory for form - show unique ingredients only
     with get_db() as conn:
         recipe = conn.execute('SELECT * FROM recipes WHERE id = ?', (recipe_id,)).fetchone()
-        # Get unique ingredients, preferring items with the most recent purchase
-        inventory = conn.execute('''
-            WITH RankedInventory AS (
-                SELECT *,
-                    ROW_NUMBER() OVER (
-                        PARTITION BY item_description 
-                        ORDER BY 
-                            CASE WHEN last_purchased_date IS NOT NULL THEN 1 ELSE 2 END,
-                            last_purchased_date DESC,
-                            current_price DESC
-                    ) as rn
-                FROM inventory
-            )
-            SELECT * FROM RankedInventory 
-            WHERE rn = 1
-            ORDER BY item_description
-        ''').fetchall()
+    # Unique ingredients, preferring items with the most recent purchase
+    inventory = catalog.current().ingredient_choices
     
     theme = get_theme()
     return render_template(f'add_recipe_ingredient_{theme}.html', recipe=recipe, inventory=inventory)
@@ -1078,8 +1251,7 @@ def edit_recipe_ingredient(recipe_id, ingredient_id):
             cursor = conn.cursor()
             
             # Get ingredient info for cost calculation
-            ingredient = cursor.execute('SELECT * FROM inventory WHERE id = ?', 
-                                      (request.form['ingredient_id'],)).fetchone()
+            ingredient = catalog.current().items.get(int(request.form['ingredient_id']))
             
             quantity = float(request.form['quantity'])
             unit = request.form.get('unit') or ingredient['unit_measure']
@@ -1087,7 +1259,7 @@ def edit_recipe_ingredient(recipe_id, ingredient_id):
             # Calculate cost using proper unit conversion
             converter = UnitConverter(DATABASE)
             cost = converter.calculate_ingredient_cost(
-                dict(ingredient),  # Convert Row to dict
+                dict(ingredient),  # a copy, the catalog's row is shared
                 quantity,
                 unit
             )
@@ -1109,6 +1281,7 @@ def edit_recipe_ingredient(recipe_id, ingredient_id):
             ''', (recipe_id, recipe_id, recipe_id))
             
             conn.commit()
+            record_snapshot(conn, 'recipe_ingredients')
         
         return redirect(url_for('view_recipe', recipe_id=recipe_id))
     
@@ -1121,23 +1294,8 @@ def edit_recipe_ingredient(recipe_id, ingredient_id):
             JOIN inventory i ON ri.ingredient_id = i.id
             WHERE ri.id = ? AND ri.recipe_id = ?
         ''', (ingredient_id, recipe_id)).fetchone()
-        # Get unique inventory items
-        inventory = conn.execute('''
-            WITH RankedInventory AS (
-                SELECT *,
-                    ROW_NUMBER() OVER (
-                        PARTITION BY item_description 
-                        ORDER BY 
-                            CASE WHEN last_purchased_date IS NOT NULL THEN 1 ELSE 2 END,
-                            last_purchased_date DESC,
-                            current_price DESC
-                    ) as rn
-                FROM inventory
-            )
-            SELECT * FROM RankedInventory 
-            WHERE rn = 1
-            ORDER BY item_description
-        ''').fetchall()
+    # Unique inventory items
+    inventory = catalog.current().ingredient_choices
     
     if not ingredient:
         return redirect(url_for('view_recipe', recipe_id=recipe_id))
@@ -1168,6 +1326,7 @@ def delete_recipe_ingredient(recipe_id, ingredient_id):
         ''', (recipe_id, recipe_id, recipe_id))
         
         conn.commit()
+        record_snapshot(conn, 'recipe_ingredients')
         flash('Ingredient removed successfully!', 'success')
     
     return redirect(url_for('view_recipe', recipe_id=recipe_id))
@@ -1561,7 +1720,7 @@ def add_menu_item_old():
                     
                     # Ensure new item is added to Master Menu
                     new_item_id = cursor.lastrowid
-                    ensure_master_menu_assignment(conn, new_item_id)
+                    ensure_master_menu_assignment(conn, [new_item_id])
             
             conn.commit()
         
@@ -1675,7 +1834,7 @@ def edit_menu_item(item_id):
                             
                             # Ensure new item is added to Master Menu
                             new_item_id = cursor.lastrowid
-                            ensure_master_menu_assignment(conn, new_item_id)
+                            ensure_master_menu_assignment(conn, [new_item_id])
                 
                 # Remove from versions not selected
                 for v_id in current_version_ids:
@@ -1781,18 +1940,19 @@ def copy_menu_item(item_id):
                     
                     # Ensure new item is added to Master Menu
                     new_item_id = cursor.lastrowid
-                    ensure_master_menu_assignment(conn, new_item_id)
+                    ensure_master_menu_assignment(conn, [new_item_id])
             
             conn.commit()
     
     return redirect(url_for('menu'))
 
 @app.route('/pricing-analysis')
+@response_cache.cached('menus', 'menu_assignments', 'menu_items', 'recipes')
 def pricing_analysis():
     """Pricing analysis and recommendations page"""
     with get_db() as conn:
         # Get menus from unified system
-        menus = conn.execute('SELECT * FROM menus ORDER BY sort_order').fetchall()
+        menus = catalog.current().menus
         
         # Get parameters
         target_food_cost = request.args.get('target_food_cost', type=float, default=30.0)
@@ -1893,41 +2053,97 @@ def pricing_analysis():
                              analysis_data=analysis_data,
                              summary=summary)
 
+VENDORS_LISTING_QUERY = '''
+    SELECT v.*, 
+           COUNT(DISTINCT vp.inventory_id) as product_count,
+           COUNT(DISTINCT CASE WHEN vp.is_active = 1 THEN vp.inventory_id END) as active_product_count
+    FROM vendors v
+    LEFT JOIN vendor_products vp ON v.id = vp.vendor_id
+    {where}
+    GROUP BY v.id
+'''
+
+VENDORS_SORT_COLUMNS = {
+    'name': 'v.vendor_name',
+    'products': 'product_count',
+    'active_products': 'active_product_count'
+}
+
+def _vendors_listing_args():
+    return dict(query=VENDORS_LISTING_QUERY, sort_columns=VENDORS_SORT_COLUMNS,
+                default_sort='name', count_query='SELECT COUNT(*) FROM vendors',
+                tiebreaker='v.id', search_columns=('v.vendor_name',))
+
+def get_vendor_top_products(conn, vendor_ids=None, limit=3):
+    """Top active products per vendor, fetched in one query instead of one per vendor"""
+    vendor_filter = ''
+    params = []
+    if vendor_ids is not None:
+        if not vendor_ids:
+            return {}
+        vendor_filter = f"AND vp.vendor_id IN ({','.join('?' * len(vendor_ids))})"
+        params.extend(vendor_ids)
+    params.append(limit)
+    
+    rows = conn.execute(f'''
+        SELECT vendor_id, item_description FROM (
+            SELECT vp.vendor_id, i.item_description,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY vp.vendor_id
+                       ORDER BY vp.is_primary DESC, i.item_description
+                   ) as rn
+            FROM vendor_products vp
+            JOIN inventory i ON vp.inventory_id = i.id
+            WHERE vp.is_active = 1 {vendor_filter}
+        )
+        WHERE rn <= ?
+        ORDER BY vendor_id, rn
+    ''', params).fetchall()
+    
+    vendor_top_products = {}
+    for row in rows:
+        vendor_top_products.setdefault(row['vendor_id'], []).append(row['item_description'])
+    return vendor_top_products
+
 @app.route('/vendors')
+@response_cache.cached('vendors', 'vendor_products', 'inventory')
 def vendors():
     """Vendor management page"""
-    with get_db() as conn:
-        # Get vendors with product counts
-        vendors = conn.execute('''
-            SELECT v.*, 
-                   COUNT(DISTINCT vp.inventory_id) as product_count,
-                   COUNT(DISTINCT CASE WHEN vp.is_active = 1 THEN vp.inventory_id END) as active_product_count
-            FROM vendors v
-            LEFT JOIN vendor_products vp ON v.id = vp.vendor_id
-            GROUP BY v.id
-            ORDER BY v.vendor_name
-        ''').fetchall()
-        
-        # Get top products for each vendor
-        vendor_top_products = {}
-        for vendor in vendors:
-            if vendor['product_count'] > 0:
-                top_products = conn.execute('''
-                    SELECT i.item_description
-                    FROM vendor_products vp
-                    JOIN inventory i ON vp.inventory_id = i.id
-                    WHERE vp.vendor_id = ? AND vp.is_active = 1
-                    ORDER BY vp.is_primary DESC, i.item_description
-                    LIMIT 3
-                ''', (vendor['id'],)).fetchall()
-                vendor_top_products[vendor['id']] = [p['item_description'] for p in top_products]
-        
     theme = get_theme()
     # Use base template name for modern theme
     template_name = 'vendors.html' if theme == 'modern' else f'vendors_{theme}.html'
-    return render_template(template_name, vendors=vendors, vendor_top_products=vendor_top_products)
+    
+    if wants_stream():
+        with get_db() as conn:
+            vendor_top_products = get_vendor_top_products(conn)
+        return render_listing(template_name,
+                              vendors=get_listing_rows(**_vendors_listing_args()),
+                              vendor_top_products=vendor_top_products,
+                              pagination=None)
+    
+    page = get_listing_page(**_vendors_listing_args())
+    with get_db() as conn:
+        # Get top products for the vendors on this page
+        vendor_top_products = get_vendor_top_products(conn, [v['id'] for v in page['items']])
+    
+    return render_listing(template_name, vendors=page['items'],
+                          vendor_top_products=vendor_top_products, pagination=page)
+
+@app.route('/api/vendors')
+@response_cache.cached('vendors', 'vendor_products', 'inventory')
+def api_vendors():
+    """Paginated, sortable vendor listing as JSON"""
+    page = get_listing_page(**_vendors_listing_args())
+    with get_db() as conn:
+        vendor_top_products = get_vendor_top_products(conn, [v['id'] for v in page['items']])
+    
+    data = page_to_json(page)
+    for vendor in data['items']:
+        vendor['top_products'] = vendor_top_products.get(vendor['id'], [])
+    return jsonify(data)
 
 @app.route('/vendors/<int:vendor_id>')
+@response_cache.cached('vendors', 'vendor_products', 'inventory')
 def vendor_detail(vendor_id):
     """Show detailed vendor information and their products"""
     with get_db() as conn:
@@ -1944,35 +2160,69 @@ def vendor_detail(vendor_id):
                         THEN ((vp.vendor_price - i.current_price) / i.current_price * 100)
                         ELSE 0 
                    END as price_variance,
-                   (SELECT COUNT(DISTINCT vendor_id) 
-                    FROM vendor_products vp2 
-                    WHERE vp2.inventory_id = vp.inventory_id) as vendor_count
+                   vc.vendor_count
             FROM vendor_products vp
             JOIN inventory i ON vp.inventory_id = i.id
+            JOIN (SELECT inventory_id, COUNT(DISTINCT vendor_id) as vendor_count
+                  FROM vendor_products
+                  WHERE inventory_id IN (SELECT inventory_id FROM vendor_products WHERE vendor_id = ?)
+                  GROUP BY inventory_id) vc ON vc.inventory_id = vp.inventory_id
             WHERE vp.vendor_id = ?
             ORDER BY vp.is_primary DESC, vp.is_active DESC, i.item_description
-        ''', (vendor_id,)).fetchall()
+        ''', (vendor_id, vendor_id)).fetchall()
         
     theme = get_theme()
     template_name = 'vendor_detail.html' if theme == 'modern' else f'vendor_detail_{theme}.html'
     return render_template(template_name, vendor=vendor, products=products)
 
 # Menu Management Routes
+MENUS_LISTING_QUERY = '''
+    SELECT m.*, 
+           COUNT(DISTINCT mmi.menu_item_id) as item_count
+    FROM menus m
+    LEFT JOIN menu_menu_items mmi ON m.id = mmi.menu_id
+    {where}
+    GROUP BY m.id
+'''
+
+MENUS_SORT_COLUMNS = {
+    'order': 'm.sort_order, m.menu_name',
+    'name': 'm.menu_name',
+    'items': 'item_count'
+}
+
+MENUS_STATS_QUERY = '''
+    SELECT COUNT(*) as total,
+           COALESCE(SUM(m.is_active = 1), 0) as active,
+           COALESCE(SUM((SELECT COUNT(DISTINCT mmi.menu_item_id) FROM menu_menu_items mmi
+                         WHERE mmi.menu_id = m.id)), 0) as assignments
+    FROM menus m
+    {where}
+'''
+
+def _menus_listing_args():
+    return dict(query=MENUS_LISTING_QUERY, sort_columns=MENUS_SORT_COLUMNS,
+                default_sort='order', count_query='SELECT COUNT(*) FROM menus',
+                tiebreaker='m.id', search_columns=('m.menu_name',))
+
 @app.route('/menus_mgmt')
+@response_cache.cached('menus', 'menu_menu_items')
 def menus():
     """List all menus"""
-    with get_db() as conn:
-        menus = conn.execute('''
-            SELECT m.*, 
-                   COUNT(DISTINCT mmi.menu_item_id) as item_count
-            FROM menus m
-            LEFT JOIN menu_menu_items mmi ON m.id = mmi.menu_id
-            GROUP BY m.id
-            ORDER BY m.sort_order, m.menu_name
-        ''').fetchall()
-    
     theme = get_theme()
-    return render_template(f'menus_{theme}.html', menus=menus)
+    stats = get_listing_stats(MENUS_STATS_QUERY, **_menus_listing_args())
+    if wants_stream():
+        return render_listing(f'menus_{theme}.html',
+                              menus=get_listing_rows(**_menus_listing_args()),
+                              pagination=None, stats=stats)
+    page = get_listing_page(**_menus_listing_args())
+    return render_listing(f'menus_{theme}.html', menus=page['items'], pagination=page, stats=stats)
+
+@app.route('/api/menus')
+@response_cache.cached('menus', 'menu_menu_items')
+def api_menus():
+    """Paginated, sortable menu listing as JSON"""
+    return jsonify(page_to_json(get_listing_page(**_menus_listing_args())))
 
 @app.route('/menus_mgmt/create', methods=['GET', 'POST'])
 def create_menu():
@@ -2059,19 +2309,13 @@ def toggle_menu_item(menu_id):
     action = request.form.get('action')
     
     with get_db() as conn:
-        cursor = conn.cursor()
-        
-        if action == 'add':
-            cursor.execute('''
-                INSERT OR IGNORE INTO menu_menu_items 
-                (menu_id, menu_item_id, category, sort_order)
-                VALUES (?, ?, ?, 0)
-            ''', (menu_id, menu_item_id, request.form.get('category', 'Uncategorized')))
-        else:
-            cursor.execute('''
-                DELETE FROM menu_menu_items 
-                WHERE menu_id = ? AND menu_item_id = ?
-            ''', (menu_id, menu_item_id))
+        try:
+            if action == 'add':
+                add_to_menu(conn, menu_id, [menu_item_id], request.form.get('category', 'Uncategorized'))
+            else:
+                remove_assignments(conn, [(menu_id, menu_item_id)])
+        except MenuAssignmentError as e:
+            flash(str(e), 'error')
     
     return redirect(url_for('edit_menu', menu_id=menu_id))
 
@@ -2083,46 +2327,125 @@ def bulk_update_menu_items(menu_id):
     if not data or 'items' not in data:
         return jsonify({'error': 'No items provided'}), 400
     
+    # One upsert batch and one delete for the whole edit, in a single transaction
     with get_db() as conn:
-        cursor = conn.cursor()
-        
-        # Process each item
-        for item in data['items']:
-            menu_item_id = item.get('item_id')
-            action = item.get('action')
-            category = item.get('category', 'Uncategorized')
-            override_price = item.get('override_price')
-            
-            if action == 'add':
-                # First check if relationship exists
-                existing = cursor.execute('''
-                    SELECT assignment_id FROM menu_assignments 
-                    WHERE menu_id = ? AND menu_item_id = ?
-                ''', (menu_id, menu_item_id)).fetchone()
-                
-                if existing:
-                    # Update existing
-                    cursor.execute('''
-                        UPDATE menu_assignments 
-                        SET category_section = ?, price_override = ?
-                        WHERE menu_id = ? AND menu_item_id = ?
-                    ''', (category, override_price if override_price else None, menu_id, menu_item_id))
-                else:
-                    # Insert new
-                    cursor.execute('''
-                        INSERT INTO menu_assignments 
-                        (menu_id, menu_item_id, category_section, sort_order, price_override)
-                        VALUES (?, ?, ?, 0, ?)
-                    ''', (menu_id, menu_item_id, category, override_price if override_price else None))
-            else:  # action == 'remove'
-                cursor.execute('''
-                    DELETE FROM menu_assignments 
-                    WHERE menu_id = ? AND menu_item_id = ?
-                ''', (menu_id, menu_item_id))
-        
+        try:
+            changes = apply_menu_changes(conn, menu_id, data['items'])
+        except MenuAssignmentError as e:
+            return jsonify({'error': str(e)}), 400
         conn.commit()
     
-    return jsonify({'success': True, 'redirect': url_for('edit_menu', menu_id=menu_id)})
+    return jsonify({'success': True, **changes, 'redirect': url_for('edit_menu', menu_id=menu_id)})
+
+@app.route('/api/scenarios', methods=['POST'])
+def api_scenarios():
+    """Cost what-if price/vendor/yield scenarios side by side without writing anything"""
+    data = request.get_json(silent=True)
+    
+    if not data or not data.get('scenarios'):
+        return jsonify({'error': 'No scenarios provided'}), 400
+    
+    from scenario_engine import Scenario, ScenarioError
+    try:
+        scenarios = [Scenario.from_dict(scenario) for scenario in data['scenarios']]
+    except (ScenarioError, TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(get_scenario_engine().compare(scenarios))
+
+@app.route('/api/vendor_optimizer', methods=['POST'])
+def api_vendor_optimizer():
+    """Cheapest vendor per item for the required quantities, as a per-vendor order guide"""
+    data = request.get_json(silent=True)
+    
+    if not data or not data.get('requirements'):
+        return jsonify({'error': 'No requirements provided'}), 400
+    
+    from vendor_optimizer import OptimizerError
+    try:
+        result = get_vendor_optimizer().optimize(data['requirements'], data.get('minimums'), data.get('vendors'))
+    except OptimizerError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(result)
+
+@app.route('/api/pricing/optimize', methods=['POST'])
+def api_pricing_optimize():
+    """Reprice a menu to one or more blended food-cost targets, with revenue and margin impact"""
+    data = request.get_json(silent=True)
+    
+    if not data or not (data.get('targets') or data.get('target')):
+        return jsonify({'error': 'No target food cost provided'}), 400
+    
+    from menu_price_optimizer import PricingError
+    try:
+        result = get_menu_price_optimizer().optimize(
+            data.get('targets') or [data['target']],
+            menu_id=data.get('menu_id'),
+            max_change_percent=data.get('max_change_percent'),
+            endings=data.get('endings'),
+            ladders=data.get('ladders'),
+            mix=data.get('mix'),
+            raise_only=bool(data.get('raise_only'))
+        )
+    except PricingError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(result)
+
+@app.route('/menu-engineering')
+@response_cache.cached('menus', 'menu_assignments', 'menu_items', 'recipes', 'sales_mix')
+def menu_engineering_page():
+    """Menu-engineering matrix for a menu and sales period"""
+    report = get_menu_engineering().report(
+        request.args.get('menu_id', type=int),
+        request.args.get('start') or None,
+        request.args.get('end') or None
+    )
+    return render_template('menu_engineering_modern.html', report=report, menus=catalog.current().menus)
+
+@app.route('/api/menu-engineering')
+@response_cache.cached('menus', 'menu_assignments', 'menu_items', 'recipes', 'sales_mix')
+def api_menu_engineering():
+    """Menu-engineering matrix as JSON"""
+    return jsonify(get_menu_engineering().report(
+        request.args.get('menu_id', type=int),
+        request.args.get('start') or None,
+        request.args.get('end') or None
+    ))
+
+@app.route('/api/cost-history/<kind>/trend')
+def api_cost_history_trend(kind):
+    """Average ingredient price or recipe cost per day/week/month"""
+    if kind not in KINDS or not request.args.get('start'):
+        return jsonify({'error': 'Expected kind ingredient or recipe and a start date'}), 400
+    try:
+        with get_db() as conn:
+            rows = trend(conn, kind, request.args['start'], request.args.get('end'),
+                         request.args.get('by', 'month'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'kind': kind, 'trend': rows})
+
+@app.route('/api/cost-history/<kind>/<int:item_id>')
+def api_cost_history(kind, item_id):
+    """Price or cost changes for one ingredient or recipe, and its value as of a date"""
+    if kind not in KINDS:
+        return jsonify({'error': 'Expected kind ingredient or recipe'}), 400
+    try:
+        with get_db() as conn:
+            series = history(conn, kind, request.args.get('start', 0), request.args.get('end'), item_id)
+            as_of = request.args.get('as_of')
+            value = value_as_of(conn, kind, item_id, as_of) if as_of else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'kind': kind,
+        'item_id': item_id,
+        'history': [{'recorded_at': at, 'value': point} for at, point in series.get(item_id, [])],
+        'as_of': as_of,
+        'value_as_of': value,
+    })
 
 @app.route('/menus_mgmt/<int:menu_id>/delete', methods=['POST'])
 def delete_menu(menu_id):
@@ -2175,6 +2498,54 @@ def delete_menu(menu_id):
         except Exception as e:
             return jsonify({'error': f'Failed to delete menu: {str(e)}'}), 500
 
+@app.route('/debug/queries')
+def debug_queries():
+    """Query count, DB time, slowest and repeated statements of recent requests"""
+    # SQL text can contain customer data, so only expose it when explicitly enabled
+    if not (app.debug or os.getenv('QUERY_DEBUG', 'false').lower() in ['true', '1']):
+        return render_template('404_modern.html'), 404
+
+    requests_seen = query_instrumentation.recent_requests()
+    if request.args.get('format') == 'json':
+        return jsonify({'requests': requests_seen})
+    return render_template('debug_queries.html', requests_seen=requests_seen,
+                           repeated_threshold=REPEATED_QUERY_THRESHOLD)
+
+def profiles_allowed():
+    # Profiles name files and functions of the app, so they need debug mode or the profile token
+    return app.debug or request_profiler.authorized(request.headers.get(TOKEN_HEADER) or request.args.get('token'))
+
+@app.route('/admin/profiles')
+def profiles():
+    """Saved request and batch-job profiles, newest first"""
+    if not profiles_allowed():
+        return render_template('404_modern.html'), 404
+
+    saved = list_profiles(request_profiler.directory)
+    if request.args.get('format') == 'json':
+        return jsonify({'profiles': saved})
+    return render_template('profiles.html', profiles=saved, profile=None, token=request.args.get('token'))
+
+@app.route('/admin/profiles/<name>')
+def profile_detail(name):
+    """Hottest functions of one profile; ?download=prof|collapsed for the raw files"""
+    if not profiles_allowed():
+        return render_template('404_modern.html'), 404
+
+    download = request.args.get('download')
+    if download:
+        path = profile_path(name, download, request_profiler.directory)
+        if path is None:
+            return render_template('404_modern.html'), 404
+        return send_file(os.path.abspath(path), as_attachment=True)
+
+    summary = load_profile(name, request_profiler.directory)
+    if summary is None:
+        return render_template('404_modern.html'), 404
+    if request.args.get('format') == 'json':
+        return jsonify(summary)
+    return render_template('profiles.html', profiles=None, profile=summary, token=request.args.get('token'))
+
 # Error handlers for production
 @app.errorhandler(404)
 def not_found(error):
@@ -2207,6 +2578,143 @@ if not os.path.exists(DATABASE) or os.getenv('FORCE_DB_INIT') == 'true':
 else:
     print("Database exists, skipping initialization...")
 
+def prepare_database():
+    """
+    Startup DDL and data sync, run under the startup lock
+
+    The DDL is skipped while the startup schema marker is current. Returns
+    whether it was.
+    """
+    try:
+        schema_current = startup_schema_current(DATABASE)
+    except Exception as e:
+        print(f"Warning: Could not read startup schema marker: {e}")
+        schema_current = False
+    ddl_ok = True
+
+    if schema_current:
+        print(f"Startup schema v{STARTUP_SCHEMA_VERSION} is current, skipping DDL")
+    else:
+        # Install the trigger-maintained dashboard counters
+        try:
+            with sqlite3.connect(DATABASE) as conn:
+                install_dashboard_stats(conn)
+        except Exception as e:
+            ddl_ok = False
+            print(f"Warning: Could not install dashboard stats, dashboard will count rows per request: {e}")
+
+        # Create the sales mix tables so the version triggers cover them too
+        try:
+            with sqlite3.connect(DATABASE) as conn:
+                ensure_sales_mix_schema(conn)
+        except Exception as e:
+            ddl_ok = False
+            print(f"Warning: Could not create sales mix tables: {e}")
+
+        # Log row changes for changeset sync
+        try:
+            with sqlite3.connect(DATABASE) as conn:
+                install_change_log(conn)
+        except Exception as e:
+            ddl_ok = False
+            print(f"Warning: Changeset sync unavailable: {e}")
+
+        # Unique (menu_id, menu_item_id) index behind the menu assignment upserts
+        try:
+            with sqlite3.connect(DATABASE) as conn:
+                ensure_assignment_index(conn)
+        except Exception as e:
+            ddl_ok = False
+            print(f"Warning: Could not create the menu assignment index: {e}")
+
+        # Version the catalog snapshot's tables so it reloads after writes
+        try:
+            with sqlite3.connect(DATABASE) as conn:
+                install_catalog_triggers(conn)
+        except Exception as e:
+            ddl_ok = False
+            print(f"Warning: Catalog snapshot will only reload on restart: {e}")
+
+    # Apply any changesets shipped with this deploy
+    try:
+        if os.path.isdir(os.path.join('data', 'changesets')):
+            with sqlite3.connect(DATABASE) as conn:
+                for result in apply_pending(conn, os.path.join('data', 'changesets')):
+                    if not result['skipped']:
+                        print(f"Applied changeset {result['path']}: {result['upserts']} upserts, {result['deletes']} deletes")
+    except Exception as e:
+        print(f"Warning: Could not apply changesets: {e}")
+
+    # Baseline cost history entry for anything changed outside the recorded paths
+    try:
+        with sqlite3.connect(DATABASE) as conn:
+            record_snapshot(conn, 'startup')
+    except Exception as e:
+        print(f"Warning: Could not record cost history snapshot: {e}")
+
+    # Install the data-version triggers backing the response cache; when they
+    # are known to exist only the cached routes' tables are resolved
+    try:
+        response_cache.install(create_triggers=not schema_current)
+    except Exception as e:
+        ddl_ok = False
+        print(f"Warning: Response cache disabled, could not install data version triggers: {e}")
+
+    if not schema_current and ddl_ok:
+        try:
+            mark_startup_schema(DATABASE)
+        except Exception as e:
+            print(f"Warning: Could not mark startup schema: {e}")
+    return schema_current
+
+# Workers booting together take turns: the first runs the DDL and marks the
+# schema, the rest (and every later boot) skip it while the marker is current
+with startup_lock(DATABASE):
+    schema_current = prepare_database()
+
+# Load the catalog snapshot now. Under gunicorn.conf.py this runs once in the
+# master and the workers inherit it copy-on-write
+try:
+    catalog.current()
+except Exception as e:
+    print(f"Warning: Could not preload catalog snapshot: {e}")
+
+preloaded = os.getenv('APP_PRELOAD') == 'true'
+if preloaded:
+    # Keep the collector from touching (and so copying) everything loaded
+    # before the fork; a dev server, test or CLI import has no fork to protect
+    gc.freeze()
+boot_info = {
+    'seconds': round(time.perf_counter() - boot_started, 3),
+    'preloaded': preloaded,
+    'schema': 'current' if schema_current else 'installed',
+    'schema_version': STARTUP_SCHEMA_VERSION,
+    'warm': None
+}
+backup_scheduler = None
+
+def start_background_threads():
+    """Scheduled backups and warm start, started once per worker"""
+    global backup_scheduler
+    # Scheduled online backups (BACKUP_INTERVAL_HOURS=0 turns them off)
+    backup_interval_hours = float(os.getenv('BACKUP_INTERVAL_HOURS', '24'))
+    if backup_interval_hours > 0 and backup_scheduler is None:
+        backup_scheduler = BackupScheduler(DATABASE, os.getenv('BACKUP_DIR'), backup_interval_hours).start()
+
+    # Fill the OS page cache and the in-process caches off the request path (WARM_START=false turns it off)
+    if os.getenv('WARM_START', 'true').lower() in ['true', '1', 'yes'] and boot_info['warm'] is None:
+        boot_info['warm'] = warm_start(DATABASE, {
+            'scenario_engine': lambda: get_scenario_engine()._current(),
+            'vendor_optimizer': lambda: get_vendor_optimizer().current(),
+            'menu_engineering': lambda: get_menu_engineering().report()
+        })
+
+# Threads started in the gunicorn master would not survive the fork, so when
+# preloaded each worker starts them from gunicorn.conf.py's post_fork hook
+if not preloaded:
+    start_background_threads()
+print(f"App loaded in {boot_info['seconds']}s")
+
 if __name__ == '__main__':
     # Production mode
     if os.getenv('FLASK_ENV') == 'production':
@@ -30,6 +30,7 @@ class DataAuditor:
         self.conn = sqlite3.connect(db_path)
         self.conn.row_factory = sqlite3.Row
         self.failures: List[Dict[str, Any]] = []
+        self.engine = None
         
     def add_failure(self, table: str, pk: Any, error_message: str, 
                    column: str = None, value: Any = None):
@@ -95,59 +96,23 @@ class DataAuditor:
         else:
             return False, f"Invalid pack size format: {pack_size}"
     
+    def add_rule_failures(self, table: str):
+        """Record the audit's data-quality rule findings for one table as audit failures"""
+        from data_quality_rules import AUDIT_RULES, DataQualityEngine
+
+        if self.engine is None:
+            # One incremental run covers every table; only changed rows are re-checked
+            self.engine = DataQualityEngine(self.db_path)
+            self.engine.run()
+
+        for finding in self.engine.findings(table=table, rule_names=AUDIT_RULES):
+            self.add_failure(table, finding['row_id'], finding['message'],
+                             finding['column_name'], finding['value'])
+
     def audit_inventory(self):
         """Audit inventory/items table"""
         print("Auditing inventory table...")
-        cursor = self.conn.cursor()
-        
-        rows = cursor.execute("""
-            SELECT id, item_code, item_description, current_price, 
-                   pack_size, purchase_unit, recipe_cost_unit, yield_percent
-            FROM inventory
-        """).fetchall()
-        
-        for row in rows:
-            # Required fields
-            if not row['item_code']:
-                self.add_failure('inventory', row['id'], 
-                               'Missing required item_code', 'item_code')
-            
-            if not row['item_description']:
-                self.add_failure('inventory', row['id'], 
-                               'Missing required item_description', 'item_description')
-            
-            # Price validation
-            if row['current_price'] is not None:
-                if not self.validate_numeric(row['current_price'], 'current_price', min_val=0):
-                    self.add_failure('inventory', row['id'], 
-                                   f'Invalid price: {row["current_price"]}', 
-                                   'current_price', row['current_price'])
-            
-            # Pack size validation
-            if row['pack_size']:
-                valid, error = self.parse_pack_size(row['pack_size'])
-                if not valid:
-                    self.add_failure('inventory', row['id'], error, 
-                                   'pack_size', row['pack_size'])
-            
-            # UOM validation
-            if row['purchase_unit'] and not self.validate_uom(row['purchase_unit']):
-                self.add_failure('inventory', row['id'], 
-                               f'Invalid purchase unit: {row["purchase_unit"]}',
-                               'purchase_unit', row['purchase_unit'])
-            
-            if row['recipe_cost_unit'] and not self.validate_uom(row['recipe_cost_unit']):
-                self.add_failure('inventory', row['id'], 
-                               f'Invalid recipe cost unit: {row["recipe_cost_unit"]}',
-                               'recipe_cost_unit', row['recipe_cost_unit'])
-            
-            # Yield percent validation
-            if row['yield_percent'] is not None:
-                if not self.validate_numeric(row['yield_percent'], 'yield_percent', 
-                                           min_val=0, max_val=100):
-                    self.add_failure('inventory', row['id'], 
-                                   f'Invalid yield percent: {row["yield_percent"]}',
-                                   'yield_percent', row['yield_percent'])
+        self.add_rule_failures('inventory')
     
     def audit_recipes(self):
         """Audit recipes table"""
@@ -211,118 +176,12 @@ class DataAuditor:
     def audit_recipe_ingredients(self):
         """Audit recipe_ingredients table"""
         print("Auditing recipe_ingredients table...")
-        cursor = self.conn.cursor()
-        
-        rows = cursor.execute("""
-            SELECT ri.id, ri.recipe_id, ri.ingredient_id, ri.ingredient_name,
-                   ri.quantity, ri.unit_of_measure, ri.cost,
-                   r.recipe_name, i.item_description
-            FROM recipe_ingredients ri
-            LEFT JOIN recipes r ON ri.recipe_id = r.id
-            LEFT JOIN inventory i ON ri.ingredient_id = i.id
-        """).fetchall()
-        
-        for row in rows:
-            # Missing recipe reference
-            if not row['recipe_name']:
-                self.add_failure('recipe_ingredients', row['id'], 
-                               'Invalid recipe_id reference', 'recipe_id', row['recipe_id'])
-            
-            # Missing ingredient reference
-            if row['ingredient_id'] and not row['item_description']:
-                self.add_failure('recipe_ingredients', row['id'], 
-                               'Invalid ingredient_id reference', 
-                               'ingredient_id', row['ingredient_id'])
-            
-            # No ingredient link at all
-            if not row['ingredient_id'] and not row['ingredient_name']:
-                self.add_failure('recipe_ingredients', row['id'], 
-                               'No ingredient specified')
-            
-            # Quantity validation
-            if row['quantity'] is None:
-                self.add_failure('recipe_ingredients', row['id'], 
-                               'Missing quantity', 'quantity')
-            elif not self.validate_numeric(row['quantity'], 'quantity', min_val=0):
-                self.add_failure('recipe_ingredients', row['id'], 
-                               f'Invalid quantity: {row["quantity"]}',
-                               'quantity', row['quantity'])
-            
-            # UOM validation
-            if not row['unit_of_measure']:
-                self.add_failure('recipe_ingredients', row['id'], 
-                               'Missing unit_of_measure', 'unit_of_measure')
-            elif not self.validate_uom(row['unit_of_measure']):
-                self.add_failure('recipe_ingredients', row['id'], 
-                               f'Invalid UOM: {row["unit_of_measure"]}',
-                               'unit_of_measure', row['unit_of_measure'])
-            
-            # Cost validation
-            if row['cost'] is not None:
-                if not self.validate_numeric(row['cost'], 'cost', min_val=0):
-                    self.add_failure('recipe_ingredients', row['id'], 
-                                   f'Invalid cost: {row["cost"]}',
-                                   'cost', row['cost'])
-            
-            # Ingredient name mismatch
-            if (row['ingredient_id'] and row['ingredient_name'] and 
-                row['item_description'] and 
-                row['ingredient_name'] != row['item_description']):
-                self.add_failure('recipe_ingredients', row['id'], 
-                               f'Ingredient name mismatch: "{row["ingredient_name"]}" vs "{row["item_description"]}"',
-                               'ingredient_name', row['ingredient_name'])
+        self.add_rule_failures('recipe_ingredients')
     
     def audit_vendor_products(self):
         """Audit vendor_products table"""
         print("Auditing vendor_products table...")
-        cursor = self.conn.cursor()
-        
-        rows = cursor.execute("""
-            SELECT vp.id, vp.inventory_id, vp.vendor_id, vp.vendor_price,
-                   vp.pack_size, vp.unit_measure, vp.is_primary,
-                   i.item_description, v.vendor_name
-            FROM vendor_products vp
-            LEFT JOIN inventory i ON vp.inventory_id = i.id
-            LEFT JOIN vendors v ON vp.vendor_id = v.id
-        """).fetchall()
-        
-        # Track primary vendors per item
-        primary_by_item = {}
-        
-        for row in rows:
-            # Invalid references
-            if not row['item_description']:
-                self.add_failure('vendor_products', row['id'], 
-                               'Invalid inventory_id reference',
-                               'inventory_id', row['inventory_id'])
-            
-            if not row['vendor_name']:
-                self.add_failure('vendor_products', row['id'], 
-                               'Invalid vendor_id reference',
-                               'vendor_id', row['vendor_id'])
-            
-            # Price validation
-            if row['vendor_price'] is not None:
-                if not self.validate_numeric(row['vendor_price'], 'vendor_price', min_val=0):
-                    self.add_failure('vendor_products', row['id'], 
-                                   f'Invalid vendor price: {row["vendor_price"]}',
-                                   'vendor_price', row['vendor_price'])
-            
-            # Pack size validation
-            if row['pack_size']:
-                valid, error = self.parse_pack_size(row['pack_size'])
-                if not valid:
-                    self.add_failure('vendor_products', row['id'], error,
-                                   'pack_size', row['pack_size'])
-            
-            # Multiple primary vendors
-            if row['is_primary']:
-                item_id = row['inventory_id']
-                if item_id in primary_by_item:
-                    self.add_failure('vendor_products', row['id'], 
-                                   f'Multiple primary vendors for item {row["item_description"]}')
-                else:
-                    primary_by_item[item_id] = row['id']
+        self.add_rule_failures('vendor_products')
     
     def audit_data_consistency(self):
         """Cross-table consistency checks"""
@@ -19,8 +19,11 @@ class AutoCommit:
         
     def get_db_hash(self):
         """Calculate hash of database content"""
+        digest = hashlib.sha256()
         with open(self.db_path, 'rb') as f:
-            return hashlib.sha256(f.read()).hexdigest()
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
     
     def get_db_stats(self):
         """Get database statistics for commit message"""
@@ -54,13 +57,9 @@ class AutoCommit:
     def git_add_and_commit(self, message):
         """Add database and commit to git"""
         try:
-            # Add database file
+            # Add database file (backups/ is rotated on disk by db_backup.py, not versioned)
             subprocess.run(['git', 'add', self.db_path], check=True)
             
-            # Add backup files if they exist
-            if os.path.exists('backups'):
-                subprocess.run(['git', 'add', 'backups/'], check=True)
-            
             # Commit
             subprocess.run(['git', 'commit', '-m', message], check=True)
             return True
@@ -128,12 +127,15 @@ def integrate_with_flask(app):
     """Integrate auto-commit with Flask app"""
     from functools import wraps
     
-    auto_commit = AutoCommit()
+    auto_commit = None  # created on the first write, not at app import
     
     def with_auto_commit(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
+            nonlocal auto_commit
             result = f(*args, **kwargs)
+            if auto_commit is None:
+                auto_commit = AutoCommit()
             # Check and commit after the request
             auto_commit.check_and_commit()
             return result
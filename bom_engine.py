@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+"""
+bom_engine.py - Bill-of-materials explosion for production and purchasing plans
+
+compile() walks menu items -> recipes -> nested prep recipes (name-matched
+ingredient lines and recipe_components) -> inventory lines once, and stores
+the result as two sparse requirement matrices in COO form:
+
+- menu item x inventory item, in the item's pack unit, grossed up for yield
+- menu item x prep recipe, in batches
+
+plan() then resolves a whole forecast (menu items x days) with one sparse
+matrix product per matrix. Item totals are rounded up to whole packs, which
+gives a purchase list grouped by the primary vendor_products vendor. The
+pack is the inventory pack size costing uses, or the offer's pack when the
+inventory has none or its unit does not convert. Prep totals are rounded up
+to whole batches per station (recipe station, else recipe group), which
+gives a prep list.
+
+One sale of a menu item consumes one recipe as written. This is the same
+basis the calculator uses for menu-item food cost and margins. A prep
+recipe line is converted to the prep recipe's batch_yield_unit, then divided
+by the batch yield.
+
+Usage:
+    python bom_engine.py forecast.csv                 # date,menu_item_id,quantity rows
+    python bom_engine.py forecast.csv --json > plan.json
+"""
+
+import argparse
+import csv
+import json
+import math
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from response_cache import get_data_versions
+from uom_standardizer import UOMStandardizer
+
+# Base tables the compiled matrices are built from
+BOM_TABLES = ('inventory', 'vendor_products', 'vendors', 'recipes_actual', 'recipe_components',
+              'recipe_ingredients_actual', 'menu_items_actual')
+
+# Units a prep recipe's portion-based yield is counted in
+PORTION_UNITS = ('portion', 'portions', 'each', 'ea', 'serving', 'servings')
+
+# Nesting deeper than this is reported as a cycle
+MAX_DEPTH = 25
+
+
+class SparseRequirements:
+    """Rows x columns requirements in COO form, multiplied as rows^T x forecast"""
+
+    def __init__(self, entries: Dict[Tuple[int, int], float], n_rows: int, n_cols: int):
+        self.n_rows = n_rows
+        self.n_cols = n_cols
+        self.rows = np.fromiter((key[0] for key in entries), dtype=np.int64, count=len(entries))
+        self.cols = np.fromiter((key[1] for key in entries), dtype=np.int64, count=len(entries))
+        self.values = np.fromiter(entries.values(), dtype=np.float64, count=len(entries))
+
+    @property
+    def nnz(self) -> int:
+        return len(self.values)
+
+    def transpose_dot(self, forecast: np.ndarray) -> np.ndarray:
+        """(n_cols x days) requirements for a (n_rows x days) forecast"""
+        # One weighted bincount per day keeps the working set at nnz floats;
+        # gathering all days at once is several times slower for long horizons
+        by_day = np.ascontiguousarray(forecast.T)
+        result = np.empty((self.n_cols, forecast.shape[1]))
+        for day, sales in enumerate(by_day):
+            result[:, day] = np.bincount(self.cols, weights=self.values * sales[self.rows],
+                                         minlength=self.n_cols)
+        return result
+
+
+class BOMEngine:
+    """Compile the recipe graph once, then explode forecasts into purchase and prep lists"""
+
+    def __init__(self, db_path: str = 'restaurant_calculator.db'):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.uom = None
+        self.compiled = None
+        self.versions = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _data_versions(self, conn: sqlite3.Connection) -> Optional[Dict[str, int]]:
+        try:
+            return get_data_versions(conn, BOM_TABLES)
+        except sqlite3.OperationalError:
+            return None  # data_versions not installed - recompile only on compile()
+
+    def current(self) -> Dict[str, Any]:
+        """The compiled graph, recompiled first if the data changed"""
+        with self.lock:
+            if self.compiled is not None and self.versions is not None:
+                conn = self._connect()
+                try:
+                    if self._data_versions(conn) != self.versions:
+                        self.compiled = None
+                finally:
+                    conn.close()
+            if self.compiled is None:
+                self.compile()
+            return self.compiled
+
+    # ------------------------------------------------------------------
+    # Compilation
+    # ------------------------------------------------------------------
+
+    def _ratio(self, from_unit: str, to_unit: str, context: Optional[Dict] = None) -> Optional[float]:
+        try:
+            ratio = self.uom.conversion_ratio(from_unit, to_unit, context)
+        except (ArithmeticError, ValueError):
+            return None
+        return ratio[0] / ratio[1] if ratio and ratio[1] else None
+
+    def _parse(self, measurement: str) -> Tuple[float, str]:
+        quantity, unit = self.uom.parse_measurement(measurement)
+        return float(quantity), unit
+
+    def _packs(self, item: Dict, offer: Optional[Dict]) -> List[Tuple[float, str, Optional[float]]]:
+        """
+        (pack quantity, pack unit, pack price) candidates the item is bought in
+
+        The inventory pack (the one costing uses) comes first; the vendor
+        offer's pack is the fallback, since its sizes often omit the unit.
+        """
+        packs = []
+        for pack_size, purchase_unit, price in (
+            (item['pack_size'], item['purchase_unit'], item['current_price']),
+            (offer and offer['pack_size'], offer and offer['unit_measure'], offer and offer['vendor_price']),
+        ):
+            pack_size = str(pack_size or '').strip()
+            if not pack_size:
+                continue
+            try:
+                if any(c.isalpha() for c in pack_size):
+                    quantity, unit = self._parse(pack_size)
+                elif purchase_unit:
+                    quantity, unit = float(pack_size), self.uom.standardize_unit(purchase_unit)
+                else:
+                    continue
+            except (ArithmeticError, ValueError):
+                continue
+            if quantity > 0 and all(pack[:2] != (quantity, unit) for pack in packs):
+                packs.append((quantity, unit, price))
+        return packs
+
+    def compile(self):
+        """Read the recipe graph and build the requirement matrices"""
+        started = time.perf_counter()
+        conn = self._connect()
+        try:
+            versions = self._data_versions(conn)
+            if self.uom is None:
+                self.uom = UOMStandardizer(self.db_path, read_only=True)
+            items = {row['id']: dict(row) for row in conn.execute("""
+                SELECT id, item_description, vendor_name, current_price, pack_size, purchase_unit,
+                       yield_percent, density_g_per_ml, count_to_weight_g
+                FROM inventory
+            """)}
+            offers = {}
+            for row in conn.execute("""
+                SELECT vp.inventory_id, v.vendor_name, vp.vendor_item_code, vp.vendor_price,
+                       vp.pack_size, vp.unit_measure
+                FROM vendor_products vp
+                JOIN vendors v ON v.id = vp.vendor_id
+                WHERE vp.is_active = 1
+                ORDER BY vp.is_primary DESC, vp.id
+            """):
+                offers.setdefault(row['inventory_id'], dict(row))
+            recipes = {row['recipe_id']: dict(row) for row in conn.execute("""
+                SELECT recipe_id, recipe_name, recipe_type, recipe_group, station,
+                       batch_yield, batch_yield_unit, portions_per_batch
+                FROM recipes_actual
+            """)}
+            recipe_ids_by_name = {}
+            for recipe_id, recipe in recipes.items():
+                recipe_ids_by_name.setdefault(recipe['recipe_name'], recipe_id)
+
+            # Each recipe's direct needs: ('item', id, qty, unit) or ('prep', id, qty, unit)
+            needs = defaultdict(list)
+            for row in conn.execute("""
+                SELECT recipe_id, ingredient_name, quantity, unit, inventory_id
+                FROM recipe_ingredients_actual
+                ORDER BY recipe_id, ingredient_order, ingredient_id
+            """):
+                nested_id = recipe_ids_by_name.get(row['ingredient_name'])
+                if nested_id:
+                    needs[row['recipe_id']].append(('prep', nested_id, row['quantity'], row['unit']))
+                elif row['inventory_id']:
+                    needs[row['recipe_id']].append(('item', row['inventory_id'], row['quantity'], row['unit']))
+                else:
+                    needs[row['recipe_id']].append(('unmatched', row['ingredient_name'], row['quantity'], row['unit']))
+            for row in conn.execute("""
+                SELECT parent_recipe_id, component_recipe_id, quantity, unit_of_measure
+                FROM recipe_components
+            """):
+                # A component already listed as a name-matched ingredient line is not counted twice
+                if not any(kind == 'prep' and key == row['component_recipe_id']
+                           for kind, key, _, _ in needs[row['parent_recipe_id']]):
+                    needs[row['parent_recipe_id']].append(
+                        ('prep', row['component_recipe_id'], row['quantity'], row['unit_of_measure'])
+                    )
+            menu_items = [dict(row) for row in conn.execute("""
+                SELECT menu_item_id, item_name, recipe_id, menu_category
+                FROM menu_items_actual
+                ORDER BY menu_item_id
+            """)]
+        finally:
+            conn.close()
+
+        warnings = []
+        columns = {}      # (item id, unit) or ('unmatched', name, unit) -> column
+        column_info = []
+        packs = {}
+
+        def column(key, info):
+            if key not in columns:
+                columns[key] = len(column_info)
+                column_info.append(info)
+            return columns[key]
+
+        def item_column(item_id: int, quantity: float, unit: Optional[str]) -> Tuple[int, float]:
+            """Column and multiplier putting quantity of unit into the item's pack unit"""
+            item = items.get(item_id)
+            if item is None:
+                return column(('unmatched', f'inventory #{item_id}', unit),
+                              {'kind': 'unmatched', 'name': f'inventory #{item_id}', 'unit': unit}), quantity
+            if item_id not in packs:
+                packs[item_id] = self._packs(item, offers.get(item_id))
+            unit = self.uom.standardize_unit(unit or 'each')
+            context = {key: item[key] for key in ('density_g_per_ml', 'count_to_weight_g') if item[key]}
+            factor = pack = None
+            for pack in packs[item_id]:
+                factor = self._ratio(unit, pack[1], context)
+                if factor is not None:
+                    break
+            if factor is None:
+                # Unconvertible lines are totalled in their own unit
+                return column((item_id, unit), {'kind': 'item', 'inventory_id': item_id, 'unit': unit,
+                                                'pack': None}), quantity
+            yield_percent = item['yield_percent'] or 100
+            return column((item_id, pack[1]), {'kind': 'item', 'inventory_id': item_id, 'unit': pack[1],
+                                               'pack': pack}), quantity * factor * 100 / yield_percent
+
+        prep_columns = {}
+        explosions = {}
+
+        def batches_for(prep_id: int, quantity: float, unit: Optional[str]) -> Optional[float]:
+            prep = recipes[prep_id]
+            if prep['batch_yield']:
+                yield_qty, yield_unit = prep['batch_yield'], prep['batch_yield_unit'] or 'each'
+            elif prep['portions_per_batch']:
+                yield_qty, yield_unit = prep['portions_per_batch'], 'portion'
+            else:
+                warnings.append(f"Prep recipe {prep['recipe_name']} has no batch yield")
+                return None
+            line_unit = self.uom.standardize_unit(unit or 'each')
+            if yield_unit.lower() in PORTION_UNITS and line_unit in PORTION_UNITS:
+                factor = 1.0
+            else:
+                factor = self._ratio(line_unit, yield_unit)
+            if factor is None:
+                warnings.append(f"Cannot convert {line_unit} to {yield_unit} for prep recipe "
+                                f"{prep['recipe_name']}; using the quantity as {yield_unit}")
+                factor = 1.0
+            return quantity * factor / yield_qty
+
+        def explode(recipe_id: int, depth: int = 0) -> Tuple[Dict[int, float], Dict[int, float]]:
+            """Per-one-recipe needs: ({column: qty}, {prep recipe id: batches})"""
+            if recipe_id in explosions:
+                return explosions[recipe_id]
+            item_needs, prep_needs = defaultdict(float), defaultdict(float)
+            if depth > MAX_DEPTH:
+                warnings.append(f"Recipe {recipe_id} nests deeper than {MAX_DEPTH} levels (cycle?)")
+                return item_needs, prep_needs
+            for kind, key, quantity, unit in needs.get(recipe_id, ()):
+                try:
+                    quantity = float(quantity or 0)
+                except (TypeError, ValueError):
+                    warnings.append(f"Invalid quantity {quantity!r} in recipe {recipe_id}")
+                    continue
+                if not quantity:
+                    continue
+                if kind == 'item':
+                    col, qty = item_column(key, quantity, unit)
+                    item_needs[col] += qty
+                elif kind == 'unmatched':
+                    col = column(('unmatched', key, unit), {'kind': 'unmatched', 'name': key, 'unit': unit})
+                    item_needs[col] += quantity
+                elif key in recipes:
+                    batches = batches_for(key, quantity, unit)
+                    if batches is None:
+                        continue
+                    prep_needs[key] += batches
+                    nested_items, nested_preps = explode(key, depth + 1)
+                    for col, qty in nested_items.items():
+                        item_needs[col] += qty * batches
+                    for prep_id, prep_batches in nested_preps.items():
+                        prep_needs[prep_id] += prep_batches * batches
+            explosions[recipe_id] = (item_needs, prep_needs)
+            return explosions[recipe_id]
+
+        item_entries, prep_entries = {}, {}
+        for row, menu_item in enumerate(menu_items):
+            if menu_item['recipe_id'] not in recipes:
+                warnings.append(f"Menu item {menu_item['item_name']} has no recipe")
+                continue
+            item_needs, prep_needs = explode(menu_item['recipe_id'])
+            for col, qty in item_needs.items():
+                item_entries[(row, col)] = qty
+            for prep_id, batches in prep_needs.items():
+                if prep_id not in prep_columns:
+                    prep_columns[prep_id] = len(prep_columns)
+                prep_entries[(row, prep_columns[prep_id])] = batches
+
+        self.compiled = {
+            'menu_items': menu_items,
+            'menu_rows': {menu_item['menu_item_id']: row for row, menu_item in enumerate(menu_items)},
+            'items': items,
+            'offers': offers,
+            'recipes': recipes,
+            'columns': column_info,
+            'prep_ids': sorted(prep_columns, key=prep_columns.get),
+            'item_matrix': SparseRequirements(item_entries, len(menu_items), len(column_info)),
+            'prep_matrix': SparseRequirements(prep_entries, len(menu_items), len(prep_columns)),
+            'warnings': sorted(set(warnings)),
+            'compile_ms': round((time.perf_counter() - started) * 1000, 2),
+        }
+        self.versions = versions
+        return self.compiled
+
+    # ------------------------------------------------------------------
+    # Planning
+    # ------------------------------------------------------------------
+
+    def forecast_matrix(self, forecast: Dict[Any, Any], days: Optional[Sequence[str]] = None):
+        """
+        (menu items x days) array from {menu_item_id: qty or [qty per day]}
+
+        Returns (array, day labels, unknown menu item ids).
+        """
+        compiled = self.current()
+        n_days = max((len(v) for v in forecast.values() if isinstance(v, (list, tuple))), default=1)
+        if days is not None:
+            n_days = len(days)
+        matrix = np.zeros((len(compiled['menu_items']), n_days))
+        unknown = []
+        for menu_item_id, quantities in forecast.items():
+            row = compiled['menu_rows'].get(int(menu_item_id))
+            if row is None:
+                unknown.append(menu_item_id)
+                continue
+            values = quantities if isinstance(quantities, (list, tuple)) else [quantities]
+            matrix[row, :len(values)] += np.asarray(values, dtype=np.float64)
+        return matrix, list(days) if days is not None else [f'day {n + 1}' for n in range(n_days)], unknown
+
+    def plan(self, forecast: Dict[Any, Any], days: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """Purchase list and per-station prep list for a forecast"""
+        started = time.perf_counter()
+        compiled = self.current()
+        matrix, days, unknown = self.forecast_matrix(forecast, days)
+        item_totals = compiled['item_matrix'].transpose_dot(matrix)
+        prep_totals = compiled['prep_matrix'].transpose_dot(matrix)
+
+        purchase_list, unresolved = [], []
+        for col, info in enumerate(compiled['columns']):
+            daily = item_totals[col]
+            total = float(daily.sum())
+            if total <= 0:
+                continue
+            if info['kind'] == 'unmatched' or info['pack'] is None:
+                name = info.get('name') or compiled['items'][info['inventory_id']]['item_description']
+                unresolved.append({'name': name, 'inventory_id': info.get('inventory_id'),
+                                   'quantity': round(total, 4), 'unit': info['unit']})
+                continue
+            item = compiled['items'][info['inventory_id']]
+            offer = compiled['offers'].get(info['inventory_id'])
+            pack_qty, pack_unit, pack_price = info['pack']
+            packs_to_order = math.ceil(round(total / pack_qty, 6))
+            purchase_list.append({
+                'inventory_id': info['inventory_id'],
+                'item_description': item['item_description'],
+                'vendor_name': offer['vendor_name'] if offer else item['vendor_name'],
+                'vendor_item_code': offer and offer['vendor_item_code'],
+                'required_quantity': round(total, 4),
+                'unit': pack_unit,
+                'daily_quantity': [round(float(q), 4) for q in daily],
+                'pack_quantity': pack_qty,
+                'packs_to_order': packs_to_order,
+                'pack_price': pack_price,
+                'estimated_cost': round(packs_to_order * pack_price, 2) if pack_price else None,
+            })
+        purchase_list.sort(key=lambda row: (row['vendor_name'] or '', row['item_description'] or ''))
+
+        prep_list = defaultdict(list)
+        for col, prep_id in enumerate(compiled['prep_ids']):
+            daily = prep_totals[col]
+            if daily.sum() <= 0:
+                continue
+            recipe = compiled['recipes'][prep_id]
+            station = recipe['station'] or recipe['recipe_group'] or 'Unassigned'
+            yield_qty = recipe['batch_yield'] or recipe['portions_per_batch']
+            prep_list[station].append({
+                'recipe_id': prep_id,
+                'recipe_name': recipe['recipe_name'],
+                'batches': round(float(daily.sum()), 4),
+                'daily_batches': [math.ceil(round(float(b), 6)) for b in daily],
+                'quantity': round(float(daily.sum()) * yield_qty, 4),
+                'unit': recipe['batch_yield_unit'] or 'portion',
+            })
+        for station in prep_list.values():
+            station.sort(key=lambda row: row['recipe_name'])
+
+        return {
+            'days': days,
+            'purchase_list': purchase_list,
+            'prep_list': dict(sorted(prep_list.items())),
+            'unresolved': sorted(unresolved, key=lambda row: row['name']),
+            'unknown_menu_items': unknown,
+            'warnings': compiled['warnings'],
+            'summary': {
+                'menu_items_forecast': int((matrix.sum(axis=1) > 0).sum()),
+                'purchase_lines': len(purchase_list),
+                'prep_recipes': sum(len(rows) for rows in prep_list.values()),
+                'estimated_cost': round(sum(row['estimated_cost'] or 0 for row in purchase_list), 2),
+            },
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+        }
+
+
+def read_forecast_csv(path: str) -> Tuple[Dict[int, List[float]], List[str]]:
+    """date,menu_item_id,quantity rows -> ({menu_item_id: [qty per date]}, dates)"""
+    rows = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            rows.append((row['date'], int(row['menu_item_id']), float(row['quantity'] or 0)))
+    days = sorted({date for date, _, _ in rows})
+    index = {date: n for n, date in enumerate(days)}
+    forecast = defaultdict(lambda: [0.0] * len(days))
+    for date, menu_item_id, quantity in rows:
+        forecast[menu_item_id][index[date]] += quantity
+    return dict(forecast), days
+
+
+def print_plan(plan: Dict[str, Any]):
+    print("=" * 80)
+    print(f"PURCHASE LIST ({plan['days'][0]} - {plan['days'][-1]})")
+    print("=" * 80)
+    vendor = object()
+    for row in plan['purchase_list']:
+        if row['vendor_name'] != vendor:
+            vendor = row['vendor_name']
+            print(f"\n{vendor or 'No vendor offer'}")
+        cost = f"${row['estimated_cost']:.2f}" if row['estimated_cost'] is not None else ''
+        print(f"  {row['item_description'][:40]:<40} {row['required_quantity']:>10.2f} {row['unit']:<6} "
+              f"-> {row['packs_to_order']:>4} x {row['pack_quantity']:g} {row['unit']:<6} {cost:>10}")
+    print(f"\nEstimated cost: ${plan['summary']['estimated_cost']:.2f}")
+
+    print("\n" + "=" * 80)
+    print("PREP LIST")
+    print("=" * 80)
+    for station, rows in plan['prep_list'].items():
+        print(f"\n{station}")
+        for row in rows:
+            print(f"  {row['recipe_name'][:40]:<40} {row['batches']:>8.2f} batches "
+                  f"({row['quantity']:.2f} {row['unit']})  daily: {row['daily_batches']}")
+
+    if plan['unresolved']:
+        print(f"\n{len(plan['unresolved'])} requirements could not be converted to purchase units:")
+        for row in plan['unresolved']:
+            print(f"  {row['name']}: {row['quantity']} {row['unit']}")
+    if plan['unknown_menu_items']:
+        print(f"\nUnknown menu items in forecast: {plan['unknown_menu_items']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Explode a sales forecast into purchase and prep lists")
+    parser.add_argument('forecast', help="CSV with date,menu_item_id,quantity columns")
+    parser.add_argument('--db', default='restaurant_calculator.db', help="Database path")
+    parser.add_argument('--json', action='store_true', help="Print the plan as JSON")
+    args = parser.parse_args()
+
+    forecast, days = read_forecast_csv(args.forecast)
+    plan = BOMEngine(args.db).plan(forecast, days)
+    if args.json:
+        print(json.dumps(plan, indent=2))
+    else:
+        print_plan(plan)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,17 +3,29 @@
 Recipe Cost Calculation Rebuilder
 Rebuilds recipe cost calculations from scratch using corrected PDF data and standardized UOMs
 Provides complete transparency and audit trails for all calculations
+
+Calculation steps are recorded as raw values and only formatted into
+formula strings by format_step() / explain_recipe_cost(). The audit trail
+streams each finished calculation to a JSON Lines file and keeps just the
+most recent ones in memory, so a full rebuild runs in flat memory.
+
+Ingredient lines are costed in integer micro-units (fixed_point.py) and
+rounded to cents only where the Decimal path quantizes; fixed_point=False
+selects the original Decimal arithmetic, which explain_recipe_cost() and
+the differential tests use as the reference.
 """
 
 import sqlite3
 import logging
 import json
 from datetime import datetime
-from decimal import Decimal, ROUND_HALF_UP
+from decimal import Decimal
 import decimal
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 from pathlib import Path
 import csv
+import heapq
+from collections import deque
 
 # Set up logging with detailed format
 logging.basicConfig(
@@ -24,6 +36,10 @@ logger = logging.getLogger(__name__)
 
 # Import dependencies
 from uom_standardizer import UOMStandardizer
+from fixed_point import SCALE, InexactError, round_ratio, to_decimal, to_micros
+from records import IngredientCost, RecipeCost, RecipeReportRow, json_default
+from metrics import timed_job
+from query_instrumentation import configure_slow_query_log, connect as db_connect, recording
 
 # PDF functionality archived - commented out
 # try:
@@ -34,17 +50,213 @@ from uom_standardizer import UOMStandardizer
 #     PDF_SUPPORT = False
 PDF_SUPPORT = False  # PDF functionality has been archived
 
+# Calculations kept in memory by the audit trail; everything else is on disk
+AUDIT_TRAIL_MEMORY = 100
+
+# Recipes listed in the batch report's top variances / error sections
+REPORT_TOP_N = 10
+
+
+# Step fields held as micro-unit ints by the fixed-point path
+MICRO_STEP_FIELDS = ('quantity', 'converted_qty', 'unit_cost', 'result', 'cost',
+                     'yield_factor', 'nested_cost', 'yield_qty')
+
+
+def format_step(step: Dict[str, Any]) -> Dict[str, Any]:
+    """Render a raw calculation step into its human-readable formula strings"""
+    if step.get('micros'):
+        step = {k: to_decimal(v) if k in MICRO_STEP_FIELDS else v for k, v in step.items()}
+    kind = step['step']
+    if kind == 'per_serving_calculation':
+        return {
+            'step': kind,
+            'formula': f"${step['total_cost']} / {step['servings']} servings",
+            'result': f"${step['result']}"
+        }
+    if kind == 'nested_recipe_cost':
+        return {
+            'step': kind,
+            'description': f"Using nested recipe: {step['ingredient_name']}",
+            'formula': f"${step['nested_cost']} / {step['yield_qty']} {step['yield_unit']}",
+            'unit_cost': f"${step['unit_cost']}/unit",
+            'total_cost': f"${step['result']}"
+        }
+    if kind == 'unit_conversion':
+        return {
+            'step': kind,
+            'from': f"{step['quantity']} {step['unit']}",
+            'to': f"{step['converted_qty']} {step['pack_unit']}",
+            'formula': f"{step['converted_qty']} × ${step['unit_cost']}/{step['pack_unit']}",
+            'result': f"${step['result']}"
+        }
+    if kind == 'direct_calculation':
+        return {
+            'step': kind,
+            'formula': f"{step['quantity']} {step['unit']} × ${step['unit_cost']}/{step['unit']}",
+            'result': f"${step['result']}"
+        }
+    if kind == 'yield_adjustment':
+        return {
+            'step': kind,
+            'formula': f"${step['cost']} / {step['yield_factor']} (yield: {step['yield_percent']}%)",
+            'result': f"${step['result']}"
+        }
+    return dict(step)
+
+
+class CalculationAuditTrail:
+    """Streams finished calculations to JSON Lines, keeping only the most recent in memory"""
+    
+    def __init__(self, path: Optional[Path] = None, keep: int = AUDIT_TRAIL_MEMORY):
+        self.recent = deque(maxlen=keep)
+        self.path = None
+        self._file = None
+        self._reset_stats()
+        if path:
+            self.open(path)
+    
+    def _reset_stats(self):
+        self.total_calculations = 0
+        self.calculations_with_errors = 0
+        self.calculations_with_warnings = 0
+        self._variance_total = Decimal('0')
+        self._variance_count = 0
+    
+    def open(self, path: Path):
+        """Start a new audit file; later calculations are appended to it as they finish"""
+        self.close()
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'w')
+        self.recent.clear()
+        self._reset_stats()
+    
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+    
+    def append(self, calculation: RecipeCost):
+        self.recent.append(calculation)
+        self.total_calculations += 1
+        if calculation.errors:
+            self.calculations_with_errors += 1
+        if calculation.warnings:
+            self.calculations_with_warnings += 1
+        if calculation.variance_from_pdf is not None:
+            self._variance_total += calculation.variance_from_pdf
+            self._variance_count += 1
+        
+        if self._file:
+            # Ingredient steps already carry every step except the per-serving one
+            record = {k: v for k, v in calculation.items() if k != 'calculation_steps'}
+            self._file.write(json.dumps(record, default=json_default) + '\n')
+            self._file.flush()
+    
+    def entries(self, recipe_id: Optional[int] = None):
+        """Iterate recorded calculations, streaming from the audit file when there is one"""
+        if self.path:
+            with open(self.path) as f:
+                for line in f:
+                    entry = json.loads(line)
+                    if recipe_id is None or entry['recipe_id'] == recipe_id:
+                        yield entry
+        else:
+            for entry in list(self.recent):
+                if recipe_id is None or entry['recipe_id'] == recipe_id:
+                    yield entry
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'total_calculations': self.total_calculations,
+            'calculations_with_errors': self.calculations_with_errors,
+            'calculations_with_warnings': self.calculations_with_warnings,
+            'average_variance_from_pdf': (
+                float(self._variance_total / self._variance_count) if self._variance_count else None
+            )
+        }
+
+
+class JSONListWriter:
+    """Writes a JSON object whose list under one key is streamed item by item"""
+    
+    def __init__(self, path: Path, key: str):
+        self._file = open(path, 'w')
+        self._file.write(f'{{\n  {json.dumps(key)}: [')
+        self._first = True
+    
+    def append(self, item: Any):
+        self._file.write('\n    ' if self._first else ',\n    ')
+        self._file.write(json.dumps(item, default=json_default))
+        self._first = False
+    
+    def extend(self, items: Iterable[Any]):
+        for item in items:
+            self.append(item)
+    
+    def close(self, fields: Dict[str, Any]):
+        """Finish the list and write the object's remaining fields"""
+        self._file.write('\n  ]' if not self._first else ']')
+        for key, value in fields.items():
+            self._file.write(f',\n  {json.dumps(key)}: {json.dumps(value, default=json_default)}')
+        self._file.write('\n}\n')
+        self._file.close()
+
+
+def gross_margin_from_cost(recipe_id: int, recipe_name: str, menu_price: Decimal,
+                           food_cost: Decimal) -> Dict[str, Any]:
+    """Gross margin for an already-calculated recipe cost at a given menu price"""
+    margin_calc = {
+        'recipe_id': recipe_id,
+        'recipe_name': recipe_name,
+        'menu_price': float(menu_price),
+        'food_cost': float(food_cost),
+        'gross_profit': float(menu_price - food_cost),
+        'gross_margin_percent': 0,
+        'food_cost_percent': 0,
+        'target_food_cost_percent': 30,  # Industry standard
+        'pricing_recommendation': None
+    }
+    
+    if menu_price > 0:
+        margin_calc['gross_margin_percent'] = float(
+            ((menu_price - food_cost) / menu_price * 100).quantize(Decimal('0.01'))
+        )
+        margin_calc['food_cost_percent'] = float(
+            (food_cost / menu_price * 100).quantize(Decimal('0.01'))
+        )
+        
+        # Pricing recommendation
+        if margin_calc['food_cost_percent'] > 35:
+            margin_calc['pricing_recommendation'] = "Consider increasing price - food cost too high"
+        elif margin_calc['food_cost_percent'] < 25:
+            margin_calc['pricing_recommendation'] = "Room for price reduction or portion increase"
+        else:
+            margin_calc['pricing_recommendation'] = "Pricing is well-balanced"
+    
+    return margin_calc
+
 
 class CalculationRebuilder:
     """Rebuild recipe cost calculations with full transparency and validation"""
     
-    def __init__(self, db_path: str = 'restaurant_calculator.db'):
+    def __init__(self, db_path: str = 'restaurant_calculator.db', read_only: bool = False,
+                 audit_path: Optional[Path] = None, fixed_point: bool = True):
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path)
+        self.fixed_point = fixed_point
+        if read_only:
+            self.conn = db_connect(f'file:{db_path}?mode=ro', uri=True)
+        else:
+            self.conn = db_connect(db_path)
         self.conn.row_factory = sqlite3.Row
-        self.uom_standardizer = UOMStandardizer(db_path)
-        self.audit_trail = []
+        self.uom_standardizer = UOMStandardizer(db_path, read_only=read_only)
+        self.audit_trail = CalculationAuditTrail(audit_path)
         self.validation_errors = []
+        # Fixed-point parse/conversion results keyed by their raw inputs, so a
+        # price or pack change in the database is simply a new key
+        self._measurement_cache = {}
+        self._unit_cost_cache = {}
+        self._conversion_cache = {}
         
     def calculate_recipe_cost_from_scratch(self, recipe_id: int, 
                                           include_nested: bool = True) -> Dict[str, Any]:
@@ -77,20 +289,13 @@ class CalculationRebuilder:
         logger.info(f"Calculating cost for recipe: {recipe_name} (ID: {recipe_id})")
         
         # Initialize calculation result
-        calculation = {
-            'recipe_id': recipe_id,
-            'recipe_name': recipe_name,
-            'recipe_type': recipe['recipe_type'],
-            'timestamp': datetime.now().isoformat(),
-            'ingredients': [],
-            'total_cost': Decimal('0'),
-            'cost_per_serving': Decimal('0'),
-            'pdf_stated_cost': Decimal(str(recipe['pdf_stated_cost'])) if recipe['pdf_stated_cost'] else None,
-            'variance_from_pdf': None,
-            'calculation_steps': [],
-            'warnings': [],
-            'errors': []
-        }
+        calculation = RecipeCost(
+            recipe_id=recipe_id,
+            recipe_name=recipe_name,
+            recipe_type=recipe['recipe_type'],
+            timestamp=datetime.now().isoformat(),
+            pdf_stated_cost=Decimal(str(recipe['pdf_stated_cost'])) if recipe['pdf_stated_cost'] else None
+        )
         
         # Get all ingredients
         ingredients = cursor.execute("""
@@ -123,49 +328,50 @@ class CalculationRebuilder:
         """, (recipe_id,)).fetchall()
         
         # Calculate cost for each ingredient
+        total_micros = 0
         for ingredient in ingredients:
-            ing_calc = self._calculate_ingredient_cost(ingredient, include_nested)
-            calculation['ingredients'].append(ing_calc)
-            calculation['total_cost'] += ing_calc['total_cost']
-            
-            # Add calculation steps
-            calculation['calculation_steps'].extend(ing_calc['steps'])
-            
-            # Collect warnings and errors
-            if ing_calc['warnings']:
-                calculation['warnings'].extend(ing_calc['warnings'])
-            if ing_calc['errors']:
-                calculation['errors'].extend(ing_calc['errors'])
+            if self.fixed_point:
+                ing_calc, line_micros = self._calculate_ingredient_cost_fixed(ingredient, include_nested)
+                total_micros += line_micros
+            else:
+                ing_calc = self._calculate_ingredient_cost(ingredient, include_nested)
+                calculation.total_cost += ing_calc.total_cost
+            # Also collects the line's steps, warnings and errors
+            calculation.add_ingredient(ing_calc)
+        
+        if self.fixed_point:
+            calculation.total_cost = to_decimal(total_micros)
         
         # Calculate per-serving cost
         serving_size = recipe['serving_size'] or recipe['portions_per_batch']
         if serving_size and serving_size > 0:
-            calculation['cost_per_serving'] = (
-                calculation['total_cost'] / Decimal(str(serving_size))
+            calculation.cost_per_serving = (
+                calculation.total_cost / Decimal(str(serving_size))
             ).quantize(Decimal('0.0001'))
             
-            calculation['calculation_steps'].append({
+            calculation.add_step({
                 'step': 'per_serving_calculation',
-                'formula': f"${calculation['total_cost']} / {serving_size} servings",
-                'result': f"${calculation['cost_per_serving']}"
+                'total_cost': calculation.total_cost,
+                'servings': serving_size,
+                'result': calculation.cost_per_serving
             })
         
         # Calculate variance from PDF
-        if calculation['pdf_stated_cost']:
-            calculation['variance_from_pdf'] = (
-                calculation['total_cost'] - calculation['pdf_stated_cost']
+        if calculation.pdf_stated_cost:
+            calculation.variance_from_pdf = (
+                calculation.total_cost - calculation.pdf_stated_cost
             ).quantize(Decimal('0.01'))
             
-            calculation['variance_percent'] = (
-                (calculation['variance_from_pdf'] / calculation['pdf_stated_cost'] * 100)
-                if calculation['pdf_stated_cost'] > 0 else Decimal('0')
+            calculation.variance_percent = (
+                (calculation.variance_from_pdf / calculation.pdf_stated_cost * 100)
+                if calculation.pdf_stated_cost > 0 else Decimal('0')
             ).quantize(Decimal('0.01'))
             
             # Flag significant variances
-            if abs(calculation['variance_from_pdf']) > Decimal('0.01'):
-                calculation['warnings'].append(
-                    f"Cost variance of ${calculation['variance_from_pdf']} "
-                    f"({calculation['variance_percent']}%) from PDF stated cost"
+            if abs(calculation.variance_from_pdf) > Decimal('0.01'):
+                calculation.warn(
+                    f"Cost variance of ${calculation.variance_from_pdf} "
+                    f"({calculation.variance_percent}%) from PDF stated cost"
                 )
         
         # Store audit trail
@@ -173,65 +379,84 @@ class CalculationRebuilder:
         
         return calculation
     
-    def _calculate_ingredient_cost(self, ingredient: sqlite3.Row, 
-                                  include_nested: bool = True) -> Dict[str, Any]:
-        """Calculate cost for a single ingredient with unit conversions"""
-        
+    def _new_ingredient_calc(self, ingredient: sqlite3.Row) -> Dict[str, Any]:
         try:
             quantity_val = Decimal(str(ingredient['quantity'])) if ingredient['quantity'] is not None else Decimal('0')
         except (ValueError, TypeError, decimal.InvalidOperation) as e:
             logger.error(f"Invalid quantity for {ingredient['ingredient_name']}: {ingredient['quantity']}")
             quantity_val = Decimal('0')
             
-        ing_calc = {
-            'ingredient_name': ingredient['ingredient_name'],
-            'ingredient_type': ingredient['ingredient_type'],
-            'quantity': quantity_val,
-            'unit': ingredient['unit_of_measure'],
-            'unit_cost': Decimal('0'),
-            'total_cost': Decimal('0'),
-            'steps': [],
-            'warnings': [],
-            'errors': []
-        }
+        return IngredientCost(
+            ingredient_name=ingredient['ingredient_name'],
+            ingredient_type=ingredient['ingredient_type'],
+            quantity=quantity_val,
+            unit=ingredient['unit_of_measure']
+        )
+    
+    def _nested_recipe_yield(self, ingredient: sqlite3.Row, include_nested: bool):
+        """
+        Cost the nested prep recipe behind an ingredient
+        
+        Returns (nested_calc, yield, yield_unit); nested_calc is None when nested
+        recipes are skipped, yield is None when the nested recipe has no yield
+        information.
+        """
+        if not include_nested:
+            return None, None, None
+        
+        nested_calc = self.calculate_recipe_cost_from_scratch(
+            ingredient['nested_recipe_id'], 
+            include_nested=True
+        )
+        
+        # Get yield information for nested recipe
+        cursor = self.conn.cursor()
+        nested_recipe = cursor.execute("""
+            SELECT batch_yield, batch_yield_unit, portions_per_batch
+            FROM recipes_actual
+            WHERE recipe_id = ?
+        """, (ingredient['nested_recipe_id'],)).fetchone()
+        
+        if nested_recipe and (nested_recipe['batch_yield'] or nested_recipe['portions_per_batch']):
+            return (nested_calc, nested_recipe['batch_yield'] or nested_recipe['portions_per_batch'],
+                    nested_recipe['batch_yield_unit'] or 'portion')
+        return nested_calc, None, None
+    
+    def _apply_nested_cost(self, ing_calc: Dict[str, Any], nested_total: Decimal,
+                           nested_yield: float, yield_unit: str):
+        yield_qty = Decimal(str(nested_yield))
+        cost_per_yield_unit = nested_total / yield_qty
+        
+        ing_calc.unit_cost = cost_per_yield_unit
+        ing_calc.total_cost = ing_calc.quantity * cost_per_yield_unit
+        
+        ing_calc.add_step({
+            'step': 'nested_recipe_cost',
+            'ingredient_name': ing_calc.ingredient_name,
+            'nested_cost': nested_total,
+            'yield_qty': yield_qty,
+            'yield_unit': yield_unit,
+            'unit_cost': cost_per_yield_unit,
+            'result': ing_calc.total_cost
+        })
+    
+    def _calculate_ingredient_cost(self, ingredient: sqlite3.Row, 
+                                  include_nested: bool = True) -> Dict[str, Any]:
+        """Calculate cost for a single ingredient with unit conversions (Decimal reference path)"""
+        ing_calc = self._new_ingredient_calc(ingredient)
         
         # Handle nested recipes
         if ingredient['ingredient_type'] == 'Prep Recipe' and ingredient['nested_recipe_id']:
-            if include_nested:
-                nested_calc = self.calculate_recipe_cost_from_scratch(
-                    ingredient['nested_recipe_id'], 
-                    include_nested=True
-                )
-                
-                # Get yield information for nested recipe
-                cursor = self.conn.cursor()
-                nested_recipe = cursor.execute("""
-                    SELECT batch_yield, batch_yield_unit, portions_per_batch
-                    FROM recipes_actual
-                    WHERE recipe_id = ?
-                """, (ingredient['nested_recipe_id'],)).fetchone()
-                
-                if nested_recipe and (nested_recipe['batch_yield'] or nested_recipe['portions_per_batch']):
-                    yield_qty = Decimal(str(nested_recipe['batch_yield'] or nested_recipe['portions_per_batch']))
-                    yield_unit = nested_recipe['batch_yield_unit'] or 'portion'
-                    cost_per_yield_unit = nested_calc['total_cost'] / yield_qty
-                    
-                    ing_calc['unit_cost'] = cost_per_yield_unit
-                    ing_calc['total_cost'] = ing_calc['quantity'] * cost_per_yield_unit
-                    
-                    ing_calc['steps'].append({
-                        'step': 'nested_recipe_cost',
-                        'description': f"Using nested recipe: {ingredient['ingredient_name']}",
-                        'formula': f"${nested_calc['total_cost']} / {yield_qty} {yield_unit}",
-                        'unit_cost': f"${cost_per_yield_unit}/unit",
-                        'total_cost': f"${ing_calc['total_cost']}"
-                    })
+            nested_calc, nested_yield, yield_unit = self._nested_recipe_yield(ingredient, include_nested)
+            if nested_calc:
+                if nested_yield:
+                    self._apply_nested_cost(ing_calc, nested_calc.total_cost, nested_yield, yield_unit)
                 else:
-                    ing_calc['errors'].append(
+                    ing_calc.error(
                         f"Nested recipe {ingredient['ingredient_name']} missing yield information"
                     )
             else:
-                ing_calc['warnings'].append(
+                ing_calc.warn(
                     f"Skipping nested recipe calculation for {ingredient['ingredient_name']}"
                 )
                 
@@ -273,54 +498,244 @@ class CalculationRebuilder:
                     )
                     
                     if converted_qty:
-                        ing_calc['total_cost'] = (converted_qty * unit_cost).quantize(Decimal('0.01'))
+                        ing_calc.total_cost = (converted_qty * unit_cost).quantize(Decimal('0.01'))
                         
-                        ing_calc['steps'].append({
+                        ing_calc.add_step({
                             'step': 'unit_conversion',
-                            'from': f"{quantity} {unit}",
-                            'to': f"{converted_qty} {pack_unit}",
-                            'formula': f"{converted_qty} × ${unit_cost}/{pack_unit}",
-                            'result': f"${ing_calc['total_cost']}"
+                            'quantity': quantity,
+                            'unit': unit,
+                            'converted_qty': converted_qty,
+                            'pack_unit': pack_unit,
+                            'unit_cost': unit_cost,
+                            'result': ing_calc.total_cost
                         })
                     else:
-                        ing_calc['errors'].append(
+                        ing_calc.error(
                             f"Cannot convert {quantity} {unit} to {pack_unit} for {ingredient['ingredient_name']}"
                         )
                 else:
                     # No conversion needed
-                    ing_calc['total_cost'] = (quantity * unit_cost).quantize(Decimal('0.01'))
+                    ing_calc.total_cost = (quantity * unit_cost).quantize(Decimal('0.01'))
                     
-                    ing_calc['steps'].append({
+                    ing_calc.add_step({
                         'step': 'direct_calculation',
-                        'formula': f"{quantity} {unit} × ${unit_cost}/{unit}",
-                        'result': f"${ing_calc['total_cost']}"
+                        'quantity': quantity,
+                        'unit': unit,
+                        'unit_cost': unit_cost,
+                        'result': ing_calc.total_cost
                     })
                 
-                ing_calc['unit_cost'] = unit_cost
+                ing_calc.unit_cost = unit_cost
                 
                 # Apply yield if applicable
                 if ingredient['yield_percent'] and ingredient['yield_percent'] < 100:
                     yield_factor = Decimal(str(ingredient['yield_percent'])) / 100
-                    adjusted_cost = ing_calc['total_cost'] / yield_factor
+                    adjusted_cost = ing_calc.total_cost / yield_factor
                     
-                    ing_calc['steps'].append({
+                    ing_calc.add_step({
                         'step': 'yield_adjustment',
-                        'formula': f"${ing_calc['total_cost']} / {yield_factor} (yield: {ingredient['yield_percent']}%)",
-                        'result': f"${adjusted_cost}"
+                        'cost': ing_calc.total_cost,
+                        'yield_factor': yield_factor,
+                        'yield_percent': ingredient['yield_percent'],
+                        'result': adjusted_cost
                     })
                     
-                    ing_calc['total_cost'] = adjusted_cost.quantize(Decimal('0.01'))
+                    ing_calc.total_cost = adjusted_cost.quantize(Decimal('0.01'))
             else:
-                ing_calc['errors'].append(
+                ing_calc.error(
                     f"Missing pack size or purchase unit for {ingredient['ingredient_name']}"
                 )
         else:
-            ing_calc['errors'].append(
+            ing_calc.error(
                 f"No pricing information for {ingredient['ingredient_name']}"
             )
         
         return ing_calc
     
+    def _calculate_ingredient_cost_fixed(self, ingredient: sqlite3.Row,
+                                        include_nested: bool = True) -> Tuple[Dict[str, Any], int]:
+        """
+        _calculate_ingredient_cost() in integer micro-units
+        
+        Rounds at the same points as the Decimal path (unit cost to 4 places,
+        line costs to cents) and returns (ing_calc, line cost in micros) so the
+        recipe total is summed without Decimal arithmetic.
+        """
+        ing_calc = self._new_ingredient_calc(ingredient)
+        line = 0
+        
+        if ingredient['ingredient_type'] == 'Prep Recipe' and ingredient['nested_recipe_id']:
+            nested_calc, nested_yield, yield_unit = self._nested_recipe_yield(ingredient, include_nested)
+            if nested_calc:
+                if nested_yield:
+                    line = self._apply_nested_cost_fixed(ing_calc, nested_calc.total_cost, nested_yield, yield_unit)
+                else:
+                    ing_calc.error(
+                        f"Nested recipe {ingredient['ingredient_name']} missing yield information"
+                    )
+            else:
+                ing_calc.warn(
+                    f"Skipping nested recipe calculation for {ingredient['ingredient_name']}"
+                )
+        
+        elif ingredient['inventory_id'] and ingredient['current_price']:
+            try:
+                line = self._price_inventory_item_fixed(ingredient, ing_calc)
+            except InexactError:
+                # Inputs finer than a micro-unit are costed by the Decimal path
+                ing_calc = self._calculate_ingredient_cost(ingredient, include_nested)
+                line = to_micros(ing_calc.total_cost)
+        else:
+            ing_calc.error(
+                f"No pricing information for {ingredient['ingredient_name']}"
+            )
+        
+        return ing_calc, line
+    
+    def _apply_nested_cost_fixed(self, ing_calc: Dict[str, Any], nested_total: Decimal,
+                                 nested_yield: float, yield_unit: str) -> int:
+        """_apply_nested_cost() in micro-units, returning the line cost in micros"""
+        try:
+            nested_cost = to_micros(nested_total)
+            yield_qty = to_micros(nested_yield)
+            quantity = to_micros(ing_calc.quantity)
+        except InexactError:
+            self._apply_nested_cost(ing_calc, nested_total, nested_yield, yield_unit)
+            return to_micros(ing_calc.total_cost, exact=False)
+        
+        unit_cost = round_ratio(nested_cost * SCALE, yield_qty)
+        line = round_ratio(quantity * nested_cost, yield_qty)
+        
+        ing_calc.unit_cost = to_decimal(unit_cost)
+        ing_calc.total_cost = to_decimal(line)
+        
+        ing_calc.add_step({
+            'step': 'nested_recipe_cost',
+            'micros': True,
+            'ingredient_name': ing_calc.ingredient_name,
+            'nested_cost': nested_cost,
+            'yield_qty': yield_qty,
+            'yield_unit': yield_unit,
+            'unit_cost': unit_cost,
+            'result': line
+        })
+        return line
+    
+    def cost_ingredient_line(self, ingredient, nested_total: Optional[Decimal] = None,
+                             nested_yield: Optional[float] = None,
+                             yield_unit: Optional[str] = None) -> Tuple[Dict[str, Any], int]:
+        """
+        Fixed-point cost of one ingredient row without querying the database
+        
+        ingredient is any mapping with the columns of the ingredient query in
+        calculate_recipe_cost_from_scratch(), e.g. with overlaid prices. For a
+        prep recipe line the caller costs the nested recipe and passes its total
+        and yield. Returns (ing_calc, line cost in micros).
+        """
+        if ingredient['ingredient_type'] == 'Prep Recipe' and ingredient['nested_recipe_id']:
+            ing_calc = self._new_ingredient_calc(ingredient)
+            if nested_yield:
+                return ing_calc, self._apply_nested_cost_fixed(ing_calc, nested_total, nested_yield, yield_unit)
+            ing_calc.error(f"Nested recipe {ingredient['ingredient_name']} missing yield information")
+            return ing_calc, 0
+        return self._calculate_ingredient_cost_fixed(ingredient, include_nested=False)
+    
+    def _price_inventory_item_fixed(self, ingredient: sqlite3.Row, ing_calc: Dict[str, Any]) -> int:
+        """Cost an inventory ingredient into ing_calc, returning the line cost in micros"""
+        line = 0
+        uom = self.uom_standardizer
+        measurement = f"{ingredient['quantity']} {ingredient['unit_of_measure']}"
+        parsed = self._measurement_cache.get(measurement)
+        if parsed is None:
+            parsed = self._measurement_cache[measurement] = uom.parse_measurement_micros(measurement)
+        quantity, unit = parsed
+        
+        if ingredient['pack_size'] and ingredient['purchase_unit'] and ingredient['current_price']:
+            pack_key = (ingredient['pack_size'], ingredient['purchase_unit'], ingredient['current_price'])
+            priced = self._unit_cost_cache.get(pack_key)
+            if priced is None:
+                pack_size_str = str(ingredient['pack_size']).strip()
+                if any(c.isalpha() for c in pack_size_str):
+                    pack_qty, pack_unit = uom.parse_measurement_micros(pack_size_str)
+                else:
+                    pack_qty = to_micros(pack_size_str)
+                    pack_unit = uom.standardize_unit(ingredient['purchase_unit'])
+                
+                # Price per pack unit, rounded to 4 places like the Decimal path
+                unit_cost = round_ratio(to_micros(ingredient['current_price']) * 10**4, pack_qty) * 100
+                priced = self._unit_cost_cache[pack_key] = (unit_cost, pack_unit)
+            unit_cost, pack_unit = priced
+            
+            if unit != pack_unit:
+                conversion_key = (unit, pack_unit, ingredient['density_g_per_ml'], ingredient['count_to_weight_g'])
+                if conversion_key in self._conversion_cache:
+                    ratio = self._conversion_cache[conversion_key]
+                else:
+                    context = {
+                        'density_g_per_ml': ingredient['density_g_per_ml'],
+                        'count_to_weight_g': ingredient['count_to_weight_g']
+                    }
+                    ratio = self._conversion_cache[conversion_key] = uom.conversion_ratio(unit, pack_unit, context)
+                
+                if ratio and quantity * ratio[0]:
+                    numerator, denominator = ratio
+                    # quantity × ratio × unit_cost is micros³; one division lands on cents
+                    line = round_ratio(quantity * numerator * unit_cost, denominator * 10**10) * 10**4
+                    ing_calc.total_cost = to_decimal(line, 2)
+                    
+                    ing_calc.add_step({
+                        'step': 'unit_conversion',
+                        'micros': True,
+                        'quantity': quantity,
+                        'unit': unit,
+                        'converted_qty': round_ratio(quantity * numerator, denominator),
+                        'pack_unit': pack_unit,
+                        'unit_cost': unit_cost,
+                        'result': line
+                    })
+                else:
+                    # Rare path: report the quantity exactly as the Decimal path does
+                    quantity_text = uom.parse_measurement(measurement)[0]
+                    ing_calc.error(
+                        f"Cannot convert {quantity_text} {unit} to {pack_unit} for {ingredient['ingredient_name']}"
+                    )
+            else:
+                line = round_ratio(quantity * unit_cost, 10**10) * 10**4
+                ing_calc.total_cost = to_decimal(line, 2)
+                
+                ing_calc.add_step({
+                    'step': 'direct_calculation',
+                    'micros': True,
+                    'quantity': quantity,
+                    'unit': unit,
+                    'unit_cost': unit_cost,
+                    'result': line
+                })
+            
+            ing_calc.unit_cost = to_decimal(unit_cost, 4)
+            
+            if ingredient['yield_percent'] and ingredient['yield_percent'] < 100:
+                yield_percent = to_micros(ingredient['yield_percent'])
+                adjusted = round_ratio(line * 10**4, yield_percent) * 10**4
+                
+                ing_calc.add_step({
+                    'step': 'yield_adjustment',
+                    'micros': True,
+                    'cost': line,
+                    'yield_factor': round_ratio(yield_percent, 100),
+                    'yield_percent': ingredient['yield_percent'],
+                    'result': adjusted
+                })
+                
+                line = adjusted
+                ing_calc.total_cost = to_decimal(line, 2)
+        else:
+            ing_calc.error(
+                f"Missing pack size or purchase unit for {ingredient['ingredient_name']}"
+            )
+        
+        return line
+    
     def validate_against_pdf_cost(self, recipe_id: int, pdf_cost: Decimal) -> Dict[str, Any]:
         """
         Validate calculated cost against PDF stated cost
@@ -332,15 +747,15 @@ class CalculationRebuilder:
         
         validation = {
             'recipe_id': recipe_id,
-            'recipe_name': calculation['recipe_name'],
-            'calculated_cost': calculation['total_cost'],
+            'recipe_name': calculation.recipe_name,
+            'calculated_cost': calculation.total_cost,
             'pdf_stated_cost': pdf_cost,
-            'variance': calculation['total_cost'] - pdf_cost,
+            'variance': calculation.total_cost - pdf_cost,
             'variance_percent': (
-                ((calculation['total_cost'] - pdf_cost) / pdf_cost * 100)
+                ((calculation.total_cost - pdf_cost) / pdf_cost * 100)
                 if pdf_cost > 0 else Decimal('0')
             ).quantize(Decimal('0.01')),
-            'is_valid': abs(calculation['total_cost'] - pdf_cost) <= Decimal('0.01'),
+            'is_valid': abs(calculation.total_cost - pdf_cost) <= Decimal('0.01'),
             'validation_notes': []
         }
         
@@ -351,14 +766,14 @@ class CalculationRebuilder:
             )
             
             # Check for common issues
-            if calculation['errors']:
+            if calculation.errors:
                 validation['validation_notes'].append(
-                    f"Calculation errors found: {', '.join(calculation['errors'][:3])}"
+                    f"Calculation errors found: {', '.join(calculation.errors[:3])}"
                 )
             
-            if calculation['warnings']:
+            if calculation.warnings:
                 validation['validation_notes'].append(
-                    f"Warnings: {', '.join(calculation['warnings'][:3])}"
+                    f"Warnings: {', '.join(calculation.warnings[:3])}"
                 )
             
             # Analyze ingredient-level variances
@@ -372,20 +787,20 @@ class CalculationRebuilder:
         
         # Sort ingredients by cost impact
         sorted_ingredients = sorted(
-            calculation['ingredients'], 
+            calculation.ingredients, 
             key=lambda x: x['total_cost'], 
             reverse=True
         )
         
         for ing in sorted_ingredients[:5]:  # Top 5 cost drivers
             analysis.append({
-                'ingredient': ing['ingredient_name'],
-                'cost': float(ing['total_cost']),
+                'ingredient': ing.ingredient_name,
+                'cost': float(ing.total_cost),
                 'percent_of_total': float(
-                    (ing['total_cost'] / calculation['total_cost'] * 100).quantize(Decimal('0.01'))
-                ) if calculation['total_cost'] > 0 else 0,
-                'has_errors': len(ing['errors']) > 0,
-                'errors': ing['errors']
+                    (ing.total_cost / calculation.total_cost * 100).quantize(Decimal('0.01'))
+                ) if calculation.total_cost > 0 else 0,
+                'has_errors': len(ing.errors) > 0,
+                'errors': ing.errors
             })
         
         return analysis
@@ -423,35 +838,20 @@ class CalculationRebuilder:
         # Calculate cost
         calculation = self.calculate_recipe_cost_from_scratch(recipe_id)
         
-        margin_calc = {
-            'recipe_id': recipe_id,
-            'recipe_name': recipe['recipe_name'],
-            'menu_price': float(menu_price),
-            'food_cost': float(calculation['total_cost']),
-            'gross_profit': float(menu_price - calculation['total_cost']),
-            'gross_margin_percent': 0,
-            'food_cost_percent': 0,
-            'target_food_cost_percent': 30,  # Industry standard
-            'pricing_recommendation': None
-        }
-        
-        if menu_price > 0:
-            margin_calc['gross_margin_percent'] = float(
-                ((menu_price - calculation['total_cost']) / menu_price * 100).quantize(Decimal('0.01'))
-            )
-            margin_calc['food_cost_percent'] = float(
-                (calculation['total_cost'] / menu_price * 100).quantize(Decimal('0.01'))
-            )
-            
-            # Pricing recommendation
-            if margin_calc['food_cost_percent'] > 35:
-                margin_calc['pricing_recommendation'] = "Consider increasing price - food cost too high"
-            elif margin_calc['food_cost_percent'] < 25:
-                margin_calc['pricing_recommendation'] = "Room for price reduction or portion increase"
-            else:
-                margin_calc['pricing_recommendation'] = "Pricing is well-balanced"
-        
-        return margin_calc
+        return gross_margin_from_cost(recipe_id, recipe['recipe_name'], menu_price, calculation.total_cost)
+    
+    def explain_recipe_cost(self, recipe_id: int) -> Dict[str, Any]:
+        """Calculate a recipe with every step rendered as formula strings"""
+        # Explanations show the Decimal reference arithmetic step by step
+        fixed_point, self.fixed_point = self.fixed_point, False
+        try:
+            calculation = self.calculate_recipe_cost_from_scratch(recipe_id)
+        finally:
+            self.fixed_point = fixed_point
+        calculation.calculation_steps = [format_step(step) for step in calculation.calculation_steps]
+        for ingredient in calculation.ingredients:
+            ingredient.steps = [format_step(step) for step in ingredient.steps]
+        return calculation
     
     def create_calculation_audit_trail(self, recipe_id: Optional[int] = None) -> Dict[str, Any]:
         """
@@ -459,51 +859,47 @@ class CalculationRebuilder:
         
         Args:
             recipe_id: Specific recipe ID or None for all calculations
-        """
-        if recipe_id:
-            # Filter audit trail for specific recipe
-            recipe_audits = [
-                audit for audit in self.audit_trail 
-                if audit['recipe_id'] == recipe_id
-            ]
-        else:
-            recipe_audits = self.audit_trail
         
+        Calculations are only listed for a specific recipe; the full trail
+        stays in the JSON Lines file at audit_trail.path.
+        """
         audit_report = {
             'generated_at': datetime.now().isoformat(),
-            'total_calculations': len(recipe_audits),
-            'calculations': recipe_audits,
-            'summary': {
-                'total_recipes': len(set(a['recipe_id'] for a in recipe_audits)),
-                'calculations_with_errors': sum(1 for a in recipe_audits if a['errors']),
-                'calculations_with_warnings': sum(1 for a in recipe_audits if a['warnings']),
-                'average_variance_from_pdf': None
-            }
+            'audit_file': str(self.audit_trail.path) if self.audit_trail.path else None,
+            'summary': self.audit_trail.summary()
         }
         
-        # Calculate average variance
-        variances = [
-            a['variance_from_pdf'] for a in recipe_audits 
-            if a['variance_from_pdf'] is not None
-        ]
-        
-        if variances:
-            audit_report['summary']['average_variance_from_pdf'] = float(
-                sum(variances) / len(variances)
-            )
+        if recipe_id:
+            recipe_audits = list(self.audit_trail.entries(recipe_id))
+            audit_report['total_calculations'] = len(recipe_audits)
+            audit_report['calculations'] = recipe_audits
+        else:
+            audit_report['total_calculations'] = self.audit_trail.total_calculations
         
         return audit_report
     
+    @timed_job('recalculation')
     def batch_recalculate_all_recipes(self, recipe_type: Optional[str] = None,
-                                     save_report: bool = True) -> Dict[str, Any]:
+                                     save_report: bool = True, output_dir: str = ".",
+                                     keep_recipes: bool = False,
+                                     on_result: Optional[Callable[[RecipeReportRow], None]] = None) -> Dict[str, Any]:
         """
         Batch recalculate all recipes with comprehensive reporting
         
         Args:
             recipe_type: Filter by recipe type (Main, Prep Recipe, etc.)
             save_report: Save detailed report to file
+            output_dir: Directory for the report, CSV and audit trail files
+            keep_recipes: Also return every per-recipe result; by default only
+                the top variances and error recipes are kept, so memory stays flat
+            on_result: Called with each per-recipe result as it finishes
+        
+        With save_report the CSV rows and the JSON Lines audit trail are
+        written as each recipe finishes.
         """
         cursor = self.conn.cursor()
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_path = Path(output_dir)
         
         # Get recipes to calculate
         query = "SELECT recipe_id as id, recipe_name, recipe_type, food_cost FROM recipes_actual"
@@ -513,16 +909,19 @@ class CalculationRebuilder:
             query += " WHERE recipe_type = ?"
             params.append(recipe_type)
         
-        recipes = cursor.execute(query, params).fetchall()
+        total_recipes = cursor.execute(f"SELECT COUNT(*) FROM ({query})", params).fetchone()[0]
         
-        logger.info(f"Starting batch calculation for {len(recipes)} recipes")
+        logger.info(f"Starting batch calculation for {total_recipes} recipes")
         
         results = {
             'start_time': datetime.now().isoformat(),
-            'total_recipes': len(recipes),
+            'total_recipes': total_recipes,
             'successful': 0,
             'failed': 0,
             'recipes': [],
+            'top_variances': [],
+            'recipes_with_errors': 0,
+            'error_recipes': [],
             'summary_stats': {
                 'total_calculated_cost': Decimal('0'),
                 'total_pdf_stated_cost': Decimal('0'),
@@ -533,53 +932,95 @@ class CalculationRebuilder:
             }
         }
         
-        for recipe in recipes:
+        csv_file = None
+        if save_report:
+            output_path.mkdir(parents=True, exist_ok=True)
+            self.audit_trail.open(output_path / f"calculation_audit_{timestamp}.jsonl")
+            results['audit_file'] = str(self.audit_trail.path)
+            
+            csv_path = output_path / f"calculation_report_{timestamp}.csv"
+            csv_file = open(csv_path, 'w', newline='')
+            writer = csv.DictWriter(csv_file, fieldnames=[
+                'recipe_id', 'recipe_name', 'recipe_type', 
+                'calculated_cost', 'pdf_stated_cost', 'variance',
+                'has_errors', 'has_warnings', 'status'
+            ], extrasaction='ignore')
+            writer.writeheader()
+        
+        # Min-heap of (|variance|, recipe_id, result) for the largest variances
+        top_variances = []
+        
+        for recipe in cursor.execute(query, params):
             try:
                 # Calculate cost
                 calculation = self.calculate_recipe_cost_from_scratch(recipe['id'])
                 
-                recipe_result = {
-                    'recipe_id': recipe['id'],
-                    'recipe_name': recipe['recipe_name'],
-                    'recipe_type': recipe['recipe_type'],
-                    'calculated_cost': float(calculation['total_cost']),
-                    'pdf_stated_cost': float(recipe['food_cost']) if recipe['food_cost'] else None,
-                    'variance': float(calculation['variance_from_pdf']) if calculation['variance_from_pdf'] else 0,
-                    'has_errors': len(calculation['errors']) > 0,
-                    'has_warnings': len(calculation['warnings']) > 0,
-                    'status': 'success'
-                }
+                recipe_result = RecipeReportRow(
+                    recipe_id=recipe['id'],
+                    recipe_name=recipe['recipe_name'],
+                    recipe_type=recipe['recipe_type'],
+                    calculated_cost=float(calculation.total_cost),
+                    pdf_stated_cost=float(recipe['food_cost']) if recipe['food_cost'] else None,
+                    variance=float(calculation.variance_from_pdf) if calculation.variance_from_pdf else 0,
+                    has_errors=len(calculation.errors) > 0,
+                    has_warnings=len(calculation.warnings) > 0
+                )
                 
                 # Update summary stats
-                results['summary_stats']['total_calculated_cost'] += calculation['total_cost']
+                results['summary_stats']['total_calculated_cost'] += calculation.total_cost
                 
                 if recipe['food_cost']:
                     results['summary_stats']['total_pdf_stated_cost'] += Decimal(str(recipe['food_cost']))
                     
-                    if abs(calculation['variance_from_pdf']) <= Decimal('0.01'):
+                    if abs(calculation.variance_from_pdf) <= Decimal('0.01'):
                         results['summary_stats']['recipes_matching_pdf'] += 1
                     else:
                         results['summary_stats']['recipes_with_variance'] += 1
                         
-                        if calculation['variance_from_pdf'] > results['summary_stats']['max_variance']:
-                            results['summary_stats']['max_variance'] = calculation['variance_from_pdf']
-                        if calculation['variance_from_pdf'] < results['summary_stats']['min_variance']:
-                            results['summary_stats']['min_variance'] = calculation['variance_from_pdf']
+                        if calculation.variance_from_pdf > results['summary_stats']['max_variance']:
+                            results['summary_stats']['max_variance'] = calculation.variance_from_pdf
+                        if calculation.variance_from_pdf < results['summary_stats']['min_variance']:
+                            results['summary_stats']['min_variance'] = calculation.variance_from_pdf
+                
+                if recipe_result.variance:
+                    entry = (abs(recipe_result.variance), recipe['id'], recipe_result)
+                    if len(top_variances) < REPORT_TOP_N:
+                        heapq.heappush(top_variances, entry)
+                    else:
+                        heapq.heappushpop(top_variances, entry)
+                if recipe_result.has_errors:
+                    results['recipes_with_errors'] += 1
+                    if len(results['error_recipes']) < REPORT_TOP_N:
+                        results['error_recipes'].append(recipe_result.recipe_name)
                 
-                results['recipes'].append(recipe_result)
                 results['successful'] += 1
                 
             except Exception as e:
                 logger.error(f"Failed to calculate recipe {recipe['id']}: {e}")
                 
-                results['recipes'].append({
-                    'recipe_id': recipe['id'],
-                    'recipe_name': recipe['recipe_name'],
-                    'status': 'failed',
-                    'error': str(e)
-                })
+                recipe_result = RecipeReportRow(
+                    recipe_id=recipe['id'],
+                    recipe_name=recipe['recipe_name'],
+                    status='failed',
+                    error=str(e)
+                )
                 results['failed'] += 1
+            
+            if keep_recipes:
+                results['recipes'].append(recipe_result)
+            if on_result:
+                on_result(recipe_result)
+            if csv_file:
+                writer.writerow(recipe_result)
         
+        if csv_file:
+            csv_file.close()
+            logger.info(f"CSV report saved to {csv_path}")
+            logger.info(f"Audit trail saved to {self.audit_trail.path}")
+        
+        results['top_variances'] = [
+            result for _, _, result in sorted(top_variances, key=lambda entry: entry[0], reverse=True)
+        ]
         results['end_time'] = datetime.now().isoformat()
         
         # Convert Decimal to float for JSON serialization
@@ -590,28 +1031,16 @@ class CalculationRebuilder:
         
         # Save report if requested
         if save_report:
-            report_path = Path(f"calculation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+            report_path = output_path / f"calculation_report_{timestamp}.json"
             with open(report_path, 'w') as f:
-                json.dump(results, f, indent=2)
+                json.dump(results, f, indent=2, default=json_default)
             logger.info(f"Report saved to {report_path}")
-            
-            # Also create CSV for easy analysis
-            csv_path = Path(f"calculation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
-            with open(csv_path, 'w', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=[
-                    'recipe_id', 'recipe_name', 'recipe_type', 
-                    'calculated_cost', 'pdf_stated_cost', 'variance',
-                    'has_errors', 'has_warnings', 'status'
-                ])
-                writer.writeheader()
-                writer.writerows(results['recipes'])
-            logger.info(f"CSV report saved to {csv_path}")
         
         return results
     
     def export_calculation_details(self, recipe_id: int, output_path: Optional[Path] = None) -> Path:
         """Export detailed calculation breakdown for a recipe"""
-        calculation = self.calculate_recipe_cost_from_scratch(recipe_id)
+        calculation = self.explain_recipe_cost(recipe_id)
         
         if not output_path:
             output_path = Path(f"calculation_details_{recipe_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
@@ -626,7 +1055,7 @@ class CalculationRebuilder:
                 return [decimal_to_float(item) for item in obj]
             return obj
         
-        calculation_export = decimal_to_float(calculation)
+        calculation_export = decimal_to_float(calculation.as_dict())
         
         with open(output_path, 'w') as f:
             json.dump(calculation_export, f, indent=2)
@@ -738,12 +1167,14 @@ class CalculationRebuilder:
         
         logger.info(f"Generating comprehensive report in {output_path}")
         
-        # 1. Batch calculation report
+        # 1. Batch calculation report (per-recipe rows and the audit trail stream to disk)
         logger.info("Running batch calculations...")
-        batch_report = self.batch_recalculate_all_recipes(save_report=False)
-        
-        with open(output_path / "batch_calculations.json", 'w') as f:
-            json.dump(batch_report, f, indent=2)
+        batch_file = JSONListWriter(output_path / "batch_calculations.json", 'recipes')
+        batch_report = self.batch_recalculate_all_recipes(
+            save_report=True, output_dir=str(output_path), keep_recipes=False,
+            on_result=batch_file.append
+        )
+        batch_file.close({key: value for key, value in batch_report.items() if key != 'recipes'})
         
         # 2. PDF validation report (if available)
         if PDF_SUPPORT:
@@ -753,11 +1184,12 @@ class CalculationRebuilder:
             with open(output_path / "pdf_validation.json", 'w') as f:
                 json.dump(pdf_validation, f, indent=2, default=str)
         
-        # 3. Audit trail
+        # 3. Audit trail, calculations read back from the batch's .jsonl file
         audit_report = self.create_calculation_audit_trail()
         
-        with open(output_path / "audit_trail.json", 'w') as f:
-            json.dump(audit_report, f, indent=2, default=str)
+        audit_file = JSONListWriter(output_path / "audit_trail.json", 'calculations')
+        audit_file.extend(self.audit_trail.entries())
+        audit_file.close(audit_report)
         
         # 4. Summary report
         summary = {
@@ -793,41 +1225,37 @@ class CalculationRebuilder:
             f.write("\n## Key Findings\n\n")
             
             # List recipes with largest variances
-            if batch_report['recipes']:
-                variances = sorted(
-                    [r for r in batch_report['recipes'] if r.get('variance', 0) != 0],
-                    key=lambda x: abs(x['variance']),
-                    reverse=True
-                )[:10]
+            variances = batch_report['top_variances']
+            if variances:
+                f.write("### Top Cost Variances from PDF\n\n")
+                f.write("| Recipe | Calculated | PDF Stated | Variance |\n")
+                f.write("|--------|------------|------------|----------|\n")
                 
-                if variances:
-                    f.write("### Top Cost Variances from PDF\n\n")
-                    f.write("| Recipe | Calculated | PDF Stated | Variance |\n")
-                    f.write("|--------|------------|------------|----------|\n")
-                    
-                    for r in variances:
-                        f.write(
-                            f"| {r['recipe_name']} | "
-                            f"${r['calculated_cost']:.2f} | "
-                            f"${r.get('pdf_stated_cost', 0):.2f} | "
-                            f"${r['variance']:.2f} |\n"
-                        )
+                for r in variances:
+                    f.write(
+                        f"| {r.recipe_name} | "
+                        f"${r.calculated_cost:.2f} | "
+                        f"${r.pdf_stated_cost or 0:.2f} | "
+                        f"${r.variance:.2f} |\n"
+                    )
             
             # List recipes with errors
-            errors = [r for r in batch_report['recipes'] if r.get('has_errors')]
-            if errors:
-                f.write(f"\n### Recipes with Calculation Errors ({len(errors)})\n\n")
-                for r in errors[:10]:
-                    f.write(f"- {r['recipe_name']}\n")
+            error_count = batch_report['recipes_with_errors']
+            if error_count:
+                f.write(f"\n### Recipes with Calculation Errors ({error_count})\n\n")
+                for recipe_name in batch_report['error_recipes']:
+                    f.write(f"- {recipe_name}\n")
                 
-                if len(errors) > 10:
-                    f.write(f"- ... and {len(errors) - 10} more\n")
+                if error_count > REPORT_TOP_N:
+                    f.write(f"- ... and {error_count - REPORT_TOP_N} more\n")
         
         logger.info(f"Comprehensive report generated in {output_path}")
         return output_path
     
     def __del__(self):
-        """Clean up database connection"""
+        """Clean up database connection and audit file"""
+        if hasattr(self, 'audit_trail'):
+            self.audit_trail.close()
         if hasattr(self, 'conn'):
             self.conn.close()
 
@@ -854,19 +1282,19 @@ def main():
             # Calculate cost
             calculation = rebuilder.calculate_recipe_cost_from_scratch(recipe_id)
             
-            print(f"\nRecipe: {calculation['recipe_name']}")
-            print(f"Total Cost: ${calculation['total_cost']}")
-            print(f"PDF Stated Cost: ${calculation['pdf_stated_cost']}")
-            print(f"Variance: ${calculation['variance_from_pdf']}")
+            print(f"\nRecipe: {calculation.recipe_name}")
+            print(f"Total Cost: ${calculation.total_cost}")
+            print(f"PDF Stated Cost: ${calculation.pdf_stated_cost}")
+            print(f"Variance: ${calculation.variance_from_pdf}")
             
-            if calculation['warnings']:
+            if calculation.warnings:
                 print(f"\nWarnings:")
-                for warning in calculation['warnings']:
+                for warning in calculation.warnings:
                     print(f"  - {warning}")
             
-            if calculation['errors']:
+            if calculation.errors:
                 print(f"\nErrors:")
-                for error in calculation['errors']:
+                for error in calculation.errors:
                     print(f"  - {error}")
             
             # Test gross margin calculation
@@ -910,68 +1338,71 @@ if __name__ == "__main__":
     
     args = parser.parse_args()
     
-    rebuilder = CalculationRebuilder(args.db)
+    # Statements slower than SLOW_QUERY_MS go to slow_queries.log with their plans
+    configure_slow_query_log()
+    with recording('calculation_rebuilder', keep_statements=False):
+        rebuilder = CalculationRebuilder(args.db)
     
-    if args.recipe_id:
-        # Calculate specific recipe by ID
-        try:
-            calculation = rebuilder.calculate_recipe_cost_from_scratch(args.recipe_id)
-            print(f"\nRecipe: {calculation['recipe_name']}")
-            print(f"Total Cost: ${calculation['total_cost']}")
-            print(f"PDF Stated Cost: ${calculation['pdf_stated_cost']}")
-            print(f"Variance: ${calculation['variance_from_pdf']}")
+        if args.recipe_id:
+            # Calculate specific recipe by ID
+            try:
+                calculation = rebuilder.calculate_recipe_cost_from_scratch(args.recipe_id)
+                print(f"\nRecipe: {calculation.recipe_name}")
+                print(f"Total Cost: ${calculation.total_cost}")
+                print(f"PDF Stated Cost: ${calculation.pdf_stated_cost}")
+                print(f"Variance: ${calculation.variance_from_pdf}")
             
-            # Export details
-            export_path = rebuilder.export_calculation_details(args.recipe_id)
-            print(f"\nDetails exported to: {export_path}")
+                # Export details
+                export_path = rebuilder.export_calculation_details(args.recipe_id)
+                print(f"\nDetails exported to: {export_path}")
             
-        except Exception as e:
-            print(f"Error calculating recipe {args.recipe_id}: {e}")
+            except Exception as e:
+                print(f"Error calculating recipe {args.recipe_id}: {e}")
     
-    elif args.recipe_name:
-        # Find and calculate recipe by name
-        cursor = rebuilder.conn.cursor()
-        recipe = cursor.execute("""
-            SELECT recipe_id 
-            FROM recipes_actual 
-            WHERE LOWER(recipe_name) LIKE LOWER(?)
-            LIMIT 1
-        """, (f"%{args.recipe_name}%",)).fetchone()
-        
-        if recipe:
-            calculation = rebuilder.calculate_recipe_cost_from_scratch(recipe['recipe_id'])
-            print(f"\nRecipe: {calculation['recipe_name']}")
-            print(f"Total Cost: ${calculation['total_cost']}")
-            print(f"PDF Stated Cost: ${calculation['pdf_stated_cost']}")
-            print(f"Variance: ${calculation['variance_from_pdf']}")
-        else:
-            print(f"Recipe '{args.recipe_name}' not found")
+        elif args.recipe_name:
+            # Find and calculate recipe by name
+            cursor = rebuilder.conn.cursor()
+            recipe = cursor.execute("""
+                SELECT recipe_id 
+                FROM recipes_actual 
+                WHERE LOWER(recipe_name) LIKE LOWER(?)
+                LIMIT 1
+            """, (f"%{args.recipe_name}%",)).fetchone()
+        
+            if recipe:
+                calculation = rebuilder.calculate_recipe_cost_from_scratch(recipe['recipe_id'])
+                print(f"\nRecipe: {calculation.recipe_name}")
+                print(f"Total Cost: ${calculation.total_cost}")
+                print(f"PDF Stated Cost: ${calculation.pdf_stated_cost}")
+                print(f"Variance: ${calculation.variance_from_pdf}")
+            else:
+                print(f"Recipe '{args.recipe_name}' not found")
     
-    elif args.batch:
-        # Run batch calculation
-        print("Running batch calculation for all recipes...")
-        results = rebuilder.batch_recalculate_all_recipes(save_report=True)
-        print(f"\nCompleted: {results['successful']} successful, {results['failed']} failed")
-        print(f"Reports saved to calculation_report_*.json/csv")
+        elif args.batch:
+            # Run batch calculation
+            print("Running batch calculation for all recipes...")
+            results = rebuilder.batch_recalculate_all_recipes(save_report=True)
+            print(f"\nCompleted: {results['successful']} successful, {results['failed']} failed")
+            print(f"Reports saved to calculation_report_*.json/csv")
     
-    elif args.validate_pdf:
-        # Validate against PDF
-        if PDF_SUPPORT:
-            print("Validating recipes against PDF data...")
-            validation = rebuilder.validate_against_pdf_data()
-            print(f"\nValidation Results:")
-            print(f"Matched Recipes: {validation['matched_recipes']}/{validation['total_pdfs']}")
-            if 'summary' in validation:
-                print(f"Validation Rate: {validation['summary']['validation_rate']:.1f}%")
-        else:
-            print("PDF support not available - install PyPDF2")
+        elif args.validate_pdf:
+            # Validate against PDF
+            if PDF_SUPPORT:
+                print("Validating recipes against PDF data...")
+                validation = rebuilder.validate_against_pdf_data()
+                print(f"\nValidation Results:")
+                print(f"Matched Recipes: {validation['matched_recipes']}/{validation['total_pdfs']}")
+                if 'summary' in validation:
+                    print(f"Validation Rate: {validation['summary']['validation_rate']:.1f}%")
+            else:
+                print("PDF support not available - install PyPDF2")
     
-    elif args.report:
-        # Generate comprehensive report
-        print("Generating comprehensive report...")
-        report_path = rebuilder.generate_comprehensive_report()
-        print(f"\nReport generated in: {report_path}")
+        elif args.report:
+            # Generate comprehensive report
+            print("Generating comprehensive report...")
+            report_path = rebuilder.generate_comprehensive_report()
+            print(f"\nReport generated in: {report_path}")
     
-    else:
-        # Run default test
-        main()
\ No newline at end of file
+        else:
+            # Run default test
+            main()
\ No newline at end of file
@@ -3,17 +3,24 @@
 End-to-End Calculation Validation System
 Tests the entire calculation chain from vendor prices to menu margins
 Validates against PDF stated values and provides comprehensive accuracy reporting
+
+Full-system validation never writes to the database: every connection is opened
+with mode=ro. Recipe costs are calculated once, split across a process pool, and
+shared by the chain, margin and PDF components, which then run concurrently on
+their own read-only connections.
 """
 
 import sqlite3
 import logging
 import json
+import os
 from datetime import datetime
 from decimal import Decimal, ROUND_HALF_UP
 from typing import Dict, List, Tuple, Optional, Any
 from pathlib import Path
 import csv
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 # Set up logging
 logging.basicConfig(
@@ -24,7 +31,7 @@ logger = logging.getLogger(__name__)
 
 # Import dependencies
 try:
-    from calculation_rebuilder import CalculationRebuilder
+    from calculation_rebuilder import CalculationRebuilder, gross_margin_from_cost
     from uom_standardizer import UOMStandardizer
     from vendor_pricing_reconciler import VendorPricingReconciler
     DEPENDENCIES_AVAILABLE = True
@@ -32,21 +39,52 @@ except ImportError as e:
     logger.warning(f"Some dependencies not available: {e}")
     DEPENDENCIES_AVAILABLE = False
 
+from records import RecipeCost
+from metrics import timed_job
+from query_instrumentation import configure_slow_query_log, connect as db_connect, recording
+
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def read_only_connect(db_path: str) -> sqlite3.Connection:
+    """Connection that can never take a write lock on the live database"""
+    conn = db_connect(f'file:{db_path}?mode=ro', uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def cost_recipes(db_path: str, recipe_ids: List[int]) -> Dict[int, Any]:
+    """Calculate a batch of recipe costs on a read-only rebuilder (process pool worker)"""
+    rebuilder = CalculationRebuilder(db_path, read_only=True)
+    costs = {}
+    for recipe_id in recipe_ids:
+        try:
+            costs[recipe_id] = rebuilder.calculate_recipe_cost_from_scratch(recipe_id)
+        except Exception as e:
+            # Re-raised by CalculationValidator._recipe_cost so components handle it as before
+            costs[recipe_id] = {'error': str(e)}
+    return costs
+
 
 class CalculationValidator:
     """Comprehensive calculation validation system"""
     
-    def __init__(self, db_path: str = 'restaurant_calculator.db'):
+    def __init__(self, db_path: str = 'restaurant_calculator.db', workers: int = DEFAULT_WORKERS):
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path)
-        self.conn.row_factory = sqlite3.Row
+        self.workers = max(1, workers)
+        self.conn = read_only_connect(db_path)
         
         # Initialize supporting modules if available
         if DEPENDENCIES_AVAILABLE:
-            self.calculation_rebuilder = CalculationRebuilder(db_path)
-            self.uom_standardizer = UOMStandardizer(db_path)
+            self.calculation_rebuilder = CalculationRebuilder(db_path, read_only=True)
+            self.uom_standardizer = UOMStandardizer(db_path, read_only=True)
             self.vendor_reconciler = VendorPricingReconciler(db_path)
         
+        # Costing shared by all components; filled by load_shared_costs()
+        self.recipe_costs = {}
+        self.menu_prices = {}
+        self.shared_costs_loaded = False
+        
         # Validation results storage
         self.validation_results = {
             'timestamp': datetime.now().isoformat(),
@@ -63,6 +101,7 @@ class CalculationValidator:
         self.TOLERANCE_CENTS = Decimal('0.01')  # $0.01 tolerance
         self.TOLERANCE_PERCENT = Decimal('0.1')  # 0.1% tolerance
         
+    @timed_job('calculation_validation')
     def run_full_system_validation(self) -> Dict[str, Any]:
         """
         Run complete end-to-end validation of the calculation system
@@ -72,25 +111,31 @@ class CalculationValidator:
         """
         logger.info("Starting full system calculation validation...")
         
-        # 1. Validate vendor pricing foundation
-        logger.info("Step 1: Validating vendor pricing data...")
-        vendor_validation = self._validate_vendor_pricing()
-        
-        # 2. Validate UOM conversions
-        logger.info("Step 2: Validating UOM conversions...")
-        uom_validation = self._validate_uom_conversions()
-        
-        # 3. Test recipe calculation chains
-        logger.info("Step 3: Testing recipe calculation chains...")
-        calculation_validation = self._test_calculation_chains()
-        
-        # 4. Validate menu margins
-        logger.info("Step 4: Validating menu margin calculations...")
-        margin_validation = self._validate_menu_margins()
+        # Cost every recipe once; steps 3-5 read from this instead of recalculating
+        logger.info(f"Calculating recipe costs on {self.workers} worker(s)...")
+        self.load_shared_costs()
+        
+        # 1-5. Vendor pricing, UOM conversions, calculation chains, menu margins, PDF values
+        logger.info("Steps 1-5: Running component validations...")
+        components = {
+            'vendor_validation': self._validate_vendor_pricing,
+            'uom_validation': self._validate_uom_conversions,
+            'calculation_validation': self._test_calculation_chains,
+            'margin_validation': self._validate_menu_margins,
+            'pdf_validation': self._validate_against_pdf_values
+        }
+        if self.workers == 1:
+            results = {name: component() for name, component in components.items()}
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(components))) as pool:
+                futures = {
+                    name: pool.submit(self._run_component, component)
+                    for name, component in components.items()
+                }
+                results = {name: future.result() for name, future in futures.items()}
         
-        # 5. Compare against PDF values
-        logger.info("Step 5: Comparing against PDF stated values...")
-        pdf_validation = self._validate_against_pdf_values()
+        # The aggregation steps below read these from validation_results
+        self.validation_results.update(results)
         
         # 6. Calculate accuracy metrics
         logger.info("Step 6: Calculating accuracy metrics...")
@@ -104,18 +149,60 @@ class CalculationValidator:
         logger.info("Step 8: Generating recommendations...")
         self._generate_recommendations()
         
-        # Compile final report
-        self.validation_results['vendor_validation'] = vendor_validation
-        self.validation_results['uom_validation'] = uom_validation
-        self.validation_results['calculation_validation'] = calculation_validation
-        self.validation_results['margin_validation'] = margin_validation
-        self.validation_results['pdf_validation'] = pdf_validation
-        
         return self.validation_results
     
-    def _validate_vendor_pricing(self) -> Dict[str, Any]:
+    def load_shared_costs(self):
+        """Calculate every recipe's cost once and load menu prices for the components"""
+        recipe_ids = [row['recipe_id'] for row in self.conn.execute(
+            "SELECT recipe_id FROM recipes_actual ORDER BY recipe_id"
+        ).fetchall()]
+        
+        self.recipe_costs = {}
+        if self.workers == 1 or len(recipe_ids) < 2:
+            self.recipe_costs.update(cost_recipes(self.db_path, recipe_ids))
+        else:
+            batches = [recipe_ids[i::self.workers] for i in range(self.workers)]
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                for costs in pool.map(cost_recipes, [self.db_path] * len(batches), batches):
+                    self.recipe_costs.update(costs)
+        
+        # First priced menu item per recipe, as the per-recipe lookup did
+        self.menu_prices = {}
+        for row in self.conn.execute("""
+            SELECT recipe_id, menu_price FROM menu_items WHERE recipe_id IS NOT NULL
+        """).fetchall():
+            self.menu_prices.setdefault(row['recipe_id'], row['menu_price'])
+        
+        self.shared_costs_loaded = True
+    
+    def _run_component(self, component):
+        """Run one validation component on its own read-only connection"""
+        conn = read_only_connect(self.db_path)
+        try:
+            return component(conn)
+        finally:
+            conn.close()
+    
+    def _recipe_cost(self, recipe_id: int) -> RecipeCost:
+        """Shared cost calculation for a recipe, calculated on demand outside full validation"""
+        if recipe_id not in self.recipe_costs:
+            if self.shared_costs_loaded:
+                raise ValueError(f"Recipe {recipe_id} not found")
+            self.recipe_costs[recipe_id] = cost_recipes(self.db_path, [recipe_id])[recipe_id]
+        calculation = self.recipe_costs[recipe_id]
+        if isinstance(calculation, dict):
+            raise ValueError(calculation['error'])
+        return calculation
+    
+    def _gross_margin(self, recipe_id: int, menu_price: Decimal) -> Dict[str, Any]:
+        calculation = self._recipe_cost(recipe_id)
+        return gross_margin_from_cost(
+            recipe_id, calculation.recipe_name, menu_price, calculation.total_cost
+        )
+    
+    def _validate_vendor_pricing(self, conn: sqlite3.Connection = None) -> Dict[str, Any]:
         """Validate vendor pricing data integrity"""
-        cursor = self.conn.cursor()
+        cursor = (conn or self.conn).cursor()
         
         validation = {
             'total_inventory_items': 0,
@@ -175,7 +262,7 @@ class CalculationValidator:
         
         return validation
     
-    def _validate_uom_conversions(self) -> Dict[str, Any]:
+    def _validate_uom_conversions(self, conn: sqlite3.Connection = None) -> Dict[str, Any]:
         """Test UOM conversion accuracy"""
         validation = {
             'conversion_tests': [],
@@ -239,9 +326,9 @@ class CalculationValidator:
         
         return validation
     
-    def _test_calculation_chains(self) -> Dict[str, Any]:
+    def _test_calculation_chains(self, conn: sqlite3.Connection = None) -> Dict[str, Any]:
         """Test complete calculation chains for representative recipes"""
-        cursor = self.conn.cursor()
+        cursor = (conn or self.conn).cursor()
         
         validation = {
             'recipes_tested': 0,
@@ -298,19 +385,16 @@ class CalculationValidator:
             'total_variance': Decimal('0')
         }
         
-        # Calculate from scratch
-        calculation = self.calculation_rebuilder.calculate_recipe_cost_from_scratch(
-            recipe['recipe_id']
-        )
+        calculation = self._recipe_cost(recipe['recipe_id'])
         
         # Checkpoint 1: Vendor price to ingredient cost
-        for ingredient in calculation['ingredients']:
+        for ingredient in calculation.ingredients:
             checkpoint = {
-                'name': f"Ingredient: {ingredient['ingredient_name']}",
+                'name': f"Ingredient: {ingredient.ingredient_name}",
                 'type': 'vendor_to_ingredient',
-                'calculated_cost': float(ingredient['total_cost']),
-                'has_errors': len(ingredient['errors']) > 0,
-                'errors': ingredient['errors']
+                'calculated_cost': float(ingredient.total_cost),
+                'has_errors': len(ingredient.errors) > 0,
+                'errors': list(ingredient.errors)
             }
             
             if checkpoint['has_errors']:
@@ -322,14 +406,14 @@ class CalculationValidator:
         recipe_checkpoint = {
             'name': 'Recipe Total Cost',
             'type': 'recipe_total',
-            'calculated_cost': float(calculation['total_cost']),
+            'calculated_cost': float(calculation.total_cost),
             'pdf_stated_cost': float(recipe['pdf_cost']) if recipe['pdf_cost'] else None,
             'variance': None,
             'variance_percent': None
         }
         
         if recipe_checkpoint['pdf_stated_cost']:
-            variance = Decimal(str(calculation['total_cost'])) - Decimal(str(recipe['pdf_cost']))
+            variance = Decimal(str(calculation.total_cost)) - Decimal(str(recipe['pdf_cost']))
             recipe_checkpoint['variance'] = float(variance)
             recipe_checkpoint['variance_percent'] = float(
                 (variance / Decimal(str(recipe['pdf_cost'])) * 100) 
@@ -344,19 +428,19 @@ class CalculationValidator:
         chain_test['checkpoints'].append(recipe_checkpoint)
         
         # Checkpoint 3: Menu margin (if applicable)
-        cursor = self.conn.cursor()
-        menu_item = cursor.execute("""
-            SELECT mi.menu_price, mi.id
-            FROM menu_items mi
-            WHERE mi.recipe_id = ?
-            LIMIT 1
-        """, (recipe['recipe_id'],)).fetchone()
-        
-        if menu_item and menu_item['menu_price']:
-            margin = self.calculation_rebuilder.calculate_gross_margin(
-                recipe['recipe_id'], 
-                Decimal(str(menu_item['menu_price']))
-            )
+        if not self.shared_costs_loaded:
+            menu_item = self.conn.execute("""
+                SELECT mi.menu_price
+                FROM menu_items mi
+                WHERE mi.recipe_id = ?
+                LIMIT 1
+            """, (recipe['recipe_id'],)).fetchone()
+            menu_price = menu_item['menu_price'] if menu_item else None
+        else:
+            menu_price = self.menu_prices.get(recipe['recipe_id'])
+        
+        if menu_price:
+            margin = self._gross_margin(recipe['recipe_id'], Decimal(str(menu_price)))
             
             margin_checkpoint = {
                 'name': 'Menu Margin',
@@ -375,9 +459,9 @@ class CalculationValidator:
         
         return chain_test
     
-    def _validate_menu_margins(self) -> Dict[str, Any]:
+    def _validate_menu_margins(self, conn: sqlite3.Connection = None) -> Dict[str, Any]:
         """Validate menu margin calculations"""
-        cursor = self.conn.cursor()
+        cursor = (conn or self.conn).cursor()
         
         validation = {
             'total_menu_items': 0,
@@ -408,10 +492,7 @@ class CalculationValidator:
             if item['recipe_id'] and item['food_cost']:
                 try:
                     # Calculate margin
-                    margin = self.calculation_rebuilder.calculate_gross_margin(
-                        item['recipe_id'],
-                        Decimal(str(item['menu_price']))
-                    )
+                    margin = self._gross_margin(item['recipe_id'], Decimal(str(item['menu_price'])))
                     
                     validation['items_validated'] += 1
                     
@@ -447,9 +528,9 @@ class CalculationValidator:
         
         return validation
     
-    def _validate_against_pdf_values(self) -> Dict[str, Any]:
+    def _validate_against_pdf_values(self, conn: sqlite3.Connection = None) -> Dict[str, Any]:
         """Validate calculations against PDF stated values"""
-        cursor = self.conn.cursor()
+        cursor = (conn or self.conn).cursor()
         
         validation = {
             'recipes_with_pdf_values': 0,
@@ -471,13 +552,10 @@ class CalculationValidator:
         
         for recipe in recipes:
             try:
-                # Calculate cost
-                calculation = self.calculation_rebuilder.calculate_recipe_cost_from_scratch(
-                    recipe['recipe_id']
-                )
+                calculation = self._recipe_cost(recipe['recipe_id'])
                 
                 pdf_cost = Decimal(str(recipe['pdf_cost']))
-                calc_cost = calculation['total_cost']
+                calc_cost = calculation.total_cost
                 variance = calc_cost - pdf_cost
                 variance_percent = (variance / pdf_cost * 100) if pdf_cost > 0 else 0
                 
@@ -497,8 +575,8 @@ class CalculationValidator:
                         'pdf_cost': float(pdf_cost),
                         'variance': float(variance),
                         'variance_percent': float(variance_percent),
-                        'calculation_errors': calculation.get('errors', []),
-                        'calculation_warnings': calculation.get('warnings', [])
+                        'calculation_errors': list(calculation.errors),
+                        'calculation_warnings': list(calculation.warnings)
                     })
                     
             except Exception as e:
@@ -1011,53 +1089,60 @@ def main():
     parser.add_argument('--recipe-ids', nargs='+', type=int, help='Specific recipe IDs to validate')
     parser.add_argument('--report', action='store_true', help='Generate validation report')
     parser.add_argument('--db', type=str, default='restaurant_calculator.db', help='Database path')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Processes for recipe costing and threads for component validation')
     
     args = parser.parse_args()
     
-    # Initialize validator
-    validator = CalculationValidator(args.db)
+    # Statements slower than SLOW_QUERY_MS go to slow_queries.log with their plans;
+    # recipes costed in the worker processes are not recorded
+    configure_slow_query_log()
+    with recording('calculation_validator', keep_statements=False):
+        # Initialize validator
+        validator = CalculationValidator(args.db, workers=args.workers)
     
-    if args.full:
-        print("Running full system validation...")
-        results = validator.run_full_system_validation()
-        
-        print(f"\n=== VALIDATION SUMMARY ===")
-        print(f"Overall Accuracy: {results['accuracy_metrics']['overall_accuracy']:.1f}%")
-        print(f"Confidence Level: {results['accuracy_metrics']['confidence_level'].upper()}")
-        
-        if results['systematic_errors']:
-            print(f"\nSystematic Errors Found: {len(results['systematic_errors'])}")
-            for error in results['systematic_errors'][:3]:
-                print(f"  - {error['pattern']} ({error['frequency']} occurrences)")
-        
-        if results['recommendations']:
-            print(f"\nTop Recommendations:")
-            for rec in results['recommendations'][:3]:
-                print(f"  [{rec['priority'].upper()}] {rec['recommendation']}")
-        
-        if args.report:
-            report_dir = validator.generate_validation_report()
-            print(f"\nDetailed report generated in: {report_dir}")
+        if args.full:
+            print("Running full system validation...")
+            results = validator.run_full_system_validation()
+        
+            print(f"\n=== VALIDATION SUMMARY ===")
+            print(f"Overall Accuracy: {results['accuracy_metrics']['overall_accuracy']:.1f}%")
+            print(f"Confidence Level: {results['accuracy_metrics']['confidence_level'].upper()}")
+        
+            if results['systematic_errors']:
+                print(f"\nSystematic Errors Found: {len(results['systematic_errors'])}")
+                for error in results['systematic_errors'][:3]:
+                    print(f"  - {error['pattern']} ({error['frequency']} occurrences)")
+        
+            if results['recommendations']:
+                print(f"\nTop Recommendations:")
+                for rec in results['recommendations'][:3]:
+                    print(f"  [{rec['priority'].upper()}] {rec['recommendation']}")
+        
+            if args.report:
+                report_dir = validator.generate_validation_report()
+                print(f"\nDetailed report generated in: {report_dir}")
     
-    elif args.quick or args.recipe_ids:
-        print("Running quick validation...")
-        results = validator.run_quick_validation(args.recipe_ids)
-        
-        print(f"\nTested {results['recipes_tested']} recipes:")
-        for result in results['results']:
-            status_icon = '✅' if result['status'] == 'passed' else '⚠️' if result['status'] == 'warning' else '❌'
-            print(f"{status_icon} {result.get('recipe_name', f'Recipe {result['recipe_id']}')} - {result['status']}")
-            if result.get('variance'):
-                print(f"   Variance: ${result['variance']:.2f}")
+        elif args.quick or args.recipe_ids:
+            print("Running quick validation...")
+            results = validator.run_quick_validation(args.recipe_ids)
+        
+            print(f"\nTested {results['recipes_tested']} recipes:")
+            for result in results['results']:
+                status_icon = '✅' if result['status'] == 'passed' else '⚠️' if result['status'] == 'warning' else '❌'
+                recipe_name = result.get('recipe_name', f"Recipe {result['recipe_id']}")
+                print(f"{status_icon} {recipe_name} - {result['status']}")
+                if result.get('variance'):
+                    print(f"   Variance: ${result['variance']:.2f}")
     
-    else:
-        # Default: Run quick validation
-        print("Running quick validation (use --full for comprehensive validation)...")
-        results = validator.run_quick_validation()
-        
-        passed = sum(1 for r in results['results'] if r['status'] == 'passed')
-        print(f"\nQuick validation: {passed}/{results['recipes_tested']} passed")
-        print("\nRun with --full flag for comprehensive system validation")
+        else:
+            # Default: Run quick validation
+            print("Running quick validation (use --full for comprehensive validation)...")
+            results = validator.run_quick_validation()
+        
+            passed = sum(1 for r in results['results'] if r['status'] == 'passed')
+            print(f"\nQuick validation: {passed}/{results['recipes_tested']} passed")
+            print("\nRun with --full flag for comprehensive system validation")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+catalog_snapshot.py - Read-only reference data loaded once and shared
+
+Routes and costing code keep re-reading the same reference data: the
+inventory (ingredient dropdowns, line costing), vendors and their active
+offers, unit conversion factors and uom_aliases.json, the recipe graph and
+the menu list. A CatalogSnapshot holds all of it, read in one pass.
+Catalog.current() hands out the snapshot and reloads it when the
+data_versions counters (response_cache.py) of its base tables change, so a
+request pays one primary-key read of data_versions instead of the
+reference queries. Without the counters installed the snapshot is only
+reloaded on refresh(), like the other in-process engines.
+
+app.py loads the first snapshot at import. Under gunicorn.conf.py
+(preload_app) that happens once in the master and the workers share it
+copy-on-write after the fork; gc.freeze() keeps the collector from
+writing to, and so copying, those pages. A worker that sees newer versions
+loads its own replacement.
+
+Snapshots are shared between threads and must be treated as read-only:
+copy a row before changing it.
+
+Usage:
+    python catalog_snapshot.py [--db restaurant_calculator.db]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from response_cache import get_data_versions, install_data_version_triggers, resolve_base_tables
+
+DATABASE = 'restaurant_calculator.db'
+
+UOM_ALIASES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uom_aliases.json')
+
+# Tables and views the snapshot is read from
+CATALOG_TABLES = ('inventory', 'vendors', 'vendor_products', 'units', 'menus',
+                  'recipes_actual', 'recipe_ingredients_actual', 'menu_items_actual')
+
+# One row per ingredient name, preferring the most recently purchased, for dropdowns
+INGREDIENT_CHOICES_QUERY = '''
+    WITH RankedInventory AS (
+        SELECT *,
+            ROW_NUMBER() OVER (
+                PARTITION BY item_description
+                ORDER BY
+                    CASE WHEN last_purchased_date IS NOT NULL THEN 1 ELSE 2 END,
+                    last_purchased_date DESC,
+                    current_price DESC
+            ) as rn
+        FROM inventory
+    )
+    SELECT * FROM RankedInventory
+    WHERE rn = 1
+    ORDER BY item_description
+'''
+
+
+def _rows(conn: sqlite3.Connection, query: str) -> List[sqlite3.Row]:
+    """Rows of a query, none if a table it reads does not exist in this database"""
+    try:
+        return conn.execute(query).fetchall()
+    except sqlite3.OperationalError as e:
+        if 'no such' in str(e):
+            return []
+        raise
+
+
+def load_uom_aliases(path: str = UOM_ALIASES_PATH) -> Dict[str, str]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f).get('aliases', {})
+
+
+class CatalogSnapshot:
+    """Reference data read once from the database"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        conn.row_factory = sqlite3.Row
+        started = time.perf_counter()
+
+        self.items = {row['id']: dict(row) for row in _rows(conn, 'SELECT * FROM inventory')}
+        self.ingredient_choices = [self.items[row['id']] for row in _rows(conn, INGREDIENT_CHOICES_QUERY)]
+
+        # 'name' is what the inventory forms call the vendor
+        self.vendors = [dict(row, name=row['vendor_name'])
+                        for row in _rows(conn, 'SELECT * FROM vendors ORDER BY vendor_name')]
+        self.offers = {}
+        for row in _rows(conn, """
+            SELECT vp.inventory_id, v.vendor_name, vp.vendor_price, vp.last_purchased_price,
+                   vp.pack_size, vp.unit_measure
+            FROM vendor_products vp
+            JOIN vendors v ON v.id = vp.vendor_id
+            WHERE vp.is_active = 1
+            ORDER BY vp.is_primary DESC, vp.id
+        """):
+            self.offers.setdefault(row['inventory_id'], []).append(dict(row))
+
+        # symbol -> (dimension, factor to the dimension's canonical unit)
+        self.units = {
+            row['symbol'].lower(): (row['dimension'], float(row['to_canonical_factor']))
+            for row in _rows(conn, 'SELECT symbol, dimension, to_canonical_factor FROM units')
+            if row['to_canonical_factor']
+        }
+        self.uom_aliases = load_uom_aliases()
+
+        self.recipes = {
+            row['recipe_id']: dict(row) for row in _rows(conn, """
+                SELECT recipe_id, recipe_name, recipe_type, batch_yield, batch_yield_unit,
+                       portions_per_batch
+                FROM recipes_actual
+            """)
+        }
+        # Same columns, nested-recipe lookup and order as the rebuilder's ingredient query
+        self.lines = {recipe_id: [] for recipe_id in self.recipes}
+        for row in _rows(conn, """
+            SELECT ri.recipe_id, ri.ingredient_name, ri.quantity, ri.unit as unit_of_measure,
+                   ri.inventory_id,
+                   (SELECT recipe_id FROM recipes_actual WHERE recipe_name = ri.ingredient_name) as nested_recipe_id
+            FROM recipe_ingredients_actual ri
+            ORDER BY ri.recipe_id, ri.ingredient_order, ri.ingredient_id
+        """):
+            line = dict(row)
+            line['ingredient_type'] = 'Prep Recipe' if line['nested_recipe_id'] else 'Product'
+            if line['recipe_id'] in self.lines:
+                self.lines[line['recipe_id']].append(line)
+        self.menu_items = [
+            dict(row) for row in _rows(conn, """
+                SELECT menu_item_id, item_name, recipe_id, menu_category, current_price
+                FROM menu_items_actual
+                ORDER BY menu_category, item_name
+            """)
+        ]
+        self.menus = [dict(row) for row in _rows(conn, 'SELECT * FROM menus ORDER BY sort_order')]
+
+        self.load_seconds = round(time.perf_counter() - started, 3)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'items': len(self.items),
+            'ingredient_choices': len(self.ingredient_choices),
+            'vendors': len(self.vendors),
+            'offers': sum(len(offers) for offers in self.offers.values()),
+            'units': len(self.units),
+            'uom_aliases': len(self.uom_aliases),
+            'recipes': len(self.recipes),
+            'lines': sum(len(lines) for lines in self.lines.values()),
+            'menu_items': len(self.menu_items),
+            'menus': len(self.menus),
+            'load_seconds': self.load_seconds,
+        }
+
+
+def install_catalog_triggers(conn: sqlite3.Connection) -> None:
+    """Data-version triggers on every base table the catalog reads"""
+    install_data_version_triggers(conn, resolve_base_tables(conn, CATALOG_TABLES))
+
+
+class Catalog:
+    """The current CatalogSnapshot of one database, reloaded when its data versions change"""
+
+    def __init__(self, db_path: str = DATABASE):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.snapshot = None
+        self.tables = None
+        self.versions = None
+        self.loads = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True)
+
+    def _data_versions(self, conn: sqlite3.Connection) -> Optional[Dict[str, int]]:
+        try:
+            return get_data_versions(conn, self.tables)
+        except sqlite3.OperationalError:
+            return None  # data_versions not installed - reload only on refresh()
+
+    def refresh(self) -> CatalogSnapshot:
+        """Load a new snapshot"""
+        with self.lock:
+            return self._load()
+
+    def _load(self) -> CatalogSnapshot:
+        conn = self._connect()
+        try:
+            if self.tables is None:
+                self.tables = resolve_base_tables(conn, CATALOG_TABLES)
+            # Read the versions first: a write landing mid-load then triggers another reload
+            versions = self._data_versions(conn)
+            snapshot = CatalogSnapshot(conn)
+        finally:
+            conn.close()
+        self.snapshot, self.versions = snapshot, versions
+        self.loads += 1
+        return snapshot
+
+    def current(self) -> CatalogSnapshot:
+        """The snapshot, reloaded first if the data changed"""
+        with self.lock:
+            if self.snapshot is not None and self.versions is not None:
+                conn = self._connect()
+                try:
+                    stale = self._data_versions(conn) != self.versions
+                finally:
+                    conn.close()
+                if stale:
+                    self.snapshot = None
+            if self.snapshot is None:
+                self._load()
+            return self.snapshot
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(db_path: str = DATABASE) -> Catalog:
+    """The process-wide Catalog for a database, shared by routes and the costing engines"""
+    with _catalogs_lock:
+        catalog = _catalogs.get(db_path)
+        if catalog is None:
+            catalog = _catalogs[db_path] = Catalog(db_path)
+        return catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load the catalog snapshot and report its size")
+    parser.add_argument('--db', default=DATABASE, help="Database path")
+    args = parser.parse_args()
+
+    snapshot = get_catalog(args.db).current()
+    for name, value in snapshot.stats().items():
+        print(f"{name:<20} {value}")
+
+
+if __name__ == "__main__":
+    main()
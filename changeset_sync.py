@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+changeset_sync.py - Row-level changeset sync between databases
+
+Instead of shipping a full `sqlite3 .dump`, triggers on every data table
+append (table, row key) to sync_changes as rows are written. A changeset is
+the current state of every row touched since a sync point - upserts for
+rows that still exist, deletes for rows that are gone - written as gzipped
+JSON Lines, so a day's edits is kilobytes.
+
+Row keys are the rowid, or the primary key for WITHOUT ROWID tables.
+Derived tables (data_versions, dashboard_stats, materialized mv_* tables,
+cost history, data_quality_* findings) are not synced - each side maintains
+its own through its triggers. Schema changes still go through migrations; apply refuses a
+changeset whose columns the target does not have.
+
+apply() runs in one IMMEDIATE transaction, skips changesets it has already
+applied and refuses gaps, so changesets can be replayed safely in order.
+
+Usage:
+    python changeset_sync.py install
+    python changeset_sync.py export --target production --mark --output-dir data/changesets
+    python changeset_sync.py apply data/changesets/changeset_00000000_00000042.jsonl.gz
+    python changeset_sync.py apply-pending data/changesets
+    python changeset_sync.py status
+"""
+
+import argparse
+import base64
+import glob
+import gzip
+import json
+import os
+import sqlite3
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+DATABASE = 'restaurant_calculator.db'
+
+CHANGESET_FORMAT = 'changeset/1'
+
+SYNC_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS sync_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_name TEXT NOT NULL,
+        row_key NOT NULL               -- rowid, or JSON array of the primary key
+    );
+
+    -- How far each target has been exported to (on the source)
+    CREATE TABLE IF NOT EXISTS sync_points (
+        target TEXT PRIMARY KEY,
+        seq INTEGER NOT NULL,
+        synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Which changesets have been applied from each source (on the target)
+    CREATE TABLE IF NOT EXISTS sync_applied (
+        source TEXT PRIMARY KEY,
+        to_seq INTEGER NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS sync_state (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+'''
+
+# Maintained by triggers or recomputed on each side
+EXCLUDED_TABLES = {
+    'sync_changes', 'sync_points', 'sync_applied', 'sync_state',
+    'data_versions', 'dashboard_stats', 'materialized_views',
+    'cost_history', 'cost_history_latest', 'cost_history_snapshots', 'startup_schema',
+}
+# data_quality_ tables are derived findings and run bookkeeping, rowid-keyed per database
+EXCLUDED_PREFIXES = ('sqlite_', 'mv_', 'data_quality_')
+
+# Rows per IN (...) lookup when reading changed rows
+LOOKUP_CHUNK = 500
+
+
+class ChangesetError(ValueError):
+    """A changeset that cannot be exported or applied"""
+
+
+def get_db(db_path: str = DATABASE) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def excluded_table(name: str) -> bool:
+    return name in EXCLUDED_TABLES or name.startswith(EXCLUDED_PREFIXES)
+
+
+def tracked_tables(conn: sqlite3.Connection) -> Dict[str, Dict[str, List[str]]]:
+    """{table: {'columns': [...], 'key': [...]}} for every synced base table"""
+    tables = {}
+    for name, sql in conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table' ORDER BY name"):
+        if excluded_table(name):
+            continue
+        info = conn.execute(f'PRAGMA table_info("{name}")').fetchall()
+        columns = [row[1] for row in info]
+        if 'WITHOUT ROWID' in (sql or '').upper():
+            key = [row[1] for row in sorted(info, key=lambda row: row[5]) if row[5]]
+        else:
+            key = ['rowid']
+            columns = ['rowid'] + columns
+        tables[name] = {'columns': columns, 'key': key}
+    return tables
+
+
+def _key_expression(key: List[str], prefix: str) -> str:
+    if key == ['rowid']:
+        return f'{prefix}.rowid'
+    return f"json_array({', '.join(f'{prefix}.{column}' for column in key)})"
+
+
+def install_change_log(conn: sqlite3.Connection) -> int:
+    """Create the sync tables and a change-log trigger set on every synced table"""
+    conn.executescript(SYNC_SCHEMA)
+    conn.execute("INSERT OR IGNORE INTO sync_state (key, value) VALUES ('node_id', ?)", (uuid.uuid4().hex,))
+
+    tables = tracked_tables(conn)
+
+    # Tables excluded since an earlier install stop logging, and their logged changes are dropped
+    stale = conn.execute(
+        "SELECT name, tbl_name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_sync_%'"
+    ).fetchall()
+    for trigger, table in stale:
+        if excluded_table(table):
+            conn.execute(f'DROP TRIGGER "{trigger}"')
+    for (table,) in conn.execute('SELECT DISTINCT table_name FROM sync_changes').fetchall():
+        if excluded_table(table):
+            conn.execute('DELETE FROM sync_changes WHERE table_name = ?', (table,))
+
+    for table, spec in tables.items():
+        new_key = _key_expression(spec['key'], 'NEW')
+        old_key = _key_expression(spec['key'], 'OLD')
+        log = f"INSERT INTO sync_changes (table_name, row_key) VALUES ('{table}', {{key}});"
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_sync_{table}_insert AFTER INSERT ON "{table}"
+            BEGIN {log.format(key=new_key)} END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_sync_{table}_update AFTER UPDATE ON "{table}"
+            BEGIN
+                {log.format(key=new_key)}
+                INSERT INTO sync_changes (table_name, row_key)
+                SELECT '{table}', {old_key} WHERE {old_key} IS NOT {new_key};
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_sync_{table}_delete AFTER DELETE ON "{table}"
+            BEGIN {log.format(key=old_key)} END
+        ''')
+    conn.commit()
+    return len(tables)
+
+
+def node_id(conn: sqlite3.Connection) -> str:
+    return conn.execute("SELECT value FROM sync_state WHERE key = 'node_id'").fetchone()[0]
+
+
+def sync_point(conn: sqlite3.Connection, target: str) -> int:
+    row = conn.execute('SELECT seq FROM sync_points WHERE target = ?', (target,)).fetchone()
+    return row[0] if row else 0
+
+
+def mark_synced(conn: sqlite3.Connection, target: str, seq: int):
+    conn.execute('''
+        INSERT INTO sync_points (target, seq, synced_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(target) DO UPDATE SET seq = excluded.seq, synced_at = excluded.synced_at
+    ''', (target, seq))
+    conn.commit()
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return {'$b64': base64.b64encode(value).decode('ascii')}
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+
+def _decode(row: List[Any]) -> List[Any]:
+    return [base64.b64decode(value['$b64']) if isinstance(value, dict) else value for value in row]
+
+
+def _column(column: str) -> str:
+    return column if column == 'rowid' else f'"{column}"'
+
+
+def _keys_in(key: List[str]) -> str:
+    """WHERE clause matching the key columns against a JSON array of key arrays"""
+    extracted = ', '.join(f"json_extract(value, '$[{index}]')" for index in range(len(key)))
+    return f"({', '.join(_column(column) for column in key)}) IN (SELECT {extracted} FROM json_each(?))"
+
+
+def export_changeset(conn: sqlite3.Connection, path: str, since: int = 0) -> Dict[str, Any]:
+    """Write every row changed after sequence `since` to a gzipped changeset"""
+    to_seq = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM sync_changes').fetchone()[0]
+    tables = tracked_tables(conn)
+
+    changed = {}
+    for table, row_key in conn.execute(
+            'SELECT DISTINCT table_name, row_key FROM sync_changes WHERE seq > ? AND seq <= ?', (since, to_seq)):
+        if excluded_table(table):
+            continue  # logged before the table was excluded
+        changed.setdefault(table, []).append(json.loads(row_key) if isinstance(row_key, str) else [row_key])
+
+    missing = set(changed) - set(tables)
+    if missing:
+        raise ChangesetError(f"Changes logged for tables no longer present: {', '.join(sorted(missing))}")
+
+    header = {
+        'format': CHANGESET_FORMAT,
+        'source': node_id(conn),
+        'from_seq': since,
+        'to_seq': to_seq,
+        'created_at': datetime.now().isoformat(),
+        'tables': {table: tables[table] for table in sorted(changed)},
+    }
+    totals = {'upserts': 0, 'deletes': 0}
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write(json.dumps(header) + '\n')
+        for table in sorted(changed):
+            spec = tables[table]
+            key_positions = [spec['columns'].index(column) for column in spec['key']]
+            column_list = ', '.join(_column(column) for column in spec['columns'])
+            upserts = []
+            keys = changed[table]
+            for start in range(0, len(keys), LOOKUP_CHUNK):
+                chunk = keys[start:start + LOOKUP_CHUNK]
+                upserts += [list(row) for row in conn.execute(
+                    f'SELECT {column_list} FROM "{table}" WHERE {_keys_in(spec["key"])}', (json.dumps(chunk),))]
+            found = {tuple(row[position] for position in key_positions) for row in upserts}
+            deletes = [key for key in keys if tuple(key) not in found]
+            f.write(json.dumps({'table': table, 'upserts': upserts, 'deletes': deletes},
+                               default=_encode, separators=(',', ':')) + '\n')
+            totals['upserts'] += len(upserts)
+            totals['deletes'] += len(deletes)
+
+    return {'path': path, 'from_seq': since, 'to_seq': to_seq, 'tables': len(changed),
+            'bytes': os.path.getsize(path), **totals}
+
+
+def read_header(f, path: str) -> Dict[str, Any]:
+    header = json.loads(f.readline() or '{}')
+    if header.get('format') != CHANGESET_FORMAT:
+        raise ChangesetError(f"{path} is not a {CHANGESET_FORMAT} file")
+    return header
+
+
+def apply_changeset(conn: sqlite3.Connection, path: str, force: bool = False) -> Dict[str, Any]:
+    """
+    Apply a changeset in one transaction
+
+    A changeset already applied from the same source is skipped; one that
+    does not start where the last left off is refused unless force=True.
+    """
+    conn.executescript(SYNC_SCHEMA)
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return _apply(conn, path, f, read_header(f, path), force)
+
+
+def _apply(conn: sqlite3.Connection, path: str, f, header: Dict[str, Any], force: bool) -> Dict[str, Any]:
+    source = header['source']
+    row = conn.execute('SELECT to_seq FROM sync_applied WHERE source = ?', (source,)).fetchone()
+    last = row[0] if row else None
+    if last is not None and header['to_seq'] <= last:
+        return {'path': path, 'skipped': True, 'to_seq': header['to_seq']}
+    if last is not None and header['from_seq'] != last and not force:
+        raise ChangesetError(f"Changeset starts at {header['from_seq']} but {last} was applied last "
+                             f"from {source}; export again from {last} or use force")
+
+    totals = {'upserts': 0, 'deletes': 0}
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.execute('PRAGMA defer_foreign_keys = ON')
+        before = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM sync_changes').fetchone()[0]
+        target_tables = tracked_tables(conn)
+        for line in f:
+            section = json.loads(line)
+            table = section['table']
+            spec = header['tables'][table]
+            if table not in target_tables:
+                raise ChangesetError(f"Table {table} does not exist on the target")
+            absent = set(spec['columns']) - set(target_tables[table]['columns'])
+            if absent:
+                raise ChangesetError(f"{table} is missing columns {', '.join(sorted(absent))} on the target")
+
+            if section['deletes']:
+                conn.execute(f'DELETE FROM "{table}" WHERE {_keys_in(spec["key"])}',
+                             (json.dumps(section['deletes']),))
+            # Update in place, insert what is new: the target's own triggers
+            # (data versions, dashboard counters) see an ordinary UPDATE or
+            # INSERT, which INSERT OR REPLACE's silent delete would not give them
+            columns = spec['columns']
+            key_positions = [columns.index(column) for column in spec['key']]
+            value_positions = [n for n, column in enumerate(columns) if column != 'rowid']
+            assignments = ', '.join(f'{_column(columns[n])} = ?' for n in value_positions)
+            match = ' AND '.join(f'{_column(column)} = ?' for column in spec['key'])
+            update = f'UPDATE "{table}" SET {assignments} WHERE {match}'
+            insert = (f'INSERT INTO "{table}" ({", ".join(_column(column) for column in columns)}) '
+                      f'VALUES ({", ".join("?" * len(columns))})')
+            if not value_positions:
+                # Every column is part of the key: present or not is the whole row
+                insert = insert.replace('INSERT INTO', 'INSERT OR IGNORE INTO', 1)
+            for row in section['upserts']:
+                row = _decode(row)
+                if not value_positions or not conn.execute(
+                        update, [row[n] for n in value_positions] + [row[n] for n in key_positions]).rowcount:
+                    conn.execute(insert, row)
+            totals['upserts'] += len(section['upserts'])
+            totals['deletes'] += len(section['deletes'])
+
+        # The rows just written are the source's changes, not new local ones
+        conn.execute('DELETE FROM sync_changes WHERE seq > ?', (before,))
+        conn.execute('''
+            INSERT INTO sync_applied (source, to_seq, applied_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(source) DO UPDATE SET to_seq = excluded.to_seq, applied_at = excluded.applied_at
+        ''', (source, header['to_seq']))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return {'path': path, 'skipped': False, 'from_seq': header['from_seq'], 'to_seq': header['to_seq'], **totals}
+
+
+def apply_pending(conn: sqlite3.Connection, directory: str) -> List[Dict[str, Any]]:
+    """Apply every changeset in a directory in sequence order, skipping ones already applied"""
+    return [apply_changeset(conn, path)
+            for path in sorted(glob.glob(os.path.join(directory, 'changeset_*.jsonl.gz')))]
+
+
+def prune_change_log(conn: sqlite3.Connection) -> int:
+    """Drop log entries every known target has already been exported"""
+    deleted = conn.execute('''
+        DELETE FROM sync_changes WHERE seq <= (SELECT MIN(seq) FROM sync_points)
+    ''').rowcount
+    conn.commit()
+    return deleted
+
+
+def changeset_filename(since: int, to_seq: int) -> str:
+    return f'changeset_{since:08d}_{to_seq:08d}.jsonl.gz'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Row-level changeset sync")
+    parser.add_argument('--db', default=DATABASE, help="Database path")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('install', help="Create the change log and its triggers")
+
+    export_parser = subparsers.add_parser('export', help="Export rows changed since a sync point")
+    export_parser.add_argument('--target', default='production', help="Sync point to export from")
+    export_parser.add_argument('--since', type=int, help="Export after this sequence instead")
+    export_parser.add_argument('--output-dir', default='data/changesets')
+    export_parser.add_argument('--mark', action='store_true', help="Advance the sync point after exporting")
+
+    apply_parser = subparsers.add_parser('apply', help="Apply one changeset")
+    apply_parser.add_argument('path')
+    apply_parser.add_argument('--force', action='store_true', help="Apply even if sequences do not line up")
+
+    pending_parser = subparsers.add_parser('apply-pending', help="Apply all changesets in a directory")
+    pending_parser.add_argument('directory', nargs='?', default='data/changesets')
+
+    subparsers.add_parser('prune', help="Drop change-log entries all targets have received")
+    subparsers.add_parser('status', help="Show sync points and pending changes")
+
+    args = parser.parse_args()
+    conn = get_db(args.db)
+    try:
+        if args.command == 'install':
+            print(f"Change log installed on {install_change_log(conn)} tables")
+        elif args.command == 'export':
+            install_change_log(conn)
+            since = args.since if args.since is not None else sync_point(conn, args.target)
+            to_seq = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM sync_changes').fetchone()[0]
+            if to_seq <= since:
+                print(f"No changes since {since}")
+                return
+            os.makedirs(args.output_dir, exist_ok=True)
+            result = export_changeset(conn, os.path.join(args.output_dir, changeset_filename(since, to_seq)), since)
+            if args.mark:
+                mark_synced(conn, args.target, result['to_seq'])
+            print(f"Wrote {result['path']}: {result['upserts']} upserts, {result['deletes']} deletes "
+                  f"in {result['tables']} tables, {result['bytes']:,} bytes")
+        elif args.command == 'apply':
+            print(json.dumps(apply_changeset(conn, args.path, args.force)))
+        elif args.command == 'apply-pending':
+            for result in apply_pending(conn, args.directory):
+                print(json.dumps(result))
+        elif args.command == 'prune':
+            print(f"Pruned {prune_change_log(conn)} change-log entries")
+        else:
+            install_change_log(conn)
+            print(f"Node: {node_id(conn)}")
+            print(f"Logged changes: {conn.execute('SELECT COALESCE(MAX(seq), 0) FROM sync_changes').fetchone()[0]}")
+            for row in conn.execute('SELECT target, seq, synced_at FROM sync_points ORDER BY target'):
+                print(f"  exported to {row['target']}: {row['seq']} at {row['synced_at']}")
+            for row in conn.execute('SELECT source, to_seq, applied_at FROM sync_applied ORDER BY source'):
+                print(f"  applied from {row['source']}: {row['to_seq']} at {row['applied_at']}")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
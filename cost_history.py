@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+cost_history.py - Append-only history of ingredient prices and recipe costs
+
+inventory.current_price and recipes.food_cost are overwritten in place.
+record_snapshot() diffs both against the last recorded value in one bulk
+INSERT ... SELECT per kind and appends only the values that changed, so
+it can run after every import or recalculation.
+
+Rows are stored compactly: integer micro-units (see fixed_point.py), unix
+seconds and a (kind, item_id, recorded_at) primary key in a WITHOUT ROWID
+table. An as-of lookup is one index seek per item; the (kind, recorded_at)
+index serves range queries across all items.
+
+Usage:
+    python cost_history.py snapshot --source manual
+    python cost_history.py as-of 2026-03-01 --kind recipe
+    python cost_history.py drift --kind ingredient --start 2026-01-01 --end 2026-03-31
+    python cost_history.py trend --kind recipe --by month --start 2026-01-01
+    python cost_history.py history --kind recipe --id 93 --start 2026-01-01
+"""
+
+import argparse
+import json
+import sqlite3
+import time
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from fixed_point import SCALE
+
+DATABASE = 'restaurant_calculator.db'
+
+INGREDIENT = 0
+RECIPE = 1
+KINDS = {'ingredient': INGREDIENT, 'recipe': RECIPE}
+
+TREND_PERIODS = {
+    'day': '%Y-%m-%d',
+    'week': '%Y-W%W',
+    'month': '%Y-%m',
+}
+
+COST_HISTORY_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS cost_history (
+        kind INTEGER NOT NULL,          -- 0 ingredient price, 1 recipe cost
+        item_id INTEGER NOT NULL,       -- inventory.id or recipe id
+        recorded_at INTEGER NOT NULL,   -- unix seconds
+        value_micros INTEGER NOT NULL,  -- value * 1,000,000
+        PRIMARY KEY (kind, item_id, recorded_at)
+    ) WITHOUT ROWID;
+
+    CREATE INDEX IF NOT EXISTS idx_cost_history_time ON cost_history(kind, recorded_at);
+
+    -- Last recorded value per item, what each snapshot diffs against
+    CREATE TABLE IF NOT EXISTS cost_history_latest (
+        kind INTEGER NOT NULL,
+        item_id INTEGER NOT NULL,
+        value_micros INTEGER NOT NULL,
+        recorded_at INTEGER NOT NULL,
+        PRIMARY KEY (kind, item_id)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS cost_history_snapshots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        recorded_at INTEGER NOT NULL,
+        source TEXT,
+        ingredients_changed INTEGER DEFAULT 0,
+        recipes_changed INTEGER DEFAULT 0
+    );
+'''
+
+# Current values and display names per kind; recipes fall back to the
+# legacy table where the recipes_actual schema is not present
+CURRENT_VALUES = {
+    INGREDIENT: 'SELECT id as item_id, current_price as value, item_description as name FROM inventory',
+    RECIPE: 'SELECT recipe_id as item_id, food_cost as value, recipe_name as name FROM recipes_actual',
+}
+LEGACY_RECIPE_VALUES = 'SELECT id as item_id, food_cost as value, recipe_name as name FROM recipes'
+
+Moment = Union[str, int, float, datetime, None]
+
+
+def get_db(db_path: str = DATABASE) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def ensure_cost_history_schema(conn: sqlite3.Connection):
+    conn.executescript(COST_HISTORY_SCHEMA)
+
+
+def to_timestamp(moment: Moment, end_of_day: bool = False) -> int:
+    """
+    Unix seconds for an ISO date/datetime, datetime or number (UTC when naive)
+
+    A bare date means the start of that day, or its last second with
+    end_of_day - "what did it cost on March 1" includes changes that day.
+    """
+    if moment is None:
+        return int(time.time())
+    if isinstance(moment, (int, float)):
+        return int(moment)
+    if isinstance(moment, str):
+        text = moment.strip()
+        parsed = datetime.fromisoformat(text)
+        if end_of_day and len(text) <= 10:
+            return to_timestamp(parsed) + 86399
+        moment = parsed
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+@lru_cache(maxsize=4096)  # a snapshot stamps every row it writes with the same time
+def from_timestamp(seconds: int) -> str:
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _kind(kind: Union[str, int]) -> int:
+    if kind in KINDS.values():
+        return kind
+    if kind not in KINDS:
+        raise ValueError(f"Unknown kind '{kind}', expected one of {', '.join(KINDS)}")
+    return KINDS[kind]
+
+
+def _current_values(conn: sqlite3.Connection, kind: int) -> str:
+    if kind == RECIPE and not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'recipes_actual'").fetchone():
+        return LEGACY_RECIPE_VALUES
+    return CURRENT_VALUES[kind]
+
+
+def record_snapshot(conn: sqlite3.Connection, source: str = 'manual', recorded_at: Moment = None,
+                    kinds: Iterable[int] = (INGREDIENT, RECIPE)) -> Dict[str, int]:
+    """Append every ingredient price and recipe cost that changed since the last snapshot"""
+    ensure_cost_history_schema(conn)
+    now = to_timestamp(recorded_at)
+    changed = {INGREDIENT: 0, RECIPE: 0}
+
+    for kind in kinds:
+        changed[kind] = conn.execute(f'''
+            INSERT OR REPLACE INTO cost_history (kind, item_id, recorded_at, value_micros)
+            SELECT ?, current.item_id, ?, current.value_micros
+            FROM (
+                SELECT source.item_id, CAST(ROUND(source.value * {SCALE}) AS INTEGER) as value_micros
+                FROM ({_current_values(conn, kind)}) source
+                WHERE source.value IS NOT NULL
+            ) current
+            LEFT JOIN cost_history_latest latest
+                ON latest.kind = ? AND latest.item_id = current.item_id
+            WHERE latest.value_micros IS NOT current.value_micros
+        ''', (kind, now, kind)).rowcount
+        if changed[kind]:
+            conn.execute('''
+                INSERT INTO cost_history_latest (kind, item_id, value_micros, recorded_at)
+                SELECT kind, item_id, value_micros, recorded_at
+                FROM cost_history WHERE kind = ? AND recorded_at = ?
+                ON CONFLICT(kind, item_id) DO UPDATE SET
+                    value_micros = excluded.value_micros,
+                    recorded_at = excluded.recorded_at
+            ''', (kind, now))
+
+    conn.execute('''
+        INSERT INTO cost_history_snapshots (recorded_at, source, ingredients_changed, recipes_changed)
+        VALUES (?, ?, ?, ?)
+    ''', (now, source, changed[INGREDIENT], changed[RECIPE]))
+    conn.commit()
+    return {'recorded_at': now, 'ingredients_changed': changed[INGREDIENT], 'recipes_changed': changed[RECIPE]}
+
+
+def values_as_of(conn: sqlite3.Connection, kind: Union[str, int], moment: Moment,
+                 item_ids: Optional[Iterable[int]] = None) -> Dict[int, float]:
+    """Every item's value as of a moment, one index seek per item"""
+    kind = _kind(kind)
+    query = '''
+        SELECT latest.item_id, (
+            SELECT h.value_micros FROM cost_history h
+            WHERE h.kind = latest.kind AND h.item_id = latest.item_id AND h.recorded_at <= ?
+            ORDER BY h.recorded_at DESC LIMIT 1
+        ) as value_micros
+        FROM cost_history_latest latest
+        WHERE latest.kind = ?
+    '''
+    params = [to_timestamp(moment, end_of_day=True), kind]
+    if item_ids is not None:
+        item_ids = list(item_ids)
+        query += f" AND latest.item_id IN ({','.join('?' * len(item_ids))})"
+        params += item_ids
+    return {row[0]: row[1] / SCALE for row in conn.execute(query, params) if row[1] is not None}
+
+
+def value_as_of(conn: sqlite3.Connection, kind: Union[str, int], item_id: int, moment: Moment) -> Optional[float]:
+    """One item's value as of a moment, e.g. what a plate cost on March 1"""
+    return values_as_of(conn, kind, moment, [item_id]).get(item_id)
+
+
+def history(conn: sqlite3.Connection, kind: Union[str, int], start: Moment = 0, end: Moment = None,
+            item_id: Optional[int] = None) -> Dict[int, List[tuple]]:
+    """
+    Change points per item between start and end, for charting
+
+    Each series opens with the value in effect at start (when there was
+    one), so a chart shows the level an item entered the range at.
+    """
+    kind = _kind(kind)
+    start_at = to_timestamp(start)
+    end_at = to_timestamp(end, end_of_day=True)
+    series = {
+        item: [(from_timestamp(start_at), value)]
+        for item, value in values_as_of(conn, kind, start_at - 1,
+                                        None if item_id is None else [item_id]).items()
+    }
+    query = '''
+        SELECT item_id, recorded_at, value_micros FROM cost_history
+        WHERE kind = ? AND recorded_at BETWEEN ? AND ?
+    '''
+    params = [kind, start_at, end_at]
+    if item_id is not None:
+        query += ' AND item_id = ?'
+        params.append(item_id)
+    cursor = conn.cursor()
+    cursor.row_factory = None  # plain tuples, a year of every recipe is tens of thousands of rows
+    for item, recorded_at, value_micros in cursor.execute(query + ' ORDER BY item_id, recorded_at', params):
+        series.setdefault(item, []).append((from_timestamp(recorded_at), value_micros / SCALE))
+    return series
+
+
+def period_ends(start_at: int, end_at: int, by: str) -> List[tuple]:
+    """(label, last second) for each day/week/month overlapping start..end"""
+    day = datetime.fromtimestamp(start_at, timezone.utc).date()
+    last_day = datetime.fromtimestamp(end_at, timezone.utc).date()
+    ends = {}
+    while day <= last_day:
+        ends[day.strftime(TREND_PERIODS[by])] = day
+        day = date.fromordinal(day.toordinal() + 1)
+    return [(label, min(to_timestamp(day.isoformat(), end_of_day=True), end_at)) for label, day in ends.items()]
+
+
+def trend(conn: sqlite3.Connection, kind: Union[str, int], start: Moment, end: Moment = None,
+          by: str = 'month') -> List[Dict[str, Any]]:
+    """
+    Average value across all items at the end of each period, with the number of changes
+
+    Each period end is one as-of lookup (an index seek per item) and the
+    change counts come from cost_history_snapshots, so a year by month
+    never reads the history rows themselves.
+    """
+    kind = _kind(kind)
+    if by not in TREND_PERIODS:
+        raise ValueError(f"Unknown period '{by}', expected one of {', '.join(TREND_PERIODS)}")
+    start_at = to_timestamp(start)
+    end_at = to_timestamp(end, end_of_day=True)
+
+    column = 'ingredients_changed' if kind == INGREDIENT else 'recipes_changed'
+    changes = {}
+    for recorded_at, changed in conn.execute(f'''
+        SELECT recorded_at, {column} FROM cost_history_snapshots
+        WHERE recorded_at BETWEEN ? AND ? AND {column} > 0
+    ''', (start_at, end_at)):
+        period = datetime.fromtimestamp(recorded_at, timezone.utc).strftime(TREND_PERIODS[by])
+        changes[period] = changes.get(period, 0) + changed
+
+    rows = []
+    for period, period_end in period_ends(start_at, end_at, by):
+        values = values_as_of(conn, kind, period_end)
+        rows.append({
+            'period': period,
+            'changes': changes.get(period, 0),
+            'items': len(values),
+            'average_value': round(sum(values.values()) / len(values), 4) if values else None,
+        })
+    return rows
+
+
+def drift(conn: sqlite3.Connection, kind: Union[str, int], start: Moment, end: Moment = None,
+          limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Per-item change between two moments, largest relative moves first"""
+    kind = _kind(kind)
+    before = values_as_of(conn, kind, start)
+    after = values_as_of(conn, kind, end)
+    names = {row[0]: row[2] for row in conn.execute(_current_values(conn, kind))}
+
+    rows = []
+    for item, end_value in after.items():
+        start_value = before.get(item)
+        if start_value is None or start_value == end_value:
+            continue
+        rows.append({
+            'item_id': item,
+            'name': names.get(item),
+            'start_value': start_value,
+            'end_value': end_value,
+            'change': round(end_value - start_value, 6),
+            'change_percent': round((end_value - start_value) / start_value * 100, 2) if start_value else None,
+        })
+    rows.sort(key=lambda row: abs(row['change_percent'] or 0), reverse=True)
+    return rows[:limit] if limit else rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingredient price and recipe cost history")
+    parser.add_argument('--db', default=DATABASE, help="Database path")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    snapshot_parser = subparsers.add_parser('snapshot', help="Record values that changed since the last snapshot")
+    snapshot_parser.add_argument('--source', default='manual', help="What triggered the snapshot")
+
+    as_of_parser = subparsers.add_parser('as-of', help="Values in effect at a date or time")
+    as_of_parser.add_argument('moment', help="ISO date or datetime")
+    as_of_parser.add_argument('--kind', choices=KINDS, default='recipe')
+    as_of_parser.add_argument('--id', type=int, help="One ingredient or recipe")
+
+    drift_parser = subparsers.add_parser('drift', help="Largest changes between two dates")
+    drift_parser.add_argument('--kind', choices=KINDS, default='ingredient')
+    drift_parser.add_argument('--start', required=True)
+    drift_parser.add_argument('--end')
+    drift_parser.add_argument('--limit', type=int, default=25)
+
+    trend_parser = subparsers.add_parser('trend', help="Average value per period across all items")
+    trend_parser.add_argument('--kind', choices=KINDS, default='recipe')
+    trend_parser.add_argument('--by', choices=TREND_PERIODS, default='month')
+    trend_parser.add_argument('--start', required=True)
+    trend_parser.add_argument('--end')
+
+    history_parser = subparsers.add_parser('history', help="Change points between two dates")
+    history_parser.add_argument('--kind', choices=KINDS, default='recipe')
+    history_parser.add_argument('--id', type=int)
+    history_parser.add_argument('--start', default='1970-01-01')
+    history_parser.add_argument('--end')
+
+    args = parser.parse_args()
+    conn = get_db(args.db)
+    try:
+        if args.command == 'snapshot':
+            result = record_snapshot(conn, args.source)
+        else:
+            ensure_cost_history_schema(conn)
+            if args.command == 'as-of':
+                result = values_as_of(conn, args.kind, args.moment, None if args.id is None else [args.id])
+            elif args.command == 'drift':
+                result = drift(conn, args.kind, args.start, args.end, args.limit)
+            elif args.command == 'trend':
+                result = trend(conn, args.kind, args.start, args.end, args.by)
+            else:
+                result = history(conn, args.kind, args.start, args.end, args.id)
+        print(json.dumps(result, indent=2))
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,23 @@
 #!/usr/bin/env python3
 """
 cost_utils.py - Recipe cost calculation utilities
+
+Ingredient line costs are computed in integer micro-units (fixed_point.py)
+and rounded half-even to $0.000001. The Decimal result they replaced was
+left unrounded, so a line can differ from it by up to half a micro-unit and
+a recipe total by half a micro-unit per line, well below the cent the
+stored float costs are read at (see TestCostUtilsDifferential in
+tests/unit/test_fixed_point.py).
 """
 
 import sqlite3
 from decimal import Decimal
-from typing import Dict, Tuple, Optional
+from typing import Dict, Iterable, Tuple, Optional
 import logging
 
+from fixed_point import SCALE, InexactError, round_ratio, to_decimal, to_micros
+from cost_history import RECIPE, record_snapshot
+
 logger = logging.getLogger(__name__)
 
 class CostCalculator:
@@ -16,6 +26,7 @@ class CostCalculator:
     def __init__(self, db_path: str = 'restaurant_calculator.db'):
         self.db_path = db_path
         self.conn = sqlite3.connect(db_path)
+        self._etl = None  # pack size parser, created on first use
     
     def calc_recipe_cost(self, recipe_id: int) -> Tuple[Decimal, str]:
         """
@@ -58,7 +69,7 @@ class CostCalculator:
             WHERE ri.recipe_id = ?
         """, (recipe_id,)).fetchall()
         
-        total_cost = Decimal('0')
+        total_micros = 0
         errors = []
         
         for ing in ingredients:
@@ -70,21 +81,23 @@ class CostCalculator:
             
             try:
                 # Calculate ingredient cost
-                ing_cost = self._calculate_ingredient_cost(
+                ing_cost = self._ingredient_cost_micros(
                     qty, uom, price, pack_size, purchase_unit, recipe_unit
                 )
-                total_cost += ing_cost
+                total_micros += ing_cost
                 
                 # Update ingredient cost
                 cursor.execute("""
                     UPDATE recipe_ingredients
                     SET cost = ?
                     WHERE id = ?
-                """, (float(ing_cost), ing_id))
+                """, (float(to_decimal(ing_cost)), ing_id))
                 
             except Exception as e:
                 errors.append(f"Error calculating {ing_name}: {str(e)}")
         
+        total_cost = to_decimal(total_micros)
+        
         # Update recipe total cost
         cursor.execute("""
             UPDATE recipes
@@ -97,23 +110,52 @@ class CostCalculator:
         status = "OK" if not errors else f"Warnings: {'; '.join(errors)}"
         return total_cost, status
     
+    def recalculate_recipes(self, recipe_ids: Optional[Iterable[int]] = None) -> Dict[int, Tuple[Decimal, str]]:
+        """
+        Recalculate recipes (default: all) and record the new costs as one cost history snapshot
+        
+        Returns {recipe_id: (total_cost, status_message)}
+        """
+        if recipe_ids is None:
+            recipe_ids = [row[0] for row in self.conn.execute("SELECT id FROM recipes ORDER BY id")]
+        results = {recipe_id: self.calc_recipe_cost(recipe_id) for recipe_id in recipe_ids}
+        record_snapshot(self.conn, 'recalculation', kinds=(RECIPE,))
+        return results
+    
     def _calculate_ingredient_cost(self, quantity: float, unit: str, 
                                  price: float, pack_size: str, 
                                  purchase_unit: str, recipe_unit: str) -> Decimal:
         """Calculate cost for a single ingredient"""
+        return to_decimal(self._ingredient_cost_micros(
+            quantity, unit, price, pack_size, purchase_unit, recipe_unit
+        ))
+    
+    def _ingredient_cost_micros(self, quantity: float, unit: str,
+                                price: float, pack_size: str,
+                                purchase_unit: str, recipe_unit: str) -> int:
+        """Ingredient cost in integer micro-units, rounded half-even once (see fixed_point.py)"""
         # Parse pack size to get quantity and unit
-        from etl import ETLPipeline
-        etl = ETLPipeline(':memory:')  # Just for parsing
-        pack_qty, pack_unit = etl.parse_pack_size(pack_size) if pack_size else (1.0, purchase_unit)
+        if self._etl is None:
+            from etl import ETLPipeline
+            self._etl = ETLPipeline(':memory:')  # Just for parsing
+        pack_qty, pack_unit = self._etl.parse_pack_size(pack_size) if pack_size else (1.0, purchase_unit)
         
-        # Calculate cost per unit
-        if pack_qty > 0:
-            cost_per_unit = Decimal(str(price)) / Decimal(str(pack_qty))
-        else:
-            cost_per_unit = Decimal(str(price))
+        try:
+            price_micros = to_micros(price)
+            quantity_micros = to_micros(quantity)
+            pack_micros = to_micros(pack_qty)
+        except InexactError:
+            # Inputs finer than a micro-unit keep the Decimal arithmetic
+            if pack_qty > 0:
+                cost_per_unit = Decimal(str(price)) / Decimal(str(pack_qty))
+            else:
+                cost_per_unit = Decimal(str(price))
+            return to_micros(cost_per_unit * Decimal(str(quantity)), exact=False)
         
-        # Simple calculation (would need unit conversion in real implementation)
-        return cost_per_unit * Decimal(str(quantity))
+        # Cost per unit times quantity, rounded once (would need unit conversion in real implementation)
+        if pack_micros > 0:
+            return round_ratio(price_micros * quantity_micros, pack_micros)
+        return round_ratio(price_micros * quantity_micros, SCALE)
     
     def close(self):
         """Close database connection"""
@@ -124,7 +166,7 @@ def main():
     calc = CostCalculator()
     
     # Example: Calculate cost for recipe 93 (Chilli Oil)
-    cost, status = calc.calc_recipe_cost(93)
+    cost, status = calc.recalculate_recipes([93])[93]
     print(f"Recipe 93 cost: ${cost:.2f} - {status}")
     
     calc.close()
@@ -6,12 +6,14 @@ Pre-checks for duplicate files and only loads the most recent version
 
 import os
 import csv
-import sqlite3
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional, Any
 import re
 import uuid
 
+from records import CSVIngredientRow
+from query_instrumentation import configure_slow_query_log, connect as db_connect, recording
+
 class CSVRecipeLoaderV2:
     def __init__(self, db_path: str = "restaurant_calculator.db", csv_dir: str = None):
         self.db_path = db_path
@@ -95,7 +97,7 @@ class CSVRecipeLoaderV2:
     
     def init_database(self):
         """Initialize the staging table with new fields"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         cursor = conn.cursor()
         
         # Add new fields if they don't exist
@@ -119,7 +121,7 @@ class CSVRecipeLoaderV2:
     
     def mark_old_versions(self, recipe_name: str, current_batch: str):
         """Mark older versions of a recipe as not latest"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         cursor = conn.cursor()
         
         try:
@@ -189,29 +191,26 @@ class CSVRecipeLoaderV2:
                     if not ingredient_name or ingredient_name == "Ingredient":
                         continue
                     
-                    ingredient = {
-                        'name': ingredient_name,
-                        'type': row[1] if len(row) > 1 else None,
-                        'measurement': row[2] if len(row) > 2 else None,
-                        'yield': row[3] if len(row) > 3 else None,
-                        'usable_yield': row[4] if len(row) > 4 else None,
-                        'cost': row[5] if len(row) > 5 else None,
-                        'row_number': row_num
-                    }
+                    ingredient = CSVIngredientRow(
+                        name=ingredient_name,
+                        type=row[1] if len(row) > 1 else None,
+                        measurement=row[2] if len(row) > 2 else None,
+                        yield_=row[3] if len(row) > 3 else None,
+                        usable_yield=row[4] if len(row) > 4 else None,
+                        cost=row[5] if len(row) > 5 else None,
+                        row_number=row_num
+                    )
                     
                     # Parse quantity and unit
-                    quantity, unit = self._parse_measurement(ingredient['measurement'])
-                    ingredient['quantity'] = quantity
-                    ingredient['unit'] = self._normalize_unit(unit)
+                    quantity, unit = self._parse_measurement(ingredient.measurement)
+                    ingredient.quantity = quantity
+                    ingredient.unit = self._normalize_unit(unit)
                     
                     # Clean ingredient name and extract category
-                    ingredient['name'], ingredient['category'] = self._parse_ingredient_name(ingredient['name'])
+                    ingredient.name, ingredient.category = self._parse_ingredient_name(ingredient.name)
                     
                     # Check if ingredient is a prep recipe
-                    if ingredient['type'] and ingredient['type'].lower() == 'preprecipe':
-                        ingredient['is_prep_ingredient'] = True
-                    else:
-                        ingredient['is_prep_ingredient'] = False
+                    ingredient.is_prep_ingredient = bool(ingredient.type and ingredient.type.lower() == 'preprecipe')
                     
                     recipe_data['ingredients'].append(ingredient)
                 
@@ -306,7 +305,7 @@ class CSVRecipeLoaderV2:
         name_lower = recipe_name.lower()
         return any(keyword in name_lower for keyword in self.prep_recipe_keywords)
     
-    def _validate_ingredient(self, ingredient: Dict) -> List[str]:
+    def _validate_ingredient(self, ingredient: CSVIngredientRow) -> List[str]:
         """Validate ingredient data"""
         errors = []
         
@@ -336,7 +335,7 @@ class CSVRecipeLoaderV2:
             'batch_id': datetime.now().strftime('%Y%m%d_%H%M%S')
         }
         
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         cursor = conn.cursor()
         
         try:
@@ -376,9 +375,9 @@ class CSVRecipeLoaderV2:
                     needs_review = bool(validation_errors)
                     
                     # Determine if this ingredient is a prep recipe
-                    used_as_ingredient = ingredient.get('is_prep_ingredient', False)
+                    used_as_ingredient = ingredient.is_prep_ingredient
                     ingredient_source_type = 'recipe' if used_as_ingredient else 'inventory'
-                    ingredient_source_recipe_name = ingredient['name'] if used_as_ingredient else None
+                    ingredient_source_recipe_name = ingredient.name if used_as_ingredient else None
                     
                     cursor.execute("""
                         INSERT INTO stg_csv_recipes (
@@ -390,16 +389,16 @@ class CSVRecipeLoaderV2:
                         ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                     """, (
                         recipe_data['recipe_name'],
-                        ingredient['name'],
-                        ingredient['quantity'],
-                        ingredient['unit'],
-                        self._clean_cost(ingredient['cost']),
-                        ingredient['category'],
+                        ingredient.name,
+                        ingredient.quantity,
+                        ingredient.unit,
+                        self._clean_cost(ingredient.cost),
+                        ingredient.category,
                         recipe_data['is_prep_recipe'],
                         file_info['filename'],
                         file_info['timestamp'],
-                        ingredient['row_number'],
-                        str(ingredient),
+                        ingredient.row_number,
+                        str(ingredient.as_dict()),
                         needs_review,
                         ', '.join(validation_errors) if validation_errors else None,
                         results['batch_id'],
@@ -424,7 +423,7 @@ class CSVRecipeLoaderV2:
     
     def check_duplicates(self):
         """Check for duplicate recipes in main recipes table"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         cursor = conn.cursor()
         
         try:
@@ -448,7 +447,7 @@ class CSVRecipeLoaderV2:
     
     def check_prep_dependencies(self):
         """Check for missing prep recipe dependencies"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         cursor = conn.cursor()
         
         try:
@@ -483,35 +482,42 @@ class CSVRecipeLoaderV2:
         finally:
             conn.close()
 
-if __name__ == "__main__":
-    # Initialize and run loader
-    loader = CSVRecipeLoaderV2()
-    loader.init_database()
+def main():
+    # Statements slower than SLOW_QUERY_MS go to slow_queries.log with their plans
+    configure_slow_query_log()
+    with recording('csv_recipe_loader_v2', keep_statements=False):
+        # Initialize and run loader
+        loader = CSVRecipeLoaderV2()
+        loader.init_database()
     
-    print("CSV Recipe Loader V2 - with duplicate file handling")
-    print("="*50)
+        print("CSV Recipe Loader V2 - with duplicate file handling")
+        print("="*50)
     
-    results = loader.load_to_staging(clear_existing=True)
+        results = loader.load_to_staging(clear_existing=True)
     
-    print(f"\nLoad Results:")
-    print(f"Total unique recipes: {results['total_files']}")
-    print(f"Duplicate files skipped: {results['skipped_files']}")
-    print(f"Successfully loaded: {results['successful_files']}")
-    print(f"Failed: {results['failed_files']}")
-    print(f"Total ingredients: {results['total_ingredients']}")
-    print(f"Batch ID: {results['batch_id']}")
+        print(f"\nLoad Results:")
+        print(f"Total unique recipes: {results['total_files']}")
+        print(f"Duplicate files skipped: {results['skipped_files']}")
+        print(f"Successfully loaded: {results['successful_files']}")
+        print(f"Failed: {results['failed_files']}")
+        print(f"Total ingredients: {results['total_ingredients']}")
+        print(f"Batch ID: {results['batch_id']}")
     
-    if results['errors']:
-        print("\nErrors:")
-        for error in results['errors']:
-            print(f"  {error['file']}: {error['errors']}")
+        if results['errors']:
+            print("\nErrors:")
+            for error in results['errors']:
+                print(f"  {error['file']}: {error['errors']}")
     
-    # Check for duplicates in main database
-    print("\nChecking for duplicates in main database...")
-    loader.check_duplicates()
+        # Check for duplicates in main database
+        print("\nChecking for duplicates in main database...")
+        loader.check_duplicates()
     
-    # Check for prep recipe dependencies
-    print("Checking for prep recipe dependencies...")
-    loader.check_prep_dependencies()
+        # Check for prep recipe dependencies
+        print("Checking for prep recipe dependencies...")
+        loader.check_prep_dependencies()
     
-    print("\nDone!")
\ No newline at end of file
+        print("\nDone!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+dashboard_stats.py - Trigger-maintained dashboard counters
+
+The dashboard used to run COUNT(*) over inventory, recipes, menu_items and
+vendors on every page load, several of which are views over the migrated
+*_actual tables. This module keeps those counts in a single-row
+dashboard_stats table, adjusted by AFTER INSERT/DELETE triggers on the
+underlying base tables, so the dashboard costs one primary-key read.
+
+It also adds expression indexes so the recent-changes fallback feed
+(ORDER BY COALESCE(updated, created) DESC LIMIT n) is an index scan.
+
+Usage:
+    python dashboard_stats.py                # install triggers and recount
+    python dashboard_stats.py --refresh      # recount only (after bulk loads)
+"""
+
+import argparse
+import re
+import sqlite3
+from typing import Dict, Optional
+
+# dashboard_stats column -> table or view it counts
+STAT_SOURCES = {
+    'inventory_count': 'inventory',
+    'recipe_count': 'recipes',
+    'menu_count': 'menu_items',
+    'vendor_count': 'vendors'
+}
+
+# table or view -> (updated column, created column) used by the recent-changes feed
+RECENT_CHANGE_SOURCES = {
+    'recipes': ('updated_at', 'created_at'),
+    'inventory': ('updated_date', 'created_date')
+}
+
+FIRST_FROM_PATTERN = re.compile(r'\bFROM\s+["`\[]?(\w+)', re.IGNORECASE)
+
+
+def count_source_table(conn: sqlite3.Connection, name: str) -> Optional[str]:
+    """
+    Resolve a table or view to the base table whose row count it mirrors
+
+    The compatibility views select from one driving table and only LEFT JOIN
+    lookups onto it, so the row count of a view is the row count of the
+    first table in its FROM clause.
+    """
+    seen = set()
+    while name and name not in seen:
+        seen.add(name)
+        row = conn.execute(
+            "SELECT type, sql FROM sqlite_master WHERE name = ? AND type IN ('table', 'view')",
+            (name,)
+        ).fetchone()
+        if not row:
+            return None
+        if row[0] == 'table':
+            return name
+        match = FIRST_FROM_PATTERN.search(row[1] or '')
+        name = match.group(1) if match else None
+    return None
+
+
+def refresh_dashboard_stats(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Recount every stat exactly and store it"""
+    counts = {}
+    for column, source in STAT_SOURCES.items():
+        try:
+            counts[column] = conn.execute(f'SELECT COUNT(*) FROM {source}').fetchone()[0]
+        except sqlite3.OperationalError:
+            counts[column] = 0
+
+    conn.execute(f'''
+        INSERT OR REPLACE INTO dashboard_stats (id, {', '.join(counts)}, refreshed_at)
+        VALUES (1, {', '.join('?' * len(counts))}, CURRENT_TIMESTAMP)
+    ''', list(counts.values()))
+    conn.commit()
+    return counts
+
+
+def install_dashboard_stats(conn: sqlite3.Connection) -> Dict[str, int]:
+    """Create the stats table, its maintenance triggers and the feed indexes"""
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS dashboard_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            {', '.join(f'{column} INTEGER NOT NULL DEFAULT 0' for column in STAT_SOURCES)},
+            refreshed_at TIMESTAMP
+        )
+    ''')
+
+    # Views can be repointed (e.g. by materialize_compat_views.py), so drop the
+    # previous counters before attaching them to the current driving tables
+    stale = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_dashboard_stats_%'"
+    ).fetchall()
+    for (trigger,) in stale:
+        conn.execute(f'DROP TRIGGER IF EXISTS "{trigger}"')
+
+    for column, source in STAT_SOURCES.items():
+        table = count_source_table(conn, source)
+        if not table:
+            print(f"Warning: no base table found for {source}, {column} will only change on refresh")
+            continue
+        for operation, delta in (('INSERT', '+ 1'), ('DELETE', '- 1')):
+            conn.execute(f'''
+                CREATE TRIGGER trg_dashboard_stats_{table}_{operation.lower()}
+                AFTER {operation} ON "{table}"
+                BEGIN
+                    UPDATE dashboard_stats SET {column} = {column} {delta} WHERE id = 1;
+                END
+            ''')
+
+    for source, (updated_column, created_column) in RECENT_CHANGE_SOURCES.items():
+        table = count_source_table(conn, source)
+        if not table:
+            continue
+        columns = {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+        if updated_column in columns and created_column in columns:
+            conn.execute(f'''
+                CREATE INDEX IF NOT EXISTS idx_{table}_recent_change
+                ON "{table}"(COALESCE({updated_column}, {created_column}))
+            ''')
+
+    # Recount once so the incremental triggers start from exact values
+    return refresh_dashboard_stats(conn)
+
+
+def get_dashboard_stats(conn: sqlite3.Connection) -> Optional[Dict[str, int]]:
+    """Read the dashboard counters with a single primary-key lookup"""
+    try:
+        row = conn.execute(
+            f"SELECT {', '.join(STAT_SOURCES)} FROM dashboard_stats WHERE id = 1"
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    if not row:
+        return None
+    return {column: row[index] for index, column in enumerate(STAT_SOURCES)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Install or refresh the dashboard statistics table')
+    parser.add_argument('--db', default='restaurant_calculator.db', help='Database path')
+    parser.add_argument('--refresh', action='store_true', help='Only recount, do not (re)install triggers')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.refresh:
+            counts = refresh_dashboard_stats(conn)
+        else:
+            counts = install_dashboard_stats(conn)
+    finally:
+        conn.close()
+
+    for column, value in counts.items():
+        print(f"{column}: {value}")
+
+
+if __name__ == "__main__":
+    main()
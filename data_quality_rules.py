@@ -0,0 +1,529 @@
+#!/usr/bin/env python3
+"""
+data_quality_rules.py - Set-based data-quality rule engine
+
+audit.py, data_validation.py and the health monitor used to pull whole
+tables into Python and check them row by row. Here each rule is declared
+once and compiled to a single SQL query (or, for checks that need Python
+parsing such as pack sizes, one column read checked with vectorized pandas
+string operations). Rules run concurrently on read-only connections and
+their violations are written to one data_quality_findings table.
+
+Reruns are incremental: triggers on the base tables record changed row ids
+in data_quality_dirty, so a rule only re-checks the rows changed since the
+last run, unless a table it joins against changed, in which case it re-runs
+in full.
+
+Usage:
+    python data_quality_rules.py              # incremental run, print summary
+    python data_quality_rules.py --full       # re-check every row
+    python data_quality_rules.py --rule inventory.invalid_price --show 20
+"""
+
+import argparse
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from audit import ALL_VALID_UOMS
+from metrics import timed_job
+from response_cache import resolve_base_tables
+
+# rule table -> (base table behind the migrated compatibility view, its key column,
+# key column in the rule table). When the rule table is itself a plain table, as
+# app.py's init_database creates it, the triggers go on it directly.
+RULE_TABLES = {
+    'inventory': ('inventory', 'id', 'id'),
+    'recipes': ('recipes_actual', 'recipe_id', 'id'),
+    'recipe_ingredients': ('recipe_ingredients_actual', 'ingredient_id', 'id'),
+    'menu_items': ('menu_items_actual', 'menu_item_id', 'id'),
+    'vendors': ('vendors', 'id', 'id'),
+    'vendor_products': ('vendor_products', 'id', 'id'),
+}
+
+UOM_LIST = ', '.join(f"'{uom}'" for uom in sorted(ALL_VALID_UOMS))
+
+# Same patterns as DataAuditor.parse_pack_size: "N x N unit" and "N unit"
+PACK_SIZE_MULTI_PATTERN = r'^\d+(\.\d+)?\s*x\s*\d+(\.\d+)?\s*\w+$'
+PACK_SIZE_SINGLE_PATTERN = r'^\d+(\.\d+)?\s*\w+$'
+
+
+def _not_numeric(column: str) -> str:
+    # Numeric text such as '12.5' passes, as it did with DataAuditor.validate_numeric's float():
+    # a REAL cast compared to the text only matches when the whole text is a number
+    return f"(typeof({column}) NOT IN ('integer', 'real') AND NOT CAST(TRIM({column}) AS REAL) = TRIM({column}))"
+
+
+def _number(column: str) -> str:
+    return f"CAST({column} AS REAL)"
+
+
+def _blank(column: str) -> str:
+    return f"({column} IS NULL OR TRIM({column}) = '')"
+
+
+def check_pack_sizes(values):
+    """Vectorized DataAuditor.parse_pack_size: message per bad value, None where valid"""
+    import pandas as pd
+
+    values = values.astype(str)
+    multi = values.str.match(PACK_SIZE_MULTI_PATTERN, case=False)
+    single = values.str.match(PACK_SIZE_SINGLE_PATTERN, case=False) & ~multi
+
+    # "N x N unit" only has its unit checked when the tokens are space separated
+    unit = values.str.extract(r'^\S+\s+\S+\s+\S+\s+(\S+)$')[0].where(multi)
+    unit = unit.fillna(values.str.extract(r'^\d+(?:\.\d+)?\s*(.+)$')[0].where(single))
+    bad_unit = unit.notna() & ~unit.str.lower().str.strip().isin(ALL_VALID_UOMS)
+
+    messages = pd.Series(None, index=values.index, dtype=object)
+    messages[(values != '') & ~multi & ~single] = 'Invalid pack size format: ' + values
+    messages[bad_unit] = 'Invalid unit in pack size: ' + unit
+    return messages
+
+
+# Each rule: name, table (a RULE_TABLES key), severity, column and message ({value} is filled in)
+# plus either `where` (SQL predicate over alias t, with optional `joins`) or `check`
+# (vectorized Python over the column). `depends_on` lists other tables whose changes
+# can flip the result for unchanged rows, which forces a full re-run of the rule; a
+# dependency that is not a tracked RULE_TABLES entry re-runs the rule in full every time.
+# Rules naming a column the table does not have are skipped.
+RULES = [
+    # inventory
+    {'name': 'inventory.missing_item_code', 'table': 'inventory', 'severity': 'error',
+     'column': 'item_code', 'message': 'Missing required item_code',
+     'where': _blank('t.item_code')},
+    {'name': 'inventory.duplicate_item_code', 'table': 'inventory', 'severity': 'warning',
+     'column': 'item_code', 'message': 'Duplicate item_code: {value}', 'depends_on': ['inventory'],
+     'where': '''t.item_code IN (SELECT item_code FROM inventory WHERE TRIM(item_code) != ''
+                                 GROUP BY item_code HAVING COUNT(*) > 1)'''},
+    {'name': 'inventory.missing_description', 'table': 'inventory', 'severity': 'error',
+     'column': 'item_description', 'message': 'Missing required item_description',
+     'where': _blank('t.item_description')},
+    {'name': 'inventory.short_description', 'table': 'inventory', 'severity': 'info',
+     'column': 'item_description', 'message': 'Description too short: {value}',
+     'where': "LENGTH(TRIM(t.item_description)) BETWEEN 1 AND 4"},
+    {'name': 'inventory.uppercase_description', 'table': 'inventory', 'severity': 'info',
+     'column': 'item_description', 'message': 'Description is all uppercase: {value}',
+     'where': '''LENGTH(t.item_description) >= 5 AND t.item_description = UPPER(t.item_description)
+                 AND UPPER(t.item_description) != LOWER(t.item_description)'''},
+    {'name': 'inventory.missing_vendor', 'table': 'inventory', 'severity': 'warning',
+     'column': 'vendor_name', 'message': 'Missing vendor', 'where': _blank('t.vendor_name')},
+    {'name': 'inventory.invalid_price', 'table': 'inventory', 'severity': 'error',
+     'column': 'current_price', 'message': 'Invalid price: {value}',
+     'where': f"t.current_price IS NOT NULL AND ({_not_numeric('t.current_price')} OR {_number('t.current_price')} < 0)"},
+    {'name': 'inventory.invalid_pack_size', 'table': 'inventory', 'severity': 'warning',
+     'column': 'pack_size', 'check': check_pack_sizes},
+    {'name': 'inventory.invalid_purchase_unit', 'table': 'inventory', 'severity': 'warning',
+     'column': 'purchase_unit', 'message': 'Invalid purchase unit: {value}',
+     'where': f"TRIM(t.purchase_unit) != '' AND LOWER(TRIM(t.purchase_unit)) NOT IN ({UOM_LIST})"},
+    {'name': 'inventory.invalid_recipe_cost_unit', 'table': 'inventory', 'severity': 'warning',
+     'column': 'recipe_cost_unit', 'message': 'Invalid recipe cost unit: {value}',
+     'where': f"TRIM(t.recipe_cost_unit) != '' AND LOWER(TRIM(t.recipe_cost_unit)) NOT IN ({UOM_LIST})"},
+    {'name': 'inventory.invalid_yield_percent', 'table': 'inventory', 'severity': 'error',
+     'column': 'yield_percent', 'message': 'Invalid yield percent: {value}',
+     'where': f'''t.yield_percent IS NOT NULL AND ({_not_numeric('t.yield_percent')}
+                  OR {_number('t.yield_percent')} NOT BETWEEN 0 AND 100)'''},
+
+    # recipe_ingredients
+    {'name': 'recipe_ingredients.invalid_recipe', 'table': 'recipe_ingredients', 'severity': 'error',
+     'column': 'recipe_id', 'message': 'Invalid recipe_id reference', 'depends_on': ['recipes'],
+     'joins': 'LEFT JOIN recipes r ON t.recipe_id = r.id', 'where': _blank('r.recipe_name')},
+    {'name': 'recipe_ingredients.invalid_ingredient', 'table': 'recipe_ingredients', 'severity': 'error',
+     'column': 'ingredient_id', 'message': 'Invalid ingredient_id reference', 'depends_on': ['inventory'],
+     'joins': 'LEFT JOIN inventory i ON t.ingredient_id = i.id',
+     'where': f"COALESCE(t.ingredient_id, 0) != 0 AND {_blank('i.item_description')}"},
+    {'name': 'recipe_ingredients.no_ingredient', 'table': 'recipe_ingredients', 'severity': 'error',
+     'column': None, 'message': 'No ingredient specified',
+     'where': f"COALESCE(t.ingredient_id, 0) = 0 AND {_blank('t.ingredient_name')}"},
+    {'name': 'recipe_ingredients.missing_quantity', 'table': 'recipe_ingredients', 'severity': 'error',
+     'column': 'quantity', 'message': 'Missing quantity', 'where': 't.quantity IS NULL'},
+    {'name': 'recipe_ingredients.invalid_quantity', 'table': 'recipe_ingredients', 'severity': 'error',
+     'column': 'quantity', 'message': 'Invalid quantity: {value}',
+     'where': f"t.quantity IS NOT NULL AND ({_not_numeric('t.quantity')} OR {_number('t.quantity')} < 0)"},
+    {'name': 'recipe_ingredients.zero_quantity', 'table': 'recipe_ingredients', 'severity': 'warning',
+     'column': 'quantity', 'message': 'Zero quantity', 'where': 't.quantity = 0'},
+    {'name': 'recipe_ingredients.excessive_quantity', 'table': 'recipe_ingredients', 'severity': 'warning',
+     'column': 'quantity', 'message': 'Excessive quantity: {value}', 'where': 't.quantity > 1000'},
+    {'name': 'recipe_ingredients.missing_uom', 'table': 'recipe_ingredients', 'severity': 'error',
+     'column': 'unit_of_measure', 'message': 'Missing unit_of_measure',
+     'where': _blank('t.unit_of_measure')},
+    {'name': 'recipe_ingredients.invalid_uom', 'table': 'recipe_ingredients', 'severity': 'warning',
+     'column': 'unit_of_measure', 'message': 'Invalid UOM: {value}',
+     'where': f"TRIM(t.unit_of_measure) != '' AND LOWER(TRIM(t.unit_of_measure)) NOT IN ({UOM_LIST})"},
+    {'name': 'recipe_ingredients.invalid_cost', 'table': 'recipe_ingredients', 'severity': 'error',
+     'column': 'cost', 'message': 'Invalid cost: {value}',
+     'where': f"t.cost IS NOT NULL AND ({_not_numeric('t.cost')} OR {_number('t.cost')} < 0)"},
+    {'name': 'recipe_ingredients.name_mismatch', 'table': 'recipe_ingredients', 'severity': 'info',
+     'column': 'ingredient_name', 'message': 'Ingredient name mismatch: "{value}" vs inventory',
+     'depends_on': ['inventory'], 'joins': 'JOIN inventory i ON t.ingredient_id = i.id',
+     'where': "TRIM(t.ingredient_name) != '' AND TRIM(i.item_description) != '' "
+              "AND t.ingredient_name != i.item_description"},
+
+    # recipes
+    {'name': 'recipes.prep_with_menu_price', 'table': 'recipes', 'severity': 'error',
+     'column': 'menu_price', 'message': 'Prep recipe has a menu price: {value} (should be 0)',
+     'where': "t.recipe_type = 'PrepRecipe' AND t.menu_price > 0"},
+    {'name': 'recipes.invalid_food_cost_percent', 'table': 'recipes', 'severity': 'error',
+     'column': 'food_cost_percentage', 'message': 'Invalid food cost: {value}%',
+     'where': 't.food_cost_percentage > 100 OR t.food_cost_percentage < 0'},
+    {'name': 'recipes.missing_status', 'table': 'recipes', 'severity': 'warning',
+     'column': 'status', 'message': 'Missing status (Draft/Complete)', 'where': _blank('t.status')},
+    {'name': 'recipes.extra_spaces', 'table': 'recipes', 'severity': 'warning',
+     'column': 'recipe_name', 'message': 'Extra spaces in name: "{value}"',
+     'where': "t.recipe_name LIKE '%  %' OR t.recipe_name LIKE '% ' OR t.recipe_name LIKE ' %'"},
+
+    # menu_items (on migrated databases menu_price and food_cost come from menu_assignments and recipes)
+    {'name': 'menu_items.missing_recipe', 'table': 'menu_items', 'severity': 'error',
+     'column': 'recipe_id', 'message': 'Menu item without a recipe', 'where': 'COALESCE(t.recipe_id, 0) = 0'},
+    {'name': 'menu_items.invalid_recipe', 'table': 'menu_items', 'severity': 'error',
+     'column': 'recipe_id', 'message': 'References non-existent recipe ID {value}', 'depends_on': ['recipes'],
+     'joins': 'LEFT JOIN recipes r ON t.recipe_id = r.id',
+     'where': 'COALESCE(t.recipe_id, 0) != 0 AND r.id IS NULL'},
+    {'name': 'menu_items.shared_recipe', 'table': 'menu_items', 'severity': 'error',
+     'column': 'recipe_id', 'message': 'Recipe {value} is used by multiple menu items (Toast requires 1:1)',
+     'depends_on': ['menu_items'],
+     'where': '''t.recipe_id IN (SELECT recipe_id FROM menu_items WHERE recipe_id IS NOT NULL
+                                 GROUP BY recipe_id HAVING COUNT(DISTINCT id) > 1)'''},
+    {'name': 'menu_items.no_price', 'table': 'menu_items', 'severity': 'warning',
+     'column': 'menu_price', 'message': 'Menu item has no price', 'depends_on': ['menu_assignments'],
+     'where': 't.menu_price = 0 OR t.menu_price IS NULL'},
+    {'name': 'menu_items.high_food_cost', 'table': 'menu_items', 'severity': 'info',
+     'column': 'food_cost_percent', 'message': 'Food cost {value}% is over 50% (may need review)',
+     'depends_on': ['recipes'], 'where': 't.food_cost_percent > 50'},
+    {'name': 'menu_items.cost_mismatch', 'table': 'menu_items', 'severity': 'warning',
+     'column': 'food_cost', 'message': 'Food cost {value} does not match its recipe',
+     'depends_on': ['recipes'], 'joins': 'JOIN recipes r ON t.recipe_id = r.id',
+     'where': 'ABS(t.food_cost - r.food_cost) > 0.01'},
+    {'name': 'menu_items.incorrect_food_cost_percent', 'table': 'menu_items', 'severity': 'error',
+     'column': 'food_cost_percent', 'message': 'Incorrect food cost %: {value}%',
+     'depends_on': ['recipes', 'menu_assignments'],
+     'where': 't.menu_price > 0 AND ABS(t.food_cost_percent - ROUND((t.food_cost / t.menu_price) * 100, 2)) > 0.1'},
+
+    # vendor_products
+    {'name': 'vendor_products.invalid_inventory', 'table': 'vendor_products', 'severity': 'error',
+     'column': 'inventory_id', 'message': 'Invalid inventory_id reference', 'depends_on': ['inventory'],
+     'joins': 'LEFT JOIN inventory i ON t.inventory_id = i.id', 'where': _blank('i.item_description')},
+    {'name': 'vendor_products.invalid_vendor', 'table': 'vendor_products', 'severity': 'error',
+     'column': 'vendor_id', 'message': 'Invalid vendor_id reference', 'depends_on': ['vendors'],
+     'joins': 'LEFT JOIN vendors v ON t.vendor_id = v.id', 'where': _blank('v.vendor_name')},
+    {'name': 'vendor_products.invalid_price', 'table': 'vendor_products', 'severity': 'error',
+     'column': 'vendor_price', 'message': 'Invalid vendor price: {value}',
+     'where': f"t.vendor_price IS NOT NULL AND ({_not_numeric('t.vendor_price')} OR {_number('t.vendor_price')} < 0)"},
+    {'name': 'vendor_products.invalid_pack_size', 'table': 'vendor_products', 'severity': 'warning',
+     'column': 'pack_size', 'check': check_pack_sizes},
+    {'name': 'vendor_products.multiple_primary', 'table': 'vendor_products', 'severity': 'warning',
+     'column': 'inventory_id', 'message': 'Multiple primary vendors for item {value}',
+     'depends_on': ['vendor_products'],
+     'where': '''t.is_primary AND EXISTS (SELECT 1 FROM vendor_products p
+                                         WHERE p.inventory_id = t.inventory_id
+                                         AND p.is_primary AND p.id < t.id)'''},
+]
+
+# The rules DataAuditor (audit.py) reports; the rest carry over DataValidator and
+# InventoryDataValidator checks, which report their own findings
+AUDIT_RULES = [
+    'inventory.missing_item_code', 'inventory.duplicate_item_code', 'inventory.missing_description',
+    'inventory.short_description', 'inventory.invalid_price', 'inventory.invalid_pack_size',
+    'inventory.invalid_purchase_unit', 'inventory.invalid_recipe_cost_unit',
+    'inventory.invalid_yield_percent',
+    'recipe_ingredients.invalid_recipe', 'recipe_ingredients.invalid_ingredient',
+    'recipe_ingredients.no_ingredient', 'recipe_ingredients.missing_quantity',
+    'recipe_ingredients.invalid_quantity', 'recipe_ingredients.missing_uom',
+    'recipe_ingredients.invalid_uom', 'recipe_ingredients.invalid_cost',
+    'recipe_ingredients.name_mismatch',
+    'vendor_products.invalid_inventory', 'vendor_products.invalid_vendor',
+    'vendor_products.invalid_price', 'vendor_products.invalid_pack_size',
+    'vendor_products.multiple_primary',
+]
+
+Finding = Tuple[str, str, str, int, Optional[str], Optional[str], str]
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set:
+    return {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+
+
+def tracking_target(conn: sqlite3.Connection, rule_table: str) -> Optional[Tuple[str, str]]:
+    """(table, key column) whose writes mark rows of rule_table dirty, None if it cannot be tracked"""
+    base_table, base_key, rule_key = RULE_TABLES[rule_table]
+    resolved = resolve_base_tables(conn, [rule_table])
+    if resolved == {rule_table}:
+        return rule_table, rule_key
+    if base_table in resolved and base_key in _columns(conn, base_table):
+        return base_table, base_key
+    # A view over a single table carrying the rule's key, e.g. a materialized mv_<view>
+    if len(resolved) == 1:
+        only = next(iter(resolved))
+        if rule_key in _columns(conn, only):
+            return only, rule_key
+    return None
+
+
+def install_change_tracking(conn: sqlite3.Connection) -> set:
+    """
+    Create the findings/state tables and the dirty-row triggers
+
+    Returns the rule tables that are tracked; rules on any other table
+    cannot be rerun incrementally.
+    """
+    conn.executescript('''
+        CREATE TABLE IF NOT EXISTS data_quality_findings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            rule_name TEXT NOT NULL,
+            severity TEXT NOT NULL,
+            table_name TEXT NOT NULL,
+            row_id INTEGER,
+            column_name TEXT,
+            value TEXT,
+            message TEXT NOT NULL,
+            found_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS idx_data_quality_findings_rule_row
+            ON data_quality_findings(rule_name, row_id);
+        CREATE INDEX IF NOT EXISTS idx_data_quality_findings_table_row
+            ON data_quality_findings(table_name, row_id);
+
+        CREATE TABLE IF NOT EXISTS data_quality_dirty (
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            UNIQUE (table_name, row_id)
+        );
+
+        CREATE TABLE IF NOT EXISTS data_quality_rule_runs (
+            rule_name TEXT PRIMARY KEY,
+            last_run_at TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS data_quality_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            mode TEXT,
+            rules_run INTEGER,
+            findings INTEGER,
+            duration_ms REAL
+        );
+    ''')
+
+    tracked = set()
+    for rule_table in RULE_TABLES:
+        target = tracking_target(conn, rule_table)
+        if target is None:
+            continue
+        base_table, base_key = target
+        for operation, row_refs in (('INSERT', ['NEW']), ('UPDATE', ['OLD', 'NEW']), ('DELETE', ['OLD'])):
+            # OR REPLACE moves the row past the current run's watermark
+            body = '\n'.join(
+                f"INSERT OR REPLACE INTO data_quality_dirty (table_name, row_id) "
+                f"VALUES ('{rule_table}', {row_ref}.{base_key});"
+                for row_ref in row_refs
+            )
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_dq_{base_table}_{operation.lower()}
+                AFTER {operation} ON "{base_table}"
+                BEGIN
+                    {body}
+                END
+            ''')
+        tracked.add(rule_table)
+    conn.commit()
+    return tracked
+
+
+class DataQualityEngine:
+    """Runs RULES against a database and maintains data_quality_findings"""
+
+    def __init__(self, db_path: str = 'restaurant_calculator.db', rules: List[Dict] = None, workers: int = 4):
+        self.db_path = db_path
+        self.rules = rules if rules is not None else RULES
+        self.workers = workers
+
+    def _read_only(self) -> sqlite3.Connection:
+        return sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True)
+
+    def _evaluate(self, rule: Dict, watermark: Optional[int]) -> Optional[List[Finding]]:
+        """Run one rule on its own read-only connection; watermark limits it to dirty rows
+
+        Returns None when the table lacks a column the rule needs.
+        """
+        key = RULE_TABLES[rule['table']][2]
+        column = rule.get('column')
+        scope, params = '1 = 1', ()
+        if watermark is not None:
+            scope = f't.{key} IN (SELECT row_id FROM data_quality_dirty WHERE table_name = ? AND rowid <= ?)'
+            params = (rule['table'], watermark)
+
+        conn = self._read_only()
+        try:
+            if 'check' in rule:
+                import pandas as pd
+                if column not in _columns(conn, rule['table']):
+                    return None
+                frame = pd.read_sql_query(
+                    f'SELECT t.{key} AS row_id, t.{column} AS value FROM {rule["table"]} t '
+                    f'WHERE t.{column} IS NOT NULL AND {scope}',
+                    conn, params=params
+                )
+                messages = rule['check'](frame['value'])
+                flagged = frame.assign(message=messages).dropna(subset=['message'])
+                return [
+                    (rule['name'], rule['severity'], rule['table'], int(row_id), column, str(value), message)
+                    for row_id, value, message in flagged.itertuples(index=False)
+                ]
+
+            value_sql = f't.{column}' if column else 'NULL'
+            try:
+                rows = conn.execute(
+                    f'SELECT t.{key}, {value_sql} FROM {rule["table"]} t {rule.get("joins", "")} '
+                    f'WHERE ({rule["where"]}) AND {scope}',
+                    params
+                ).fetchall()
+            except sqlite3.OperationalError as e:
+                if 'no such column' in str(e):
+                    return None
+                raise
+            return [
+                (rule['name'], rule['severity'], rule['table'], row_id, column,
+                 None if value is None else str(value), rule['message'].format(value=value))
+                for row_id, value in rows
+            ]
+        finally:
+            conn.close()
+
+    @timed_job('data_quality')
+    def run(self, incremental: bool = True, rule_names: List[str] = None) -> Dict:
+        """Run the rules (only changed rows when incremental) and store their findings"""
+        started = time.perf_counter()
+        conn = sqlite3.connect(self.db_path)
+        try:
+            tracked = install_change_tracking(conn)
+            existing = {row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type IN ('table', 'view')"
+            )}
+            watermark = conn.execute('SELECT COALESCE(MAX(rowid), 0) FROM data_quality_dirty').fetchone()[0]
+            dirty_tables = {row[0] for row in conn.execute(
+                'SELECT DISTINCT table_name FROM data_quality_dirty WHERE rowid <= ?', (watermark,)
+            )}
+            previously_run = {row[0] for row in conn.execute('SELECT rule_name FROM data_quality_rule_runs')}
+
+            plan = []
+            for rule in self.rules:
+                if rule_names and rule['name'] not in rule_names:
+                    continue
+                if rule['table'] not in existing:
+                    print(f"Warning: skipping {rule['name']}, table {rule['table']} not found")
+                    continue
+                # Untracked tables record no dirty rows, so their rules always re-run in full
+                depends_on = set(rule.get('depends_on', []))
+                if (not incremental or rule['name'] not in previously_run or rule['table'] not in tracked
+                        or dirty_tables & depends_on or depends_on - tracked):
+                    plan.append((rule, None))
+                elif rule['table'] in dirty_tables:
+                    plan.append((rule, watermark))
+
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(lambda item: self._evaluate(*item), plan))
+
+            new_findings = rules_run = 0
+            for (rule, scoped), findings in zip(plan, results):
+                if findings is None:
+                    print(f"Warning: skipping {rule['name']}, {rule['table']} lacks a column it checks")
+                    continue
+                rules_run += 1
+                if scoped is None:
+                    conn.execute('DELETE FROM data_quality_findings WHERE rule_name = ?', (rule['name'],))
+                else:
+                    conn.execute('''
+                        DELETE FROM data_quality_findings
+                        WHERE rule_name = ? AND row_id IN (
+                            SELECT row_id FROM data_quality_dirty WHERE table_name = ? AND rowid <= ?
+                        )
+                    ''', (rule['name'], rule['table'], scoped))
+                conn.executemany('''
+                    INSERT INTO data_quality_findings
+                        (rule_name, severity, table_name, row_id, column_name, value, message)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', findings)
+                conn.execute(
+                    'INSERT OR REPLACE INTO data_quality_rule_runs (rule_name, last_run_at) '
+                    'VALUES (?, CURRENT_TIMESTAMP)', (rule['name'],)
+                )
+                new_findings += len(findings)
+
+            # Other rules still need the dirty rows when only a subset ran
+            if not rule_names:
+                conn.execute('DELETE FROM data_quality_dirty WHERE rowid <= ?', (watermark,))
+
+            duration_ms = (time.perf_counter() - started) * 1000
+            mode = 'incremental' if incremental else 'full'
+            conn.execute(
+                'INSERT INTO data_quality_runs (mode, rules_run, findings, duration_ms) VALUES (?, ?, ?, ?)',
+                (mode, rules_run, new_findings, duration_ms)
+            )
+            conn.commit()
+            return {
+                'mode': mode,
+                'rules_run': rules_run,
+                'findings_written': new_findings,
+                'findings_by_severity': self.summary(conn),
+                'duration_ms': round(duration_ms, 1)
+            }
+        finally:
+            conn.close()
+
+    def summary(self, conn: sqlite3.Connection = None) -> Dict[str, int]:
+        """Current finding counts by severity"""
+        own = conn is None
+        conn = conn or sqlite3.connect(self.db_path)
+        try:
+            return dict(conn.execute(
+                'SELECT severity, COUNT(*) FROM data_quality_findings GROUP BY severity'
+            ).fetchall())
+        finally:
+            if own:
+                conn.close()
+
+    def findings(self, table: str = None, rule_names: List[str] = None, limit: int = None) -> List[Dict]:
+        """Stored findings, optionally for one table or a set of rules"""
+        where, params = ['1 = 1'], []
+        if table:
+            where.append('table_name = ?')
+            params.append(table)
+        if rule_names:
+            where.append(f"rule_name IN ({', '.join('?' * len(rule_names))})")
+            params.extend(rule_names)
+        sql = f"SELECT * FROM data_quality_findings WHERE {' AND '.join(where)} ORDER BY table_name, row_id, rule_name"
+        if limit:
+            sql += f' LIMIT {int(limit)}'
+
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            return [dict(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the data-quality rules')
+    parser.add_argument('--db', default='restaurant_calculator.db', help='Database path')
+    parser.add_argument('--full', action='store_true', help='Re-check every row, not just changed ones')
+    parser.add_argument('--rule', action='append', help='Only run this rule (repeatable)')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent rule workers')
+    parser.add_argument('--show', type=int, default=0, help='Print this many findings')
+    args = parser.parse_args()
+
+    engine = DataQualityEngine(args.db, workers=args.workers)
+    result = engine.run(incremental=not args.full, rule_names=args.rule)
+
+    print(f"{result['mode'].title()} run: {result['rules_run']} rules in {result['duration_ms']}ms")
+    for severity, count in sorted(result['findings_by_severity'].items()):
+        print(f"  {severity}: {count}")
+
+    for finding in engine.findings(rule_names=args.rule, limit=args.show) if args.show else []:
+        print(f"  [{finding['severity']}] {finding['table_name']} #{finding['row_id']}: {finding['message']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,6 @@ Checks data integrity, Toast POS compliance, and system consistency
 
 import sqlite3
 from datetime import datetime
-from decimal import Decimal
 
 class DataValidator:
     def __init__(self, db_path='restaurant_calculator.db'):
@@ -25,20 +24,9 @@ class DataValidator:
         # Menu System Checks
         self.check_menu_system()
         
-        # Recipe Checks
-        self.check_recipes()
-        
-        # Menu Item Checks
-        self.check_menu_items()
-        
-        # Toast POS Compliance
-        self.check_toast_compliance()
-        
-        # Cost Calculations
-        self.check_cost_calculations()
-        
-        # Data Relationships
-        self.check_relationships()
+        # Recipe, menu item, Toast POS, cost and relationship checks run as
+        # data-quality rules (shared with audit.py)
+        self.check_data_quality_rules()
         
         # Generate report
         self.generate_report()
@@ -73,155 +61,6 @@ class DataValidator:
         if orphans['cnt'] > 0:
             self.warnings.append(f"{orphans['cnt']} menu items not assigned to any menu")
         
-        print(f"  ✓ Completed menu system checks\n")
-    
-    def check_recipes(self):
-        """Validate recipe data"""
-        print("Checking Recipes...")
-        
-        # Check for prep recipes with menu prices
-        prep_with_price = self.conn.execute("""
-            SELECT COUNT(*) as cnt FROM recipes 
-            WHERE recipe_type = 'PrepRecipe' AND menu_price > 0
-        """).fetchone()
-        
-        if prep_with_price['cnt'] > 0:
-            self.issues.append(f"{prep_with_price['cnt']} prep recipes have menu prices (should be 0)")
-        
-        # Check for recipes with extreme food cost percentages
-        extreme_costs = self.conn.execute("""
-            SELECT recipe_name, food_cost_percentage, recipe_type
-            FROM recipes 
-            WHERE food_cost_percentage > 100 OR food_cost_percentage < 0
-        """).fetchall()
-        
-        for r in extreme_costs:
-            self.issues.append(f"Recipe '{r['recipe_name']}' has invalid food cost: {r['food_cost_percentage']}%")
-        
-        # Check for missing recipe status
-        no_status = self.conn.execute("""
-            SELECT COUNT(*) as cnt FROM recipes 
-            WHERE status IS NULL OR status = ''
-        """).fetchone()
-        
-        if no_status['cnt'] > 0:
-            self.warnings.append(f"{no_status['cnt']} recipes missing status (Draft/Complete)")
-        
-        print(f"  ✓ Completed recipe checks\n")
-    
-    def check_menu_items(self):
-        """Validate menu items"""
-        print("Checking Menu Items...")
-        
-        # Check for menu items without recipes
-        no_recipe = self.conn.execute("""
-            SELECT COUNT(*) as cnt FROM menu_items 
-            WHERE recipe_id IS NULL OR recipe_id = 0
-        """).fetchone()
-        
-        if no_recipe['cnt'] > 0:
-            self.issues.append(f"{no_recipe['cnt']} menu items without recipes")
-        
-        # Check for menu items with zero price
-        zero_price = self.conn.execute("""
-            SELECT item_name FROM menu_items 
-            WHERE menu_price = 0 OR menu_price IS NULL
-        """).fetchall()
-        
-        if zero_price:
-            for item in zero_price[:5]:  # Show first 5
-                self.warnings.append(f"Menu item '{item['item_name']}' has no price")
-        
-        # Check food cost percentages
-        high_cost = self.conn.execute("""
-            SELECT item_name, food_cost_percent 
-            FROM menu_items 
-            WHERE food_cost_percent > 50
-            ORDER BY food_cost_percent DESC
-            LIMIT 10
-        """).fetchall()
-        
-        if high_cost:
-            self.info.append(f"{len(high_cost)} menu items with >50% food cost (may need review)")
-        
-        print(f"  ✓ Completed menu item checks\n")
-    
-    def check_toast_compliance(self):
-        """Check Toast POS compliance rules"""
-        print("Checking Toast POS Compliance...")
-        
-        # Rule: 1 menu item = 1 recipe
-        violations = self.conn.execute("""
-            SELECT recipe_id, COUNT(DISTINCT id) as item_count
-            FROM menu_items
-            WHERE recipe_id IS NOT NULL
-            GROUP BY recipe_id
-            HAVING item_count > 1
-        """).fetchall()
-        
-        if violations:
-            self.issues.append(f"{len(violations)} recipes used by multiple menu items (Toast requires 1:1)")
-        
-        # Check recipe naming conventions
-        bad_names = self.conn.execute("""
-            SELECT recipe_name FROM recipes
-            WHERE recipe_name LIKE '%  %' OR recipe_name LIKE '% ' OR recipe_name LIKE ' %'
-        """).fetchall()
-        
-        if bad_names:
-            self.warnings.append(f"{len(bad_names)} recipes with extra spaces in names")
-        
-        print(f"  ✓ Completed Toast compliance checks\n")
-    
-    def check_cost_calculations(self):
-        """Validate cost calculations"""
-        print("Checking Cost Calculations...")
-        
-        # Check for mismatched costs between recipes and menu items
-        mismatches = self.conn.execute("""
-            SELECT mi.item_name, mi.food_cost as mi_cost, r.food_cost as r_cost
-            FROM menu_items mi
-            JOIN recipes r ON mi.recipe_id = r.id
-            WHERE ABS(mi.food_cost - r.food_cost) > 0.01
-        """).fetchall()
-        
-        if mismatches:
-            self.warnings.append(f"{len(mismatches)} menu items with cost mismatches vs recipes")
-        
-        # Check for invalid percentages
-        invalid_pct = self.conn.execute("""
-            SELECT item_name, food_cost, menu_price, food_cost_percent,
-                   ROUND((food_cost / NULLIF(menu_price, 0)) * 100, 2) as calc_percent
-            FROM menu_items
-            WHERE menu_price > 0 
-            AND ABS(food_cost_percent - ROUND((food_cost / menu_price) * 100, 2)) > 0.1
-        """).fetchall()
-        
-        if invalid_pct:
-            for item in invalid_pct[:3]:
-                self.issues.append(
-                    f"Menu item '{item['item_name']}' has incorrect food cost %: "
-                    f"{item['food_cost_percent']}% (should be {item['calc_percent']}%)"
-                )
-        
-        print(f"  ✓ Completed cost calculation checks\n")
-    
-    def check_relationships(self):
-        """Check data relationships and foreign keys"""
-        print("Checking Data Relationships...")
-        
-        # Check for invalid recipe references
-        invalid_refs = self.conn.execute("""
-            SELECT mi.item_name, mi.recipe_id
-            FROM menu_items mi
-            LEFT JOIN recipes r ON mi.recipe_id = r.id
-            WHERE mi.recipe_id IS NOT NULL AND r.id IS NULL
-        """).fetchall()
-        
-        if invalid_refs:
-            for ref in invalid_refs:
-                self.issues.append(f"Menu item '{ref['item_name']}' references non-existent recipe ID {ref['recipe_id']}")
-        
         # Check menu_menu_items integrity
         invalid_menu = self.conn.execute("""
             SELECT COUNT(*) as cnt FROM menu_menu_items mmi
@@ -231,7 +70,31 @@ class DataValidator:
         if invalid_menu['cnt'] > 0:
             self.issues.append(f"{invalid_menu['cnt']} menu assignments reference non-existent menus")
         
-        print(f"  ✓ Completed relationship checks\n")
+        print(f"  ✓ Completed menu system checks\n")
+    
+    def check_data_quality_rules(self):
+        """Run the data-quality rules and report their findings by rule"""
+        print("Checking Data Quality Rules...")
+        from data_quality_rules import DataQualityEngine
+        
+        self.conn.commit()
+        engine = DataQualityEngine(self.db_path)
+        engine.run()
+        
+        by_rule = self.conn.execute("""
+            SELECT rule_name, severity, COUNT(*) as cnt, MIN(message) as example
+            FROM data_quality_findings
+            GROUP BY rule_name, severity
+            ORDER BY rule_name
+        """).fetchall()
+        
+        buckets = {'error': self.issues, 'warning': self.warnings, 'info': self.info}
+        for r in by_rule:
+            buckets.get(r['severity'], self.info).append(
+                f"{r['cnt']} rows fail rule {r['rule_name']} (e.g. {r['example']})"
+            )
+        
+        print(f"  ✓ Completed data quality rule checks\n")
     
     def generate_report(self):
         """Generate final validation report"""
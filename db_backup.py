@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+db_backup.py - Online database backups with compression and rotation
+
+Backups use the SQLite online backup API (sqlite3.Connection.backup) a few
+hundred pages per step, sleeping between steps, so the live app keeps
+reading and writing while a backup runs: each step holds the read lock only
+for the pages it copies. The copy is checked with PRAGMA quick_check,
+gzipped as a stream into <name>_<YYYYmmdd_HHMMSS>.db.gz and renamed into
+place, so a partial or corrupt backup never shows up in the directory.
+
+Rotation keeps the newest KEEP_LAST backups plus the newest backup of each
+of the last few days, weeks and months.
+
+BackupScheduler runs the same backup-and-rotate in a daemon thread. Every
+gunicorn worker starts one; a non-blocking lock file and the age of the
+newest backup make sure only one of them backs up per interval.
+
+Usage:
+    python db_backup.py backup [--dir backups]
+    python db_backup.py list
+    python db_backup.py rotate [--keep-last 5 --daily 7 --weekly 4 --monthly 6]
+    python db_backup.py verify backups/restaurant_calculator_20260301_020000.db.gz
+    python db_backup.py restore backups/restaurant_calculator_20260301_020000.db.gz
+    python db_backup.py schedule --interval-hours 6
+"""
+
+import argparse
+import fcntl
+import gzip
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from metrics import job_timer
+
+DATABASE = 'restaurant_calculator.db'
+
+# Pages copied per backup step and the pause between steps
+BACKUP_PAGES = 256
+STEP_SLEEP = 0.005
+
+# Retention: newest N, then one per day / ISO week / month
+KEEP_LAST = 5
+KEEP_DAILY = 7
+KEEP_WEEKLY = 4
+KEEP_MONTHLY = 6
+
+COPY_CHUNK = 1024 * 1024
+
+BACKUP_NAME = re.compile(r'^(?P<stem>.+)_(?P<stamp>\d{8}_\d{6})\.db\.gz$')
+
+
+class BackupError(RuntimeError):
+    """A backup that could not be taken or failed verification"""
+
+
+def default_backup_dir(db_path: str) -> str:
+    """backups/ next to the database, e.g. /data/backups on the Railway volume"""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), 'backups')
+
+
+def quick_check(db_path: str) -> List[str]:
+    """PRAGMA quick_check problems, empty when the database is sound"""
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        result = [row[0] for row in conn.execute('PRAGMA quick_check')]
+    except sqlite3.DatabaseError as e:
+        return [str(e)]  # not even readable as a database
+    finally:
+        conn.close()
+    return [] if result == ['ok'] else result
+
+
+def backup_database(db_path: str = DATABASE, backup_dir: Optional[str] = None,
+                    pages: int = BACKUP_PAGES, sleep: float = STEP_SLEEP) -> Dict[str, Any]:
+    """Take a verified, gzipped online backup and return where it went"""
+    backup_dir = backup_dir or default_backup_dir(db_path)
+    os.makedirs(backup_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    final_path = os.path.join(backup_dir, f'{stem}_{stamp}.db.gz')
+    if os.path.exists(final_path):
+        raise BackupError(f"{final_path} already exists")
+
+    started = time.perf_counter()
+    steps = [0]
+
+    def progress(status, remaining, total):
+        steps[0] += 1
+        if sleep:
+            time.sleep(sleep)  # let writers in between steps
+
+    fd, copy_path = tempfile.mkstemp(suffix='.db', dir=backup_dir)
+    os.close(fd)
+    try:
+        source = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+        target = sqlite3.connect(copy_path)
+        try:
+            source.backup(target, pages=pages, progress=progress)
+        finally:
+            target.close()
+            source.close()
+
+        problems = quick_check(copy_path)
+        if problems:
+            raise BackupError(f"Backup of {db_path} failed quick_check: {'; '.join(problems[:5])}")
+
+        digest = hashlib.sha256()
+        partial_path = final_path + '.partial'
+        with open(copy_path, 'rb') as raw, open(partial_path, 'wb') as out:
+            with gzip.GzipFile(fileobj=out, mode='wb', mtime=0) as compressed:
+                for chunk in iter(lambda: raw.read(COPY_CHUNK), b''):
+                    compressed.write(chunk)
+                    digest.update(chunk)
+        os.replace(partial_path, final_path)
+        size = os.path.getsize(copy_path)
+    finally:
+        for path in (copy_path, final_path + '.partial'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    return {
+        'path': final_path,
+        'database_bytes': size,
+        'compressed_bytes': os.path.getsize(final_path),
+        'database_sha256': digest.hexdigest(),
+        'steps': steps[0],
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def list_backups(backup_dir: str) -> List[Dict[str, Any]]:
+    """Backups in a directory, newest first"""
+    backups = []
+    for name in os.listdir(backup_dir) if os.path.isdir(backup_dir) else []:
+        match = BACKUP_NAME.match(name)
+        if match:
+            backups.append({
+                'path': os.path.join(backup_dir, name),
+                'taken_at': datetime.strptime(match.group('stamp'), '%Y%m%d_%H%M%S'),
+                'bytes': os.path.getsize(os.path.join(backup_dir, name)),
+            })
+    return sorted(backups, key=lambda backup: backup['taken_at'], reverse=True)
+
+
+def select_retained(taken: List[datetime], keep_last: int = KEEP_LAST, daily: int = KEEP_DAILY,
+                    weekly: int = KEEP_WEEKLY, monthly: int = KEEP_MONTHLY) -> set:
+    """Indexes of the backups to keep, given their times newest first"""
+    keep = set(range(min(keep_last, len(taken))))
+    for count, bucket in ((daily, lambda at: at.date()),
+                          (weekly, lambda at: at.isocalendar()[:2]),
+                          (monthly, lambda at: (at.year, at.month))):
+        seen = []
+        for index, at in enumerate(taken):
+            key = bucket(at)
+            if key not in seen:
+                if len(seen) == count:
+                    break
+                seen.append(key)
+                keep.add(index)  # newest backup in this bucket
+    return keep
+
+
+def rotate_backups(backup_dir: str, **retention) -> List[str]:
+    """Delete backups outside the retention schedule, returning their paths"""
+    backups = list_backups(backup_dir)
+    keep = select_retained([backup['taken_at'] for backup in backups], **retention)
+    removed = []
+    for index, backup in enumerate(backups):
+        if index not in keep:
+            os.remove(backup['path'])
+            removed.append(backup['path'])
+    return removed
+
+
+def _decompress(backup_path: str, directory: str) -> str:
+    fd, path = tempfile.mkstemp(suffix='.db', dir=directory)
+    with os.fdopen(fd, 'wb') as out, gzip.open(backup_path, 'rb') as compressed:
+        shutil.copyfileobj(compressed, out, COPY_CHUNK)
+    return path
+
+
+def verify_backup(backup_path: str) -> List[str]:
+    """Decompress a backup and run quick_check on it"""
+    path = _decompress(backup_path, os.path.dirname(os.path.abspath(backup_path)))
+    try:
+        return quick_check(path)
+    finally:
+        os.remove(path)
+
+
+def restore_backup(backup_path: str, db_path: str = DATABASE, pages: int = BACKUP_PAGES) -> Dict[str, Any]:
+    """
+    Restore a backup over the live database through the backup API
+
+    Other connections see either the old or the restored database, never a
+    half-copied file, which a plain file copy would not guarantee.
+    """
+    path = _decompress(backup_path, os.path.dirname(os.path.abspath(db_path)))
+    try:
+        problems = quick_check(path)
+        if problems:
+            raise BackupError(f"{backup_path} failed quick_check: {'; '.join(problems[:5])}")
+        source = sqlite3.connect(path)
+        target = sqlite3.connect(db_path)
+        try:
+            source.backup(target, pages=pages)
+        finally:
+            target.close()
+            source.close()
+    finally:
+        os.remove(path)
+    return {'restored': backup_path, 'database': db_path}
+
+
+class BackupScheduler:
+    """Backup and rotate every interval in a daemon thread, once across processes"""
+
+    def __init__(self, db_path: str = DATABASE, backup_dir: Optional[str] = None,
+                 interval_hours: float = 24, **retention):
+        self.db_path = db_path
+        self.backup_dir = backup_dir or default_backup_dir(db_path)
+        self.interval = interval_hours * 3600
+        self.retention = retention
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.last_result = None
+
+    def due(self) -> bool:
+        backups = list_backups(self.backup_dir)
+        return not backups or (datetime.now() - backups[0]['taken_at']).total_seconds() >= self.interval
+
+    def run_once(self) -> Optional[Dict[str, Any]]:
+        """Back up and rotate if no other process is doing so and the newest backup is old enough"""
+        os.makedirs(self.backup_dir, exist_ok=True)
+        with open(os.path.join(self.backup_dir, '.backup.lock'), 'w') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None  # another worker is backing up
+            if not self.due():
+                return None
+            with job_timer('backup'):
+                result = backup_database(self.db_path, self.backup_dir)
+                result['removed'] = rotate_backups(self.backup_dir, **self.retention)
+            self.last_result = result
+            return result
+
+    def _loop(self):
+        while not self.stop_event.is_set():
+            try:
+                result = self.run_once()
+                if result:
+                    print(f"Backup written to {result['path']} ({result['compressed_bytes']:,} bytes), "
+                          f"{len(result['removed'])} rotated out")
+            except Exception as e:
+                print(f"Warning: Scheduled backup failed: {e}")
+            # Wake at least hourly so a restarted worker picks the schedule back up
+            self.stop_event.wait(min(self.interval, 3600))
+
+    def start(self) -> 'BackupScheduler':
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._loop, name='db-backup', daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Online SQLite backups")
+    parser.add_argument('--db', default=DATABASE, help="Database path")
+    parser.add_argument('--dir', help="Backup directory (default: backups/ next to the database)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('backup', help="Take a backup now and rotate")
+    subparsers.add_parser('list', help="List backups, newest first")
+    rotate_parser = subparsers.add_parser('rotate', help="Delete backups outside the retention schedule")
+    for name, default in (('keep-last', KEEP_LAST), ('daily', KEEP_DAILY),
+                          ('weekly', KEEP_WEEKLY), ('monthly', KEEP_MONTHLY)):
+        rotate_parser.add_argument(f'--{name}', type=int, default=default)
+    verify_parser = subparsers.add_parser('verify', help="quick_check a backup")
+    verify_parser.add_argument('path')
+    restore_parser = subparsers.add_parser('restore', help="Restore a backup over the database")
+    restore_parser.add_argument('path')
+    schedule_parser = subparsers.add_parser('schedule', help="Run the backup scheduler in the foreground")
+    schedule_parser.add_argument('--interval-hours', type=float, default=24)
+
+    args = parser.parse_args()
+    backup_dir = args.dir or default_backup_dir(args.db)
+
+    if args.command == 'backup':
+        result = backup_database(args.db, backup_dir)
+        removed = rotate_backups(backup_dir)
+        print(f"✓ {result['path']}: {result['database_bytes']:,} bytes -> {result['compressed_bytes']:,} "
+              f"in {result['seconds']}s ({result['steps']} steps), {len(removed)} rotated out")
+    elif args.command == 'list':
+        for backup in list_backups(backup_dir):
+            print(f"{backup['taken_at']:%Y-%m-%d %H:%M:%S}  {backup['bytes']:>12,}  {backup['path']}")
+    elif args.command == 'rotate':
+        removed = rotate_backups(backup_dir, keep_last=args.keep_last, daily=args.daily,
+                                 weekly=args.weekly, monthly=args.monthly)
+        print(f"Removed {len(removed)} backups")
+    elif args.command == 'verify':
+        problems = verify_backup(args.path)
+        print("✓ ok" if not problems else '\n'.join(problems))
+        raise SystemExit(1 if problems else 0)
+    elif args.command == 'restore':
+        print(f"✓ Restored {restore_backup(args.path, args.db)['restored']} into {args.db}")
+    else:
+        scheduler = BackupScheduler(args.db, backup_dir, args.interval_hours).start()
+        try:
+            scheduler.thread.join()
+        except KeyboardInterrupt:
+            scheduler.stop()
+
+
+if __name__ == '__main__':
+    main()
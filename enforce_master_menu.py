@@ -8,6 +8,8 @@ import sqlite3
 import sys
 from datetime import datetime
 
+from menu_assignments import ensure_assignment_index, ensure_master_menu_assignment
+
 def enforce_master_menu():
     """Add all menu items to the Master Menu"""
     
@@ -25,30 +27,14 @@ def enforce_master_menu():
         master_menu_id = result[0]
         print(f"Master Menu ID: {master_menu_id}")
         
-        # Get all menu items
-        cursor.execute("SELECT id, item_name FROM menu_items ORDER BY menu_group, item_name")
-        all_items = cursor.fetchall()
-        print(f"Total menu items: {len(all_items)}")
-        
-        # Get current Master Menu assignments
-        cursor.execute("""
-            SELECT menu_item_id 
-            FROM menu_menu_items 
-            WHERE menu_id = ?
-        """, (master_menu_id,))
-        current_assignments = set([row[0] for row in cursor.fetchall()])
-        print(f"Current Master Menu assignments: {len(current_assignments)}")
+        # Count all menu items
+        cursor.execute("SELECT COUNT(*) FROM menu_items")
+        total_items = cursor.fetchone()[0]
+        print(f"Total menu items: {total_items}")
         
-        # Add missing items to Master Menu
-        added_count = 0
-        for item_id, item_name in all_items:
-            if item_id not in current_assignments:
-                cursor.execute("""
-                    INSERT INTO menu_menu_items (menu_id, menu_item_id, sort_order)
-                    VALUES (?, ?, ?)
-                """, (master_menu_id, item_id, added_count))
-                added_count += 1
-                print(f"Added to Master Menu: {item_name} (ID: {item_id})")
+        # Add missing items to Master Menu in one set-based statement
+        ensure_assignment_index(conn)
+        added_count = ensure_master_menu_assignment(conn)
         
         # Commit changes
         conn.commit()
@@ -64,9 +50,9 @@ def enforce_master_menu():
         print(f"\nSummary:")
         print(f"- Items added to Master Menu: {added_count}")
         print(f"- Total items in Master Menu: {final_count}")
-        print(f"- Total menu items in system: {len(all_items)}")
+        print(f"- Total menu items in system: {total_items}")
         
-        if final_count == len(all_items):
+        if final_count == total_items:
             print("✓ SUCCESS: All menu items are now in the Master Menu")
         else:
             print("⚠ WARNING: Count mismatch - please investigate")
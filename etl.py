@@ -10,11 +10,14 @@ import logging
 from datetime import datetime
 from pathlib import Path
 from typing import Tuple, Optional, Dict, List
-import pandas as pd
 from decimal import Decimal
 import subprocess
 import sys
 
+from cost_history import record_snapshot
+from metrics import timed_job
+from query_instrumentation import configure_slow_query_log, connect as db_connect, recording
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -27,7 +30,7 @@ class ETLPipeline:
     
     def __init__(self, db_path: str = 'restaurant_calculator.db'):
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path)
+        self.conn = db_connect(db_path)
         self.uom_aliases = self._load_uom_aliases()
         self.error_log = []
         
@@ -206,6 +209,7 @@ class ETLPipeline:
     def process_inventory_csv(self, csv_path: str):
         """Process inventory CSV with pack size and UOM fixes"""
         logger.info(f"Processing inventory CSV: {csv_path}")
+        import pandas as pd  # only the CSV paths need pandas
         
         # Read CSV
         df = pd.read_csv(csv_path, encoding='utf-8-sig')
@@ -258,6 +262,7 @@ class ETLPipeline:
             processed += 1
         
         self.conn.commit()
+        record_snapshot(self.conn, 'etl_inventory_import')
         logger.info(f"Processed {processed} inventory items")
     
     def process_vendor_products_csv(self, csv_path: str):
@@ -271,6 +276,7 @@ class ETLPipeline:
     def seed_disposables(self, csv_path: str):
         """Seed disposable inventory items"""
         logger.info(f"Seeding disposable items from: {csv_path}")
+        import pandas as pd
         
         # Read CSV
         df = pd.read_csv(csv_path, encoding='utf-8-sig')
@@ -462,6 +468,7 @@ class ETLPipeline:
         original_file = audit_files[-2]  # Second most recent
         new_file = audit_files[-1]       # Most recent
         
+        import pandas as pd
         original_df = pd.read_csv(original_file)
         new_df = pd.read_csv(new_file)
         
@@ -498,6 +505,7 @@ class ETLPipeline:
         
         logger.info(f"Delta report saved to {summary_file}")
     
+    @timed_job('etl')
     def run_full_etl(self):
         """Run complete ETL pipeline with P1 fixes"""
         logger.info("Starting full ETL pipeline with P1 fixes...")
@@ -706,61 +714,64 @@ def main():
     
     args = parser.parse_args()
     
-    etl = ETLPipeline()
+    # Statements slower than SLOW_QUERY_MS go to slow_queries.log with their plans
+    configure_slow_query_log()
+    with recording(f'etl {args.command}', keep_statements=False):
+        etl = ETLPipeline()
     
-    try:
-        if args.command == 'ingest':
-            if args.wipe:
-                logger.info("Wiping inventory and vendor_products tables...")
-                cursor = etl.conn.cursor()
-                cursor.execute("DELETE FROM vendor_products")
-                cursor.execute("DELETE FROM inventory")
-                etl.conn.commit()
-                logger.info("Tables wiped")
+        try:
+            if args.command == 'ingest':
+                if args.wipe:
+                    logger.info("Wiping inventory and vendor_products tables...")
+                    cursor = etl.conn.cursor()
+                    cursor.execute("DELETE FROM vendor_products")
+                    cursor.execute("DELETE FROM inventory")
+                    etl.conn.commit()
+                    logger.info("Tables wiped")
             
-            # Process CSV files
-            if args.files:
-                for csv_file in args.files:
-                    if Path(csv_file).exists():
-                        logger.info(f"Processing {csv_file}")
-                        etl.process_inventory_csv(csv_file)
-                    else:
-                        logger.error(f"File not found: {csv_file}")
-            else:
-                # Use default directory
-                etl.run_full_etl()
+                # Process CSV files
+                if args.files:
+                    for csv_file in args.files:
+                        if Path(csv_file).exists():
+                            logger.info(f"Processing {csv_file}")
+                            etl.process_inventory_csv(csv_file)
+                        else:
+                            logger.error(f"File not found: {csv_file}")
+                else:
+                    # Use default directory
+                    etl.run_full_etl()
             
-            if args.fill_prices:
-                etl.backfill_prices()
+                if args.fill_prices:
+                    etl.backfill_prices()
             
-            # Write error log
-            etl.write_error_log()
+                # Write error log
+                etl.write_error_log()
             
-            # Run audit
-            etl.run_audit()
+                # Run audit
+                etl.run_audit()
         
-        elif args.command == 'p1':
-            etl.run_full_etl()
+            elif args.command == 'p1':
+                etl.run_full_etl()
         
-        elif args.command == 'p2':
-            results = etl.run_p2_fixes()
+            elif args.command == 'p2':
+                results = etl.run_p2_fixes()
             
-            print("\nP2 Fix Results:")
-            print(f"- Prices backfilled: {results['prices_backfilled']}")
-            print(f"- Prices still null: {results['prices_still_null']}")
-            print(f"- Recipes with >100% cost: {results['recipe_issues']['high_cost']}")
-            print(f"- Recipes with no ingredients: {results['recipe_issues']['no_ingredients']}")
-            print(f"- Recipes with zero cost: {results['recipe_issues']['zero_cost']}")
-        
-        elif args.command == 'seed':
-            if args.file and Path(args.file).exists():
-                count = etl.seed_disposables(args.file)
-                print(f"Seeded {count} disposable items")
-            else:
-                logger.error("Seed file not found or not specified")
+                print("\nP2 Fix Results:")
+                print(f"- Prices backfilled: {results['prices_backfilled']}")
+                print(f"- Prices still null: {results['prices_still_null']}")
+                print(f"- Recipes with >100% cost: {results['recipe_issues']['high_cost']}")
+                print(f"- Recipes with no ingredients: {results['recipe_issues']['no_ingredients']}")
+                print(f"- Recipes with zero cost: {results['recipe_issues']['zero_cost']}")
+        
+            elif args.command == 'seed':
+                if args.file and Path(args.file).exists():
+                    count = etl.seed_disposables(args.file)
+                    print(f"Seeded {count} disposable items")
+                else:
+                    logger.error("Seed file not found or not specified")
         
-    finally:
-        etl.close()
+        finally:
+            etl.close()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+fixed_point.py - Integer micro-unit arithmetic for the costing hot loop
+
+Money and quantities are plain ints holding millionths (micro-units), so a
+cost line is a few integer multiplies and one rounded division instead of
+a chain of Decimal(str(x)) conversions and quantize() calls.
+
+Every helper rounds exactly once, half-even like Decimal's default context,
+and only where the caller says so: cost lines round to cents and unit costs
+to 4 places, the same boundaries the Decimal path quantizes at. Convert in
+with to_micros() and back out with to_decimal() at the edges.
+
+Inputs with more than six decimals (float noise like 0.30000000000000004)
+cannot be held exactly; to_micros() raises InexactError for them so callers
+can cost that value with Decimal instead of silently rounding it.
+"""
+
+import re
+from decimal import Decimal
+from typing import Union
+
+SCALE = 1_000_000
+PLACES = 6
+
+Micros = int
+
+Number = Union[int, float, str, Decimal]
+
+_DECIMAL_TEXT = re.compile(r'\s*([+-]?)(\d*)(?:\.(\d*))?\s*\Z')
+
+
+class InexactError(ValueError):
+    """A value has more decimal places than micro-units can hold"""
+
+
+def round_ratio(numerator: int, denominator: int) -> int:
+    """numerator / denominator rounded half-even to an int"""
+    if denominator < 0:
+        numerator, denominator = -numerator, -denominator
+    quotient, remainder = divmod(numerator, denominator)
+    twice = remainder * 2
+    if twice > denominator or (twice == denominator and quotient % 2):
+        quotient += 1
+    return quotient
+
+
+def to_micros(value: Number, exact: bool = True) -> Micros:
+    """
+    Exact micro-units for a number, parsed from its string form like Decimal(str(value))
+
+    Anything Decimal would reject (None, '', 'n/a') raises the same InvalidOperation.
+    Values finer than a micro-unit raise InexactError, or round half-even with exact=False.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value * SCALE
+    text = value if isinstance(value, str) else str(value)
+    match = _DECIMAL_TEXT.match(text)
+    if match is None or not (match.group(2) or match.group(3)):
+        # Exponents, underscores and invalid text go through Decimal itself
+        numerator, denominator = Decimal(text).as_integer_ratio()
+        if exact and (numerator * SCALE) % denominator:
+            raise InexactError(text)
+        return round_ratio(numerator * SCALE, denominator)
+
+    sign, whole, fraction = match.group(1), match.group(2), match.group(3) or ''
+    if len(fraction) <= PLACES:
+        micros = int(whole or '0') * SCALE + int(fraction.ljust(PLACES, '0'))
+    elif exact and fraction[PLACES:].strip('0'):
+        raise InexactError(text)
+    else:
+        micros = round_ratio(int((whole or '0') + fraction) * SCALE, 10 ** len(fraction))
+    return -micros if sign == '-' else micros
+
+
+def mul(a: Micros, b: Micros) -> Micros:
+    return round_ratio(a * b, SCALE)
+
+
+def div(a: Micros, b: Micros) -> Micros:
+    return round_ratio(a * SCALE, b)
+
+
+def quantize(micros: Micros, places: int) -> Micros:
+    """Round to the given number of decimal places, staying in micro-units"""
+    step = 10 ** (PLACES - places)
+    return round_ratio(micros, step) * step
+
+
+def to_decimal(micros: Micros, places: int = None) -> Decimal:
+    """
+    Decimal for a micro-unit value
+
+    With places, round to exactly that many decimals (like quantize). Without,
+    drop trailing zeros down to cents, so whole-cent amounts come out as '2.50'.
+    """
+    if places is None:
+        places = PLACES
+        while places > 2 and micros % 10 ** (PLACES - places + 1) == 0:
+            places -= 1
+    return Decimal(round_ratio(micros, 10 ** (PLACES - places))).scaleb(-places)
@@ -0,0 +1,20 @@
+"""
+gunicorn.conf.py - Load the app once in the master and fork workers from it
+
+gunicorn reads this file from the working directory, so the existing
+`gunicorn app:app --bind 0.0.0.0:$PORT` start commands pick it up. The
+master imports app once (startup DDL, catalog snapshot) and the workers
+share that memory copy-on-write. Threads do not survive a fork, so each
+worker starts its backup scheduler and warm start in post_fork.
+"""
+import os
+
+preload_app = True
+
+# Tells app.py to leave its background threads to post_fork
+os.environ['APP_PRELOAD'] = 'true'
+
+
+def post_fork(server, worker):
+    import app
+    app.start_background_threads()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+import_profile.py - Import-time profile of a cold app.py worker
+
+Imports app in a fresh interpreter with python -X importtime, from a
+scratch directory holding an empty database and with scheduled backups and
+warm start turned off, so the numbers are what a gunicorn worker pays
+before it can serve its first request. Reports the total and the slowest
+modules; --save records a baseline and --baseline compares against one.
+
+Usage:
+    python import_profile.py
+    python import_profile.py --top 30 --runs 5
+    python import_profile.py --save reports/import_baseline.json
+    python import_profile.py --baseline reports/import_baseline.json
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Boot the way a worker would, minus the background threads
+COLD_START_ENV = {'BACKUP_INTERVAL_HOURS': '0', 'WARM_START': 'false'}
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+MODULES_MARKER = '--loaded-modules--'
+
+# Modules faster than this are left out of a saved baseline (they stay in 'loaded')
+BASELINE_MIN_MS = 1.0
+
+
+def parse_importtime(stderr: str) -> Dict[str, Dict[str, float]]:
+    """-X importtime output -> module -> self/cumulative milliseconds (top-level imports flagged)"""
+    modules = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        modules[name] = {
+            'self_ms': int(self_us) / 1000,
+            'cumulative_ms': int(cumulative_us) / 1000,
+            'top_level': len(indent) == 1,
+        }
+    return modules
+
+
+def profile_import(module: str = 'app') -> Dict[str, Any]:
+    """Import a module once in a fresh interpreter and return its import profile"""
+    with tempfile.TemporaryDirectory() as scratch:
+        sqlite3.connect(os.path.join(scratch, 'restaurant_calculator.db')).close()
+        code = (f"import sys; sys.path.insert(0, {REPO_DIR!r}); import {module}; "
+                f"print({MODULES_MARKER!r}); print(' '.join(sorted(sys.modules)))")
+        env = dict(os.environ, **COLD_START_ENV)
+        completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=scratch, env=env,
+                                   capture_output=True, text=True, timeout=120)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+
+    modules = parse_importtime(completed.stderr)
+    loaded = completed.stdout.split(MODULES_MARKER, 1)[1].split()
+    return {
+        'module': module,
+        'total_ms': modules[module]['cumulative_ms'],
+        'modules': modules,
+        'loaded': loaded,
+    }
+
+
+def best_of(runs: int, module: str = 'app') -> Dict[str, Any]:
+    """The fastest of several cold imports, to keep scheduler noise out of the baseline"""
+    profiles = [profile_import(module) for _ in range(max(1, runs))]
+    return min(profiles, key=lambda profile: profile['total_ms'])
+
+
+def slowest(profile: Dict[str, Any], top: int = 20, key: str = 'cumulative_ms') -> List[tuple]:
+    return sorted(((name, timing[key]) for name, timing in profile['modules'].items()),
+                  key=lambda item: item[1], reverse=True)[:top]
+
+
+def print_profile(profile: Dict[str, Any], top: int = 20, baseline: Dict[str, Any] = None):
+    print(f"import {profile['module']}: {profile['total_ms']:.1f} ms, {len(profile['loaded'])} modules loaded")
+    if baseline:
+        change = profile['total_ms'] - baseline['total_ms']
+        print(f"baseline: {baseline['total_ms']:.1f} ms ({change:+.1f} ms)")
+        dropped = sorted(set(baseline['loaded']) - set(profile['loaded']))
+        added = sorted(set(profile['loaded']) - set(baseline['loaded']))
+        print(f"no longer loaded: {len(dropped)} modules, newly loaded: {len(added)} modules")
+
+    print(f"\n{'Module':<50} {'Self ms':>9} {'Cumulative ms':>14}")
+    print("-" * 75)
+    for name, _ in slowest(profile, top):
+        timing = profile['modules'][name]
+        print(f"{name:<50} {timing['self_ms']:>9.1f} {timing['cumulative_ms']:>14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import-time profile of a cold app worker')
+    parser.add_argument('--module', default='app', help='Module to import (default: app)')
+    parser.add_argument('--runs', type=int, default=3, help='Cold imports to take the fastest of')
+    parser.add_argument('--top', type=int, default=20, help='Slowest modules to list')
+    parser.add_argument('--save', help='Write the profile as a JSON baseline to this path')
+    parser.add_argument('--baseline', help='Compare against a JSON baseline')
+    args = parser.parse_args()
+
+    profile = best_of(args.runs, args.module)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+    print_profile(profile, args.top, baseline)
+
+    if args.save:
+        saved = dict(profile, modules={name: timing for name, timing in profile['modules'].items()
+                                       if timing['cumulative_ms'] >= BASELINE_MIN_MS})
+        with open(args.save, 'w') as f:
+            json.dump(saved, f, indent=2)
+        print(f"\nBaseline written to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
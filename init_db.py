@@ -5,6 +5,7 @@ Runs automatically on Railway deployment
 """
 import sqlite3
 import os
+import sys
 from datetime import datetime
 
 def init_database():
@@ -133,6 +134,7 @@ def init_database():
                 conn.close()   # Close connection
                 
                 # Import and run the recalculation
+                sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts', 'utilities'))
                 from recalculate_all_costs import recalculate_all_costs
                 recalculate_all_costs()
                 
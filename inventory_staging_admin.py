@@ -6,6 +6,8 @@ Provides Flask routes and functionality for reviewing and approving staged inven
 
 from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for
 import sqlite3
+from query_instrumentation import connect as db_connect
+from metrics import timed_job
 from datetime import datetime
 import json
 from typing import Dict, List, Tuple, Any
@@ -23,7 +25,7 @@ class InventoryStagingAdmin:
     
     def get_review_items(self, filters: Dict = None, page: int = 1, per_page: int = 50) -> Dict:
         """Get items for review with filtering and pagination"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -130,7 +132,7 @@ class InventoryStagingAdmin:
     
     def get_batch_list(self) -> List[Dict]:
         """Get list of all import batches"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         cursor = conn.cursor()
         
         query = """
@@ -165,7 +167,7 @@ class InventoryStagingAdmin:
     
     def update_item(self, staging_id: int, updates: Dict) -> bool:
         """Update a staged item"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         cursor = conn.cursor()
         
         try:
@@ -215,7 +217,7 @@ class InventoryStagingAdmin:
     
     def batch_update(self, staging_ids: List[int], action: str) -> Dict:
         """Perform batch actions on multiple items"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         cursor = conn.cursor()
         
         results = {
@@ -264,9 +266,10 @@ class InventoryStagingAdmin:
         
         return results
     
+    @timed_job('inventory_import')
     def process_to_live(self, batch_id: str = None) -> Dict:
         """Process approved items to live inventory table"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         cursor = conn.cursor()
         
         results = {
@@ -325,8 +328,14 @@ class InventoryStagingAdmin:
         return results
 
 
-# Initialize admin handler
-admin = InventoryStagingAdmin()
+# Admin handler, created on the first request rather than at import
+_admin = None
+
+def get_admin() -> InventoryStagingAdmin:
+    global _admin
+    if _admin is None:
+        _admin = InventoryStagingAdmin()
+    return _admin
 
 # Routes
 @inventory_staging_bp.route('/')
@@ -357,8 +366,8 @@ def index():
             per_page = 50
     
     # Get data
-    result = admin.get_review_items(filters, page, per_page)
-    batches = admin.get_batch_list()
+    result = get_admin().get_review_items(filters, page, per_page)
+    batches = get_admin().get_batch_list()
     
     return render_template('inventory_staging_review.html',
                          items=result['items'],
@@ -374,7 +383,7 @@ def edit_item(staging_id):
     """Edit individual item"""
     if request.method == 'POST':
         updates = request.get_json()
-        success = admin.update_item(staging_id, updates)
+        success = get_admin().update_item(staging_id, updates)
         
         if success:
             return jsonify({'success': True, 'message': 'Item updated successfully'})
@@ -382,7 +391,7 @@ def edit_item(staging_id):
             return jsonify({'success': False, 'message': 'Failed to update item'}), 500
     
     # GET - return item details
-    conn = sqlite3.connect(admin.db_path)
+    conn = db_connect(get_admin().db_path)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
@@ -404,13 +413,13 @@ def batch_action():
     if not staging_ids or not action:
         return jsonify({'error': 'Missing required parameters'}), 400
     
-    results = admin.batch_update(staging_ids, action)
+    results = get_admin().batch_update(staging_ids, action)
     return jsonify(results)
 
 @inventory_staging_bp.route('/process-to-live', methods=['POST'])
 def process_to_live():
     """Process approved items to live inventory"""
     batch_id = request.json.get('batch_id')
-    results = admin.process_to_live(batch_id)
+    results = get_admin().process_to_live(batch_id)
     
     return jsonify(results)
\ No newline at end of file
@@ -2,6 +2,10 @@
 """
 Inventory Staging Loader
 Loads inventory data from CSV into staging table with validation and flagging
+
+Rows are built as slotted records (records.staging_row_type) generated from
+the column map, so every row has the same columns and shares one prepared
+INSERT statement.
 """
 
 import csv
@@ -13,11 +17,19 @@ from pathlib import Path
 import re
 from typing import Dict, List, Tuple, Any
 
+from records import staging_row_type
+
 class InventoryStagingLoader:
     def __init__(self, db_path: str = "restaurant_calculator.db"):
         self.db_path = db_path
         self.config_path = Path("config/column_map_inventory.json")
         self.column_config = self._load_config()
+        self.row_type = staging_row_type([config['target'] for config in self.column_config.values()])
+        columns = self.row_type._field_names
+        self.insert_sql = f"""
+            INSERT INTO stg_inventory_items ({', '.join(columns)})
+            VALUES ({', '.join('?' for _ in columns)})
+        """
         
     def _load_config(self) -> Dict:
         """Load column mapping configuration"""
@@ -90,7 +102,7 @@ class InventoryStagingLoader:
             
         return value, None
     
-    def _validate_row(self, row_data: Dict, cleaned_data: Dict) -> Tuple[bool, List[str]]:
+    def _validate_row(self, row_data: Dict, cleaned_data) -> Tuple[bool, List[str]]:
         """Validate a row and return needs_review flag and list of issues - NEVER rejects, only flags"""
         issues = []
         needs_review = False
@@ -197,21 +209,20 @@ class InventoryStagingLoader:
                         continue  # Skip this row entirely
                     
                     # If we get here, the row passes exclusion rules - proceed with loading
-                    insert_data = {
-                        'staging_id': None,  # Auto-increment
-                        'original_row_number': row_num,
-                        'import_batch_id': batch_id,
-                        'source_filename': source_filename,
-                        'needs_review': False  # Default to false
-                    }
+                    insert_data = self.row_type(
+                        original_row_number=row_num,
+                        import_batch_id=batch_id,
+                        source_filename=source_filename,
+                        duplicate_check_hash=None
+                    )
                     
                     try:
                         # Create duplicate hash
-                        insert_data['duplicate_check_hash'] = self._create_duplicate_hash(row)
+                        insert_data.duplicate_check_hash = self._create_duplicate_hash(row)
                     except Exception as e:
                         # Even if hash fails, still load the row
-                        insert_data['duplicate_check_hash'] = f"hash_error_row_{row_num}"
-                        insert_data['needs_review'] = True
+                        insert_data.duplicate_check_hash = f"hash_error_row_{row_num}"
+                        insert_data.needs_review = True
                     
                     # Process each mapped column
                     flags = []
@@ -224,36 +235,36 @@ class InventoryStagingLoader:
                             raw_value = row.get(original_col, '')
                             
                             # Always store raw value
-                            insert_data[f"{target_col}_raw"] = raw_value
+                            setattr(insert_data, f"{target_col}_raw", raw_value)
                             
                             # Try to clean and validate
                             cleaned_value, flag = self._clean_value(raw_value, config['type'])
-                            insert_data[f"{target_col}_cleaned"] = cleaned_value
+                            setattr(insert_data, f"{target_col}_cleaned", cleaned_value)
                             
                             if flag:
-                                insert_data[f"{target_col}_flag"] = flag
+                                setattr(insert_data, f"{target_col}_flag", flag)
                                 flags.append(f"{target_col}: {flag}")
                                 
                         except Exception as e:
                             # If cleaning fails, store raw value and flag error
-                            insert_data[f"{target_col}_cleaned"] = None
-                            insert_data[f"{target_col}_flag"] = f"processing_error: {str(e)}"
+                            setattr(insert_data, f"{target_col}_cleaned", None)
+                            setattr(insert_data, f"{target_col}_flag", f"processing_error: {str(e)}")
                             all_issues.append(f"{target_col}: processing error")
-                            insert_data['needs_review'] = True
+                            insert_data.needs_review = True
                     
                     # Validate row
                     try:
                         needs_review, issues = self._validate_row(row, insert_data)
                         if needs_review:
-                            insert_data['needs_review'] = True
+                            insert_data.needs_review = True
                         all_issues.extend(issues)
                     except Exception as e:
-                        insert_data['needs_review'] = True
+                        insert_data.needs_review = True
                         all_issues.append(f"validation_error: {str(e)}")
                     
-                    if insert_data['needs_review']:
+                    if insert_data.needs_review:
                         stats['needs_review'] += 1
-                        insert_data['review_notes'] = '; '.join(all_issues + flags)[:1000]  # Limit length
+                        insert_data.review_notes = '; '.join(all_issues + flags)[:1000]  # Limit length
                     
                     # Check for duplicates (but don't fail if it errors)
                     try:
@@ -262,35 +273,20 @@ class InventoryStagingLoader:
                             WHERE duplicate_check_hash = ? 
                             AND import_batch_id != ?
                             LIMIT 1
-                        """, (insert_data['duplicate_check_hash'], batch_id))
+                        """, (insert_data.duplicate_check_hash, batch_id))
                         
                         duplicate = cursor.fetchone()
                         if duplicate:
-                            insert_data['is_duplicate'] = True
-                            insert_data['duplicate_of_staging_id'] = duplicate[0]
+                            insert_data.is_duplicate = True
+                            insert_data.duplicate_of_staging_id = duplicate[0]
                             stats['duplicates'] += 1
                     except Exception as e:
                         # Don't fail on duplicate check errors
                         pass
                     
-                    # Build INSERT query - ALWAYS insert something
+                    # INSERT every column - unset fields hold the table defaults - ALWAYS insert something
                     try:
-                        columns = []
-                        values = []
-                        placeholders = []
-                        
-                        for key, value in insert_data.items():
-                            if key != 'staging_id':  # Skip auto-increment field
-                                columns.append(key)
-                                values.append(value)
-                                placeholders.append('?')
-                        
-                        query = f"""
-                            INSERT INTO stg_inventory_items ({', '.join(columns)})
-                            VALUES ({', '.join(placeholders)})
-                        """
-                        
-                        cursor.execute(query, values)
+                        cursor.execute(self.insert_sql, [value for _, value in insert_data.items()])
                         stats['loaded_rows'] += 1
                         
                     except Exception as e:
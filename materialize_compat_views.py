@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+materialize_compat_views.py - Collapse the compatibility view stack into indexed shadow tables
+
+migrations/004-012 left the app reading recipes, recipe_ingredients, menus,
+menu_versions, menu_menu_items and menu_items through views over
+recipes_actual, menu_items_actual, menus_actual and menu_assignments.
+menu_items in particular runs two correlated subqueries per row.
+
+For each view this tool:
+1. keeps the original definition as <view>_source
+2. materializes it into an indexed shadow table mv_<view>
+3. redefines <view> as SELECT * FROM mv_<view>, which SQLite flattens,
+   so routes read the shadow table and its indexes directly
+4. installs triggers on the base tables that re-sync only the affected
+   shadow rows (in dependency order) on every insert, update and delete
+
+INSTEAD OF triggers on menus and menu_menu_items write through to
+menus_actual/menu_assignments, so create_menu, edit_menu, delete_menu and
+toggle_menu_item work against the views.
+
+Usage:
+    python materialize_compat_views.py                 # materialize
+    python materialize_compat_views.py --rebuild       # re-sync every shadow table
+    python materialize_compat_views.py --rollback      # restore the original views
+"""
+
+import argparse
+import re
+import sqlite3
+from typing import Dict, List
+
+# Views in dependency order: a view's source may only read views listed before it.
+# sources maps base table -> how a changed base row maps onto shadow rows:
+#   'col'             refresh shadow rows whose key equals the row's col
+#   ('vcol', 'col')   refresh shadow rows whose vcol equals the row's col
+#   None              refresh the whole shadow table (rare, small tables)
+MATERIALIZED_VIEWS = [
+    {
+        'view': 'menus',
+        'key': 'id',
+        'indexes': [('menu_name',), ('status',), ('sort_order',)],
+        'sources': {'menus_actual': 'menu_id'}
+    },
+    {
+        'view': 'menu_versions',
+        'key': 'id',
+        'indexes': [('is_active',)],
+        'sources': {'menus_actual': 'menu_id'}
+    },
+    {
+        'view': 'recipes',
+        'key': 'id',
+        'indexes': [('recipe_name',), ('recipe_group', 'recipe_name'), ('recipe_type',)],
+        'sources': {'recipes_actual': 'recipe_id'}
+    },
+    {
+        'view': 'recipe_ingredients',
+        'key': 'id',
+        'indexes': [('recipe_id',), ('ingredient_id',)],
+        'sources': {'recipe_ingredients_actual': 'ingredient_id'}
+    },
+    {
+        'view': 'menu_menu_items',
+        'key': 'id',
+        'indexes': [('menu_id', 'menu_item_id'), ('menu_item_id',)],
+        'sources': {'menu_assignments': 'assignment_id'}
+    },
+    {
+        'view': 'menu_items',
+        'key': 'id',
+        'indexes': [('recipe_id',), ('menu_group', 'item_name'), ('version_id',), ('item_name',)],
+        'sources': {
+            'menu_items_actual': 'menu_item_id',
+            'menu_assignments': 'menu_item_id',
+            'recipes_actual': ('recipe_id', 'recipe_id'),
+            'menus_actual': None
+        }
+    }
+]
+
+# Write-through triggers for the views the menu management routes write to
+WRITE_THROUGH_TRIGGERS = {
+    'menus': [
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_mv_menus_instead_insert
+        INSTEAD OF INSERT ON menus
+        BEGIN
+            INSERT INTO menus_actual (menu_name, menu_version, status, effective_date, end_date,
+                                      description, target_food_cost)
+            VALUES (NEW.menu_name,
+                    COALESCE(NEW.menu_version, 'Current'),
+                    CASE WHEN NEW.is_active THEN 'Active' ELSE COALESCE(NEW.status, 'Draft') END,
+                    NEW.effective_date, NEW.end_date, NEW.description,
+                    COALESCE(NEW.target_food_cost, 30.0));
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_mv_menus_instead_update
+        INSTEAD OF UPDATE ON menus
+        BEGIN
+            UPDATE menus_actual
+            SET menu_name = NEW.menu_name,
+                menu_version = NEW.menu_version,
+                status = CASE
+                    WHEN NEW.is_active IS NOT OLD.is_active
+                    THEN CASE WHEN NEW.is_active THEN 'Active' ELSE 'Draft' END
+                    ELSE NEW.status
+                END,
+                effective_date = NEW.effective_date,
+                end_date = NEW.end_date,
+                description = NEW.description,
+                target_food_cost = NEW.target_food_cost,
+                updated_at = COALESCE(NEW.updated_at, CURRENT_TIMESTAMP)
+            WHERE menu_id = OLD.id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_mv_menus_instead_delete
+        INSTEAD OF DELETE ON menus
+        BEGIN
+            DELETE FROM menus_actual WHERE menu_id = OLD.id;
+        END
+        '''
+    ],
+    'menu_menu_items': [
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_mv_menu_menu_items_instead_insert
+        INSTEAD OF INSERT ON menu_menu_items
+        BEGIN
+            INSERT OR IGNORE INTO menu_assignments
+                (menu_id, menu_item_id, category_section, sort_order, price_override, is_active)
+            VALUES (NEW.menu_id, NEW.menu_item_id, NEW.category, COALESCE(NEW.sort_order, 0),
+                    COALESCE(NEW.override_price, NEW.price_override), COALESCE(NEW.is_available, 1));
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_mv_menu_menu_items_instead_update
+        INSTEAD OF UPDATE ON menu_menu_items
+        BEGIN
+            UPDATE menu_assignments
+            SET category_section = NEW.category,
+                sort_order = NEW.sort_order,
+                price_override = CASE
+                    WHEN NEW.override_price IS NOT OLD.override_price THEN NEW.override_price
+                    ELSE NEW.price_override
+                END,
+                is_active = NEW.is_available
+            WHERE assignment_id = OLD.id;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_mv_menu_menu_items_instead_delete
+        INSTEAD OF DELETE ON menu_menu_items
+        BEGIN
+            DELETE FROM menu_assignments WHERE assignment_id = OLD.id;
+        END
+        '''
+    ]
+}
+
+
+def _object_type(conn: sqlite3.Connection, name: str):
+    row = conn.execute(
+        "SELECT type FROM sqlite_master WHERE name = ? AND type IN ('table', 'view')", (name,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _view_sql(conn: sqlite3.Connection, name: str) -> str:
+    return conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'view' AND name = ?", (name,)
+    ).fetchone()[0]
+
+
+def _ensure_metadata_table(conn: sqlite3.Connection) -> None:
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS materialized_views (
+            view_name TEXT PRIMARY KEY,
+            original_sql TEXT NOT NULL,
+            materialized_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def get_materialized_views(conn: sqlite3.Connection) -> List[str]:
+    """Names of the views currently backed by shadow tables"""
+    if _object_type(conn, 'materialized_views') != 'table':
+        return []
+    return [row[0] for row in conn.execute('SELECT view_name FROM materialized_views')]
+
+
+def _refresh_statements(spec: Dict, base_table: str, row_ref: str) -> List[str]:
+    """SQL that re-syncs the shadow rows of spec affected by one base row"""
+    view = spec['view']
+    mapping = spec['sources'][base_table]
+    if mapping is None:
+        return [
+            f'DELETE FROM mv_{view};',
+            f'INSERT INTO mv_{view} SELECT * FROM {view}_source;'
+        ]
+    if isinstance(mapping, tuple):
+        view_column, base_column = mapping
+    else:
+        view_column, base_column = spec['key'], mapping
+    return [
+        f'DELETE FROM mv_{view} WHERE {view_column} = {row_ref}.{base_column};',
+        f'INSERT INTO mv_{view} SELECT * FROM {view}_source WHERE {view_column} = {row_ref}.{base_column};'
+    ]
+
+
+def _install_maintenance_triggers(conn: sqlite3.Connection, specs: List[Dict]) -> int:
+    """One trigger per base table and operation, refreshing dependents in order"""
+    base_tables = []
+    for spec in specs:
+        for base_table in spec['sources']:
+            if base_table not in base_tables:
+                base_tables.append(base_table)
+
+    created = 0
+    for base_table in base_tables:
+        if _object_type(conn, base_table) != 'table':
+            continue
+        for operation, row_refs in (('INSERT', ['NEW']), ('UPDATE', ['OLD', 'NEW']), ('DELETE', ['OLD'])):
+            statements = []
+            for spec in specs:
+                if base_table not in spec['sources']:
+                    continue
+                if spec['sources'][base_table] is None:
+                    statements.extend(_refresh_statements(spec, base_table, 'NEW'))
+                    continue
+                for row_ref in row_refs:
+                    statements.extend(_refresh_statements(spec, base_table, row_ref))
+            if not statements:
+                continue
+            body = '\n                '.join(statements)
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_mv_{base_table}_{operation.lower()}
+                AFTER {operation} ON "{base_table}"
+                BEGIN
+                {body}
+                END
+            ''')
+            created += 1
+    return created
+
+
+def materialize(conn: sqlite3.Connection) -> List[str]:
+    """Materialize every compatibility view that is still a plain view"""
+    _ensure_metadata_table(conn)
+    already = set(get_materialized_views(conn))
+    materialized = []
+
+    for spec in MATERIALIZED_VIEWS:
+        view = spec['view']
+        if view in already:
+            continue
+        if _object_type(conn, view) != 'view':
+            print(f"  {view}: not a view, skipping")
+            continue
+
+        original_sql = _view_sql(conn, view)
+        source_sql = re.sub(
+            r'^\s*CREATE\s+VIEW\s+(IF\s+NOT\s+EXISTS\s+)?["`\[]?\w+["`\]]?\s+AS',
+            f'CREATE VIEW {view}_source AS', original_sql, count=1, flags=re.IGNORECASE
+        )
+
+        conn.execute(f'DROP VIEW IF EXISTS {view}_source')
+        conn.execute(source_sql)
+        conn.execute(f'DROP TABLE IF EXISTS mv_{view}')
+        conn.execute(f'CREATE TABLE mv_{view} AS SELECT * FROM {view}_source')
+
+        try:
+            conn.execute(f'CREATE UNIQUE INDEX idx_mv_{view}_key ON mv_{view}({spec["key"]})')
+        except sqlite3.IntegrityError:
+            conn.execute(f'CREATE INDEX idx_mv_{view}_key ON mv_{view}({spec["key"]})')
+        shadow_columns = {row[1] for row in conn.execute(f'PRAGMA table_info(mv_{view})')}
+        for columns in spec['indexes']:
+            if not set(columns) <= shadow_columns:
+                continue
+            conn.execute(
+                f'CREATE INDEX IF NOT EXISTS idx_mv_{view}_{"_".join(columns)} '
+                f'ON mv_{view}({", ".join(columns)})'
+            )
+
+        conn.execute(f'DROP VIEW {view}')
+        conn.execute(f'CREATE VIEW {view} AS SELECT * FROM mv_{view}')
+        conn.execute(
+            'INSERT OR REPLACE INTO materialized_views (view_name, original_sql) VALUES (?, ?)',
+            (view, original_sql)
+        )
+        materialized.append(view)
+        count = conn.execute(f'SELECT COUNT(*) FROM mv_{view}').fetchone()[0]
+        print(f"  {view}: materialized {count} rows into mv_{view}")
+
+    active = set(get_materialized_views(conn))
+    specs = [spec for spec in MATERIALIZED_VIEWS if spec['view'] in active]
+    triggers = _install_maintenance_triggers(conn, specs)
+
+    for view, statements in WRITE_THROUGH_TRIGGERS.items():
+        if view in active:
+            for statement in statements:
+                conn.execute(statement)
+
+    conn.execute('ANALYZE')
+    conn.commit()
+    print(f"  {triggers} maintenance triggers installed")
+    return materialized
+
+
+def rebuild(conn: sqlite3.Connection) -> None:
+    """Re-sync every shadow table from its source view (e.g. after a bulk import with triggers off)"""
+    for spec in MATERIALIZED_VIEWS:
+        view = spec['view']
+        if view not in get_materialized_views(conn):
+            continue
+        conn.execute(f'DELETE FROM mv_{view}')
+        conn.execute(f'INSERT INTO mv_{view} SELECT * FROM {view}_source')
+        count = conn.execute(f'SELECT COUNT(*) FROM mv_{view}').fetchone()[0]
+        print(f"  {view}: rebuilt {count} rows")
+    conn.commit()
+
+
+def rollback(conn: sqlite3.Connection) -> None:
+    """Drop the shadow tables and triggers and restore the original views"""
+    for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg\\_mv\\_%' ESCAPE '\\'"
+    ).fetchall():
+        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+    if _object_type(conn, 'materialized_views') != 'table':
+        conn.commit()
+        return
+
+    for view, original_sql in conn.execute(
+        'SELECT view_name, original_sql FROM materialized_views'
+    ).fetchall():
+        conn.execute(f'DROP VIEW IF EXISTS {view}')
+        conn.execute(original_sql)
+        conn.execute(f'DROP VIEW IF EXISTS {view}_source')
+        conn.execute(f'DROP TABLE IF EXISTS mv_{view}')
+        conn.execute('DELETE FROM materialized_views WHERE view_name = ?', (view,))
+        print(f"  {view}: restored original view")
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Materialize the compatibility views into indexed shadow tables')
+    parser.add_argument('--db', default='restaurant_calculator.db', help='Database path')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--rebuild', action='store_true', help='Re-sync all shadow tables from their sources')
+    group.add_argument('--rollback', action='store_true', help='Restore the original views')
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.rollback:
+            print("Restoring compatibility views...")
+            rollback(conn)
+        elif args.rebuild:
+            print("Rebuilding shadow tables...")
+            rebuild(conn)
+        else:
+            print("Materializing compatibility views...")
+            materialize(conn)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+memory_profile.py - Memory benchmark for costing results and staging rows
+
+Measures with tracemalloc what the slotted records (records.py) are for:
+
+- rebuild: every recipe in the catalog costed with CalculationRebuilder,
+  --passes times over, with every RecipeCost result held the way a batch
+  with keep_recipes does; bytes held per result and the peak
+- staging rows: --rows inventory staging rows (records.staging_row_type)
+  built the way InventoryStagingLoader fills them, all held; bytes per row
+- staging load: a --rows synthetic inventory CSV streamed through
+  InventoryStagingLoader into a scratch database; peak and wall time
+
+The catalog is data/production_data.sql loaded into a scratch database
+unless --db names one. Parse caches are warmed before measuring, so the
+numbers are the results themselves. --save records a baseline and
+--baseline compares against one.
+
+Usage:
+    python memory_profile.py
+    python memory_profile.py --rows 10000 --passes 5
+    python memory_profile.py --save reports/memory_baseline.json
+    python memory_profile.py --baseline reports/memory_baseline.json
+"""
+
+import argparse
+import csv
+import gc
+import json
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Tuple
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+CATALOG_DUMP = os.path.join(REPO_DIR, 'data', 'production_data.sql')
+STAGING_SCHEMA = os.path.join(REPO_DIR, 'migrations', 'create_staging_inventory_table.sql')
+
+# (section, metric) pairs compared against a baseline
+COMPARED = (
+    ('rebuild', 'bytes_per_result'), ('rebuild', 'peak_bytes'),
+    ('staging_rows', 'bytes_per_row'),
+    ('staging_load', 'peak_bytes'), ('staging_load', 'seconds'),
+)
+
+
+def measure(function: Callable[[], Any]) -> Tuple[Any, Dict[str, float]]:
+    """Run function under tracemalloc: bytes still held by its result, peak and wall time"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - started
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, {'held_bytes': current - before, 'peak_bytes': peak - before, 'seconds': round(seconds, 3)}
+
+
+def load_catalog(path: str) -> str:
+    conn = sqlite3.connect(path)
+    with open(CATALOG_DUMP) as f:
+        conn.executescript(f.read())
+    conn.close()
+    return path
+
+
+def profile_rebuild(db_path: str, passes: int = 20) -> Dict[str, Any]:
+    """Cost every recipe `passes` times and hold every result"""
+    from calculation_rebuilder import CalculationRebuilder
+
+    rebuilder = CalculationRebuilder(db_path, read_only=True)
+    conn = sqlite3.connect(db_path)
+    recipe_ids = [row[0] for row in conn.execute('SELECT recipe_id FROM recipes_actual ORDER BY recipe_id')]
+    conn.close()
+
+    def cost_all():
+        results = []
+        for recipe_id in recipe_ids:
+            try:
+                results.append(rebuilder.calculate_recipe_cost_from_scratch(recipe_id))
+            except Exception:
+                pass  # the same recipes fail on every pass
+        return results
+
+    cost_all()  # warm the parse and conversion caches
+    results, stats = measure(lambda: [result for _ in range(passes) for result in cost_all()])
+    stats.update(results=len(results), bytes_per_result=round(stats['held_bytes'] / max(len(results), 1)))
+    return stats
+
+
+def write_staging_csv(path: str, rows: int):
+    """A synthetic inventory export: recent purchases, a few flagged values"""
+    purchased = (datetime.now() - timedelta(days=30)).strftime('%m/%d/%Y')
+    vendors = ('Sysco', 'US Foods', 'Restaurant Depot')
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Product(s)', 'Location Name', 'Vendor Name', 'Item Code', 'Item Description', 'UOM',
+                         'Item UOM', 'Pack', 'Size', 'Unit', 'Last Purchased Date', 'Last Purchased Price ($)'])
+        for n in range(rows):
+            writer.writerow([
+                f'Product {n % 5000}', 'Lea Jane\'s Hot Chicken', vendors[n % 3], f'{100000 + n}',
+                f'ITEM DESCRIPTION {n}', 'Case', 'lb' if n % 7 else '', str(1 + n % 12),
+                f'{(n % 40) / 4 + 0.5}', 'lb', purchased, '0' if n % 50 == 0 else f'{(n % 9000) / 100 + 1:.2f}',
+            ])
+
+
+def profile_staging_rows(csv_path: str) -> Dict[str, Any]:
+    """Build a staging row per CSV row the way the loader fills them, holding them all"""
+    from inventory_staging_loader import InventoryStagingLoader
+
+    loader = InventoryStagingLoader(':memory:')
+    with open(csv_path, newline='') as f:
+        source = list(csv.DictReader(f))
+
+    def build():
+        rows = []
+        for row_num, row in enumerate(source, start=2):
+            staged = loader.row_type(original_row_number=row_num, import_batch_id='INV_PROFILE',
+                                     source_filename=os.path.basename(csv_path),
+                                     duplicate_check_hash=loader._create_duplicate_hash(row))
+            for original_col, config in loader.column_config.items():
+                target = config['target']
+                raw_value = row.get(original_col, '')
+                cleaned, flag = loader._clean_value(raw_value, config['type'])
+                setattr(staged, f'{target}_raw', raw_value)
+                setattr(staged, f'{target}_cleaned', cleaned)
+                if flag:
+                    setattr(staged, f'{target}_flag', flag)
+            rows.append(staged)
+        return rows
+
+    rows, stats = measure(build)
+    stats.update(rows=len(rows), bytes_per_row=round(stats['held_bytes'] / max(len(rows), 1)))
+    return stats
+
+
+def profile_staging_load(scratch: str, csv_path: str) -> Dict[str, Any]:
+    """Stream the CSV through InventoryStagingLoader into a scratch staging table"""
+    from inventory_staging_loader import InventoryStagingLoader
+
+    db_path = os.path.join(scratch, 'staging.db')
+    conn = sqlite3.connect(db_path)
+    with open(STAGING_SCHEMA) as f:
+        conn.executescript(f.read())
+    # migrations/add_source_filename_to_staging.sql also alters stg_recipes
+    conn.execute("ALTER TABLE stg_inventory_items ADD COLUMN source_filename TEXT")
+    conn.close()
+
+    loader = InventoryStagingLoader(db_path)
+    result, stats = measure(lambda: loader.load_csv_to_staging(csv_path))
+    stats.update(rows=result['loaded_rows'])
+    return stats
+
+
+def print_profile(profile: Dict[str, Any], baseline: Dict[str, Any] = None):
+    rebuild, rows, load = profile['rebuild'], profile['staging_rows'], profile['staging_load']
+    print(f"rebuild:      {rebuild['results']} results held, {rebuild['bytes_per_result']} bytes each, "
+          f"{rebuild['held_bytes'] / 1e6:.2f} MB held, peak {rebuild['peak_bytes'] / 1e6:.2f} MB, "
+          f"{rebuild['seconds']:.1f}s")
+    print(f"staging rows: {rows['rows']} rows held, {rows['bytes_per_row']} bytes each, "
+          f"{rows['held_bytes'] / 1e6:.1f} MB held")
+    print(f"staging load: {load['rows']} rows loaded, peak {load['peak_bytes'] / 1e6:.2f} MB, "
+          f"{load['seconds']:.1f}s")
+    if baseline:
+        print("\nAgainst baseline:")
+        if (baseline['rows'], baseline['passes']) != (profile['rows'], profile['passes']):
+            print(f"  (baseline ran --rows {baseline['rows']} --passes {baseline['passes']}; sizes differ)")
+        for section, metric in COMPARED:
+            before, after = baseline[section][metric], profile[section][metric]
+            change = f"{(after - before) / before * 100:+.1f}%" if before else '-'
+            print(f"  {section}.{metric}: {before} -> {after} ({change})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory benchmark for costing results and staging rows')
+    parser.add_argument('--db', help='Catalog database (default: data/production_data.sql in a scratch db)')
+    parser.add_argument('--passes', type=int, default=20, help='Times to cost the whole catalog, all held')
+    parser.add_argument('--rows', type=int, default=100000, help='Staging rows to hold and to load')
+    parser.add_argument('--save', help='Write the profile as a JSON baseline to this path')
+    parser.add_argument('--baseline', help='Compare against a JSON baseline')
+    args = parser.parse_args()
+
+    # The staging loader reads config/ relative to the working directory
+    os.chdir(REPO_DIR)
+    sys.path.insert(0, REPO_DIR)
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        db_path = args.db or load_catalog(os.path.join(scratch, 'catalog.db'))
+        csv_path = os.path.join(scratch, 'inventory_profile.csv')
+        write_staging_csv(csv_path, args.rows)
+        profile = {
+            'passes': args.passes,
+            'rows': args.rows,
+            'python': sys.version.split()[0],
+            'rebuild': profile_rebuild(db_path, args.passes),
+            'staging_rows': profile_staging_rows(csv_path),
+            'staging_load': profile_staging_load(scratch, csv_path),
+        }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+    print_profile(profile, baseline)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(profile, f, indent=2)
+        print(f"\nBaseline written to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
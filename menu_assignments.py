@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+menu_assignments.py - Set-based writes to menu_assignments
+
+Every path that puts items on a menu or takes them off (the bulk editor,
+the add/remove toggle, the Master Menu rule) writes through the unique
+(menu_id, menu_item_id) index on menu_assignments instead of checking for
+an existing row first:
+
+- additions are one executemany of INSERT ... ON CONFLICT DO UPDATE
+- removals are one DELETE ... WHERE (menu_id, menu_item_id) IN (json_each(?))
+- the Master Menu rule is one INSERT ... SELECT ... ON CONFLICT DO NOTHING
+
+so a 1,000-item bulk edit is two statements in the caller's transaction
+rather than a SELECT plus an UPDATE or INSERT per item. A batch naming the
+same item twice applies its last entry, as the old item-by-item loop did.
+The write functions leave committing to the caller.
+
+ensure_assignment_index() creates the unique index on databases that lack
+it (dropping duplicate assignments first, oldest kept); app.py runs it with
+the rest of the startup DDL.
+
+Usage:
+    python menu_assignments.py enforce-master [--db restaurant_calculator.db]
+"""
+
+import argparse
+import json
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DATABASE = 'restaurant_calculator.db'
+
+MASTER_MENU = 'Master Menu'
+
+DEFAULT_CATEGORY = 'Uncategorized'
+
+UPSERT_ASSIGNMENT = '''
+    INSERT INTO menu_assignments (menu_id, menu_item_id, category_section, sort_order, price_override)
+    VALUES (?, ?, ?, 0, ?)
+    ON CONFLICT(menu_id, menu_item_id) DO UPDATE SET
+        category_section = excluded.category_section,
+        price_override = excluded.price_override
+'''
+
+# Adding an item that is already on the menu leaves its category and price alone
+ADD_ASSIGNMENT = '''
+    INSERT INTO menu_assignments (menu_id, menu_item_id, category_section, sort_order)
+    VALUES (?, ?, ?, 0)
+    ON CONFLICT(menu_id, menu_item_id) DO NOTHING
+'''
+
+DELETE_ASSIGNMENTS = '''
+    DELETE FROM menu_assignments
+    WHERE (menu_id, menu_item_id) IN (
+        SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]') FROM json_each(?)
+    )
+'''
+
+
+class MenuAssignmentError(ValueError):
+    """Raised for a bulk edit entry without a usable menu item id"""
+
+
+def _item_id(value: Any) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise MenuAssignmentError(f"Invalid menu item id: {value!r}")
+
+
+def has_assignment_key(conn: sqlite3.Connection) -> bool:
+    """Whether menu_assignments has a unique index on (menu_id, menu_item_id) for ON CONFLICT"""
+    for _, name, unique, _, partial in conn.execute('PRAGMA index_list(menu_assignments)'):
+        if unique and not partial:
+            columns = {row[2] for row in conn.execute(f'PRAGMA index_info("{name}")')}
+            if columns == {'menu_id', 'menu_item_id'}:
+                return True
+    return False
+
+
+def ensure_assignment_index(conn: sqlite3.Connection) -> bool:
+    """Create the unique (menu_id, menu_item_id) index if missing; False without a menu_assignments table"""
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'menu_assignments'").fetchone():
+        return False
+    if has_assignment_key(conn):
+        return True
+    conn.execute('''
+        DELETE FROM menu_assignments
+        WHERE assignment_id NOT IN (
+            SELECT MIN(assignment_id) FROM menu_assignments GROUP BY menu_id, menu_item_id
+        )
+    ''')
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_menu_assignments_menu_item
+        ON menu_assignments(menu_id, menu_item_id)
+    ''')
+    conn.commit()
+    return True
+
+
+def plan_changes(items: Iterable[Dict[str, Any]]) -> Tuple[List[Tuple[int, str, Optional[float]]], List[int]]:
+    """Bulk edit entries -> (additions as (item_id, category, price_override), removed item ids)"""
+    latest = {}
+    for item in items:
+        if not isinstance(item, dict):
+            raise MenuAssignmentError(f"Invalid bulk edit entry: {item!r}")
+        item_id = _item_id(item.get('item_id'))
+        latest.pop(item_id, None)  # the last entry for an item wins
+        latest[item_id] = item
+
+    additions, removals = [], []
+    for item_id, item in latest.items():
+        if item.get('action') == 'add':
+            additions.append((item_id, item.get('category', DEFAULT_CATEGORY), item.get('override_price') or None))
+        else:
+            removals.append(item_id)
+    return additions, removals
+
+
+def remove_assignments(conn: sqlite3.Connection, pairs: Iterable[Tuple[int, int]]) -> int:
+    """Delete (menu_id, menu_item_id) assignments in one statement; returns rows removed"""
+    pairs = [[int(menu_id), _item_id(menu_item_id)] for menu_id, menu_item_id in pairs]
+    if not pairs:
+        return 0
+    return conn.execute(DELETE_ASSIGNMENTS, (json.dumps(pairs),)).rowcount
+
+
+def apply_menu_changes(conn: sqlite3.Connection, menu_id: int, items: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    """Apply a bulk edit ({'item_id', 'action', 'category', 'override_price'} entries) to one menu"""
+    additions, removals = plan_changes(items)
+    if additions:
+        conn.executemany(UPSERT_ASSIGNMENT, [(menu_id, item_id, category, price)
+                                             for item_id, category, price in additions])
+    removed = remove_assignments(conn, [(menu_id, item_id) for item_id in removals])
+    return {'upserted': len(additions), 'removed': removed}
+
+
+def add_to_menu(conn: sqlite3.Connection, menu_id: int, menu_item_ids: Iterable[Any],
+                category: str = DEFAULT_CATEGORY) -> int:
+    """Add items not yet on a menu; returns rows added"""
+    return conn.executemany(ADD_ASSIGNMENT, [(menu_id, _item_id(item_id), category)
+                                             for item_id in menu_item_ids]).rowcount
+
+
+def ensure_master_menu_assignment(conn: sqlite3.Connection, menu_item_ids: Optional[Iterable[Any]] = None) -> int:
+    """
+    Put menu items on the Master Menu in one statement
+
+    menu_item_ids=None enforces the rule for every menu item. Returns the
+    number of assignments added (0 when there is no Master Menu).
+    """
+    if menu_item_ids is None:
+        items, params = 'SELECT id FROM menu_items', ()
+    else:
+        items, params = 'SELECT value AS id FROM json_each(?)', (json.dumps([_item_id(i) for i in menu_item_ids]),)
+    return conn.execute(f'''
+        INSERT INTO menu_assignments (menu_id, menu_item_id, sort_order)
+        SELECT master.id, item.id, 0
+        FROM menus master, ({items}) item
+        WHERE master.menu_name = ?
+        ON CONFLICT(menu_id, menu_item_id) DO NOTHING
+    ''', params + (MASTER_MENU,)).rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Menu assignment maintenance")
+    parser.add_argument('command', choices=['enforce-master'])
+    parser.add_argument('--db', default=DATABASE, help="Database path")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        ensure_assignment_index(conn)
+        added = ensure_master_menu_assignment(conn)
+        conn.commit()
+    finally:
+        conn.close()
+    print(f"Added {added} menu items to the {MASTER_MENU}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+menu_engineering.py - Menu-engineering matrix (Stars / Plowhorses / Puzzles / Dogs)
+
+For a menu and a sales period, every item's contribution margin (menu
+price - recipe food cost, the basis pricing_analysis uses), sales mix and
+popularity index are computed in one numpy pass over the menu:
+
+- popular:    mix share >= 70% of an equal share (1 / items on the menu)
+- profitable: contribution margin >= the sales-weighted average margin
+
+Star = popular and profitable, Plowhorse = popular only, Puzzle =
+profitable only, Dog = neither.
+
+Results are cached per (menu, period) together with the data versions of
+the tables they read (menus, assignments, menu items, recipe costs,
+sales_mix). A report is recomputed only after one of those tables changes,
+so repeated views read the cache. Without the data_versions triggers
+(see response_cache.py) every call recomputes.
+
+Usage:
+    python menu_engineering.py --menu-id 5 --start 2026-03-01 --end 2026-03-31
+    python menu_engineering.py --json
+"""
+
+import argparse
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from menu_price_optimizer import MENU_PRICING_QUERY
+from response_cache import get_data_versions, resolve_base_tables
+
+# Tables and views a report reads; resolved to base tables for versioning
+ENGINEERING_TABLES = ('menus', 'menu_assignments', 'menu_items', 'recipes', 'sales_mix')
+
+CLASSIFICATIONS = ('Dog', 'Puzzle', 'Plowhorse', 'Star')
+
+# An item is popular at this fraction of an equal share of the mix
+POPULARITY_FACTOR = 0.7
+
+# Default period, ending on the last day with sales
+DEFAULT_PERIOD_DAYS = 30
+
+
+def classify(quantity: np.ndarray, price: np.ndarray, cost: np.ndarray,
+             popularity_factor: float = POPULARITY_FACTOR) -> Dict[str, Any]:
+    """Margins, mix and classification for all items at once"""
+    total_sold = quantity.sum()
+    margin = price - cost
+    mix = quantity / total_sold if total_sold else np.zeros_like(quantity)
+    equal_share = 1 / len(quantity) if len(quantity) else 0
+    average_margin = (quantity @ margin) / total_sold if total_sold else (margin.mean() if len(margin) else 0)
+    popular = mix >= popularity_factor * equal_share
+    profitable = margin >= average_margin
+    return {
+        'margin': margin,
+        'total_margin': quantity * margin,
+        'mix': mix,
+        'popularity_index': mix / equal_share if equal_share else mix,
+        'classification': np.array(CLASSIFICATIONS)[popular * 2 + profitable],
+        'average_margin': float(average_margin),
+        'popularity_threshold': popularity_factor * equal_share,
+    }
+
+
+class MenuEngineering:
+    """Menu-engineering reports cached per (menu, period) and data versions"""
+
+    def __init__(self, db_path: str = 'restaurant_calculator.db', max_entries: int = 64):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.base_tables = None
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _versions(self, conn: sqlite3.Connection) -> Optional[Tuple]:
+        if self.base_tables is None:
+            self.base_tables = resolve_base_tables(conn, ENGINEERING_TABLES)
+        try:
+            versions = get_data_versions(conn, self.base_tables)
+        except sqlite3.OperationalError:
+            return None  # data_versions not installed - no way to tell a stale entry
+        if set(versions) != self.base_tables:
+            return None  # some tables have no version triggers
+        return tuple(sorted(versions.items()))
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+    def report(self, menu_id: Optional[int] = None, start: Optional[str] = None,
+               end: Optional[str] = None) -> Dict[str, Any]:
+        """The matrix for a menu and period, from cache when nothing it reads has changed"""
+        conn = self._connect()
+        try:
+            versions = self._versions(conn)
+            key = (menu_id, start, end)
+            with self.lock:
+                entry = self.entries.get(key)
+                if entry is not None and versions is not None and entry[0] == versions:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                self.misses += 1
+            result = self.compute(conn, menu_id, start, end)
+        finally:
+            conn.close()
+        if versions is not None:
+            with self.lock:
+                self.entries[key] = (versions, result)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return result
+
+    def compute(self, conn: sqlite3.Connection, menu_id: Optional[int] = None,
+                start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Any]:
+        """Read the menu and its sales and classify every item"""
+        started = time.perf_counter()
+        if menu_id is None:
+            row = conn.execute('''
+                SELECT id FROM menus WHERE status = 'Active'
+                ORDER BY CASE WHEN menu_name = 'Current Menu' THEN 0 ELSE 1 END
+                LIMIT 1
+            ''').fetchone()
+            menu_id = row['id'] if row else None
+        menu = conn.execute('SELECT id, menu_name FROM menus WHERE id = ?', (menu_id,)).fetchone()
+        if end is None:
+            try:
+                end = conn.execute('SELECT MAX(sale_date) FROM sales_mix_daily').fetchone()[0]
+            except sqlite3.OperationalError:
+                end = None  # no sales imported yet
+            end = end or date.today().isoformat()
+        if start is None:
+            start = (date.fromisoformat(end) - timedelta(days=DEFAULT_PERIOD_DAYS - 1)).isoformat()
+
+        items = [dict(row) for row in conn.execute(MENU_PRICING_QUERY, (menu_id,))]
+        try:
+            sales = {row['menu_item_id']: (row['quantity'], row['net_sales']) for row in conn.execute('''
+                SELECT s.menu_item_id, SUM(s.quantity) as quantity, SUM(s.net_sales) as net_sales
+                FROM sales_mix s
+                WHERE s.sale_date BETWEEN ? AND ?
+                  AND s.menu_item_id IN (SELECT menu_item_id FROM menu_assignments
+                                         WHERE menu_id = ? AND is_active = 1)
+                GROUP BY s.menu_item_id
+            ''', (start, end, menu_id))}
+        except sqlite3.OperationalError:
+            sales = {}  # sales_mix not created yet
+
+        quantity = np.array([sales.get(item['id'], (0, 0))[0] for item in items], dtype=np.float64)
+        price = np.array([item['menu_price'] for item in items], dtype=np.float64)
+        cost = np.array([item['food_cost'] or 0 for item in items], dtype=np.float64)
+        matrix = classify(quantity, price, cost)
+
+        rows = []
+        for n, item in enumerate(items):
+            rows.append({
+                'id': item['id'],
+                'item_name': item['item_name'],
+                'category': item['category'],
+                'menu_price': float(price[n]),
+                'food_cost': round(float(cost[n]), 2),
+                'quantity_sold': float(quantity[n]),
+                'net_sales': round(float(sales.get(item['id'], (0, 0))[1]), 2),
+                'contribution_margin': round(float(matrix['margin'][n]), 2),
+                'total_contribution': round(float(matrix['total_margin'][n]), 2),
+                'mix_percent': round(float(matrix['mix'][n]) * 100, 2),
+                'popularity_index': round(float(matrix['popularity_index'][n]), 2),
+                'classification': str(matrix['classification'][n]),
+            })
+        rows.sort(key=lambda row: (CLASSIFICATIONS[::-1].index(row['classification']), -row['total_contribution']))
+
+        return {
+            'menu_id': menu_id,
+            'menu_name': menu['menu_name'] if menu else None,
+            'start': start,
+            'end': end,
+            'items': rows,
+            'summary': {
+                'items': len(rows),
+                'items_sold': float(quantity.sum()),
+                'total_contribution': round(float(matrix['total_margin'].sum()), 2),
+                'average_contribution_margin': round(matrix['average_margin'], 2),
+                'popularity_threshold_percent': round(matrix['popularity_threshold'] * 100, 2),
+                'counts': {label: sum(row['classification'] == label for row in rows)
+                           for label in CLASSIFICATIONS[::-1]},
+            },
+            'compute_ms': round((time.perf_counter() - started) * 1000, 2),
+        }
+
+
+def print_report(report: Dict[str, Any]):
+    summary = report['summary']
+    print("=" * 80)
+    print(f"MENU ENGINEERING - {report['menu_name']} ({report['start']} - {report['end']})")
+    print("=" * 80)
+    print(f"Average contribution margin ${summary['average_contribution_margin']:.2f}, "
+          f"popularity threshold {summary['popularity_threshold_percent']:.2f}% of mix")
+    print(f"{'Item':<36} {'Class':<10} {'Sold':>7} {'Mix %':>6} {'CM':>7} {'Total CM':>10}")
+    for row in report['items']:
+        print(f"{row['item_name'][:36]:<36} {row['classification']:<10} {row['quantity_sold']:>7.0f} "
+              f"{row['mix_percent']:>6.2f} {row['contribution_margin']:>7.2f} {row['total_contribution']:>10.2f}")
+    print("-" * 80)
+    print(', '.join(f"{label}s: {count}" for label, count in summary['counts'].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Menu-engineering matrix for a menu and sales period")
+    parser.add_argument('--menu-id', type=int, help="Menu (default: the active menu)")
+    parser.add_argument('--start', help="First sales date (default: 30 days before --end)")
+    parser.add_argument('--end', help="Last sales date (default: the last day with sales)")
+    parser.add_argument('--db', default='restaurant_calculator.db', help="Database path")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = MenuEngineering(args.db).report(args.menu_id, args.start, args.end)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+menu_price_optimizer.py - Price a whole menu to a blended food-cost target
+
+pricing_analysis recommends food_cost / target for each item on its own.
+This sets all prices on a menu together so the blended food cost
+(sum of food cost / sum of price, weighted by an optional sales mix) hits
+the target, under constraints:
+
+- max_change_percent: no price moves by more than this
+- price_override: items priced by an override on the menu keep that price
+- ladders: {category: [price points]} - prices in the category are picked from these
+- endings: allowed cents endings (0.49, 0.99, ...) for items without a ladder
+- raise_only: no price goes down, even when the menu is under target
+
+The continuous problem - minimize sum(w * (new - current)^2 / food_cost)
+subject to the blended target and the max-change band - has the solution
+new = clip(current + lam * food_cost, low, high): every item moves in
+proportion to its food cost until it hits its band. lam is found by
+bisection for all targets at once, one (targets x items) array per step.
+Prices are then snapped to the nearest ladder point or ending inside the
+band, and the blended food cost actually reached is reported.
+
+Usage:
+    python menu_price_optimizer.py --target 28 --target 30 --target 32
+    python menu_price_optimizer.py --menu-id 5 --target 30 --max-change 10 --endings 0.49,0.99
+    python menu_price_optimizer.py --target 30 --ladder "Main=11.99,13.99,15.99" --json
+"""
+
+import argparse
+import json
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# The items pricing_analysis shows for a menu
+MENU_PRICING_QUERY = '''
+    SELECT
+        mi.id,
+        mi.item_name,
+        mi.menu_group,
+        COALESCE(ma.price_override, mi.menu_price) as menu_price,
+        ma.price_override,
+        COALESCE(mi.food_cost, r.food_cost, 0) as food_cost,
+        COALESCE(ma.category_section, mi.menu_group) as category
+    FROM menu_assignments ma
+    JOIN menu_items mi ON ma.menu_item_id = mi.id
+    LEFT JOIN recipes r ON mi.recipe_id = r.id
+    WHERE ma.menu_id = ? AND ma.is_active = 1
+        AND COALESCE(ma.price_override, mi.menu_price) > 0
+    ORDER BY ma.category_section, ma.sort_order, mi.item_name
+'''
+
+# Without max_change_percent no price goes above this multiple of the current one
+DEFAULT_MAX_MULTIPLE = 10.0
+
+BISECTION_STEPS = 60
+
+
+class PricingError(ValueError):
+    """Raised for targets or constraints that cannot be used"""
+
+
+class MenuPriceOptimizer:
+    """Set prices across a menu to hit blended food-cost targets"""
+
+    def __init__(self, db_path: str = 'restaurant_calculator.db'):
+        self.db_path = db_path
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def default_menu_id(self, conn: sqlite3.Connection) -> Optional[int]:
+        """The active menu pricing_analysis opens on"""
+        row = conn.execute('''
+            SELECT id FROM menus WHERE status = 'Active'
+            ORDER BY CASE WHEN menu_name = 'Current Menu' THEN 0 ELSE 1 END
+            LIMIT 1
+        ''').fetchone()
+        return row['id'] if row else None
+
+    def load(self, menu_id: Optional[int] = None) -> Dict[str, Any]:
+        """The menu's priced items as arrays"""
+        conn = self._connect()
+        try:
+            if menu_id is None:
+                menu_id = self.default_menu_id(conn)
+            rows = [dict(row) for row in conn.execute(MENU_PRICING_QUERY, (menu_id,))]
+        finally:
+            conn.close()
+        return {
+            'menu_id': menu_id,
+            'items': rows,
+            'price': np.array([row['menu_price'] for row in rows], dtype=np.float64),
+            'cost': np.array([max(row['food_cost'] or 0, 0) for row in rows], dtype=np.float64),
+            'fixed': np.array([row['price_override'] is not None for row in rows], dtype=bool),
+        }
+
+    # ------------------------------------------------------------------
+    # Solving
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _bounds(price: np.ndarray, cost: np.ndarray, fixed: np.ndarray,
+                max_change_percent: Optional[float], raise_only: bool = False):
+        """Per-item (low, high) price band"""
+        if max_change_percent is None:
+            low, high = np.zeros_like(price), price * DEFAULT_MAX_MULTIPLE
+        else:
+            if max_change_percent < 0:
+                raise PricingError("max_change_percent cannot be negative")
+            low = price * max(1 - max_change_percent / 100, 0)
+            high = price * (1 + max_change_percent / 100)
+        # Never price below food cost, unless the item already is
+        low = np.maximum(low, np.minimum(cost, price))
+        if raise_only:
+            low = price
+        low = np.where(fixed, price, low)
+        high = np.where(fixed, price, np.maximum(high, low))
+        return low, high
+
+    @staticmethod
+    def _solve(price, step, low, high, weight, revenue) -> np.ndarray:
+        """(targets x items) prices clip(price + lam * step, low, high) with sum(weight * p) = revenue"""
+        movable = step > 0
+        if not movable.any():
+            return np.broadcast_to(price, (len(revenue), len(price))).copy()
+        lam_low = np.full(len(revenue), ((low - price)[movable] / step[movable]).min())
+        lam_high = np.full(len(revenue), ((high - price)[movable] / step[movable]).max())
+        for _ in range(BISECTION_STEPS):
+            lam = (lam_low + lam_high) / 2
+            prices = np.clip(price + lam[:, None] * step, low, high)
+            short = prices @ weight < revenue
+            lam_low = np.where(short, lam, lam_low)
+            lam_high = np.where(short, lam_high, lam)
+        return np.clip(price + lam_high[:, None] * step, low, high)
+
+    @staticmethod
+    def _candidates(prices: np.ndarray, ladder_points: np.ndarray, has_ladder: np.ndarray,
+                    endings: Optional[np.ndarray]) -> np.ndarray:
+        """(targets x items x k) allowed prices near each solved price, NaN-padded"""
+        if endings is not None and len(endings):
+            dollars = np.floor(prices)[..., None, None] + np.array([-1.0, 0.0, 1.0])[:, None]
+            near = (dollars + endings).reshape(prices.shape + (-1,))
+        else:
+            near = np.round(prices, 2)[..., None]
+        ladder = np.broadcast_to(ladder_points, prices.shape + ladder_points.shape[-1:])
+        width = max(near.shape[-1], ladder.shape[-1])
+        candidates = np.full(prices.shape + (width,), np.nan)
+        candidates[..., :near.shape[-1]] = np.where(has_ladder[:, None], np.nan, near)
+        candidates[..., :ladder.shape[-1]] = np.where(has_ladder[:, None], ladder,
+                                                      candidates[..., :ladder.shape[-1]])
+        return candidates
+
+    def optimize(self, targets: Sequence[float], menu_id: Optional[int] = None,
+                 max_change_percent: Optional[float] = None,
+                 endings: Optional[Sequence[float]] = None,
+                 ladders: Optional[Dict[str, Sequence[float]]] = None,
+                 mix: Optional[Dict[Any, float]] = None, raise_only: bool = False) -> Dict[str, Any]:
+        """
+        New prices for every target food-cost % in targets
+
+        mix maps menu item id to units sold; without it every item counts once.
+        """
+        try:
+            targets = np.array([float(t) for t in targets], dtype=np.float64)
+        except (TypeError, ValueError):
+            raise PricingError("Targets must be numbers")
+        if not len(targets) or ((targets <= 0) | (targets >= 100)).any():
+            raise PricingError("Give one or more targets between 0 and 100")
+        if max_change_percent is not None:
+            try:
+                max_change_percent = float(max_change_percent)
+            except (TypeError, ValueError):
+                raise PricingError(f"Invalid max_change_percent {max_change_percent!r}")
+        endings = normalize_endings(endings)
+        menu = self.load(menu_id)
+        items, price, cost, fixed = menu['items'], menu['price'], menu['cost'], menu['fixed']
+        if not items:
+            raise PricingError(f"Menu {menu['menu_id']} has no priced items")
+
+        if mix:
+            try:
+                units = {int(key): float(value) for key, value in mix.items()}
+            except (TypeError, ValueError):
+                raise PricingError("Sales mix must map menu item ids to quantities")
+            weight = np.array([units.get(item['id'], 0.0) for item in items])
+        else:
+            weight = np.ones(len(items))
+        if weight.sum() <= 0:
+            raise PricingError("The sales mix sells none of the menu's items")
+
+        low, high = self._bounds(price, cost, fixed, max_change_percent, raise_only)
+        step = np.where(fixed, 0.0, cost)
+        required = (cost @ weight) / (targets / 100)
+        solved = self._solve(price, step, low, high, weight, required)
+
+        # Snap to ladder points / endings inside each item's band
+        try:
+            ladders = {str(k).strip().lower(): sorted(float(p) for p in v) for k, v in (ladders or {}).items()}
+        except (TypeError, ValueError):
+            raise PricingError("Ladders must map categories to lists of prices")
+        item_ladders = [ladders.get(str(item['category'] or '').strip().lower(), []) for item in items]
+        ladder_points = np.full((len(items), max([len(p) for p in item_ladders] + [1])), np.nan)
+        for row, points in enumerate(item_ladders):
+            ladder_points[row, :len(points)] = points
+        has_ladder = np.array([bool(points) for points in item_ladders])
+        candidates = self._candidates(solved, ladder_points, has_ladder, endings)
+        allowed = (candidates >= low[:, None] - 1e-9) & (candidates <= high[:, None] + 1e-9)
+        distance = np.where(allowed, np.abs(candidates - solved[..., None]), np.inf)
+        pick = distance.argmin(axis=-1)
+        snapped = np.isfinite(np.take_along_axis(distance, pick[..., None], -1)[..., 0])
+        picked = np.take_along_axis(candidates, pick[..., None], -1)[..., 0]
+        new_prices = np.where(fixed, price, np.where(snapped, picked, np.round(solved, 2)))
+        off_grid = ~fixed & ~snapped & (has_ladder | (endings is not None))
+
+        current_revenue = price @ weight
+        current_margin = (price - cost) @ weight
+        scenarios = []
+        for t, target in enumerate(targets):
+            new = new_prices[t]
+            revenue = float(new @ weight)
+            rows = []
+            for n, item in enumerate(items):
+                change = float(new[n] - price[n])
+                rows.append({
+                    'id': item['id'],
+                    'item_name': item['item_name'],
+                    'category': item['category'],
+                    'menu_price': float(price[n]),
+                    'food_cost': round(float(cost[n]), 4),
+                    'food_cost_percent': round(float(cost[n] / price[n] * 100), 2),
+                    'new_price': round(float(new[n]), 2),
+                    'price_change': round(change, 2),
+                    'price_change_percent': round(change / price[n] * 100, 2),
+                    'new_food_cost_percent': round(float(cost[n] / new[n] * 100), 2),
+                    'fixed': bool(fixed[n]),
+                    'off_grid': bool(off_grid[t, n]),
+                })
+            scenarios.append({
+                'target_food_cost': float(target),
+                'feasible': bool(low @ weight <= required[t] + 1e-6 and high @ weight >= required[t] - 1e-6),
+                'achieved_food_cost_percent': round(float(cost @ weight / revenue * 100), 2),
+                'items': rows,
+                'summary': {
+                    'items_raised': int((new > price + 0.005).sum()),
+                    'items_lowered': int((new < price - 0.005).sum()),
+                    'items_fixed': int(fixed.sum()),
+                    'items_off_grid': int(off_grid[t].sum()),
+                    'current_revenue': round(float(current_revenue), 2),
+                    'new_revenue': round(revenue, 2),
+                    'revenue_impact': round(revenue - float(current_revenue), 2),
+                    'current_margin': round(float(current_margin), 2),
+                    'new_margin': round(float((new - cost) @ weight), 2),
+                    'margin_impact': round(float((new - cost) @ weight - current_margin), 2),
+                },
+            })
+
+        return {
+            'menu_id': menu['menu_id'],
+            'weighted_by': 'sales mix' if mix else 'one of each item',
+            'current_food_cost_percent': round(float(cost @ weight / current_revenue * 100), 2),
+            'scenarios': scenarios,
+        }
+
+
+def normalize_endings(endings: Optional[Sequence[Any]]) -> Optional[np.ndarray]:
+    """[0.99, '.49', 95] -> array([0.99, 0.49, 0.95]); whole numbers are cents"""
+    if not endings:
+        return None
+    values = []
+    for ending in endings:
+        try:
+            value = float(ending)
+        except (TypeError, ValueError):
+            raise PricingError(f"Invalid price ending {ending!r}")
+        if value >= 1:
+            value /= 100
+        if not 0 <= value < 1:
+            raise PricingError(f"Invalid price ending {ending!r}")
+        values.append(round(value, 2))
+    return np.array(sorted(set(values)))
+
+
+def parse_ladder(value: str) -> Dict[str, List[float]]:
+    """"Main=11.99,13.99" -> {'Main': [11.99, 13.99]}"""
+    category, _, points = value.rpartition('=')
+    try:
+        return {category.strip(): [float(p) for p in points.split(',') if p.strip()]}
+    except ValueError:
+        raise PricingError(f"Ladder must be CATEGORY=PRICE,PRICE,..., got {value!r}")
+
+
+def print_scenarios(result: Dict[str, Any]):
+    print("=" * 80)
+    print(f"MENU PRICE OPTIMIZER - menu {result['menu_id']} "
+          f"(current blended food cost {result['current_food_cost_percent']:.2f}%, {result['weighted_by']})")
+    print("=" * 80)
+    for scenario in result['scenarios']:
+        summary = scenario['summary']
+        print(f"\nTarget {scenario['target_food_cost']:.1f}% -> achieved {scenario['achieved_food_cost_percent']:.2f}%"
+              + ("" if scenario['feasible'] else " (target outside the allowed price bands)"))
+        print(f"  Revenue {summary['current_revenue']:.2f} -> {summary['new_revenue']:.2f} "
+              f"({summary['revenue_impact']:+.2f}); margin {summary['current_margin']:.2f} -> "
+              f"{summary['new_margin']:.2f} ({summary['margin_impact']:+.2f})")
+        for row in scenario['items']:
+            if row['price_change']:
+                flag = ' *' if row['off_grid'] else ''
+                print(f"  {row['item_name'][:40]:<40} {row['menu_price']:>7.2f} -> {row['new_price']:>7.2f} "
+                      f"({row['price_change_percent']:+.1f}%){flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Set menu prices to hit blended food-cost targets")
+    parser.add_argument('--target', action='append', type=float, required=True,
+                        help="Target blended food cost %% (repeatable)")
+    parser.add_argument('--menu-id', type=int, help="Menu to price (default: the active menu)")
+    parser.add_argument('--max-change', type=float, help="Largest allowed price change, in %%")
+    parser.add_argument('--endings', help="Allowed price endings, e.g. 0.49,0.99")
+    parser.add_argument('--ladder', action='append', default=[], metavar='CATEGORY=PRICE,...',
+                        help="Allowed price points for a category (repeatable)")
+    parser.add_argument('--raise-only', action='store_true', help="Never lower a price")
+    parser.add_argument('--db', default='restaurant_calculator.db', help="Database path")
+    parser.add_argument('--json', action='store_true', help="Print the scenarios as JSON")
+    args = parser.parse_args()
+
+    try:
+        ladders = {}
+        for value in args.ladder:
+            ladders.update(parse_ladder(value))
+        result = MenuPriceOptimizer(args.db).optimize(
+            args.target, menu_id=args.menu_id, max_change_percent=args.max_change,
+            endings=args.endings.split(',') if args.endings else None, ladders=ladders,
+            raise_only=args.raise_only)
+    except PricingError as e:
+        parser.error(str(e))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_scenarios(result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+metrics.py - Prometheus text-format metrics for requests, SQLite and jobs
+
+A small in-process registry of counters, gauges and histograms rendered in
+the Prometheus text exposition format (0.0.4) at /metrics. Recording is a
+dict lookup and a bisect under a lock, cheap enough to stay on in
+production. Values computed elsewhere (response cache and catalog
+statistics, SQLite connection counts) are read from collectors only when
+/metrics is scraped.
+
+RequestMetrics(app) records for every request:
+
+- http_request_duration_seconds{method,route}   histogram
+- http_requests_total{method,route,status}      counter
+- http_requests_in_progress                     gauge, busy request threads
+- db_queries_per_request{route}                 histogram, from query_instrumentation
+- db_time_per_request_seconds{route}            histogram
+
+route is the URL rule (/recipes/<int:recipe_id>), not the path, so the
+label set stays bounded; requests matching no rule are 'unmatched'.
+
+timed_job(name) records background and batch jobs (imports,
+recalculation, validation, backups) as job_duration_seconds{job} and
+job_runs_total{job,outcome}. Jobs only appear on /metrics when they run in
+the app process; a CLI run keeps its numbers to itself.
+
+Each gunicorn worker keeps its own registry, so a scrape reports the worker
+that answered it. Counters are per worker and restart at zero with it,
+which Prometheus' rate() already handles.
+
+Usage:
+    curl http://localhost:8888/metrics
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+JOB_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0)
+
+# A collector returns (name, type, help, [(labels, value), ...]) families at scrape time
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """A metric family: one value (or histogram) per label combination"""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        with self.lock:
+            return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+                    for key, value in sorted(self.values.items())]
+
+    def render(self) -> List[str]:
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}'] + self.samples()
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self.lock:
+            return self.values.get(self._key(labels), 0)
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.values.get(key)
+            if series is None:
+                # per-bucket (not yet cumulative) counts, +Inf last, then the sum
+                series = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def snapshot(self, **labels) -> Optional[Dict[str, float]]:
+        """count and sum of one label combination"""
+        with self.lock:
+            series = self.values.get(self._key(labels))
+            if series is None:
+                return None
+            return {'count': sum(series[:-1]), 'sum': series[-1]}
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self.lock:
+            items = sorted((key, list(series)) for key, series in self.values.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ('le',), key + (_format_value(bound),))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(series[-1])}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Registry:
+    """Metrics and scrape-time collectors rendered together"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+        self.lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self.lock:
+            existing = self.metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self.metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        with self.lock:
+            self.collectors.append(collector)
+
+    def render(self) -> str:
+        with self.lock:
+            metrics = list(self.metrics.values())
+            collectors = list(self.collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                lines.append(f'# collector {getattr(collector, "__name__", collector)} failed: {_escape(e)}')
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in samples:
+                    lines.append(f'{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def stats_collector(prefix: str, stats: Callable[[], Dict[str, float]], counters: Tuple[str, ...] = (),
+                    gauges: Tuple[str, ...] = ()) -> Callable[[], List[Family]]:
+    """Collector exporting chosen keys of a stats() dict as {prefix}_{key}_total counters and {prefix}_{key} gauges"""
+    def collect() -> List[Family]:
+        values = stats()
+        families = [(f'{prefix}_{key}_total', 'counter', f'{prefix} {key}'.replace('_', ' '), [({}, values[key])])
+                    for key in counters]
+        families += [(f'{prefix}_{key}', 'gauge', f'{prefix} {key}'.replace('_', ' '), [({}, values[key])])
+                     for key in gauges]
+        return families
+    collect.__name__ = f'{prefix}_collector'
+    return collect
+
+
+REGISTRY = Registry()
+
+job_duration = REGISTRY.histogram('job_duration_seconds', 'Duration of background and batch jobs',
+                                  ('job',), JOB_BUCKETS)
+job_runs = REGISTRY.counter('job_runs_total', 'Background and batch job runs by outcome', ('job', 'outcome'))
+
+
+@contextmanager
+def job_timer(job: str):
+    """Time the enclosed block as one run of a job; an exception counts as outcome=error"""
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'success'
+    finally:
+        job_duration.observe(time.perf_counter() - started, job=job)
+        job_runs.inc(job=job, outcome=outcome)
+
+
+def timed_job(job: str):
+    """Decorator form of job_timer"""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with job_timer(job):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class RequestMetrics:
+    """Flask integration: latency, status and per-request query metrics, served at /metrics"""
+
+    def __init__(self, app=None, registry: Registry = REGISTRY):
+        self.registry = registry
+        self.duration = registry.histogram('http_request_duration_seconds', 'Request latency by route',
+                                           ('method', 'route'), LATENCY_BUCKETS)
+        self.requests = registry.counter('http_requests_total', 'Requests by route and status',
+                                         ('method', 'route', 'status'))
+        self.in_progress = registry.gauge('http_requests_in_progress', 'Requests being handled right now')
+        self.queries = registry.histogram('db_queries_per_request', 'SQLite statements per request',
+                                          ('route',), QUERY_COUNT_BUCKETS)
+        self.db_time = registry.histogram('db_time_per_request_seconds', 'Time in SQLite per request',
+                                          ('route',), DB_TIME_BUCKETS)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        """Register the hooks after QueryInstrumentation so its recorder is still active here"""
+        from flask import Response, g, request
+
+        from query_instrumentation import current_recorder
+
+        def route():
+            return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+        def record(status: int):
+            g.metrics_recorded = True
+            labels = {'method': request.method, 'route': route()}
+            self.duration.observe(time.perf_counter() - g.metrics_started, **labels)
+            self.requests.inc(status=status, **labels)
+
+        @app.before_request
+        def start_request_metrics():
+            g.metrics_started = time.perf_counter()
+            g.metrics_recorded = False
+            self.in_progress.inc()
+
+        @app.after_request
+        def finish_request_metrics(response):
+            if 'metrics_started' not in g:
+                return response
+            record(response.status_code)
+            recorder = current_recorder()
+            if recorder is not None:
+                self.queries.observe(recorder.query_count, route=route())
+                self.db_time.observe(recorder.total_ms / 1000, route=route())
+            return response
+
+        @app.teardown_request
+        def stop_request_metrics(exc=None):
+            if 'metrics_started' not in g:
+                return
+            if not g.metrics_recorded:
+                record(500)  # raised past the error handlers
+            self.in_progress.dec()
+
+        @app.route('/metrics')
+        def metrics():
+            return Response(self.registry.render(), content_type=CONTENT_TYPE)
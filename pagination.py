@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+pagination.py - Server-side pagination, sorting and streaming for listing pages
+
+Used by the /inventory, /recipes, /vendors and /menus_mgmt pages and their
+/api/* JSON variants so that response size no longer grows with the catalog.
+
+Searching (?q=) and filtering (?vendor=, ?group=, ...) happen in SQL as
+well, so they cover the whole listing rather than the rows of one page.
+Listing queries mark where the WHERE clause goes with a {where}
+placeholder, ahead of any GROUP BY.
+"""
+
+import sqlite3
+from typing import Callable, Dict, Mapping, Optional, Sequence, Tuple
+
+DEFAULT_PER_PAGE = 100
+MAX_PER_PAGE = 500
+
+# Rows fetched per round trip when streaming a full listing
+STREAM_BATCH_SIZE = 500
+
+
+def _int_arg(args: Mapping, key: str, default: int) -> int:
+    """Read a positive integer query argument, falling back to the default"""
+    try:
+        value = int(args.get(key, default))
+    except (TypeError, ValueError):
+        return default
+    return value if value > 0 else default
+
+
+def parse_listing_filters(args: Mapping, filter_columns: Dict[str, str] = None) -> Dict:
+    """Parse the q search argument and the non-empty arguments named in filter_columns"""
+    filters = {}
+    for key in filter_columns or {}:
+        value = (args.get(key) or '').strip()
+        if value:
+            filters[key] = value
+    return {'q': (args.get('q') or '').strip(), 'filters': filters}
+
+
+def parse_listing_args(args: Mapping, sort_columns: Dict[str, str], default_sort: str,
+                       default_order: str = 'asc', filter_columns: Dict[str, str] = None) -> Dict:
+    """
+    Parse page/per_page/sort/order query arguments plus q and filters
+
+    Unknown sort keys fall back to the default so that user input never
+    reaches the ORDER BY clause.
+    """
+    sort = args.get('sort') or default_sort
+    if sort not in sort_columns:
+        sort = default_sort
+
+    order = (args.get('order') or default_order).lower()
+    if order not in ('asc', 'desc'):
+        order = default_order
+
+    return {
+        'page': _int_arg(args, 'page', 1),
+        'per_page': min(_int_arg(args, 'per_page', DEFAULT_PER_PAGE), MAX_PER_PAGE),
+        'sort': sort,
+        'order': order,
+        **parse_listing_filters(args, filter_columns)
+    }
+
+
+def where_clause(q: str = '', filters: Dict[str, str] = None, search_columns: Sequence[str] = (),
+                 filter_columns: Dict[str, str] = None) -> Tuple[str, Tuple]:
+    """
+    Build a WHERE clause and its parameters from a search string and filters
+
+    q is a case-insensitive substring match against any of search_columns.
+    filter_columns maps a filter name to a condition with one ? for its
+    value, e.g. {'status': 'r.status = ?'}; filters it does not name are
+    ignored. Returns ('', ()) when there is nothing to filter on.
+    """
+    conditions, params = [], []
+    if q and search_columns:
+        pattern = '%' + q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        conditions.append('(' + ' OR '.join(f"{column} LIKE ? ESCAPE '\\'" for column in search_columns) + ')')
+        params.extend([pattern] * len(search_columns))
+    for key, value in (filters or {}).items():
+        if key in (filter_columns or {}):
+            conditions.append(filter_columns[key])
+            params.append(value)
+    if not conditions:
+        return '', ()
+    return 'WHERE ' + ' AND '.join(conditions), tuple(params)
+
+
+def with_where(query: str, where: str) -> str:
+    """Put a where_clause() result at the query's {where} placeholder"""
+    return query.replace('{where}', where)
+
+
+def order_by_clause(sort_columns: Dict[str, str], sort: str, order: str,
+                    tiebreaker: Optional[str] = None) -> str:
+    """
+    Build an ORDER BY clause from a whitelisted sort key
+
+    A sort column may list several comma-separated expressions; the
+    direction is applied to each of them and to the tiebreaker.
+    """
+    direction = 'DESC' if order == 'desc' else 'ASC'
+    columns = [column.strip() for column in sort_columns[sort].split(',')]
+    if tiebreaker:
+        columns.append(tiebreaker)
+    return ', '.join(f"{column} {direction}" for column in columns)
+
+
+def paginate_query(conn: sqlite3.Connection, query: str, params: Sequence = (),
+                   sort_columns: Dict[str, str] = None, sort: str = None, order: str = 'asc',
+                   page: int = 1, per_page: int = DEFAULT_PER_PAGE,
+                   count_query: str = None, tiebreaker: str = None, q: str = '',
+                   filters: Dict[str, str] = None, search_columns: Sequence[str] = (),
+                   filter_columns: Dict[str, str] = None) -> Dict:
+    """
+    Run one page of a listing query
+
+    The query must not contain its own ORDER BY/LIMIT. count_query can be
+    given when a cheaper COUNT(*) than wrapping the listing query exists;
+    it is not used while a search or filter applies. params bind ahead of
+    the {where} clause.
+
+    Returns a dict shaped like the staging admins' review pages:
+    items, total, page, per_page, total_pages, sort, order, sort_options,
+    q, filters
+    """
+    where, where_params = where_clause(q, filters, search_columns, filter_columns)
+    query = with_where(query, where)
+    params = tuple(params) + where_params
+
+    if count_query and not where:
+        total = conn.execute(count_query, params).fetchone()[0]
+    else:
+        total = conn.execute(f"SELECT COUNT(*) FROM ({query})", params).fetchone()[0]
+
+    total_pages = max(1, (total + per_page - 1) // per_page)
+    page = min(max(page, 1), total_pages)
+    offset = (page - 1) * per_page
+
+    order_sql = order_by_clause(sort_columns, sort, order, tiebreaker)
+    items = conn.execute(
+        f"{query} ORDER BY {order_sql} LIMIT ? OFFSET ?",
+        params + (per_page, offset)
+    ).fetchall()
+
+    return {
+        'items': items,
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+        'total_pages': total_pages,
+        'sort': sort,
+        'order': order,
+        'sort_options': list(sort_columns),
+        'q': q,
+        'filters': dict(filters or {})
+    }
+
+
+def page_to_json(page: Dict) -> Dict:
+    """Convert a paginate_query() result into a JSON-serialisable dict"""
+    data = {key: value for key, value in page.items() if key != 'items'}
+    data['items'] = [dict(row) for row in page['items']]
+    return data
+
+
+class LazyRows:
+    """
+    Re-iterable row source for streamed renders
+
+    len() runs a COUNT(*) once; each iteration opens its own connection and
+    fetches rows in batches, so a template rendered with stream_template()
+    starts sending bytes before the whole table has been read.
+    """
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], query: str,
+                 params: Sequence = (), count_query: str = None):
+        self.connect = connect
+        self.query = query
+        self.params = tuple(params)
+        self.count_query = count_query
+        self._count = None
+
+    def __len__(self):
+        if self._count is None:
+            conn = self.connect()
+            try:
+                if self.count_query:
+                    self._count = conn.execute(self.count_query, self.params).fetchone()[0]
+                else:
+                    self._count = conn.execute(
+                        f"SELECT COUNT(*) FROM ({self.query})", self.params
+                    ).fetchone()[0]
+            finally:
+                conn.close()
+        return self._count
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __iter__(self):
+        conn = self.connect()
+        try:
+            cursor = conn.execute(self.query, self.params)
+            while True:
+                batch = cursor.fetchmany(STREAM_BATCH_SIZE)
+                if not batch:
+                    break
+                yield from batch
+        finally:
+            conn.close()
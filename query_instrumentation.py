@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+query_instrumentation.py - Per-request SQLite query timing and slow-query log
+
+connect() is a drop-in for sqlite3.connect() that returns an
+InstrumentedConnection. While a QueryRecorder is active on the current
+thread (one per Flask request via init_app(), or the recording() context
+manager in CLI tools) every statement is recorded with:
+
+- its SQL as expanded by SQLite's trace callback (bound values inlined)
+- execute + fetch time
+- how many extra statements it fired (triggers, implicit transactions)
+
+At the end of a request the recorder summarizes query count, total DB time
+and the slowest statements, flags statements repeated often enough to be an
+N+1 loop, adds a Server-Timing header, keeps the summary for /debug/queries
+and logs statements slower than SLOW_QUERY_MS with their EXPLAIN QUERY PLAN.
+
+The batch CLIs (calculation_rebuilder, calculation_validator, etl,
+csv_recipe_loader_v2) open their connections through connect() and run
+under recording(keep_statements=False) with configure_slow_query_log(), so
+their slow statements land in the same slow_queries.log as the app's while
+memory stays flat however long the run.
+
+With no recorder active the wrapper adds one thread-local lookup per execute.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import heapq
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '100'))
+SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG', 'slow_queries.log')
+
+# A normalized statement run this many times in one request is reported as N+1
+REPEATED_QUERY_THRESHOLD = 10
+
+SLOWEST_PER_REQUEST = 5
+RECENT_REQUESTS = 50
+
+LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+WHITESPACE_PATTERN = re.compile(r'\s+')
+TRANSACTION_PREFIXES = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', '--')
+
+_state = threading.local()
+
+# Instrumented connections opened and closed by this process (/metrics)
+_connections = {'opened': 0, 'closed': 0}
+_connections_lock = threading.Lock()
+
+slow_query_logger = logging.getLogger('slow_queries')
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and replace literals with ? so repeats group together"""
+    return LITERAL_PATTERN.sub('?', WHITESPACE_PATTERN.sub(' ', sql).strip())
+
+
+def current_recorder() -> Optional['QueryRecorder']:
+    return getattr(_state, 'recorder', None)
+
+
+class QueryRecorder:
+    """Statements executed on this thread while the recorder is active"""
+
+    def __init__(self, label: str = ''):
+        self.label = label
+        self.statements = []
+        self.started = time.perf_counter()
+
+    def record(self, database: str, sql: str, params, expanded: List[str], seconds: float) -> Dict:
+        # The trace also sees implicit BEGINs and trigger bodies; show the statement itself
+        statement = next(
+            (traced for traced in expanded if not traced.lstrip().upper().startswith(TRANSACTION_PREFIXES)),
+            sql
+        )
+        entry = {
+            'database': database,
+            'sql': sql,
+            'params': params,
+            'expanded': statement,
+            'nested': max(len(expanded) - 1, 0),
+            'ms': seconds * 1000
+        }
+        self._keep(entry)
+        return entry
+
+    def _keep(self, entry: Dict) -> None:
+        self.statements.append(entry)
+
+    @property
+    def query_count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(entry['ms'] for entry in self.statements)
+
+    def slowest(self, limit: int = SLOWEST_PER_REQUEST) -> List[Dict]:
+        return sorted(self.statements, key=lambda entry: entry['ms'], reverse=True)[:limit]
+
+    def repeated(self, threshold: int = REPEATED_QUERY_THRESHOLD) -> List[Dict]:
+        """Normalized statements executed at least threshold times (likely N+1 loops)"""
+        groups = OrderedDict()
+        for entry in self.statements:
+            group = groups.setdefault(normalize_sql(entry['sql']), {'count': 0, 'ms': 0.0})
+            group['count'] += 1
+            group['ms'] += entry['ms']
+        return [
+            {'sql': sql, 'count': group['count'], 'ms': round(group['ms'], 3)}
+            for sql, group in groups.items() if group['count'] >= threshold
+        ]
+
+    def summary(self) -> Dict:
+        slowest = self.slowest()
+        return {
+            'label': self.label,
+            'query_count': self.query_count,
+            'db_ms': round(self.total_ms, 3),
+            'request_ms': round((time.perf_counter() - self.started) * 1000, 3),
+            'slowest': [
+                {'sql': entry['expanded'], 'ms': round(entry['ms'], 3), 'nested': entry['nested']}
+                for entry in slowest
+            ],
+            'repeated': self.repeated()
+        }
+
+    def slow_statements(self, threshold_ms: float = SLOW_QUERY_MS) -> List[Dict]:
+        return [entry for entry in self.statements if entry['ms'] >= threshold_ms]
+
+
+class RunningQueryRecorder(QueryRecorder):
+    """
+    Recorder for batch runs that keeps memory flat however many statements run
+
+    Only running totals and the slowest few statements are kept. Each
+    statement over the threshold goes to the slow-query log once it has
+    finished, i.e. when the next one starts (so fetch time is included) or
+    when finish() is called. N+1 detection is left to per-request recorders.
+    """
+
+    def __init__(self, label: str = '', threshold_ms: float = SLOW_QUERY_MS, keep: int = SLOWEST_PER_REQUEST):
+        super().__init__(label)
+        self.threshold_ms = threshold_ms
+        self.keep = keep
+        self.logged = 0
+        self._count = 0
+        self._total_ms = 0.0
+        self._slowest = []  # min-heap of (ms, sequence, entry)
+        self._pending = None
+
+    def _keep(self, entry: Dict) -> None:
+        self.finish()
+        self._pending = entry
+
+    def finish(self) -> None:
+        """Account for the last statement recorded"""
+        entry, self._pending = self._pending, None
+        if entry is None:
+            return
+        self._count += 1
+        self._total_ms += entry['ms']
+        item = (entry['ms'], self._count, entry)
+        if len(self._slowest) < self.keep:
+            heapq.heappush(self._slowest, item)
+        else:
+            heapq.heappushpop(self._slowest, item)
+        if entry['ms'] >= self.threshold_ms:
+            log_slow_statement(entry, self.label)
+            self.logged += 1
+
+    @property
+    def query_count(self) -> int:
+        self.finish()
+        return self._count
+
+    @property
+    def total_ms(self) -> float:
+        self.finish()
+        return self._total_ms
+
+    def slowest(self, limit: int = SLOWEST_PER_REQUEST) -> List[Dict]:
+        self.finish()
+        return [entry for _, _, entry in sorted(self._slowest, reverse=True)][:limit]
+
+    def repeated(self, threshold: int = REPEATED_QUERY_THRESHOLD) -> List[Dict]:
+        return []
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports execute and fetch time to the active recorder"""
+
+    _entry = None
+
+    def _timed(self, method, sql, params, many=False):
+        recorder = current_recorder()
+        if recorder is None:
+            self._entry = None
+            return method(sql, params)
+        connection = self.connection
+        connection._traced = []
+        start = time.perf_counter()
+        try:
+            return method(sql, params)
+        finally:
+            self._entry = recorder.record(
+                connection.database, sql, None if many else params, connection._traced,
+                time.perf_counter() - start
+            )
+
+    def execute(self, sql, params=()):
+        return self._timed(super().execute, sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self._timed(super().executemany, sql, seq_of_params, many=True)
+
+    def _fetch(self, method, *args):
+        if self._entry is None:
+            return method(*args)
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self._entry['ms'] += (time.perf_counter() - start) * 1000
+
+    def fetchone(self):
+        return self._fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._fetch(super().fetchmany, size if size is not None else self.arraysize)
+
+    def fetchall(self):
+        return self._fetch(super().fetchall)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3.Connection whose cursors (and execute shortcuts) are instrumented"""
+
+    def __init__(self, database, *args, **kwargs):
+        super().__init__(database, *args, **kwargs)
+        self.database = str(database)
+        self._traced = []
+        self._counted_open = True
+        self.set_trace_callback(self._trace)
+        with _connections_lock:
+            _connections['opened'] += 1
+
+    def _count_close(self) -> None:
+        if self.__dict__.get('_counted_open'):
+            self._counted_open = False
+            with _connections_lock:
+                _connections['closed'] += 1
+
+    def close(self):
+        self._count_close()
+        super().close()
+
+    def __del__(self):
+        # "with get_db() as conn" commits but does not close; those close when collected
+        self._count_close()
+
+    def _trace(self, statement: str) -> None:
+        if _state.__dict__.get('recorder') is not None:
+            self._traced.append(statement)
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+
+def connect(database, **kwargs) -> sqlite3.Connection:
+    """Drop-in replacement for sqlite3.connect() returning an instrumented connection"""
+    kwargs.setdefault('factory', InstrumentedConnection)
+    return sqlite3.connect(database, **kwargs)
+
+
+def connection_stats() -> Dict[str, int]:
+    """Instrumented connections opened, closed and still open in this process"""
+    with _connections_lock:
+        return dict(_connections, open=_connections['opened'] - _connections['closed'])
+
+
+def explain_plan(database: str, sql: str, params=()) -> List[str]:
+    """EXPLAIN QUERY PLAN on a separate, unrecorded connection"""
+    if not sql.lstrip().upper().startswith(('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')):
+        return []
+    try:
+        conn = sqlite3.connect(database)
+        try:
+            return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params or ())]
+        finally:
+            conn.close()
+    except (sqlite3.Error, ValueError) as e:
+        return [f'(plan unavailable: {e})']
+
+
+def log_slow_statement(entry: Dict, label: str) -> None:
+    """Write one recorded statement, with its plan, to the slow-query log"""
+    params = entry['params'] if isinstance(entry['params'], (tuple, list, dict)) else ()
+    plan = explain_plan(entry['database'], entry['sql'], params)
+    slow_query_logger.warning(
+        "%.1fms %s\n  %s\n  plan: %s",
+        entry['ms'], label, entry['expanded'], ' | '.join(plan) or '-'
+    )
+
+
+def log_slow_statements(recorder: QueryRecorder, threshold_ms: float = SLOW_QUERY_MS) -> int:
+    """Write statements over the threshold, with their plans, to the slow-query log"""
+    slow = recorder.slow_statements(threshold_ms)
+    for entry in slow:
+        log_slow_statement(entry, recorder.label)
+    return len(slow)
+
+
+def configure_slow_query_log(path: str = SLOW_QUERY_LOG) -> None:
+    if not any(isinstance(handler, logging.FileHandler) for handler in slow_query_logger.handlers):
+        handler = logging.FileHandler(path)
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        slow_query_logger.addHandler(handler)
+        slow_query_logger.setLevel(logging.WARNING)
+
+
+@contextmanager
+def recording(label: str = '', keep_statements: bool = True):
+    """
+    Record every statement run on this thread, e.g. around a CLI tool's main()
+
+    keep_statements=False uses a RunningQueryRecorder, which logs slow
+    statements as they finish instead of keeping the whole run in memory.
+    """
+    previous = current_recorder()
+    recorder = QueryRecorder(label) if keep_statements else RunningQueryRecorder(label)
+    _state.recorder = recorder
+    try:
+        yield recorder
+    finally:
+        _state.recorder = previous
+        if keep_statements:
+            log_slow_statements(recorder)
+        else:
+            recorder.finish()
+
+
+class QueryInstrumentation:
+    """Flask integration: per-request recorder, Server-Timing header and recent summaries"""
+
+    def __init__(self, app=None, recent: int = RECENT_REQUESTS):
+        self.recent = deque(maxlen=recent)
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        from flask import request
+
+        configure_slow_query_log()
+
+        @app.before_request
+        def start_query_recording():
+            _state.recorder = QueryRecorder(f'{request.method} {request.full_path.rstrip("?")}')
+
+        @app.after_request
+        def finish_query_recording(response):
+            recorder = current_recorder()
+            if recorder is None:
+                return response
+            summary = recorder.summary()
+            summary['status'] = response.status_code
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={summary["db_ms"]:.1f};desc="{summary["query_count"]} queries"'
+            )
+            if request.endpoint != 'debug_queries':
+                with self._lock:
+                    self.recent.appendleft(summary)
+            log_slow_statements(recorder)
+            return response
+
+        @app.teardown_request
+        def stop_query_recording(exc=None):
+            _state.recorder = None
+
+    def recent_requests(self) -> List[Dict]:
+        with self._lock:
+            return list(self.recent)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+query_plan_report.py - EXPLAIN QUERY PLAN report for every route's SQL
+
+Statically collects the SQL each function in app.py (and any extra
+modules) passes to execute()/executemany(), runs EXPLAIN QUERY PLAN for it
+against a database, and flags full table scans and temp B-tree sorts so
+hot routes can be checked to run as indexed lookups, e.g. before and
+after materialize_compat_views.py.
+
+Usage:
+    python query_plan_report.py
+    python query_plan_report.py --db restaurant_calculator.db --source recipe_csv_staging_admin.py
+    python query_plan_report.py --scans-only --json reports/query_plans.json
+"""
+
+import argparse
+import ast
+import json
+import re
+import sqlite3
+from typing import Dict, List, Optional
+
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+INDEXED_SCAN_MARKERS = ('USING INDEX', 'USING COVERING INDEX', 'USING INTEGER PRIMARY KEY')
+
+CTE_PATTERN = re.compile(r'(\w+)\s+AS\s*\(', re.IGNORECASE)
+
+
+def _route_path(function: ast.FunctionDef) -> Optional[str]:
+    """The URL rule of an @app.route / @blueprint.route decorated function"""
+    for decorator in function.decorator_list:
+        if (isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Attribute)
+                and decorator.func.attr == 'route' and decorator.args
+                and isinstance(decorator.args[0], ast.Constant)):
+            return decorator.args[0].value
+    return None
+
+
+def collect_statements(source_path: str) -> List[Dict]:
+    """Find the SQL literal (or module-level SQL constant) of every execute() call"""
+    with open(source_path, 'r') as f:
+        tree = ast.parse(f.read(), filename=source_path)
+
+    constants = {}
+    for node in tree.body:
+        if (isinstance(node, ast.Assign) and len(node.targets) == 1
+                and isinstance(node.targets[0], ast.Name)
+                and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str)):
+            constants[node.targets[0].id] = node.value.value
+
+    statements = []
+    for function in ast.walk(tree):
+        if not isinstance(function, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        route = _route_path(function)
+        for node in ast.walk(function):
+            if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                    and node.func.attr in ('execute', 'executemany') and node.args):
+                continue
+            argument = node.args[0]
+            if isinstance(argument, ast.Constant) and isinstance(argument.value, str):
+                sql = argument.value
+            elif isinstance(argument, ast.Name) and argument.id in constants:
+                sql = constants[argument.id]
+            elif isinstance(argument, ast.JoinedStr):
+                sql = None  # built at runtime, cannot be planned statically
+            else:
+                continue
+            statements.append({
+                'source': source_path,
+                'function': function.name,
+                'route': route,
+                'line': node.lineno,
+                'sql': sql
+            })
+
+    # Module-level listing queries are executed through helpers, plan them too
+    for name, sql in constants.items():
+        if sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            statements.append({
+                'source': source_path, 'function': name, 'route': None, 'line': None, 'sql': sql
+            })
+    return statements
+
+
+def _bind_nulls(sql: str):
+    named = re.findall(r'[:@$](\w+)', sql)
+    if named:
+        return {name: None for name in named}
+    return [None] * sql.count('?')
+
+
+def explain(conn: sqlite3.Connection, sql: str) -> Dict:
+    """EXPLAIN QUERY PLAN one statement and classify its plan"""
+    try:
+        rows = conn.execute(f'EXPLAIN QUERY PLAN {sql}', _bind_nulls(sql)).fetchall()
+    except sqlite3.Error as e:
+        return {'plan': [], 'full_scans': [], 'temp_sorts': 0, 'error': str(e)}
+
+    plan = [row[3] for row in rows]
+    # Scans of constant rows, subqueries and CTEs are not table scans
+    ctes = {name.lower() for name in CTE_PATTERN.findall(sql)}
+    full_scans = [
+        detail for detail in plan
+        if detail.startswith('SCAN ') and 'CONSTANT ROW' not in detail and not detail.startswith('SCAN (')
+        and detail.split()[1].lower() not in ctes
+        and not any(marker in detail for marker in INDEXED_SCAN_MARKERS)
+    ]
+    return {
+        'plan': plan,
+        'full_scans': full_scans,
+        'temp_sorts': sum(1 for detail in plan if 'USE TEMP B-TREE' in detail),
+        'error': None
+    }
+
+
+def build_report(db_path: str, sources: List[str]) -> List[Dict]:
+    """Collect and explain every statement, read-only against the database"""
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        report = []
+        for source in sources:
+            for statement in collect_statements(source):
+                sql = statement['sql']
+                if sql is None:
+                    statement.update({'plan': [], 'full_scans': [], 'temp_sorts': 0, 'error': 'dynamic SQL'})
+                elif not sql.lstrip().upper().startswith(EXPLAINABLE):
+                    continue
+                else:
+                    statement.update(explain(conn, sql))
+                report.append(statement)
+        return report
+    finally:
+        conn.close()
+
+
+def print_report(report: List[Dict], scans_only: bool = False) -> None:
+    flagged = [entry for entry in report if entry['full_scans']]
+    errors = [entry for entry in report if entry['error'] and entry['error'] != 'dynamic SQL']
+    dynamic = [entry for entry in report if entry['error'] == 'dynamic SQL']
+
+    print("=" * 70)
+    print("QUERY PLAN REPORT")
+    print("=" * 70)
+    print(f"Statements analysed: {len(report)}")
+    print(f"With full table scans: {len(flagged)}")
+    print(f"With temp B-tree sorts: {sum(1 for entry in report if entry['temp_sorts'])}")
+    print(f"Dynamic (not planned): {len(dynamic)}")
+    print(f"Failed to plan: {len(errors)}")
+
+    for entry in report:
+        if scans_only and not entry['full_scans']:
+            continue
+        location = f"{entry['source']}:{entry['line']}" if entry['line'] else entry['source']
+        route = f" [{entry['route']}]" if entry['route'] else ''
+        status = 'FULL SCAN' if entry['full_scans'] else ('ERROR' if entry['error'] else 'ok')
+        print(f"\n{status:9} {entry['function']}{route} ({location})")
+        if entry['error']:
+            print(f"          {entry['error']}")
+        for detail in entry['plan']:
+            marker = '!' if detail in entry['full_scans'] else ' '
+            print(f"        {marker} {detail}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='EXPLAIN QUERY PLAN every route query and flag full scans')
+    parser.add_argument('--db', default='restaurant_calculator.db', help='Database path')
+    parser.add_argument('--source', action='append', help='Python module to scan (default: app.py)')
+    parser.add_argument('--scans-only', action='store_true', help='Only print statements with full scans')
+    parser.add_argument('--json', help='Also write the report as JSON to this path')
+    args = parser.parse_args()
+
+    report = build_report(args.db, args.source or ['app.py'])
+    print_report(report, scans_only=args.scans_only)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nJSON report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,48 @@
 """
 Railway Volume Configuration Helper
 This script helps configure the app to use Railway volumes for database storage
+
+It also holds the warm-start path used by every gunicorn worker:
+
+- the database is migrated onto the volume with the SQLite backup API, so a
+  copy taken while something still writes the source is consistent
+- a startup_schema marker records which version of the startup DDL last ran
+  and the SQLite schema cookie after it; when both still match, workers skip
+  the DDL entirely, and any later schema change (migrations/,
+  materialize_compat_views.py) makes the next boot run it again
+- warm_start() reads the database file into the OS page cache and fills the
+  in-process caches in a background thread instead of on the first requests
 """
+import fcntl
+import hashlib
 import os
-import shutil
-from pathlib import Path
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
+from db_backup import quick_check, BACKUP_PAGES
+
+VOLUME_DATABASE = '/data/restaurant_calculator.db'
+LOCAL_DATABASE = 'restaurant_calculator.db'
+
+# Bump whenever the DDL app.py runs at startup changes
+STARTUP_SCHEMA_VERSION = 3
+
+STARTUP_SCHEMA_TABLE = '''
+    CREATE TABLE IF NOT EXISTS startup_schema (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL,
+        schema_cookie INTEGER NOT NULL,
+        marked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+# Read the database file in 1MB chunks when warming the page cache, up to a limit
+WARM_CHUNK = 1024 * 1024
+WARM_MAX_BYTES = 512 * 1024 * 1024
 
 def get_database_path():
     """
@@ -18,7 +56,7 @@ def get_database_path():
     if os.path.exists('/data'):
         print("✅ Railway volume detected at /data")
         print(f"  Volume writable: {os.access('/data', os.W_OK)}")
-        return '/data/restaurant_calculator.db'
+        return VOLUME_DATABASE
     
     # Check Railway environment without volume
     if os.getenv('RAILWAY_ENVIRONMENT'):
@@ -26,17 +64,36 @@ def get_database_path():
     
     # Local development
     print("Using local database path")
-    return 'restaurant_calculator.db'
+    return LOCAL_DATABASE
 
-def migrate_database_to_volume():
+def copy_database(source_path, target_path, pages=BACKUP_PAGES):
+    """
+    Copy a database through the backup API into a .partial file, check it
+    and rename it into place
+    """
+    partial_path = target_path + '.partial'
+    try:
+        source = sqlite3.connect(f'file:{source_path}?mode=ro', uri=True)
+        target = sqlite3.connect(partial_path)
+        try:
+            source.backup(target, pages=pages)
+        finally:
+            target.close()
+            source.close()
+        problems = quick_check(partial_path)
+        if problems:
+            raise sqlite3.DatabaseError(f"Copy of {source_path} failed quick_check: {'; '.join(problems[:5])}")
+        os.replace(partial_path, target_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+def migrate_database_to_volume(volume_path=VOLUME_DATABASE, local_path=LOCAL_DATABASE):
     """
     One-time migration: Copy existing database to volume if needed
     """
-    volume_path = '/data/restaurant_calculator.db'
-    local_path = 'restaurant_calculator.db'
-    
     # Only run if on Railway and volume exists
-    if not os.path.exists('/data'):
+    if not os.path.exists(os.path.dirname(volume_path)):
         print("No Railway volume found, skipping migration")
         return False
     
@@ -49,7 +106,7 @@ def migrate_database_to_volume():
     if os.path.exists(local_path):
         print(f"Migrating database from {local_path} to {volume_path}")
         try:
-            shutil.copy2(local_path, volume_path)
+            copy_database(local_path, volume_path)
             print("✅ Database migrated successfully!")
             return True
         except Exception as e:
@@ -72,6 +129,88 @@ def setup_volume_database():
     
     return db_path
 
+@contextmanager
+def startup_lock(db_path):
+    """Serialize startup DDL across gunicorn workers booting together"""
+    # The lock file lives in the temp dir, not next to the database: closing
+    # another descriptor on the database file would drop SQLite's own locks
+    key = hashlib.sha1(os.path.abspath(db_path).encode('utf-8')).hexdigest()[:12]
+    lock_path = os.path.join(tempfile.gettempdir(), f'{os.path.basename(db_path)}.{key}.startup.lock')
+    with open(lock_path, 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def startup_schema_current(db_path):
+    """Whether the startup DDL already ran for this code version and nothing changed the schema since"""
+    conn = sqlite3.connect(db_path)
+    try:
+        row = conn.execute('SELECT version, schema_cookie FROM startup_schema WHERE id = 1').fetchone()
+        cookie = conn.execute('PRAGMA schema_version').fetchone()[0]
+    except sqlite3.OperationalError:
+        return False  # no marker yet
+    finally:
+        conn.close()
+    return row == (STARTUP_SCHEMA_VERSION, cookie)
+
+def mark_startup_schema(db_path):
+    """Record that the startup DDL ran against the current schema"""
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(STARTUP_SCHEMA_TABLE)
+        # Read the cookie after creating the marker table, which bumps it the first time
+        cookie = conn.execute('PRAGMA schema_version').fetchone()[0]
+        conn.execute('INSERT OR REPLACE INTO startup_schema (id, version, schema_cookie) VALUES (1, ?, ?)',
+                     (STARTUP_SCHEMA_VERSION, cookie))
+        conn.commit()
+    finally:
+        conn.close()
+
+def warm_page_cache(db_path, max_bytes=WARM_MAX_BYTES):
+    """
+    Read the database file once so the first queries hit the OS page cache
+
+    Every request opens its own connection, so SQLite's per-connection page
+    cache starts cold anyway; the OS cache is the one worth filling.
+    """
+    read = 0
+    with open(db_path, 'rb') as f:
+        while read < max_bytes:
+            chunk = f.read(WARM_CHUNK)
+            if not chunk:
+                break
+            read += len(chunk)
+    return read
+
+def warm_start(db_path, warmers: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+    """
+    Warm the page cache, then call each warmer, in a daemon thread
+
+    Returns a status dict the thread keeps up to date, for /health.
+    """
+    status = {'state': 'running', 'page_cache_bytes': 0, 'warmers': {}, 'errors': {}, 'seconds': None}
+
+    def run():
+        started = time.perf_counter()
+        try:
+            status['page_cache_bytes'] = warm_page_cache(db_path)
+        except OSError as e:
+            status['errors']['page_cache'] = str(e)
+        for name, warmer in warmers.items():
+            warmer_started = time.perf_counter()
+            try:
+                warmer()
+            except Exception as e:
+                status['errors'][name] = str(e)
+            status['warmers'][name] = round(time.perf_counter() - warmer_started, 3)
+        status['seconds'] = round(time.perf_counter() - started, 3)
+        status['state'] = 'done'
+
+    threading.Thread(target=run, name='warm-start', daemon=True).start()
+    return status
+
 if __name__ == "__main__":
     # Test the configuration
     print("=== Railway Volume Configuration Test ===")
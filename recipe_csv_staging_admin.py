@@ -6,6 +6,8 @@ Provides Flask routes and functionality for reviewing and approving staged recip
 
 from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for
 import sqlite3
+from query_instrumentation import connect as db_connect
+from metrics import timed_job
 from datetime import datetime
 import json
 from typing import Dict, List, Tuple, Any
@@ -23,7 +25,7 @@ class RecipeCsvStagingAdmin:
     
     def get_recipes_for_review(self, filters: Dict = None, page: int = 1, per_page: int = 50) -> Dict:
         """Get RECIPES for review (not individual ingredients)"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -92,7 +94,7 @@ class RecipeCsvStagingAdmin:
     
     def get_recipe_ingredients(self, recipe_name: str) -> List[Dict]:
         """Get all ingredients for a specific recipe"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -111,7 +113,7 @@ class RecipeCsvStagingAdmin:
     
     def get_review_items(self, filters: Dict = None, page: int = 1, per_page: int = 50) -> Dict:
         """DEPRECATED - Use get_recipes_for_review instead"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -261,7 +263,7 @@ class RecipeCsvStagingAdmin:
     
     def get_batch_list(self) -> List[str]:
         """Get list of all import batches"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         cursor = conn.cursor()
         
         batches = []
@@ -286,7 +288,7 @@ class RecipeCsvStagingAdmin:
     
     def update_item(self, staging_id: int, updates: Dict) -> Dict:
         """Update a single staging item"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         cursor = conn.cursor()
         
         result = {'success': False, 'message': ''}
@@ -336,7 +338,7 @@ class RecipeCsvStagingAdmin:
     
     def batch_action(self, staging_ids: List[int], action: str) -> Dict:
         """Perform batch action on multiple items"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         cursor = conn.cursor()
         
         results = {
@@ -392,7 +394,7 @@ class RecipeCsvStagingAdmin:
     
     def approve_recipe(self, recipe_name: str) -> Dict:
         """Approve all ingredients for a recipe"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         cursor = conn.cursor()
         
         result = {'success': False, 'message': '', 'updated': 0}
@@ -425,7 +427,7 @@ class RecipeCsvStagingAdmin:
     
     def reject_recipe(self, recipe_name: str, reason: str = None) -> Dict:
         """Reject all ingredients for a recipe"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         cursor = conn.cursor()
         
         result = {'success': False, 'message': '', 'updated': 0}
@@ -456,9 +458,10 @@ class RecipeCsvStagingAdmin:
         
         return result
     
+    @timed_job('recipe_csv_import')
     def process_to_live(self, batch_id: str = None) -> Dict:
         """Process approved recipes to live recipe tables"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         cursor = conn.cursor()
         
         results = {
@@ -628,7 +631,7 @@ class RecipeCsvStagingAdmin:
     
     def get_statistics(self) -> Dict:
         """Get overall statistics for staged recipes"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         cursor = conn.cursor()
         
         stats = {}
@@ -691,8 +694,14 @@ class RecipeCsvStagingAdmin:
         conn.close()
         return stats
 
-# Initialize admin instance
-admin = RecipeCsvStagingAdmin()
+# Admin handler, created on the first request rather than at import
+_admin = None
+
+def get_admin() -> RecipeCsvStagingAdmin:
+    global _admin
+    if _admin is None:
+        _admin = RecipeCsvStagingAdmin()
+    return _admin
 
 # Routes
 @recipe_csv_staging_bp.route('/')
@@ -714,9 +723,9 @@ def index():
     per_page = int(request.args.get('per_page', 50))
     
     # Get data
-    data = admin.get_recipes_for_review(filters, page, per_page)
-    batches = admin.get_batch_list()
-    stats = admin.get_statistics()
+    data = get_admin().get_recipes_for_review(filters, page, per_page)
+    batches = get_admin().get_batch_list()
+    stats = get_admin().get_statistics()
     
     return render_template('recipe_csv_staging_review.html',
                          recipes=data['recipes'],
@@ -731,7 +740,7 @@ def index():
 @recipe_csv_staging_bp.route('/recipe/<recipe_name>/ingredients')
 def get_recipe_ingredients(recipe_name):
     """Get ingredients for a specific recipe"""
-    ingredients = admin.get_recipe_ingredients(recipe_name)
+    ingredients = get_admin().get_recipe_ingredients(recipe_name)
     return jsonify({'ingredients': ingredients})
 
 @recipe_csv_staging_bp.route('/item/<int:staging_id>', methods=['GET', 'POST'])
@@ -739,11 +748,11 @@ def item(staging_id):
     """Get or update a single item"""
     if request.method == 'POST':
         updates = request.json
-        result = admin.update_item(staging_id, updates)
+        result = get_admin().update_item(staging_id, updates)
         return jsonify(result)
     else:
         # Get single item
-        conn = sqlite3.connect(admin.db_path)
+        conn = db_connect(get_admin().db_path)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -762,14 +771,14 @@ def item(staging_id):
 @recipe_csv_staging_bp.route('/recipe/<recipe_name>/approve', methods=['POST'])
 def approve_recipe(recipe_name):
     """Approve all ingredients for a recipe"""
-    result = admin.approve_recipe(recipe_name)
+    result = get_admin().approve_recipe(recipe_name)
     return jsonify(result)
 
 @recipe_csv_staging_bp.route('/recipe/<recipe_name>/reject', methods=['POST'])
 def reject_recipe(recipe_name):
     """Reject all ingredients for a recipe"""
     reason = request.json.get('reason') if request.json else None
-    result = admin.reject_recipe(recipe_name, reason)
+    result = get_admin().reject_recipe(recipe_name, reason)
     return jsonify(result)
 
 @recipe_csv_staging_bp.route('/batch-action', methods=['POST'])
@@ -781,21 +790,21 @@ def batch_action():
     if not staging_ids or not action:
         return jsonify({'error': 'Missing parameters'}), 400
     
-    results = admin.batch_action(staging_ids, action)
+    results = get_admin().batch_action(staging_ids, action)
     return jsonify(results)
 
 @recipe_csv_staging_bp.route('/process-to-live', methods=['POST'])
 def process_to_live():
     """Process approved recipes to live tables"""
     batch_id = request.json.get('batch_id')
-    results = admin.process_to_live(batch_id)
+    results = get_admin().process_to_live(batch_id)
     
     return jsonify(results)
 
 @recipe_csv_staging_bp.route('/statistics')
 def statistics():
     """Get current statistics"""
-    stats = admin.get_statistics()
+    stats = get_admin().get_statistics()
     return jsonify(stats)
 
 @recipe_csv_staging_bp.route('/refresh-data', methods=['POST'])
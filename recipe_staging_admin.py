@@ -6,6 +6,8 @@ Provides Flask routes and functionality for reviewing and approving staged recip
 
 from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for
 import sqlite3
+from query_instrumentation import connect as db_connect
+from metrics import timed_job
 from datetime import datetime
 import json
 from typing import Dict, List, Tuple, Any, Optional
@@ -23,7 +25,7 @@ class RecipeStagingAdmin:
     
     def get_review_items(self, filters: Dict = None, page: int = 1, per_page: int = 50) -> Dict:
         """Get items for review with filtering and pagination"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -157,7 +159,7 @@ class RecipeStagingAdmin:
     
     def get_validation_summary(self, batch_id: str = None) -> Dict:
         """Get summary of validation issues"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -241,7 +243,7 @@ class RecipeStagingAdmin:
     
     def get_duplicate_groups(self, batch_id: str = None) -> List[Dict]:
         """Get groups of duplicate recipes"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -280,7 +282,7 @@ class RecipeStagingAdmin:
     
     def handle_duplicate(self, staging_id: int, action: str, suffix: str = None) -> bool:
         """Handle duplicate recipe with specified action"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         cursor = conn.cursor()
         
         try:
@@ -331,7 +333,7 @@ class RecipeStagingAdmin:
     
     def update_item(self, staging_id: int, updates: Dict) -> bool:
         """Update a staged item"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         cursor = conn.cursor()
         
         try:
@@ -405,7 +407,7 @@ class RecipeStagingAdmin:
     
     def bulk_update_status(self, staging_ids: List[int], status: str) -> int:
         """Bulk update review status"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         cursor = conn.cursor()
         
         try:
@@ -433,7 +435,7 @@ class RecipeStagingAdmin:
     
     def batch_action(self, staging_ids: List[int], action: str) -> Dict:
         """Handle batch actions matching inventory staging pattern"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         cursor = conn.cursor()
         
         result = {'success': 0, 'failed': 0}
@@ -489,9 +491,10 @@ class RecipeStagingAdmin:
         
         return result
     
+    @timed_job('recipe_import')
     def commit_to_live(self, staging_ids: List[int] = None) -> Dict:
         """Commit approved items to live recipes table"""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connect(self.db_path)
         cursor = conn.cursor()
         
         stats = {
@@ -618,8 +621,14 @@ class RecipeStagingAdmin:
         
         return stats
 
-# Initialize admin instance
-admin = RecipeStagingAdmin()
+# Admin handler, created on the first request rather than at import
+_admin = None
+
+def get_admin() -> RecipeStagingAdmin:
+    global _admin
+    if _admin is None:
+        _admin = RecipeStagingAdmin()
+    return _admin
 
 # Routes
 @recipe_staging_bp.route('/')
@@ -649,15 +658,15 @@ def index():
     per_page = per_page_str if per_page_str == 'all' else int(per_page_str)
     
     # Get data
-    data = admin.get_review_items(filters, page, per_page)
+    data = get_admin().get_review_items(filters, page, per_page)
     
     # Get validation summary
     batch_id = filters.get('batch_id')
-    summary = admin.get_validation_summary(batch_id)
+    summary = get_admin().get_validation_summary(batch_id)
     
     # Get duplicates if requested
     show_duplicates = request.args.get('show_duplicates') == '1'
-    duplicates = admin.get_duplicate_groups(batch_id) if show_duplicates else []
+    duplicates = get_admin().get_duplicate_groups(batch_id) if show_duplicates else []
     
     return render_template('recipe_staging_review.html',
                          items=data['items'],
@@ -677,7 +686,7 @@ def edit_item(staging_id):
     if request.method == 'POST':
         updates = request.json
         
-        if admin.update_item(staging_id, updates):
+        if get_admin().update_item(staging_id, updates):
             return jsonify({'success': True, 'message': 'Item updated successfully'})
         else:
             return jsonify({'success': False, 'message': 'Failed to update item'}), 400
@@ -698,7 +707,7 @@ def batch_action():
     # Convert string IDs to integers
     staging_ids = [int(sid) for sid in staging_ids]
     
-    result = admin.batch_action(staging_ids, action)
+    result = get_admin().batch_action(staging_ids, action)
     
     return jsonify({
         'success': result['success'],
@@ -716,7 +725,7 @@ def process_to_live():
         # Get approved staging IDs for the batch if specified
         staging_ids = None
         if batch_id:
-            conn = sqlite3.connect(admin.db_path)
+            conn = db_connect(get_admin().db_path)
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT staging_id 
@@ -726,7 +735,7 @@ def process_to_live():
             staging_ids = [row[0] for row in cursor.fetchall()]
             conn.close()
         
-        stats = admin.commit_to_live(staging_ids)
+        stats = get_admin().commit_to_live(staging_ids)
         
         return jsonify({
             'processed': stats['processed'],
@@ -748,12 +757,12 @@ def process_to_live():
 def api_summary():
     """Get validation summary as JSON"""
     batch_id = request.args.get('batch_id')
-    summary = admin.get_validation_summary(batch_id)
+    summary = get_admin().get_validation_summary(batch_id)
     return jsonify(summary)
 
 @recipe_staging_bp.route('/api/duplicates')
 def api_duplicates():
     """Get duplicate groups as JSON"""
     batch_id = request.args.get('batch_id')
-    duplicates = admin.get_duplicate_groups(batch_id)
+    duplicates = get_admin().get_duplicate_groups(batch_id)
     return jsonify(duplicates)
\ No newline at end of file
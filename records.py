@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+records.py - Compact record types for costing and staging
+
+Ingredient lines, recipe cost results and staging rows are created once per
+row in the costing and import loops, so they are slotted dataclasses rather
+than dicts: no per-instance __dict__, and the step, warning and error lists
+are only allocated when the first item is added (until then they are the
+shared empty tuple).
+
+Records still answer record['field'], .get(), .items() and as_dict(), so
+reports, JSON/CSV writers and callers written against the old dicts keep
+working unchanged.
+"""
+
+from dataclasses import dataclass, field, fields, make_dataclass
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence
+
+ZERO = Decimal('0')
+
+
+class Record:
+    """Dict-style access for slotted dataclasses"""
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._field_names:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in self._field_names:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._field_names
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self._field_names else default
+
+    def keys(self):
+        return self._field_names
+
+    def items(self):
+        return [(name, getattr(self, name)) for name in self._field_names]
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Plain dict copy, converting nested records and tuples to dicts and lists"""
+        return {name: _plain(getattr(self, name)) for name in self._field_names}
+
+    def _append(self, name: str, item: Any):
+        items = getattr(self, name)
+        if items:
+            items.append(item)
+        else:
+            setattr(self, name, [item])
+
+    def _extend(self, name: str, items: Sequence[Any]):
+        if items:
+            current = getattr(self, name)
+            if current:
+                current.extend(items)
+            else:
+                setattr(self, name, list(items))
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Record):
+        return value.as_dict()
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return value
+
+
+def _record(cls):
+    """Make cls a slotted dataclass and cache its field names for Record"""
+    cls = dataclass(slots=True)(cls)
+    cls._field_names = tuple(f.name for f in fields(cls))
+    return cls
+
+
+def json_default(value: Any) -> Any:
+    """json.dumps(default=...) hook: records become dicts, anything else its string"""
+    if isinstance(value, Record):
+        return value.as_dict()
+    return str(value)
+
+
+@_record
+class IngredientCost(Record):
+    """One costed ingredient line"""
+    ingredient_name: str
+    ingredient_type: str
+    quantity: Decimal
+    unit: Optional[str]
+    unit_cost: Decimal = ZERO
+    total_cost: Decimal = ZERO
+    steps: Sequence[Dict[str, Any]] = ()
+    warnings: Sequence[str] = ()
+    errors: Sequence[str] = ()
+
+    def add_step(self, step: Dict[str, Any]):
+        self._append('steps', step)
+
+    def warn(self, message: str):
+        self._append('warnings', message)
+
+    def error(self, message: str):
+        self._append('errors', message)
+
+
+@_record
+class RecipeCost(Record):
+    """A recipe costed from its ingredients up"""
+    recipe_id: int
+    recipe_name: str
+    recipe_type: Optional[str]
+    timestamp: str
+    ingredients: List[IngredientCost] = field(default_factory=list)
+    total_cost: Decimal = ZERO
+    cost_per_serving: Decimal = ZERO
+    pdf_stated_cost: Optional[Decimal] = None
+    variance_from_pdf: Optional[Decimal] = None
+    variance_percent: Optional[Decimal] = None
+    calculation_steps: Sequence[Dict[str, Any]] = ()
+    warnings: Sequence[str] = ()
+    errors: Sequence[str] = ()
+
+    def add_ingredient(self, line: IngredientCost):
+        self.ingredients.append(line)
+        self._extend('calculation_steps', line.steps)
+        self._extend('warnings', line.warnings)
+        self._extend('errors', line.errors)
+
+    def add_step(self, step: Dict[str, Any]):
+        self._append('calculation_steps', step)
+
+    def warn(self, message: str):
+        self._append('warnings', message)
+
+
+@_record
+class RecipeReportRow(Record):
+    """One recipe's row in a batch recalculation report"""
+    recipe_id: int
+    recipe_name: str
+    recipe_type: Optional[str] = None
+    calculated_cost: Optional[float] = None
+    pdf_stated_cost: Optional[float] = None
+    variance: float = 0
+    has_errors: bool = False
+    has_warnings: bool = False
+    status: str = 'success'
+    error: Optional[str] = None
+
+
+@_record
+class CSVIngredientRow(Record):
+    """One ingredient row parsed from a recipe CSV export"""
+    name: str
+    type: Optional[str]
+    measurement: Optional[str]
+    yield_: Optional[str]
+    usable_yield: Optional[str]
+    cost: Optional[str]
+    row_number: int
+    quantity: Optional[str] = None
+    unit: Optional[str] = None
+    category: Optional[str] = None
+    is_prep_ingredient: bool = False
+
+    def as_dict(self) -> Dict[str, Any]:
+        # Same keys, in the same order, as the dict these rows replaced ('yield' is a keyword)
+        row = Record.as_dict(self)
+        return {('yield' if name == 'yield_' else name): value for name, value in row.items()}
+
+
+STAGING_METADATA = (
+    ('original_row_number', int),
+    ('import_batch_id', str),
+    ('source_filename', str),
+    ('duplicate_check_hash', Optional[str]),
+)
+
+
+def staging_row_type(targets: Sequence[str], name: str = 'StagingRow'):
+    """
+    Build a slotted staging row class for a column map
+
+    Each mapped target gets <target>_raw, <target>_cleaned and <target>_flag
+    fields; the remaining defaults match the staging table's column defaults,
+    so an untouched field inserts exactly what omitting the column did.
+    """
+    spec = [(field_name, field_type) for field_name, field_type in STAGING_METADATA]
+    spec.append(('needs_review', bool, field(default=False)))
+    for target in targets:
+        spec.append((f'{target}_raw', Optional[str], field(default=None)))
+        spec.append((f'{target}_cleaned', Any, field(default=None)))
+        spec.append((f'{target}_flag', Optional[str], field(default=None)))
+    spec += [
+        ('review_notes', Optional[str], field(default=None)),
+        ('is_duplicate', bool, field(default=False)),
+        ('duplicate_of_staging_id', Optional[int], field(default=None)),
+    ]
+    cls = make_dataclass(name, spec, bases=(Record,), slots=True)
+    cls._field_names = tuple(f.name for f in fields(cls))
+    return cls
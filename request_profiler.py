@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+request_profiler.py - Opt-in cProfile capture for requests and batch CLIs
+
+A request sent with an X-Profile-Token header (or a _profile query
+argument) holding profile_token(SECRET_KEY) runs under cProfile while a
+sampler thread records its call stacks every SAMPLE_INTERVAL seconds.
+Afterwards three files are written to PROFILE_DIR, named after the time
+and the request:
+
+- <name>.prof       pstats dump, for snakeviz or python -m pstats
+- <name>.collapsed  folded stacks ("a;b;c 12"), for flamegraph.pl or speedscope
+- <name>.json       label, wall time and the hottest functions, for /admin/profiles
+
+The response carries an X-Profile header with the profile's name. The
+token is an HMAC of the secret key, so it can be handed out without the key
+itself. While the development default key is in use only debug mode
+accepts it. Without a token the hook costs one header lookup per request.
+
+Batch CLIs go through the same path without code changes:
+"python request_profiler.py run etl.py p2" runs the script as __main__
+under the profiler and saves the profile next to the request profiles.
+
+Usage:
+    python request_profiler.py token                      # token for $SECRET_KEY
+    python request_profiler.py run calculation_rebuilder.py --batch
+    python request_profiler.py run csv_recipe_loader_v2.py
+    python request_profiler.py list
+    python request_profiler.py show 20260301_120000_get_pricing-analysis
+"""
+
+import argparse
+import cProfile
+import hashlib
+import hmac
+import json
+import os
+import pstats
+import re
+import runpy
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+
+# Profiles kept on disk, newest first
+PROFILE_KEEP = 50
+
+TOP_FUNCTIONS = 25
+
+# Seconds between call-stack samples for the collapsed-stack file
+SAMPLE_INTERVAL = 0.001
+
+DEV_SECRET_KEY = 'dev-secret-key-change-in-production'
+
+TOKEN_HEADER = 'X-Profile-Token'
+TOKEN_ARG = '_profile'
+
+PROFILE_NAME = re.compile(r'^\d{8}_\d{6}_\d{6}_[\w.-]+$')
+UNSAFE_NAME_CHARACTERS = re.compile(r'[^\w.-]+')
+
+
+def profile_token(secret_key: str) -> str:
+    """The token that unlocks profiling, derived from the app's secret key"""
+    return hmac.new(secret_key.encode('utf-8'), b'request-profile', hashlib.sha256).hexdigest()[:32]
+
+
+def token_matches(token: Optional[str], secret_key: Optional[str], debug: bool = False) -> bool:
+    if not token or not secret_key or (secret_key == DEV_SECRET_KEY and not debug):
+        return False
+    return hmac.compare_digest(token, profile_token(secret_key))
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Count the call stacks of one thread from a background thread"""
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def _run(self):
+        labels = {}
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _frame_label(code)
+                stack.append(label)
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self) -> 'StackSampler':
+        self.thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self.stop_event.set()
+        self.thread.join()
+        return self.stacks
+
+
+def top_functions(stats: pstats.Stats, limit: int = TOP_FUNCTIONS) -> List[Dict[str, Any]]:
+    """Hottest functions by own time, with their cumulative time"""
+    rows = []
+    for (filename, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+        rows.append({
+            'function': f"{name} ({os.path.basename(filename)}:{line})" if line else name,
+            'calls': calls,
+            'own_ms': round(own * 1000, 3),
+            'cumulative_ms': round(cumulative * 1000, 3),
+        })
+    rows.sort(key=lambda row: row['own_ms'], reverse=True)
+    return rows[:limit]
+
+
+class Profile:
+    """One cProfile run plus stack samples of the same thread"""
+
+    def __init__(self, label: str, sample_interval: float = SAMPLE_INTERVAL):
+        self.label = label
+        self.sample_interval = sample_interval
+        self.profiler = cProfile.Profile()
+        self.sampler = None
+        self.started_at = None
+        self.started = None
+        self.seconds = None
+
+    def start(self) -> 'Profile':
+        self.started_at = datetime.now()
+        self.started = time.perf_counter()
+        if self.sample_interval:
+            self.sampler = StackSampler(threading.get_ident(), self.sample_interval).start()
+        self.profiler.enable()
+        return self
+
+    def stop(self) -> 'Profile':
+        if self.seconds is None:
+            self.profiler.disable()
+            self.seconds = time.perf_counter() - self.started
+            if self.sampler:
+                self.sampler.stop()
+        return self
+
+    @property
+    def name(self) -> str:
+        slug = UNSAFE_NAME_CHARACTERS.sub('_', self.label.lower()).strip('_')[:60] or 'profile'
+        return f"{self.started_at:%Y%m%d_%H%M%S_%f}_{slug}"
+
+    def save(self, directory: str = PROFILE_DIR, keep: int = PROFILE_KEEP) -> Dict[str, Any]:
+        """Write the .prof, .collapsed and .json files and prune old profiles"""
+        self.stop()
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, self.name)
+        self.profiler.dump_stats(base + '.prof')
+        stacks = self.sampler.stacks if self.sampler else Counter()
+        with open(base + '.collapsed', 'w') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        summary = {
+            'name': self.name,
+            'label': self.label,
+            'recorded_at': self.started_at.isoformat(timespec='seconds'),
+            'wall_ms': round(self.seconds * 1000, 3),
+            'samples': sum(stacks.values()),
+            'top_functions': top_functions(pstats.Stats(self.profiler)),
+        }
+        with open(base + '.json', 'w') as f:
+            json.dump(summary, f, indent=2)
+        prune_profiles(directory, keep)
+        return summary
+
+
+@contextmanager
+def profiled(label: str, directory: str = PROFILE_DIR, sample_interval: float = SAMPLE_INTERVAL):
+    """Profile the enclosed block and save it, e.g. around a batch job"""
+    profile = Profile(label, sample_interval).start()
+    try:
+        yield profile
+    finally:
+        profile.save(directory)
+
+
+def list_profiles(directory: str = PROFILE_DIR) -> List[Dict[str, Any]]:
+    """Saved profile summaries, newest first"""
+    if not os.path.isdir(directory):
+        return []
+    summaries = []
+    for filename in sorted(os.listdir(directory), reverse=True):
+        if filename.endswith('.json') and PROFILE_NAME.match(filename[:-5]):
+            with open(os.path.join(directory, filename), 'r') as f:
+                summaries.append(json.load(f))
+    return summaries
+
+
+def profile_path(name: str, extension: str, directory: str = PROFILE_DIR) -> Optional[str]:
+    """Path of a saved profile file, None for unknown or unsafe names"""
+    if not PROFILE_NAME.match(name) or extension not in ('prof', 'collapsed', 'json'):
+        return None
+    path = os.path.join(directory, f"{name}.{extension}")
+    return path if os.path.exists(path) else None
+
+
+def load_profile(name: str, directory: str = PROFILE_DIR) -> Optional[Dict[str, Any]]:
+    path = profile_path(name, 'json', directory)
+    if path is None:
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def prune_profiles(directory: str = PROFILE_DIR, keep: int = PROFILE_KEEP) -> int:
+    """Delete all but the newest `keep` profiles"""
+    removed = 0
+    for summary in list_profiles(directory)[keep:]:
+        for extension in ('prof', 'collapsed', 'json'):
+            path = profile_path(summary['name'], extension, directory)
+            if path:
+                os.remove(path)
+        removed += 1
+    return removed
+
+
+class RequestProfiler:
+    """Flask integration: profile requests that present the profile token"""
+
+    def __init__(self, app=None, directory: str = PROFILE_DIR):
+        self.directory = directory
+        self.app = None
+        if app is not None:
+            self.init_app(app)
+
+    def authorized(self, token: Optional[str]) -> bool:
+        return token_matches(token, self.app.secret_key, self.app.debug)
+
+    def request_token(self) -> Optional[str]:
+        from flask import request
+        return request.headers.get(TOKEN_HEADER) or request.args.get(TOKEN_ARG)
+
+    def init_app(self, app) -> None:
+        from flask import g, request
+
+        self.app = app
+
+        @app.before_request
+        def start_request_profile():
+            token = self.request_token()
+            if token and self.authorized(token):
+                g.request_profile = Profile(f'{request.method} {request.path}').start()
+
+        @app.after_request
+        def finish_request_profile(response):
+            profile = g.pop('request_profile', None)
+            if profile is not None:
+                summary = profile.save(self.directory)
+                response.headers['X-Profile'] = summary['name']
+            return response
+
+        @app.teardown_request
+        def stop_request_profile(exc=None):
+            profile = g.pop('request_profile', None)
+            if profile is not None:
+                profile.stop()  # the request failed before after_request
+
+
+def run_script(argv: List[str], directory: str = PROFILE_DIR) -> Dict[str, Any]:
+    """Run a Python script as __main__ under the profiler, e.g. a batch CLI"""
+    script = argv[0]
+    label = ' '.join([os.path.basename(script)] + argv[1:])
+    saved_argv = sys.argv
+    sys.argv = list(argv)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+    profile = Profile(label).start()
+    try:
+        runpy.run_path(script, run_name='__main__')
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            print(f"{script} exited with {e.code}")
+    finally:
+        sys.argv = saved_argv
+        summary = profile.save(directory)
+    return summary
+
+
+def print_summary(summary: Dict[str, Any], top: int = TOP_FUNCTIONS):
+    print(f"{summary['name']}: {summary['label']}")
+    print(f"{summary['wall_ms']:.1f} ms wall, {summary['samples']} stack samples")
+    print(f"\n{'Function':<70} {'Calls':>8} {'Own ms':>10} {'Cum ms':>10}")
+    print("-" * 101)
+    for row in summary['top_functions'][:top]:
+        print(f"{row['function'][:70]:<70} {row['calls']:>8} {row['own_ms']:>10.1f} {row['cumulative_ms']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Opt-in profiles of requests and batch CLIs")
+    parser.add_argument('--dir', default=PROFILE_DIR, help="Profile directory")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('token', help="Print the profile token for $SECRET_KEY")
+    run_parser = subparsers.add_parser('run', help="Run a script under the profiler")
+    run_parser.add_argument('script')
+    run_parser.add_argument('args', nargs=argparse.REMAINDER)
+    subparsers.add_parser('list', help="List saved profiles, newest first")
+    show_parser = subparsers.add_parser('show', help="Print a saved profile's hottest functions")
+    show_parser.add_argument('name')
+    args = parser.parse_args()
+
+    if args.command == 'token':
+        secret_key = os.environ.get('SECRET_KEY')
+        if not secret_key:
+            parser.error("SECRET_KEY is not set")
+        print(profile_token(secret_key))
+    elif args.command == 'run':
+        summary = run_script([args.script] + args.args, args.dir)
+        print()
+        print_summary(summary, top=15)
+    elif args.command == 'list':
+        for summary in list_profiles(args.dir):
+            print(f"{summary['name']:<70} {summary['wall_ms']:>10.1f} ms  {summary['label']}")
+    else:
+        summary = load_profile(args.name, args.dir)
+        if summary is None:
+            parser.error(f"No profile named {args.name}")
+        print_summary(summary)
+
+
+if __name__ == "__main__":
+    main()
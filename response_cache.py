@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+response_cache.py - Rendered-page cache keyed on per-table data versions
+
+Every base table a cached route reads gets AFTER INSERT/UPDATE/DELETE
+triggers that bump a counter in the data_versions table. A cached GET is
+keyed on endpoint + view args + query args + theme + the versions of the
+tables it depends on, so:
+
+- a matching If-None-Match is answered with 304 Not Modified
+- a hit in the in-process LRU is served without re-querying or re-rendering
+- any write to a dependent table changes the key, so stale pages are never served
+
+On a hit the only database work is one read of data_versions.
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Set
+
+from flask import request, session, make_response
+
+VIEW_SOURCE_PATTERN = re.compile(r'\b(?:FROM|JOIN)\s+["`\[]?(\w+)', re.IGNORECASE)
+
+CACHEABLE_MIMETYPES = ('text/html', 'application/json')
+
+
+def resolve_base_tables(conn: sqlite3.Connection, names: Iterable[str]) -> Set[str]:
+    """
+    Resolve table or view names to the base tables they read from
+
+    Views (e.g. the recipes/menu_items compatibility views from migrations/)
+    are expanded recursively by scanning their FROM/JOIN clauses.
+    """
+    objects = {
+        row[0]: (row[1], row[2] or '')
+        for row in conn.execute(
+            "SELECT name, type, sql FROM sqlite_master WHERE type IN ('table', 'view')"
+        )
+    }
+
+    base_tables = set()
+    seen = set()
+    pending = list(names)
+    while pending:
+        name = pending.pop()
+        if name in seen or name not in objects:
+            continue
+        seen.add(name)
+        object_type, sql = objects[name]
+        if object_type == 'table':
+            base_tables.add(name)
+        else:
+            pending.extend(VIEW_SOURCE_PATTERN.findall(sql))
+    return base_tables
+
+
+def install_data_version_triggers(conn: sqlite3.Connection, tables: Iterable[str]) -> None:
+    """Create the data_versions table and the triggers that bump it"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    for table in sorted(tables):
+        conn.execute('INSERT OR IGNORE INTO data_versions (table_name, version) VALUES (?, 0)', (table,))
+        for operation in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_data_version_{table}_{operation.lower()}
+                AFTER {operation} ON "{table}"
+                BEGIN
+                    UPDATE data_versions SET version = version + 1 WHERE table_name = '{table}';
+                END
+            ''')
+    conn.commit()
+
+
+def get_data_versions(conn: sqlite3.Connection, tables: Iterable[str]) -> Dict[str, int]:
+    """Read the current version of each table"""
+    tables = sorted(tables)
+    if not tables:
+        return {}
+    rows = conn.execute(
+        f"SELECT table_name, version FROM data_versions WHERE table_name IN ({','.join('?' * len(tables))})",
+        tables
+    ).fetchall()
+    return {row[0]: row[1] for row in rows}
+
+
+class ResponseCache:
+    """In-process LRU of rendered GET responses validated by data versions"""
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], max_entries: int = 256,
+                 max_body_bytes: int = 2 * 1024 * 1024):
+        self.connect = connect
+        self.max_entries = max_entries
+        self.max_body_bytes = max_body_bytes
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.dependencies = {}  # endpoint function name -> declared tables
+        self.base_tables = None  # declared table -> base tables, set by install()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def install(self, create_triggers: bool = True) -> bool:
+        """
+        Resolve declared dependencies and install the version triggers
+
+        create_triggers=False only resolves the dependencies, for a warm
+        start where the triggers are known to exist already.
+        """
+        conn = self.connect()
+        try:
+            declared = set().union(*self.dependencies.values()) if self.dependencies else set()
+            base_tables = {table: resolve_base_tables(conn, [table]) for table in declared}
+            if create_triggers:
+                install_data_version_triggers(conn, set().union(*base_tables.values()) if base_tables else set())
+            self.base_tables = base_tables
+            return True
+        finally:
+            conn.close()
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> Dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'not_modified': self.not_modified,
+                'hit_ratio': (self.hits / lookups) if lookups else 0.0
+            }
+
+    def _get(self, etag: str):
+        with self.lock:
+            entry = self.entries.get(etag)
+            if entry is not None:
+                self.entries.move_to_end(etag)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return entry
+
+    def _put(self, etag: str, entry) -> None:
+        with self.lock:
+            self.entries[etag] = entry
+            self.entries.move_to_end(etag)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def _request_etag(self, tables: List[str], max_age: int = None) -> str:
+        base_tables = set()
+        for table in tables:
+            base_tables |= self.base_tables.get(table, set())
+
+        conn = self.connect()
+        try:
+            versions = get_data_versions(conn, base_tables)
+        finally:
+            conn.close()
+
+        key = repr((
+            request.endpoint,
+            sorted((request.view_args or {}).items()),
+            sorted(request.args.items(multi=True)),
+            request.cookies.get('theme', ''),
+            sorted(versions.items()),
+            int(time.time() // max_age) if max_age else None
+        ))
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def cached(self, *tables: str, max_age: int = None):
+        """
+        Decorator caching a GET view that reads the given tables or views
+
+        max_age (seconds) additionally expires pages that show relative
+        times such as "5 minutes ago". Requests with pending flash messages
+        are never cached because the rendered page would include them.
+        """
+        def decorator(view):
+            self.dependencies[view.__name__] = set(tables)
+
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if (request.method != 'GET' or self.base_tables is None
+                        or session.get('_flashes')):
+                    return view(*args, **kwargs)
+
+                etag = self._request_etag(list(tables), max_age)
+
+                if etag in request.if_none_match:
+                    with self.lock:
+                        self.not_modified += 1
+                    response = make_response('', 304)
+                    response.set_etag(etag)
+                    return response
+
+                entry = self._get(etag)
+                if entry is not None:
+                    body, status, headers = entry
+                    response = make_response(body, status, headers)
+                    response.set_etag(etag)
+                    return response
+
+                response = make_response(view(*args, **kwargs))
+                if (response.status_code == 200 and not response.is_streamed
+                        and response.mimetype in CACHEABLE_MIMETYPES):
+                    body = response.get_data()
+                    if len(body) <= self.max_body_bytes:
+                        self._put(etag, (body, response.status_code,
+                                         [(k, v) for k, v in response.headers.items()
+                                          if k.lower() not in ('content-length', 'set-cookie')]))
+                    response.set_etag(etag)
+                return response
+
+            return wrapper
+        return decorator
@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""
+sales_mix.py - Toast sales-mix import and theoretical food cost reporting
+
+Toast sales exports (ItemSelectionDetails, Product Mix, Sales Mix) are
+streamed row by row into a temporary staging table, aggregated per Toast
+item name and business date, then swapped into a compact daily fact table:
+
+    sales_mix (menu_item_id, sale_date) -> quantity, net_sales, unit_food_cost
+
+A file replaces every business date it contains, so re-importing a modified
+export (sync_toast_data re-processes changed files) does not double count.
+Toast names are matched to menu_items_actual by name, preferring the same
+menu category, then an item assigned to a menu. Names that do not match are
+kept per day in sales_mix_unmatched.
+
+unit_food_cost is the recipe food_cost (recipes_actual, kept current by the
+calculation rebuilder) when the day was imported or last recosted, so
+theoretical cost is quantity x unit_food_cost. Per-day totals are
+precomputed into sales_mix_daily; period reports sum those (or group the
+fact table by item/category) in SQL.
+
+Actual food cost comes from an inventory count and purchases, which the
+calculator does not record; pass it in for a theoretical vs. actual variance.
+
+Usage:
+    python sales_mix.py import ItemSelectionDetails_2026-03-02.csv
+    python sales_mix.py import ProductMix.csv --date 2026-03-02    # export without a date column
+    python sales_mix.py report --start 2026-01-01 --end 2026-03-31 --by month --actual-cost 41250
+    python sales_mix.py recost --start 2026-03-01                  # after recipe costs change
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+DATABASE = 'restaurant_calculator.db'
+
+SALES_MIX_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS sales_mix (
+        menu_item_id INTEGER NOT NULL,
+        sale_date TEXT NOT NULL,            -- business date, YYYY-MM-DD
+        quantity REAL NOT NULL DEFAULT 0,
+        net_sales REAL NOT NULL DEFAULT 0,
+        unit_food_cost REAL,                -- recipe food_cost when imported/recosted
+        PRIMARY KEY (menu_item_id, sale_date)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_sales_mix_date ON sales_mix(sale_date);
+
+    CREATE TABLE IF NOT EXISTS sales_mix_daily (
+        sale_date TEXT PRIMARY KEY,
+        items_sold REAL NOT NULL DEFAULT 0,
+        net_sales REAL NOT NULL DEFAULT 0,
+        theoretical_cost REAL NOT NULL DEFAULT 0,
+        uncosted_items REAL NOT NULL DEFAULT 0
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS sales_mix_unmatched (
+        toast_item_name TEXT NOT NULL,
+        sale_date TEXT NOT NULL,
+        quantity REAL NOT NULL DEFAULT 0,
+        net_sales REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (toast_item_name, sale_date)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS sales_mix_imports (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        source_file TEXT NOT NULL,
+        file_hash TEXT,
+        rows_read INTEGER,
+        rows_skipped INTEGER,
+        first_date TEXT,
+        last_date TEXT,
+        imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+'''
+
+# Toast export column -> field, first match wins
+COLUMN_ALIASES = {
+    'date': ('Business Date', 'Order Date', 'Sent Date', 'Date'),
+    'item': ('Menu Item', 'Item', 'Item Name'),
+    'group': ('Menu Group', 'Sales Category', 'Menu'),
+    'quantity': ('Qty', 'Item Qty', 'Quantity', 'Qty Sold'),
+    'net_sales': ('Net Amount', 'Net Price', 'Net Sales', 'Net'),
+    'void': ('Void?', 'Voided', 'Void'),
+}
+
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%Y%m%d', '%Y/%m/%d')
+FILENAME_DATE = re.compile(r'(\d{4})-?(\d{2})-?(\d{2})')
+
+# Staged rows are flushed to SQLite in batches of this many
+CHUNK_ROWS = 5000
+
+# report(by=...) -> SQL key over sales_mix_daily
+PERIOD_KEYS = {
+    'day': 'sale_date',
+    'week': "strftime('%Y-W%W', sale_date)",
+    'month': "strftime('%Y-%m', sale_date)",
+    'year': "strftime('%Y', sale_date)",
+}
+
+
+class SalesMixError(ValueError):
+    """Raised for exports that cannot be read"""
+
+
+def get_db(db_path: str = DATABASE) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def ensure_sales_mix_schema(conn: sqlite3.Connection):
+    """Create the sales mix tables if they don't exist"""
+    conn.executescript(SALES_MIX_SCHEMA)
+
+
+def is_sales_mix_file(filename: str) -> bool:
+    """Whether a Toast export file name is a sales export"""
+    name = filename.lower().replace(' ', '').replace('_', '')
+    return any(key in name for key in ('itemselectiondetails', 'productmix', 'salesmix'))
+
+
+# ----------------------------------------------------------------------
+# Import
+# ----------------------------------------------------------------------
+
+def parse_sale_date(value: str, cache: Optional[Dict[str, Optional[str]]] = None) -> Optional[str]:
+    """'3/2/26 11:32 AM', '03/02/2026', '2026-03-02' -> '2026-03-02'"""
+    day = (value or '').strip().split(' ')[0].split('T')[0]
+    if cache is not None and day in cache:
+        return cache[day]
+    parsed = None
+    for fmt in DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(day, fmt).strftime('%Y-%m-%d')
+            break
+        except ValueError:
+            continue
+    if cache is not None:
+        cache[day] = parsed
+    return parsed
+
+
+def parse_number(value: Any) -> float:
+    """'$1,234.50', '(12.00)', '' -> float"""
+    text = str(value or '').strip().replace('$', '').replace(',', '')
+    negative = text.startswith('(') and text.endswith(')')
+    try:
+        number = float(text.strip('()') or 0)
+    except ValueError:
+        return 0.0
+    return -number if negative else number
+
+
+def _columns(fieldnames: Iterable[str]) -> Dict[str, Optional[str]]:
+    by_name = {name.strip().lower(): name for name in fieldnames or () if name}
+    return {field: next((by_name[a.lower()] for a in aliases if a.lower() in by_name), None)
+            for field, aliases in COLUMN_ALIASES.items()}
+
+
+def read_sales_rows(path: str, sale_date: Optional[str] = None,
+                    stats: Optional[Dict[str, int]] = None) -> Iterator[Tuple[str, str, str, float, float]]:
+    """
+    Stream (sale_date, item name, menu group, quantity, net sales) from an export
+
+    Exports without a date column use sale_date, else a date in the file name.
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault('rows_read', 0)
+    stats.setdefault('rows_skipped', 0)
+    if sale_date:
+        sale_date = parse_sale_date(sale_date)
+    else:
+        match = FILENAME_DATE.search(os.path.basename(path))
+        sale_date = parse_sale_date('-'.join(match.groups())) if match else None
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        columns = _columns(reader.fieldnames)
+        if not columns['item'] or not columns['quantity']:
+            raise SalesMixError(f"{os.path.basename(path)} has no menu item or quantity column")
+        if not columns['date'] and not sale_date:
+            raise SalesMixError(f"{os.path.basename(path)} has no date column; pass the business date")
+        dates = {}
+        for row in reader:
+            stats['rows_read'] += 1
+            name = (row.get(columns['item']) or '').strip()
+            void = (row.get(columns['void']) or '').strip().lower() if columns['void'] else ''
+            day = parse_sale_date(row.get(columns['date']), dates) if columns['date'] else sale_date
+            if not name or name.lower() in ('total', 'totals') or void in ('true', 'yes', '1') or not day:
+                stats['rows_skipped'] += 1
+                continue
+            yield (day, name, (row.get(columns['group']) or '').strip() if columns['group'] else '',
+                   parse_number(row.get(columns['quantity'])),
+                   parse_number(row.get(columns['net_sales'])) if columns['net_sales'] else 0.0)
+
+
+def _menu_item_lookup(conn: sqlite3.Connection) -> Tuple[Dict[Tuple[str, str], int], Dict[str, int]]:
+    """({(name, category): id}, {name: id}) preferring items assigned to a menu, then lowest id"""
+    by_category, by_name = {}, {}
+    for row in conn.execute('''
+        SELECT mi.menu_item_id, LOWER(TRIM(mi.item_name)) as name, LOWER(TRIM(mi.menu_category)) as category
+        FROM menu_items_actual mi
+        ORDER BY EXISTS (SELECT 1 FROM menu_assignments ma
+                         WHERE ma.menu_item_id = mi.menu_item_id AND ma.is_active = 1) DESC,
+                 mi.menu_item_id
+    '''):
+        by_category.setdefault((row['name'], row['category'] or ''), row['menu_item_id'])
+        by_name.setdefault(row['name'], row['menu_item_id'])
+    return by_category, by_name
+
+
+def import_sales_mix(conn: sqlite3.Connection, path: str, sale_date: Optional[str] = None) -> Dict[str, Any]:
+    """Stream one Toast export into sales_mix, replacing the business dates it covers"""
+    ensure_sales_mix_schema(conn)
+    by_category, by_name = _menu_item_lookup(conn)
+    conn.execute('''
+        CREATE TEMP TABLE IF NOT EXISTS sales_mix_stage (
+            toast_item_name TEXT NOT NULL,
+            sale_date TEXT NOT NULL,
+            menu_item_id INTEGER,
+            quantity REAL NOT NULL,
+            net_sales REAL NOT NULL,
+            PRIMARY KEY (toast_item_name, sale_date)
+        )
+    ''')
+    conn.execute('DELETE FROM temp.sales_mix_stage')
+    stage_sql = '''
+        INSERT INTO temp.sales_mix_stage (toast_item_name, sale_date, menu_item_id, quantity, net_sales)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (toast_item_name, sale_date) DO UPDATE SET
+            quantity = quantity + excluded.quantity,
+            net_sales = net_sales + excluded.net_sales
+    '''
+
+    stats = {}
+    hasher = hashlib.md5()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            hasher.update(block)
+    batch = []
+    for day, name, group, quantity, net_sales in read_sales_rows(path, sale_date, stats):
+        key = name.lower()
+        menu_item_id = by_category.get((key, group.lower())) or by_name.get(key)
+        batch.append((name, day, menu_item_id, quantity, net_sales))
+        if len(batch) >= CHUNK_ROWS:
+            conn.executemany(stage_sql, batch)
+            batch = []
+    if batch:
+        conn.executemany(stage_sql, batch)
+
+    dates = [row[0] for row in conn.execute('SELECT DISTINCT sale_date FROM temp.sales_mix_stage ORDER BY 1')]
+    with conn:
+        covered = 'SELECT DISTINCT sale_date FROM temp.sales_mix_stage'
+        conn.execute(f'DELETE FROM sales_mix WHERE sale_date IN ({covered})')
+        conn.execute(f'DELETE FROM sales_mix_unmatched WHERE sale_date IN ({covered})')
+        conn.execute('''
+            INSERT INTO sales_mix (menu_item_id, sale_date, quantity, net_sales, unit_food_cost)
+            SELECT s.menu_item_id, s.sale_date, SUM(s.quantity), SUM(s.net_sales), r.food_cost
+            FROM temp.sales_mix_stage s
+            JOIN menu_items_actual mi ON mi.menu_item_id = s.menu_item_id
+            LEFT JOIN recipes_actual r ON r.recipe_id = mi.recipe_id
+            GROUP BY s.menu_item_id, s.sale_date
+        ''')
+        conn.execute('''
+            INSERT INTO sales_mix_unmatched (toast_item_name, sale_date, quantity, net_sales)
+            SELECT toast_item_name, sale_date, quantity, net_sales
+            FROM temp.sales_mix_stage
+            WHERE menu_item_id IS NULL
+        ''')
+        refresh_daily_totals(conn, dates)
+        conn.execute('''
+            INSERT INTO sales_mix_imports (source_file, file_hash, rows_read, rows_skipped, first_date, last_date)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (os.path.basename(path), hasher.hexdigest(), stats['rows_read'], stats['rows_skipped'],
+              dates[0] if dates else None, dates[-1] if dates else None))
+    unmatched = conn.execute('''
+        SELECT COUNT(DISTINCT toast_item_name) FROM temp.sales_mix_stage WHERE menu_item_id IS NULL
+    ''').fetchone()[0]
+    conn.execute('DELETE FROM temp.sales_mix_stage')
+    conn.commit()
+
+    return {
+        'source_file': os.path.basename(path),
+        'rows_read': stats['rows_read'],
+        'rows_skipped': stats['rows_skipped'],
+        'days': len(dates),
+        'first_date': dates[0] if dates else None,
+        'last_date': dates[-1] if dates else None,
+        'unmatched_items': unmatched,
+    }
+
+
+# ----------------------------------------------------------------------
+# Theoretical cost
+# ----------------------------------------------------------------------
+
+def refresh_daily_totals(conn: sqlite3.Connection, dates: Optional[List[str]] = None):
+    """Recompute sales_mix_daily for the given dates (all dates if None)"""
+    if dates is None:
+        conn.execute('DELETE FROM sales_mix_daily')
+        where, params = '', []
+    else:
+        if not dates:
+            return
+        placeholders = ', '.join('?' * len(dates))
+        conn.execute(f'DELETE FROM sales_mix_daily WHERE sale_date IN ({placeholders})', dates)
+        where, params = f'WHERE sale_date IN ({placeholders})', dates
+    conn.execute(f'''
+        INSERT INTO sales_mix_daily (sale_date, items_sold, net_sales, theoretical_cost, uncosted_items)
+        SELECT sale_date, SUM(quantity), SUM(net_sales),
+               SUM(quantity * COALESCE(unit_food_cost, 0)),
+               SUM(CASE WHEN COALESCE(unit_food_cost, 0) > 0 THEN 0 ELSE quantity END)
+        FROM sales_mix
+        {where}
+        GROUP BY sale_date
+    ''', params)
+
+
+def recost(conn: sqlite3.Connection, start: Optional[str] = None, end: Optional[str] = None) -> int:
+    """Re-read unit food costs from the recipes for a date range and refresh its daily totals"""
+    ensure_sales_mix_schema(conn)
+    start, end = start or '0000-01-01', end or '9999-12-31'
+    with conn:
+        updated = conn.execute('''
+            UPDATE sales_mix SET unit_food_cost = (
+                SELECT r.food_cost
+                FROM menu_items_actual mi
+                JOIN recipes_actual r ON r.recipe_id = mi.recipe_id
+                WHERE mi.menu_item_id = sales_mix.menu_item_id
+            )
+            WHERE sale_date BETWEEN ? AND ?
+        ''', (start, end)).rowcount
+        dates = [row[0] for row in conn.execute(
+            'SELECT DISTINCT sale_date FROM sales_mix WHERE sale_date BETWEEN ? AND ?', (start, end))]
+        refresh_daily_totals(conn, dates)
+    return updated
+
+
+def _percent(part: float, whole: float) -> Optional[float]:
+    return round(part / whole * 100, 2) if whole else None
+
+
+def period_report(conn: sqlite3.Connection, start: str, end: str, by: str = 'day',
+                  actual_cost: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Theoretical food cost for start..end (inclusive), grouped by day, week,
+    month, year, item or category; with actual_cost, the variance against it
+    """
+    ensure_sales_mix_schema(conn)
+    if by in PERIOD_KEYS:
+        rows = conn.execute(f'''
+            SELECT {PERIOD_KEYS[by]} as period, SUM(items_sold) as items_sold, SUM(net_sales) as net_sales,
+                   SUM(theoretical_cost) as theoretical_cost, SUM(uncosted_items) as uncosted_items
+            FROM sales_mix_daily
+            WHERE sale_date BETWEEN ? AND ?
+            GROUP BY period
+            ORDER BY period
+        ''', (start, end)).fetchall()
+    elif by in ('item', 'category'):
+        label, key = ('mi.item_name', 'mi.menu_item_id') if by == 'item' else ('mi.menu_category',) * 2
+        rows = conn.execute(f'''
+            SELECT {label} as period,
+                   SUM(s.quantity) as items_sold, SUM(s.net_sales) as net_sales,
+                   SUM(s.quantity * COALESCE(s.unit_food_cost, 0)) as theoretical_cost,
+                   SUM(CASE WHEN COALESCE(s.unit_food_cost, 0) > 0 THEN 0 ELSE s.quantity END) as uncosted_items
+            FROM sales_mix s
+            JOIN menu_items_actual mi ON mi.menu_item_id = s.menu_item_id
+            WHERE s.sale_date BETWEEN ? AND ?
+            GROUP BY {key}
+            ORDER BY theoretical_cost DESC
+        ''', (start, end)).fetchall()
+    else:
+        raise SalesMixError(f"Unknown grouping {by!r}")
+
+    totals = conn.execute('''
+        SELECT COUNT(*) as days, COALESCE(SUM(items_sold), 0) as items_sold,
+               COALESCE(SUM(net_sales), 0) as net_sales, COALESCE(SUM(theoretical_cost), 0) as theoretical_cost,
+               COALESCE(SUM(uncosted_items), 0) as uncosted_items
+        FROM sales_mix_daily
+        WHERE sale_date BETWEEN ? AND ?
+    ''', (start, end)).fetchone()
+    summary = {
+        'days': totals['days'],
+        'items_sold': totals['items_sold'],
+        'net_sales': round(totals['net_sales'], 2),
+        'theoretical_cost': round(totals['theoretical_cost'], 2),
+        'theoretical_food_cost_percent': _percent(totals['theoretical_cost'], totals['net_sales']),
+        'uncosted_items': totals['uncosted_items'],
+    }
+    if actual_cost is not None:
+        summary.update({
+            'actual_cost': round(actual_cost, 2),
+            'actual_food_cost_percent': _percent(actual_cost, totals['net_sales']),
+            'variance': round(actual_cost - totals['theoretical_cost'], 2),
+            'variance_percent': _percent(actual_cost - totals['theoretical_cost'], totals['theoretical_cost']),
+        })
+
+    return {
+        'start': start,
+        'end': end,
+        'by': by,
+        'summary': summary,
+        'rows': [{
+            'period': row['period'],
+            'items_sold': row['items_sold'],
+            'net_sales': round(row['net_sales'], 2),
+            'theoretical_cost': round(row['theoretical_cost'], 2),
+            'theoretical_food_cost_percent': _percent(row['theoretical_cost'], row['net_sales']),
+            'uncosted_items': row['uncosted_items'],
+        } for row in rows],
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    summary = report['summary']
+    print("=" * 80)
+    print(f"THEORETICAL FOOD COST {report['start']} - {report['end']} ({summary['days']} days)")
+    print("=" * 80)
+    print(f"{report['by'].title():<32} {'Sold':>8} {'Net Sales':>12} {'Theo Cost':>11} {'Cost %':>7}")
+    for row in report['rows']:
+        percent = f"{row['theoretical_food_cost_percent']:.1f}%" if row['theoretical_food_cost_percent'] is not None else ''
+        print(f"{str(row['period'])[:32]:<32} {row['items_sold']:>8.0f} {row['net_sales']:>12.2f} "
+              f"{row['theoretical_cost']:>11.2f} {percent:>7}")
+    print("-" * 80)
+    print(f"Net sales ${summary['net_sales']:.2f}, theoretical cost ${summary['theoretical_cost']:.2f} "
+          f"({summary['theoretical_food_cost_percent'] or 0:.1f}%)")
+    if 'actual_cost' in summary:
+        print(f"Actual cost ${summary['actual_cost']:.2f} ({summary['actual_food_cost_percent'] or 0:.1f}%), "
+              f"variance ${summary['variance']:+.2f}")
+    if summary['uncosted_items']:
+        print(f"{summary['uncosted_items']:.0f} items sold have no recipe cost")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Toast sales-mix import and theoretical food cost")
+    parser.add_argument('--db', default=DATABASE, help="Database path")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_cmd = commands.add_parser('import', help="Import Toast sales exports")
+    import_cmd.add_argument('files', nargs='+')
+    import_cmd.add_argument('--date', help="Business date for exports without a date column")
+
+    report_cmd = commands.add_parser('report', help="Theoretical food cost for a period")
+    report_cmd.add_argument('--start', required=True)
+    report_cmd.add_argument('--end', required=True)
+    report_cmd.add_argument('--by', default='day', choices=list(PERIOD_KEYS) + ['item', 'category'])
+    report_cmd.add_argument('--actual-cost', type=float, help="Actual cost of goods for the period")
+    report_cmd.add_argument('--json', action='store_true')
+
+    recost_cmd = commands.add_parser('recost', help="Re-read recipe costs into the fact table")
+    recost_cmd.add_argument('--start')
+    recost_cmd.add_argument('--end')
+    args = parser.parse_args()
+
+    conn = get_db(args.db)
+    try:
+        if args.command == 'import':
+            for path in args.files:
+                try:
+                    result = import_sales_mix(conn, path, args.date)
+                except SalesMixError as e:
+                    print(f"❌ {e}")
+                    continue
+                print(f"✅ {result['source_file']}: {result['rows_read']} rows, {result['days']} days "
+                      f"({result['first_date']} - {result['last_date']}), "
+                      f"{result['unmatched_items']} unmatched items")
+        elif args.command == 'report':
+            report = period_report(conn, args.start, args.end, args.by, args.actual_cost)
+            if args.json:
+                print(json.dumps(report, indent=2))
+            else:
+                print_report(report)
+        else:
+            print(f"Recosted {recost(conn, args.start, args.end)} sales mix rows")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
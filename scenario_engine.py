@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+scenario_engine.py - In-memory what-if scenarios for prices, vendors and yields
+
+A scenario is an ordered list of overlays on the inventory:
+
+- price:  percent or absolute change for an item, a category or a vendor
+- vendor: swap items to another vendor's offer from vendor_products
+- yield:  set the usable yield percent for an item, a category or a vendor
+
+The engine loads the costing graph (inventory, vendor offers, recipes,
+ingredient lines, menu items) once into a snapshot and costs every recipe
+from it with the rebuilder's fixed-point line arithmetic, so the baseline
+matches calculate_recipe_cost_from_scratch(). Running a scenario applies its
+overlays to a copy of the affected inventory rows, recosts only the recipes
+that use them (directly or through prep recipes) and reports recipe and menu
+item costs and margins against the baseline. Nothing is written back.
+
+The graph comes from the shared catalog snapshot (catalog_snapshot.py), so
+the baseline is recosted when the catalog reloads after its data_versions
+counters change, or on refresh().
+
+Usage:
+    python scenario_engine.py scenarios.json            # compare scenarios side by side
+    python scenario_engine.py --category Protein --percent 10
+    python scenario_engine.py --vendor "US Foods" --swap-to "RESTAURANT DEPOT" --json
+"""
+
+import argparse
+import json
+import math
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from calculation_rebuilder import CalculationRebuilder, gross_margin_from_cost
+from fixed_point import to_decimal
+from catalog_snapshot import CatalogSnapshot, get_catalog
+
+# Base tables the costing graph is read from
+SNAPSHOT_TABLES = ('inventory', 'vendor_products', 'vendors', 'recipes_actual',
+                   'recipe_ingredients_actual', 'menu_items_actual')
+
+# Inventory fields an overlay can change
+OVERLAY_FIELDS = ('current_price', 'pack_size', 'purchase_unit', 'yield_percent', 'vendor_name')
+
+CHANGE_TYPES = ('price', 'vendor', 'yield')
+
+
+class ScenarioError(ValueError):
+    """A scenario change is malformed"""
+
+
+def _number(change: Dict[str, Any], key: str) -> Optional[float]:
+    """A change's percent or amount as a float; None when absent"""
+    value = change.get(key)
+    if value is None:
+        return None
+    try:
+        number = float(value) if not isinstance(value, bool) else math.nan
+    except (TypeError, ValueError):
+        number = math.nan
+    if not math.isfinite(number):
+        raise ScenarioError(f"{change.get('type')} change {key} must be a number, got {value!r}")
+    return number
+
+
+class Scenario:
+    """A named, ordered list of overlay changes"""
+
+    def __init__(self, name: str, changes: Optional[List[Dict[str, Any]]] = None):
+        self.name = name
+        self.changes = []
+        for change in changes or []:
+            self.add(change)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Scenario':
+        if not isinstance(data, dict) or not data.get('name'):
+            raise ScenarioError("Scenario needs a name")
+        return cls(data['name'], data.get('changes', []))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'name': self.name, 'changes': [dict(change) for change in self.changes]}
+
+    def add(self, change: Dict[str, Any]) -> 'Scenario':
+        change = dict(change)
+        change_type = change.get('type')
+        if change_type not in CHANGE_TYPES:
+            raise ScenarioError(f"Unknown change type: {change_type!r}")
+        for key in ('percent', 'amount'):
+            if change.get(key) is not None:
+                change[key] = _number(change, key)
+        if change_type == 'price' and (change.get('percent') is None) == (change.get('amount') is None):
+            raise ScenarioError("Price change needs exactly one of percent or amount")
+        if change_type == 'vendor' and not change.get('to_vendor'):
+            raise ScenarioError("Vendor swap needs to_vendor")
+        if change_type == 'yield' and not 0 < (change.get('percent') or 0) <= 100:
+            raise ScenarioError("Yield change needs a percent between 0 and 100")
+        if change_type != 'vendor' and not any(change.get(key) for key in ('item', 'category', 'vendor')):
+            raise ScenarioError(f"{change_type} change needs an item, category or vendor")
+        self.changes.append(change)
+        return self
+
+    def change_price(self, percent: float = None, amount: float = None, **selector) -> 'Scenario':
+        """Change prices by a percent (10 = +10%) or an absolute amount per purchase unit"""
+        return self.add({'type': 'price', 'percent': percent, 'amount': amount, **selector})
+
+    def swap_vendor(self, to_vendor: str, **selector) -> 'Scenario':
+        """Price selected items (default: all) at to_vendor's vendor_products offer"""
+        return self.add({'type': 'vendor', 'to_vendor': to_vendor, **selector})
+
+    def change_yield(self, percent: float, **selector) -> 'Scenario':
+        return self.add({'type': 'yield', 'percent': percent, **selector})
+
+
+def _category_matches(categories: Optional[str], wanted: str) -> bool:
+    """'Dairy' and 'Dairy, Cream' both match 'Dairy, Cream, Heavy'"""
+    if not categories:
+        return False
+    have = [part.strip().lower() for part in categories.split(',')]
+    want = [part.strip().lower() for part in wanted.split(',')]
+    return have[:len(want)] == want
+
+
+def _as_list(value) -> List:
+    return value if isinstance(value, (list, tuple, set)) else [value]
+
+
+class CostingSnapshot:
+    """The costing graph of a catalog snapshot, with the edges needed to recost"""
+
+    def __init__(self, catalog: CatalogSnapshot):
+        # Shared with the catalog and every other reader - never modified in place
+        self.items = catalog.items
+        self.offers = catalog.offers
+        self.recipes = catalog.recipes
+        self.lines = catalog.lines
+        self.menu_items = catalog.menu_items
+
+        # Reverse edges: which recipes to recost when an item or prep recipe changes
+        self.item_users = {}
+        self.recipe_users = {}
+        for recipe_id, lines in self.lines.items():
+            for line in lines:
+                if line['nested_recipe_id']:
+                    self.recipe_users.setdefault(line['nested_recipe_id'], set()).add(recipe_id)
+                elif line['inventory_id']:
+                    self.item_users.setdefault(line['inventory_id'], set()).add(recipe_id)
+
+    def select_items(self, change: Dict[str, Any]) -> List[int]:
+        """Inventory ids matched by a change's item / category / vendor selector"""
+        items = change.get('item')
+        if items is not None:
+            wanted = {str(item).strip().lower() for item in _as_list(items)}
+            return [item_id for item_id, item in self.items.items()
+                    if str(item_id) in wanted or (item['item_description'] or '').strip().lower() in wanted]
+        selected = list(self.items)
+        if change.get('category'):
+            categories = _as_list(change['category'])
+            selected = [item_id for item_id in selected
+                        if any(_category_matches(self.items[item_id]['product_categories'], c) for c in categories)]
+        vendor = change.get('vendor') or change.get('from_vendor')
+        if vendor:
+            vendors = {v.strip().lower() for v in _as_list(vendor)}
+            selected = [item_id for item_id in selected
+                        if (self.items[item_id]['vendor_name'] or '').strip().lower() in vendors]
+        return selected
+
+    def affected_recipes(self, item_ids: Iterable[int]) -> Set[int]:
+        """Recipes using the items, directly or through prep recipes"""
+        affected = set()
+        pending = [recipe_id for item_id in item_ids for recipe_id in self.item_users.get(item_id, ())]
+        while pending:
+            recipe_id = pending.pop()
+            if recipe_id not in affected:
+                affected.add(recipe_id)
+                pending.extend(self.recipe_users.get(recipe_id, ()))
+        return affected
+
+
+class ScenarioEngine:
+    """Cost what-if scenarios against an in-memory snapshot of the costing graph"""
+
+    def __init__(self, db_path: str = 'restaurant_calculator.db'):
+        self.db_path = db_path
+        self.catalog = get_catalog(db_path)
+        self.lock = threading.Lock()
+        self.source = None  # the catalog snapshot the baseline was costed from
+        self.snapshot = None
+        self.baseline = None
+        self.rebuilder = None
+
+    def _recost(self, source: CatalogSnapshot):
+        snapshot = CostingSnapshot(source)
+        # Used only for its line arithmetic and parse caches; costing never queries the database
+        rebuilder = CalculationRebuilder(self.db_path, read_only=True)
+        baseline = self._cost_recipes(snapshot, rebuilder, snapshot.items, set(snapshot.recipes), {})
+        self.source, self.snapshot, self.baseline, self.rebuilder = source, snapshot, baseline, rebuilder
+
+    def refresh(self):
+        """Reload the catalog and recost the baseline"""
+        with self.lock:
+            self._recost(self.catalog.refresh())
+
+    def _current(self):
+        with self.lock:
+            source = self.catalog.current()
+            if source is not self.source:
+                self._recost(source)
+            return self.snapshot, self.baseline, self.rebuilder
+
+    def _cost_recipes(self, snapshot: CostingSnapshot, rebuilder: CalculationRebuilder,
+                      items: Dict[int, Dict], recipe_ids: Set[int], known: Dict[int, Dict]) -> Dict[int, Dict]:
+        """
+        Cost recipe_ids (and any prep recipes they need) from items
+
+        known holds already-costed recipes that are reused as-is. Each result is
+        {'total_micros': int, 'errors': int} or {'error': message} when the
+        recipe (or a prep recipe under it) could not be costed.
+        """
+        costs = dict(known)
+        for recipe_id in recipe_ids:
+            costs.pop(recipe_id, None)
+
+        def cost(recipe_id: int, visiting: Set[int]) -> Dict:
+            if recipe_id in costs:
+                return costs[recipe_id]
+            if recipe_id in visiting:
+                return {'error': f"Recipe {recipe_id} uses itself"}
+            visiting.add(recipe_id)
+            total = errors = 0
+            try:
+                for line in snapshot.lines.get(recipe_id, ()):
+                    if line['nested_recipe_id']:
+                        nested = cost(line['nested_recipe_id'], visiting)
+                        if 'error' in nested:
+                            result = {'error': nested['error']}
+                            break
+                        prep = snapshot.recipes[line['nested_recipe_id']]
+                        ing_calc, micros = rebuilder.cost_ingredient_line(
+                            line, to_decimal(nested['total_micros']),
+                            prep['batch_yield'] or prep['portions_per_batch'],
+                            prep['batch_yield_unit'] or 'portion'
+                        )
+                    else:
+                        row = dict(line)
+                        row.update(items.get(line['inventory_id']) or dict.fromkeys(OVERLAY_FIELDS))
+                        ing_calc, micros = rebuilder.cost_ingredient_line(row)
+                    total += micros
+                    errors += len(ing_calc.errors)
+                else:
+                    result = {'total_micros': total, 'errors': errors}
+            except Exception as e:
+                result = {'error': f"{type(e).__name__}: {e}"}
+            visiting.discard(recipe_id)
+            costs[recipe_id] = result
+            return result
+
+        for recipe_id in recipe_ids:
+            cost(recipe_id, set())
+        return costs
+
+    def _apply(self, snapshot: CostingSnapshot, scenario: Scenario):
+        """Overlay the scenario on copies of the inventory rows it touches"""
+        overlay = {}
+        unmatched = []
+        for change in scenario.changes:
+            for item_id in snapshot.select_items(change):
+                item = overlay.get(item_id)
+                if item is None:
+                    item = overlay[item_id] = dict(snapshot.items[item_id])
+                if change['type'] == 'price':
+                    if item['current_price'] is None:
+                        continue
+                    price = Decimal(str(item['current_price']))
+                    if change.get('percent') is not None:
+                        price *= 1 + Decimal(str(change['percent'])) / 100
+                    else:
+                        price += Decimal(str(change['amount']))
+                    item['current_price'] = float(max(price, Decimal('0')).quantize(Decimal('0.0001')))
+                elif change['type'] == 'yield':
+                    item['yield_percent'] = float(change['percent'])
+                else:
+                    vendor = change['to_vendor'].strip().lower()
+                    if (item['vendor_name'] or '').strip().lower() == vendor:
+                        continue  # already bought from that vendor
+                    offer = next((o for o in snapshot.offers.get(item_id, ())
+                                  if (o['vendor_name'] or '').strip().lower() == vendor), None)
+                    price = offer and (offer['vendor_price'] or offer['last_purchased_price'])
+                    if not price:
+                        unmatched.append(item_id)
+                        continue
+                    item['current_price'] = price
+                    item['pack_size'] = offer['pack_size'] or item['pack_size']
+                    item['purchase_unit'] = offer['unit_measure'] or item['purchase_unit']
+                    item['vendor_name'] = offer['vendor_name']
+        changed = {
+            item_id: item for item_id, item in overlay.items()
+            if any(item[field] != snapshot.items[item_id][field] for field in OVERLAY_FIELDS)
+        }
+        return changed, sorted(set(unmatched) - set(changed))
+
+    def run(self, scenario: Scenario) -> Dict[str, Any]:
+        """Cost one scenario against the baseline"""
+        started = time.perf_counter()
+        snapshot, baseline, rebuilder = self._current()
+        changed, unmatched = self._apply(snapshot, scenario)
+        affected = snapshot.affected_recipes(changed)
+        items = dict(snapshot.items)
+        items.update(changed)
+        costs = self._cost_recipes(snapshot, rebuilder, items, affected, baseline)
+
+        recipes = []
+        for recipe_id in sorted(affected):
+            recipes.append(self._compare_costs(snapshot.recipes[recipe_id], baseline[recipe_id], costs[recipe_id]))
+        menu_items = [
+            self._menu_item_row(snapshot, menu_item, baseline, costs)
+            for menu_item in snapshot.menu_items if menu_item['recipe_id'] in affected
+        ]
+        return {
+            'name': scenario.name,
+            'changes': scenario.to_dict()['changes'],
+            'changed_items': [
+                {
+                    'inventory_id': item_id,
+                    'item_description': item['item_description'],
+                    **{f'base_{field}': snapshot.items[item_id][field] for field in OVERLAY_FIELDS},
+                    **{field: item[field] for field in OVERLAY_FIELDS},
+                }
+                for item_id, item in sorted(changed.items())
+            ],
+            'unmatched_items': unmatched,
+            'recipes': recipes,
+            'menu_items': menu_items,
+            'summary': {
+                'items_changed': len(changed),
+                'recipes_affected': len(affected),
+                'menu_items_affected': len(menu_items),
+                'total_cost_change': float(sum(
+                    (Decimal(str(r['cost_change'])) for r in recipes if r['cost_change'] is not None), Decimal('0')
+                )),
+            },
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    @staticmethod
+    def _compare_costs(recipe: Dict, base: Dict, cost: Dict) -> Dict[str, Any]:
+        row = {
+            'recipe_id': recipe['recipe_id'],
+            'recipe_name': recipe['recipe_name'],
+            'base_cost': float(to_decimal(base['total_micros'], 2)) if 'total_micros' in base else None,
+            'cost': float(to_decimal(cost['total_micros'], 2)) if 'total_micros' in cost else None,
+            'cost_change': None,
+            'cost_change_percent': None,
+            'error': cost.get('error'),
+        }
+        if row['base_cost'] is not None and row['cost'] is not None:
+            row['cost_change'] = round(row['cost'] - row['base_cost'], 2)
+            if row['base_cost']:
+                row['cost_change_percent'] = round(row['cost_change'] / row['base_cost'] * 100, 2)
+        return row
+
+    @staticmethod
+    def _menu_item_row(snapshot: CostingSnapshot, menu_item: Dict, baseline: Dict, costs: Dict) -> Dict[str, Any]:
+        """Menu item cost and margin before and after, priced like calculate_gross_margin()"""
+        row = {
+            'menu_item_id': menu_item['menu_item_id'],
+            'item_name': menu_item['item_name'],
+            'menu_category': menu_item['menu_category'],
+            'recipe_id': menu_item['recipe_id'],
+            'menu_price': menu_item['current_price'],
+        }
+        price = Decimal(str(menu_item['current_price'] or 0))
+        recipe_name = snapshot.recipes[menu_item['recipe_id']]['recipe_name']
+        for prefix, result in (('base_', baseline[menu_item['recipe_id']]), ('', costs[menu_item['recipe_id']])):
+            if 'total_micros' in result:
+                margin = gross_margin_from_cost(menu_item['recipe_id'], recipe_name, price,
+                                                to_decimal(result['total_micros'], 2))
+                row[f'{prefix}food_cost'] = margin['food_cost']
+                row[f'{prefix}food_cost_percent'] = margin['food_cost_percent']
+                row[f'{prefix}gross_margin_percent'] = margin['gross_margin_percent']
+            else:
+                row[f'{prefix}food_cost'] = row[f'{prefix}food_cost_percent'] = None
+                row[f'{prefix}gross_margin_percent'] = None
+        return row
+
+    def compare(self, scenarios: List[Scenario]) -> Dict[str, Any]:
+        """Run several scenarios and line their menu item results up side by side"""
+        runs = [self.run(scenario) for scenario in scenarios]
+        snapshot, baseline, _ = self._current()
+        menu_items = {}
+        for index, result in enumerate(runs):
+            for row in result['menu_items']:
+                entry = menu_items.get(row['menu_item_id'])
+                if entry is None:
+                    entry = menu_items[row['menu_item_id']] = {
+                        key: row[key] for key in ('menu_item_id', 'item_name', 'menu_category', 'menu_price',
+                                                  'base_food_cost', 'base_food_cost_percent',
+                                                  'base_gross_margin_percent')
+                    }
+                    entry['scenarios'] = [None] * len(runs)
+                entry['scenarios'][index] = {
+                    'food_cost': row['food_cost'],
+                    'food_cost_percent': row['food_cost_percent'],
+                    'gross_margin_percent': row['gross_margin_percent'],
+                }
+        # Unaffected menu items keep their baseline in every scenario
+        for entry in menu_items.values():
+            for index, value in enumerate(entry['scenarios']):
+                if value is None:
+                    entry['scenarios'][index] = {
+                        'food_cost': entry['base_food_cost'],
+                        'food_cost_percent': entry['base_food_cost_percent'],
+                        'gross_margin_percent': entry['base_gross_margin_percent'],
+                    }
+        return {
+            'scenarios': [{'name': r['name'], 'summary': r['summary'], 'unmatched_items': r['unmatched_items'],
+                           'elapsed_ms': r['elapsed_ms']} for r in runs],
+            'menu_items': sorted(menu_items.values(), key=lambda e: (e['menu_category'] or '', e['item_name'])),
+            'runs': runs,
+        }
+
+
+def print_comparison(comparison: Dict[str, Any], top: int = 20):
+    names = [s['name'] for s in comparison['scenarios']]
+    print("=" * 80)
+    print("WHAT-IF SCENARIOS")
+    print("=" * 80)
+    for scenario in comparison['scenarios']:
+        summary = scenario['summary']
+        print(f"{scenario['name']}: {summary['items_changed']} items, {summary['recipes_affected']} recipes, "
+              f"{summary['menu_items_affected']} menu items, cost change ${summary['total_cost_change']:+.2f} "
+              f"({scenario['elapsed_ms']} ms)")
+        if scenario['unmatched_items']:
+            print(f"  No offer from the target vendor for {len(scenario['unmatched_items'])} items")
+
+    rows = comparison['menu_items']
+    if not rows:
+        print("\nNo menu items affected")
+        return
+    print(f"\nFood cost % by menu item (first {min(top, len(rows))} of {len(rows)})")
+    print(f"{'Menu Item':<32} {'Base':>8} " + ' '.join(f"{name[:12]:>12}" for name in names))
+    for row in rows[:top]:
+        cells = [f"{s['food_cost_percent']:>11.2f}%" if s['food_cost_percent'] is not None else f"{'n/a':>12}"
+                 for s in row['scenarios']]
+        base = f"{row['base_food_cost_percent']:.2f}%" if row['base_food_cost_percent'] is not None else 'n/a'
+        print(f"{row['item_name'][:32]:<32} {base:>8} " + ' '.join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost what-if price, vendor and yield scenarios")
+    parser.add_argument('scenarios', nargs='?', help="JSON file with a scenario or a list of scenarios")
+    parser.add_argument('--db', default='restaurant_calculator.db', help="Database path")
+    parser.add_argument('--item', action='append', help="Inventory id or description (repeatable)")
+    parser.add_argument('--category', help="Category prefix, e.g. 'Protein' or 'Dairy, Cream'")
+    parser.add_argument('--vendor', help="Current vendor name")
+    parser.add_argument('--percent', type=float, help="Price change in percent")
+    parser.add_argument('--amount', type=float, help="Price change per purchase unit")
+    parser.add_argument('--swap-to', help="Swap the selected items to this vendor's offer")
+    parser.add_argument('--yield-percent', type=float, help="Set the usable yield percent")
+    parser.add_argument('--top', type=int, default=20, help="Menu items to print")
+    parser.add_argument('--json', action='store_true', help="Print the full comparison as JSON")
+    args = parser.parse_args()
+
+    try:
+        if args.scenarios:
+            with open(args.scenarios) as f:
+                data = json.load(f)
+            scenarios = [Scenario.from_dict(d) for d in (data if isinstance(data, list) else [data])]
+        else:
+            selector = {key: value for key, value in
+                        (('item', args.item), ('category', args.category), ('vendor', args.vendor)) if value}
+            scenario = Scenario('what-if')
+            if args.swap_to:
+                scenario.swap_vendor(args.swap_to, **selector)
+            if args.percent is not None or args.amount is not None:
+                scenario.change_price(percent=args.percent, amount=args.amount, **selector)
+            if args.yield_percent is not None:
+                scenario.change_yield(args.yield_percent, **selector)
+            if not scenario.changes:
+                parser.error("Give a scenarios file or at least one of --percent, --amount, --swap-to, --yield-percent")
+            scenarios = [scenario]
+    except ScenarioError as e:
+        parser.error(str(e))
+
+    comparison = ScenarioEngine(args.db).compare(scenarios)
+    if args.json:
+        print(json.dumps(comparison, indent=2, default=str))
+    else:
+        print_comparison(comparison, args.top)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,17 +4,18 @@ Database synchronization script for production deployment
 """
 import os
 import sqlite3
-import shutil
+import sys
 from datetime import datetime
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from changeset_sync import install_change_log, mark_synced
+from db_backup import backup_database
+
 def export_database_for_production():
     """Export local database to production format"""
     
-    # Create backup
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    backup_path = f'backups/db_backup_{timestamp}.db'
-    os.makedirs('backups', exist_ok=True)
-    shutil.copy2('restaurant_calculator.db', backup_path)
+    # Create backup (online, so the running app can keep writing)
+    backup_path = backup_database('restaurant_calculator.db', 'backups')['path']
     print(f"✓ Created backup: {backup_path}")
     
     # Export to SQL
@@ -25,6 +26,10 @@ def export_database_for_production():
     conn = sqlite3.connect('restaurant_calculator.db')
     cursor = conn.cursor()
     
+    # The full dump carries every change so far; later changesets start here
+    install_change_log(conn)
+    mark_synced(conn, 'production', cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM sync_changes').fetchone()[0])
+    
     stats = {}
     tables = ['inventory', 'recipes', 'menu_items', 'vendors', 'vendor_descriptions']
     for table in tables:
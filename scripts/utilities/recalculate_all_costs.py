@@ -2,10 +2,18 @@
 """
 Recalculate all recipe and menu item costs
 Run this after database migrations to fix cost calculations
+
+The new recipe costs are recorded in cost history as one snapshot for the
+whole run.
 """
+import os
 import sqlite3
+import sys
 from decimal import Decimal
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from cost_history import RECIPE, record_snapshot
+
 def get_unit_conversion(conn, from_unit, to_unit, unit_type):
     """Get conversion factor between units"""
     if from_unit == to_unit:
@@ -155,6 +163,7 @@ def recalculate_all_costs():
         print(f"Updated {menu_updated} menu items")
         
         conn.commit()
+        record_snapshot(conn, 'recalculation', kinds=(RECIPE,))
         print("\nCost recalculation complete!")
         
         # Show summary statistics
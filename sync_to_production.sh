@@ -1,16 +1,34 @@
 #!/bin/bash
 # Quick database sync to production
+#
+# Ships a changeset of the rows changed since the last sync (changeset_sync.py);
+# the app applies pending changesets from data/changesets on startup.
+# Use --full to ship the whole database dump instead.
 
 echo "🔄 Syncing database to production..."
 
-# Export database
-python3 scripts/sync_database.py
+if [ "$1" == "--full" ]; then
+    # Export database
+    python3 scripts/sync_database.py
 
-# Add and commit
-git add data/production_data.sql data/production_data_summary.txt
-git commit -m "Update production database - $(date +%Y-%m-%d)"
+    # Add and commit
+    git add data/production_data.sql data/production_data_summary.txt
+    git commit -m "Update production database - $(date +%Y-%m-%d)"
+else
+    # Export rows changed since the last sync
+    python3 changeset_sync.py export --target production --mark --output-dir data/changesets
+
+    if [ -z "$(git status --porcelain data/changesets)" ]; then
+        echo "✅ Nothing to sync."
+        exit 0
+    fi
+
+    # Add and commit
+    git add data/changesets
+    git commit -m "Sync database changes to production - $(date +%Y-%m-%d)"
+fi
 
 # Push to trigger deployment
 git push origin main
 
-echo "✅ Sync complete! Railway will automatically deploy with new data."
\ No newline at end of file
+echo "✅ Sync complete! Railway will automatically deploy with new data."
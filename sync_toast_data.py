@@ -16,6 +16,8 @@ from import_recipe_system import (
     import_recipe_summary, import_individual_recipe_files,
     create_menu_item_mappings
 )
+from sales_mix import is_sales_mix_file, import_sales_mix
+from cost_history import record_snapshot
 
 SYNC_STATE_FILE = '.toast_sync_state.json'
 WATCH_DIRECTORIES = [
@@ -145,6 +147,7 @@ def import_inventory_file(filepath):
                     items_imported += 1
             
             conn.commit()
+            record_snapshot(conn, 'toast_inventory_import')
     
     print(f"    ✅ Imported {items_imported} new items, updated {items_updated}")
 
@@ -158,6 +161,12 @@ def process_file(filepath):
     elif 'Recipe_Summary' in filename or 'Recipe_List_Summary' in filename:
         print(f"  🍳 Processing recipe summary: {filename}")
         import_recipe_summary()
+    elif is_sales_mix_file(filename):
+        print(f"  🧾 Importing sales mix from {filename}")
+        with get_db() as conn:
+            result = import_sales_mix(conn, filepath)
+        print(f"    ✅ {result['days']} days ({result['first_date']} - {result['last_date']}), "
+              f"{result['unmatched_items']} unmatched items")
     elif '/recipes/' in filepath:
         print(f"  📄 Individual recipe file: {filename}")
         # Individual files are processed in batch by import_individual_recipe_files
@@ -12,11 +12,15 @@ This script runs automated health checks and can be triggered:
 
 import sqlite3
 import os
+import sys
 import json
 import time
 from datetime import datetime
 from typing import Dict, List, Any
 
+# Repository root, for the shared data-quality rule engine
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
 class HealthMonitor:
     """Continuous health monitoring for Lea Jane's Hot Chicken system"""
     
@@ -164,6 +168,32 @@ class HealthMonitor:
                 'error': str(e)
             }
     
+    def check_data_quality(self) -> Dict[str, Any]:
+        """Incremental data-quality rule run (only rows changed since the last check)"""
+        try:
+            from data_quality_rules import DataQualityEngine
+            
+            result = DataQualityEngine(self.database_path).run()
+            findings = result['findings_by_severity']
+            
+            return {
+                'status': 'warning' if findings.get('error', 0) > 0 else 'healthy',
+                'errors': findings.get('error', 0),
+                'warnings': findings.get('warning', 0),
+                'rules_run': result['rules_run'],
+                'duration_ms': result['duration_ms'],
+                'error': None
+            }
+        except Exception as e:
+            return {
+                'status': 'error',
+                'errors': 0,
+                'warnings': 0,
+                'rules_run': 0,
+                'duration_ms': 0,
+                'error': str(e)
+            }
+    
     def run_comprehensive_health_check(self) -> Dict[str, Any]:
         """Execute all health checks and compile report"""
         print(f"🏥 Running health check at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -179,6 +209,7 @@ class HealthMonitor:
         health_report['checks']['xtrachef'] = self.check_xtrachef_integration()
         health_report['checks']['recipe_costing'] = self.check_recipe_costing_accuracy()
         health_report['checks']['menu_system'] = self.check_menu_integrity()
+        health_report['checks']['data_quality'] = self.check_data_quality()
         
         # Determine overall status
         error_count = sum(1 for check in health_report['checks'].values() if check['status'] == 'error')
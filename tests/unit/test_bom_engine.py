@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - BOM Engine
+Tests forecast explosion into purchase and per-station prep lists
+"""
+
+import pytest
+import sqlite3
+import sys
+import os
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from bom_engine import BOMEngine, SparseRequirements, read_forecast_csv
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'bom.db')
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE inventory (id INTEGER PRIMARY KEY, item_description TEXT, vendor_name TEXT,
+                                current_price REAL, pack_size TEXT, purchase_unit TEXT,
+                                yield_percent REAL, density_g_per_ml REAL, count_to_weight_g REAL);
+        CREATE TABLE vendors (id INTEGER PRIMARY KEY, vendor_name TEXT);
+        CREATE TABLE vendor_products (id INTEGER PRIMARY KEY, inventory_id INTEGER, vendor_id INTEGER,
+                                      vendor_item_code TEXT, vendor_price REAL, pack_size TEXT,
+                                      unit_measure TEXT, is_primary BOOLEAN, is_active BOOLEAN);
+        CREATE TABLE recipes_actual (recipe_id INTEGER PRIMARY KEY, recipe_name TEXT, recipe_type TEXT,
+                                     recipe_group TEXT, station TEXT, batch_yield REAL,
+                                     batch_yield_unit TEXT, portions_per_batch INTEGER);
+        CREATE TABLE recipe_ingredients_actual (ingredient_id INTEGER PRIMARY KEY, recipe_id INTEGER,
+                                                ingredient_name TEXT, quantity REAL, unit TEXT,
+                                                inventory_id INTEGER, ingredient_order INTEGER);
+        CREATE TABLE recipe_components (id INTEGER PRIMARY KEY, parent_recipe_id INTEGER,
+                                        component_recipe_id INTEGER, quantity REAL, unit_of_measure TEXT);
+        CREATE TABLE menu_items_actual (menu_item_id INTEGER PRIMARY KEY, item_name TEXT, recipe_id INTEGER,
+                                        menu_category TEXT);
+
+        INSERT INTO inventory VALUES
+            (1, 'Chicken Thighs', 'Sysco', 40.0, '10 lb', 'case', 100, NULL, NULL),
+            (2, 'Heavy Cream', 'Sysco', 24.0, '4 qt', 'case', 100, NULL, NULL),
+            (3, 'Potatoes', 'US Foods', 25.0, '50 lb', 'bag', 80, NULL, NULL);
+        INSERT INTO vendors VALUES (1, 'Sysco'), (2, 'US Foods');
+        INSERT INTO vendor_products VALUES (1, 1, 1, 'SY-1', 40.0, '1 each', 'cs', 1, 1),
+                                           (2, 3, 2, 'US-3', 25.0, '1 each', 'bag', 1, 1);
+        INSERT INTO recipes_actual VALUES
+            (1, 'Cream Sauce', 'PrepRecipe', 'Sauces', 'Sauce', 2, 'qt', NULL),
+            (2, 'Fries Prep', 'PrepRecipe', 'Sides', NULL, NULL, NULL, 10),
+            (3, 'Hot Chicken', 'Recipe', 'Main', NULL, NULL, NULL, NULL),
+            (4, 'Loaded Fries', 'Recipe', 'Sides', NULL, NULL, NULL, NULL);
+        INSERT INTO recipe_ingredients_actual VALUES
+            (1, 1, 'Heavy Cream', 2, 'qt', 2, 1),
+            (2, 2, 'Potatoes', 5, 'lb', 3, 1),
+            (3, 3, 'Chicken Thighs', 8, 'oz', 1, 1),
+            (4, 3, 'Cream Sauce', 0.5, 'qt', NULL, 2),
+            (5, 4, 'Cream Sauce', 4, 'fl oz', NULL, 1),
+            (6, 4, 'Chives', 0.25, 'oz', NULL, 2);
+        INSERT INTO recipe_components VALUES (1, 4, 2, 1, 'each');
+        INSERT INTO menu_items_actual VALUES (1, 'Hot Chicken Sandwich', 3, 'Mains'),
+                                             (2, 'Loaded Fries', 4, 'Sides');
+    ''')
+    conn.commit()
+    conn.close()
+    return path
+
+def by_name(rows, key):
+    return {row[key]: row for row in rows}
+
+class TestPlan:
+    """Test forecast explosion"""
+
+    def test_purchase_list_in_whole_packs(self, db_path):
+        plan = BOMEngine(db_path).plan({1: [10, 20], 2: [5, 5]}, ['mon', 'tue'])
+        items = by_name(plan['purchase_list'], 'item_description')
+
+        chicken = items['Chicken Thighs']
+        assert (chicken['required_quantity'], chicken['unit'], chicken['daily_quantity']) == (15.0, 'lb', [5.0, 10.0])
+        assert (chicken['packs_to_order'], chicken['estimated_cost'], chicken['vendor_item_code']) == (2, 80.0, 'SY-1')
+
+        # 30 x 0.5 qt + 10 x 4 fl oz of sauce = 8.125 batches x 2 qt of cream
+        cream = items['Heavy Cream']
+        assert (cream['required_quantity'], cream['packs_to_order'], cream['vendor_name']) == (16.25, 5, 'Sysco')
+
+        # One batch of fries prep: 5 lb at 80% yield
+        assert items['Potatoes']['required_quantity'] == 6.25
+        assert items['Potatoes']['packs_to_order'] == 1
+
+        assert plan['unresolved'] == [{'name': 'Chives', 'inventory_id': None, 'quantity': 2.5, 'unit': 'oz'}]
+        assert plan['summary']['estimated_cost'] == 80.0 + 5 * 24.0 + 25.0
+
+    def test_prep_list_by_station(self, db_path):
+        plan = BOMEngine(db_path).plan({1: [10, 20], 2: [5, 5]})
+        assert sorted(plan['prep_list']) == ['Sauce', 'Sides']
+
+        sauce = plan['prep_list']['Sauce'][0]
+        assert (sauce['recipe_name'], sauce['batches'], sauce['quantity']) == ('Cream Sauce', 8.125, 16.25)
+        assert sauce['daily_batches'] == [3, 6]
+
+        fries = plan['prep_list']['Sides'][0]
+        assert (fries['recipe_name'], fries['batches'], fries['unit']) == ('Fries Prep', 1.0, 'portion')
+
+    def test_unknown_menu_items_are_reported(self, db_path):
+        plan = BOMEngine(db_path).plan({1: 4, 99: 3})
+        assert plan['unknown_menu_items'] == [99]
+        assert by_name(plan['purchase_list'], 'item_description')['Chicken Thighs']['required_quantity'] == 2.0
+
+    def test_forecast_csv(self, db_path, tmp_path):
+        path = tmp_path / 'forecast.csv'
+        path.write_text("date,menu_item_id,quantity\n2026-03-02,1,10\n2026-03-01,1,4\n2026-03-02,2,5\n")
+        forecast, days = read_forecast_csv(str(path))
+        assert days == ['2026-03-01', '2026-03-02']
+        assert forecast == {1: [4.0, 10.0], 2: [0.0, 5.0]}
+
+class TestSparseRequirements:
+    """Test the sparse product against a dense one"""
+
+    def test_matches_dense_product(self):
+        rng = np.random.default_rng(3)
+        entries = {(int(r), int(c)): float(v) for r, c, v in
+                   zip(rng.integers(0, 200, 1500), rng.integers(0, 300, 1500), rng.random(1500))}
+        matrix = SparseRequirements(entries, 200, 300)
+        dense = np.zeros((200, 300))
+        for (row, col), value in entries.items():
+            dense[row, col] = value
+        forecast = rng.integers(0, 30, (200, 14)).astype(float)
+        assert np.allclose(matrix.transpose_dot(forecast), dense.T @ forecast)
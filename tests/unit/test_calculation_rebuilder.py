@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - Calculation Rebuilder
+Tests the streaming JSON Lines audit trail and on-demand step formatting
+"""
+
+import csv
+import json
+import pytest
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from calculation_rebuilder import CalculationRebuilder, AUDIT_TRAIL_MEMORY, REPORT_TOP_N, format_step
+
+RECIPE_COUNT = AUDIT_TRAIL_MEMORY + 20
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'rebuilder.db')
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE inventory (id INTEGER PRIMARY KEY, item_description TEXT, current_price REAL,
+                                pack_size TEXT, purchase_unit TEXT, recipe_cost_unit TEXT,
+                                yield_percent REAL, density_g_per_ml REAL, count_to_weight_g REAL);
+        CREATE TABLE recipes_actual (recipe_id INTEGER PRIMARY KEY, recipe_name TEXT, recipe_type TEXT,
+                                     batch_yield REAL, batch_yield_unit TEXT, serving_size REAL,
+                                     serving_unit TEXT, menu_price REAL, food_cost REAL,
+                                     portions_per_batch REAL);
+        CREATE TABLE recipe_ingredients_actual (ingredient_id INTEGER PRIMARY KEY, recipe_id INTEGER,
+                                                ingredient_name TEXT, quantity REAL, unit TEXT,
+                                                inventory_id INTEGER, unit_cost REAL, total_cost REAL,
+                                                ingredient_order INTEGER);
+
+        INSERT INTO inventory VALUES (1, 'Chicken Thighs', 40.0, '10 lb', 'case', 'lb', 80, NULL, NULL);
+    ''')
+    # Recipe n uses n oz of chicken, so its cost grows with n against a flat $1.00 PDF cost
+    conn.executemany(
+        "INSERT INTO recipes_actual VALUES (?, ?, 'Mains', 1, 'each', 2, 'each', NULL, 1.0, 2)",
+        [(n, f'Recipe {n}') for n in range(1, RECIPE_COUNT + 1)]
+    )
+    conn.executemany(
+        "INSERT INTO recipe_ingredients_actual VALUES (?, ?, 'Chicken Thighs', ?, 'oz', 1, NULL, NULL, 1)",
+        [(n, n, n) for n in range(1, RECIPE_COUNT + 1)]
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+class TestSteps:
+    """Test raw steps and on-demand formatting"""
+
+    def test_steps_are_raw_until_explained(self, db_path):
+        rebuilder = CalculationRebuilder(db_path)
+        calculation = rebuilder.calculate_recipe_cost_from_scratch(8)
+        steps = calculation['ingredients'][0]['steps']
+        assert [step['step'] for step in steps] == ['unit_conversion', 'yield_adjustment']
+        assert not any(isinstance(value, str) and '$' in value for value in steps[0].values())
+
+        explained = rebuilder.explain_recipe_cost(8)
+        assert explained['ingredients'][0]['steps'][0] == {
+            'step': 'unit_conversion', 'from': '8.0 oz', 'to': '0.50 lb',
+            'formula': '0.50 × $4.0000/lb', 'result': '$2.00'
+        }
+        assert explained['calculation_steps'][-1] == format_step(calculation['calculation_steps'][-1])
+        assert explained['calculation_steps'][-1]['formula'] == '$2.50 / 2.0 servings'
+
+class TestAuditTrail:
+    """Test the streaming audit trail"""
+
+    def test_batch_streams_reports_with_bounded_memory(self, db_path, tmp_path):
+        rebuilder = CalculationRebuilder(db_path)
+        results = rebuilder.batch_recalculate_all_recipes(output_dir=str(tmp_path / 'out'), keep_recipes=False)
+
+        assert results['successful'] == RECIPE_COUNT
+        assert results['recipes'] == []
+        assert [r['recipe_id'] for r in results['top_variances']] == list(
+            range(RECIPE_COUNT, RECIPE_COUNT - REPORT_TOP_N, -1)
+        )
+        assert len(rebuilder.audit_trail.recent) == AUDIT_TRAIL_MEMORY
+
+        with open(results['audit_file']) as f:
+            entries = [json.loads(line) for line in f]
+        assert [entry['recipe_id'] for entry in entries] == list(range(1, RECIPE_COUNT + 1))
+        assert 'calculation_steps' not in entries[0]
+
+        csv_path = results['audit_file'].replace('calculation_audit_', 'calculation_report_').replace('.jsonl', '.csv')
+        with open(csv_path, newline='') as f:
+            assert len(list(csv.DictReader(f))) == RECIPE_COUNT
+
+    def test_audit_report_reads_back_from_file(self, db_path, tmp_path):
+        rebuilder = CalculationRebuilder(db_path)
+        rebuilder.batch_recalculate_all_recipes(output_dir=str(tmp_path))
+
+        report = rebuilder.create_calculation_audit_trail()
+        assert report['total_calculations'] == RECIPE_COUNT
+        assert 'calculations' not in report
+        assert report['summary']['calculations_with_warnings'] == RECIPE_COUNT
+
+        # Recipe 1 fell out of memory long ago but is still in the file
+        single = rebuilder.create_calculation_audit_trail(1)
+        assert [entry['recipe_name'] for entry in single['calculations']] == ['Recipe 1']
+        assert single['calculations'][0]['total_cost'] == '0.31'
+
+    def test_comprehensive_report_keeps_json_file_names(self, db_path, tmp_path):
+        rebuilder = CalculationRebuilder(db_path)
+        report_dir = rebuilder.generate_comprehensive_report(str(tmp_path))
+
+        with open(report_dir / 'batch_calculations.json') as f:
+            batch = json.load(f)
+        assert batch['successful'] == RECIPE_COUNT
+        assert [row['recipe_id'] for row in batch['recipes']] == list(range(1, RECIPE_COUNT + 1))
+        assert batch['recipes'][0]['status'] == 'success'
+
+        with open(report_dir / 'audit_trail.json') as f:
+            audit = json.load(f)
+        assert audit['total_calculations'] == len(audit['calculations']) == RECIPE_COUNT
+        assert audit['calculations'][0]['recipe_name'] == 'Recipe 1'
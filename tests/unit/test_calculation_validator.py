@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - Calculation Validator
+Tests read-only, parallel full-system validation and shared recipe costing
+"""
+
+import pytest
+import sqlite3
+import sys
+import os
+from decimal import Decimal
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from calculation_rebuilder import CalculationRebuilder
+from calculation_validator import CalculationValidator
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'validator.db')
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE inventory (id INTEGER PRIMARY KEY, item_description TEXT, current_price REAL,
+                                pack_size TEXT, purchase_unit TEXT, recipe_cost_unit TEXT,
+                                yield_percent REAL, density_g_per_ml REAL, count_to_weight_g REAL,
+                                last_purchased_date TEXT);
+        CREATE TABLE recipes_actual (recipe_id INTEGER PRIMARY KEY, recipe_name TEXT, recipe_type TEXT,
+                                     recipe_group TEXT, batch_yield REAL, batch_yield_unit TEXT,
+                                     serving_size REAL, serving_unit TEXT, menu_price REAL,
+                                     food_cost REAL, portions_per_batch REAL);
+        CREATE TABLE recipe_ingredients_actual (ingredient_id INTEGER PRIMARY KEY, recipe_id INTEGER,
+                                                ingredient_name TEXT, quantity REAL, unit TEXT,
+                                                inventory_id INTEGER, unit_cost REAL, total_cost REAL,
+                                                ingredient_order INTEGER);
+        CREATE TABLE menu_items_actual (menu_item_id INTEGER PRIMARY KEY, item_name TEXT,
+                                        recipe_id INTEGER, current_price REAL);
+        CREATE VIEW menu_items AS
+            SELECT menu_item_id as id, item_name, recipe_id, current_price as menu_price
+            FROM menu_items_actual;
+
+        INSERT INTO inventory VALUES (1, 'Chicken Thighs', 40.0, '10 lb', 'case', 'lb', 100, NULL, NULL, NULL),
+                                     (2, 'Potatoes', 25.0, '50 lb', 'bag', 'lb', 100, NULL, NULL, NULL),
+                                     (3, 'Pickles', 0, NULL, NULL, NULL, NULL, NULL, NULL, NULL);
+        INSERT INTO recipes_actual VALUES (1, 'Hot Chicken', 'Mains', 'Mains', 1, 'each', 1, 'each', NULL, 2.0, 1),
+                                          (2, 'Fries', 'Sides', 'Sides', 1, 'each', 1, 'each', NULL, 0.25, 1),
+                                          (3, 'Pickle Plate', 'Sides', 'Sides', 1, 'each', 1, 'each', NULL, 1.0, 1);
+        INSERT INTO recipe_ingredients_actual VALUES (1, 1, 'Chicken Thighs', 0.5, 'lb', 1, NULL, NULL, 1),
+                                                     (2, 2, 'Potatoes', 0.5, 'lb', 2, NULL, NULL, 1),
+                                                     (3, 3, 'Pickles', 2, 'oz', 3, NULL, NULL, 1);
+        INSERT INTO menu_items_actual VALUES (1, 'Hot Chicken Sandwich', 1, 8.0), (2, 'Fries', 2, 4.0),
+                                             (3, 'Pickle Plate', 3, 3.0), (4, 'Ghost Item', 99, 5.0);
+    ''')
+    conn.commit()
+    conn.close()
+    return path
+
+def component_results(results):
+    names = ['vendor_validation', 'uom_validation', 'calculation_validation', 'margin_validation', 'pdf_validation']
+    return {name: results[name] for name in names}
+
+class TestFullValidation:
+    """Test full-system validation"""
+
+    def test_costs_each_recipe_once(self, db_path, monkeypatch):
+        calls = []
+        original = CalculationRebuilder.calculate_recipe_cost_from_scratch
+
+        def counting(self, recipe_id, include_nested=True):
+            calls.append(recipe_id)
+            return original(self, recipe_id, include_nested)
+
+        monkeypatch.setattr(CalculationRebuilder, 'calculate_recipe_cost_from_scratch', counting)
+        validator = CalculationValidator(db_path, workers=1)
+        results = validator.run_full_system_validation()
+
+        assert sorted(calls) == [1, 2, 3]
+        assert results['calculation_validation']['recipes_tested'] == 3
+        assert results['pdf_validation']['recipes_with_pdf_values'] == 3
+        assert results['margin_validation']['items_validated'] == 3
+
+    def test_parallel_matches_sequential(self, db_path):
+        sequential = CalculationValidator(db_path, workers=1).run_full_system_validation()
+        parallel = CalculationValidator(db_path, workers=3).run_full_system_validation()
+        assert component_results(parallel) == component_results(sequential)
+        assert parallel['accuracy_metrics'] == sequential['accuracy_metrics']
+
+    def test_accuracy_metrics_use_component_results(self, db_path):
+        results = CalculationValidator(db_path, workers=1).run_full_system_validation()
+        assert results['pdf_validation']['exact_matches'] == 2
+        assert results['accuracy_metrics']['overall_accuracy'] == pytest.approx(200 / 3)
+        assert results['margin_validation']['margin_distribution']['no_cost'] == 1
+
+    def test_never_writes_to_database(self, db_path):
+        with open(db_path, 'rb') as f:
+            before = f.read()
+
+        # A writer holding the reserved lock does not block read-only validation
+        writer = sqlite3.connect(db_path)
+        writer.execute('BEGIN IMMEDIATE')
+        writer.execute("UPDATE inventory SET current_price = 45.0 WHERE id = 1")
+        results = CalculationValidator(db_path, workers=2).run_full_system_validation()
+        writer.rollback()
+        writer.close()
+
+        assert results['vendor_validation']['total_inventory_items'] == 3
+        with open(db_path, 'rb') as f:
+            assert f.read() == before
+
+class TestQuickValidation:
+    """Test on-demand costing outside full validation"""
+
+    def test_margin_matches_rebuilder(self, db_path):
+        validator = CalculationValidator(db_path, workers=1)
+        rebuilder = CalculationRebuilder(db_path, read_only=True)
+        assert validator._gross_margin(1, Decimal('8.0')) == rebuilder.calculate_gross_margin(1, Decimal('8.0'))
+
+        quick = validator.run_quick_validation([1, 2])
+        assert [result['status'] for result in quick['results']] == ['passed', 'warning']
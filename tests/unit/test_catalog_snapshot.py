@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - Catalog Snapshot
+Tests the shared reference-data snapshot and its data-version reloads
+"""
+
+import pytest
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from catalog_snapshot import Catalog, get_catalog, install_catalog_triggers
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'catalog.db')
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE inventory (id INTEGER PRIMARY KEY, item_description TEXT, current_price REAL,
+                                last_purchased_date TEXT);
+        CREATE TABLE vendors (id INTEGER PRIMARY KEY, vendor_name TEXT UNIQUE);
+        CREATE TABLE vendor_products (id INTEGER PRIMARY KEY, inventory_id INTEGER, vendor_id INTEGER,
+                                      vendor_price REAL, last_purchased_price REAL, pack_size TEXT,
+                                      unit_measure TEXT, is_primary BOOLEAN, is_active BOOLEAN);
+        CREATE TABLE units (unit_id INTEGER PRIMARY KEY, symbol TEXT, dimension TEXT, to_canonical_factor REAL);
+        CREATE TABLE menus_actual (id INTEGER PRIMARY KEY, menu_name TEXT, sort_order INTEGER);
+        CREATE VIEW menus AS SELECT * FROM menus_actual;
+
+        INSERT INTO inventory VALUES (1, 'Flour', 20.0, '2026-01-05'), (2, 'Flour', 22.0, '2026-02-01'),
+                                     (3, 'Salt', 5.0, NULL);
+        INSERT INTO vendors VALUES (1, 'US Foods'), (2, 'Sysco');
+        INSERT INTO vendor_products VALUES (1, 1, 1, 19.0, NULL, '50 lb', 'bag', 1, 1),
+                                           (2, 1, 2, 18.0, NULL, '50 lb', 'bag', 0, 0);
+        INSERT INTO units VALUES (1, 'LB', 'WEIGHT', 453.592);
+        INSERT INTO menus_actual VALUES (1, 'Late Night', 2), (2, 'Master Menu', 1);
+    ''')
+    conn.commit()
+    conn.close()
+    return path
+
+class TestSnapshot:
+    """Test what a snapshot holds"""
+
+    def test_reference_data(self, db_path):
+        snapshot = Catalog(db_path).current()
+        # One dropdown entry per name, the most recently purchased
+        assert [(item['id'], item['item_description']) for item in snapshot.ingredient_choices] == \
+            [(2, 'Flour'), (3, 'Salt')]
+        assert [vendor['name'] for vendor in snapshot.vendors] == ['Sysco', 'US Foods']
+        assert [offer['vendor_name'] for offer in snapshot.offers[1]] == ['US Foods']
+        assert snapshot.units == {'lb': ('WEIGHT', 453.592)}
+        assert [menu['menu_name'] for menu in snapshot.menus] == ['Master Menu', 'Late Night']
+        # Tables this database does not have load empty
+        assert snapshot.recipes == {} and snapshot.menu_items == []
+
+    def test_one_catalog_per_database(self, db_path):
+        assert get_catalog(db_path) is get_catalog(db_path)
+
+class TestReload:
+    """Test version-checked reloads"""
+
+    def test_reloads_only_after_a_write(self, db_path):
+        conn = sqlite3.connect(db_path)
+        install_catalog_triggers(conn)
+        catalog = Catalog(db_path)
+        first = catalog.current()
+        assert catalog.current() is first
+
+        # A view's base table is versioned too
+        conn.execute("UPDATE menus_actual SET menu_name = 'Current Menu' WHERE id = 2")
+        conn.commit()
+        conn.close()
+        second = catalog.current()
+        assert second is not first
+        assert second.menus[0]['menu_name'] == 'Current Menu'
+        assert catalog.loads == 2
+
+    def test_without_versions_only_refresh_reloads(self, db_path):
+        catalog = Catalog(db_path)
+        first = catalog.current()
+        conn = sqlite3.connect(db_path)
+        conn.execute('UPDATE inventory SET current_price = 30 WHERE id = 3')
+        conn.commit()
+        conn.close()
+        assert catalog.current() is first
+        assert catalog.refresh().items[3]['current_price'] == 30
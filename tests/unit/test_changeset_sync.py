@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - Changeset Sync
+Tests row-level change logging, changeset export and transactional apply
+"""
+
+import pytest
+import shutil
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import changeset_sync
+from changeset_sync import (install_change_log, export_changeset, apply_changeset, apply_pending,
+                            mark_synced, sync_point, prune_change_log, changeset_filename, ChangesetError)
+
+@pytest.fixture
+def databases(tmp_path):
+    """A source with the change log installed and a target copied from it"""
+    source_path = str(tmp_path / 'source.db')
+    conn = sqlite3.connect(source_path)
+    conn.executescript('''
+        CREATE TABLE inventory (id INTEGER PRIMARY KEY AUTOINCREMENT, item_code TEXT UNIQUE,
+                                item_description TEXT, current_price REAL);
+        CREATE TABLE notes (body TEXT);
+        CREATE TABLE sales_mix (menu_item_id INTEGER, sale_date TEXT, quantity REAL,
+                                PRIMARY KEY (menu_item_id, sale_date)) WITHOUT ROWID;
+        CREATE TABLE data_versions (table_name TEXT PRIMARY KEY, version INTEGER);
+        INSERT INTO inventory (item_code, item_description, current_price)
+            VALUES ('A1', 'Chicken', 50.0), ('B2', 'Flour', 20.0), ('C3', 'Salt', 5.0);
+        INSERT INTO notes VALUES ('first');
+    ''')
+    install_change_log(conn)
+    conn.close()
+    target_path = str(tmp_path / 'target.db')
+    shutil.copy(source_path, target_path)
+    source, target = sqlite3.connect(source_path), sqlite3.connect(target_path)
+    yield source, target, tmp_path
+    source.close()
+    target.close()
+
+def edit(conn):
+    conn.execute("UPDATE inventory SET current_price = 55.0 WHERE item_code = 'A1'")
+    conn.execute("UPDATE inventory SET current_price = 56.0 WHERE item_code = 'A1'")
+    conn.execute("DELETE FROM inventory WHERE item_code = 'C3'")
+    conn.execute("INSERT INTO inventory (item_code, item_description, current_price) VALUES ('D4', 'Oil', 30.0)")
+    conn.execute("INSERT INTO notes VALUES ('second')")
+    conn.execute("INSERT INTO sales_mix VALUES (1, '2026-03-01', 4), (2, '2026-03-01', 2)")
+    conn.execute("UPDATE sales_mix SET quantity = 5 WHERE menu_item_id = 1")
+    conn.execute("INSERT INTO data_versions VALUES ('inventory', 7)")
+    conn.commit()
+
+def rows(conn, query):
+    return sorted(conn.execute(query).fetchall())
+
+class TestExport:
+    """Test the change log and changeset contents"""
+
+    def test_changeset_holds_final_row_states(self, databases):
+        source, target, tmp_path = databases
+        edit(source)
+        result = export_changeset(source, str(tmp_path / 'changes.jsonl.gz'))
+        # Two updates to A1 collapse to one upsert; data_versions is not synced
+        assert (result['tables'], result['upserts'], result['deletes']) == (3, 5, 1)
+        assert result['to_seq'] == source.execute('SELECT MAX(seq) FROM sync_changes').fetchone()[0]
+
+    def test_sync_points_and_prune(self, databases):
+        source, target, tmp_path = databases
+        edit(source)
+        assert sync_point(source, 'production') == 0
+        mark_synced(source, 'production', 5)
+        assert prune_change_log(source) == 5
+        assert source.execute('SELECT MIN(seq) FROM sync_changes').fetchone()[0] == 6
+
+    def test_data_quality_tables_are_not_synced(self, databases, monkeypatch):
+        source, target, tmp_path = databases
+        source.execute('CREATE TABLE data_quality_findings (rule_name TEXT, row_id INTEGER)')
+        # An install from before the data_quality_ tables were excluded
+        monkeypatch.setattr(changeset_sync, 'EXCLUDED_PREFIXES', ('sqlite_', 'mv_'))
+        install_change_log(source)
+        source.execute("INSERT INTO data_quality_findings VALUES ('inventory.invalid_price', 2)")
+        source.commit()
+        monkeypatch.undo()
+
+        install_change_log(source)
+        source.execute("INSERT INTO data_quality_findings VALUES ('inventory.invalid_price', 3)")
+        edit(source)
+        result = export_changeset(source, str(tmp_path / 'changes.jsonl.gz'))
+        assert (result['tables'], result['upserts'], result['deletes']) == (3, 5, 1)
+        assert source.execute(
+            "SELECT COUNT(*) FROM sync_changes WHERE table_name LIKE 'data_quality_%'"
+        ).fetchone()[0] == 0
+
+class TestApply:
+    """Test applying changesets on the target"""
+
+    def test_apply_matches_source_and_is_idempotent(self, databases):
+        source, target, tmp_path = databases
+        edit(source)
+        path = str(tmp_path / 'changes.jsonl.gz')
+        export_changeset(source, path)
+        assert apply_changeset(target, path)['skipped'] is False
+        for query in ('SELECT rowid, * FROM inventory', 'SELECT rowid, * FROM notes', 'SELECT * FROM sales_mix'):
+            assert rows(target, query) == rows(source, query)
+        assert rows(target, 'SELECT * FROM data_versions') == []
+        # Applied rows are not logged again as local changes
+        assert target.execute('SELECT COUNT(*) FROM sync_changes').fetchone()[0] == 0
+        assert apply_changeset(target, path)['skipped'] is True
+
+    def test_gaps_are_refused_and_pending_apply_in_order(self, databases):
+        source, target, tmp_path = databases
+        directory = tmp_path / 'changesets'
+        directory.mkdir()
+        source.execute("UPDATE inventory SET current_price = 60 WHERE item_code = 'B2'")
+        source.commit()
+        first = export_changeset(source, str(directory / changeset_filename(0, 1)))
+        source.execute("UPDATE inventory SET current_price = 61 WHERE item_code = 'B2'")
+        source.commit()
+        second = export_changeset(source, str(directory / changeset_filename(1, 2)), since=first['to_seq'])
+
+        apply_changeset(target, first['path'])
+        source.execute("UPDATE inventory SET current_price = 62 WHERE item_code = 'B2'")
+        source.commit()
+        skipping = export_changeset(source, str(tmp_path / 'skip.jsonl.gz'), since=second['to_seq'])
+        with pytest.raises(ChangesetError):
+            apply_changeset(target, skipping['path'])
+
+        assert [result['skipped'] for result in apply_pending(target, str(directory))] == [True, False]
+        assert target.execute("SELECT current_price FROM inventory WHERE item_code = 'B2'").fetchone()[0] == 61
+
+    def test_failed_apply_rolls_back(self, databases):
+        source, target, tmp_path = databases
+        edit(source)
+        path = str(tmp_path / 'changes.jsonl.gz')
+        export_changeset(source, path)
+        # The target holds an unsynced row that collides with D4's item code
+        target.execute("INSERT INTO inventory (id, item_code) VALUES (99, 'D4')")
+        target.commit()
+        with pytest.raises(sqlite3.IntegrityError):
+            apply_changeset(target, path)
+        assert target.execute("SELECT current_price FROM inventory WHERE item_code = 'A1'").fetchone()[0] == 50.0
+        assert target.execute('SELECT COUNT(*) FROM sync_applied').fetchone()[0] == 0
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - Worker Cold Start
+Guards how much a gunicorn worker imports and how long it takes before serving
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from import_profile import profile_import, best_of
+
+# Generous enough for a slow CI box; a regression such as numpy or pandas
+# coming back onto the import path shows up in the loaded-modules test first
+COLD_START_BUDGET_MS = 1000
+
+DEFERRED_MODULES = ('numpy', 'pandas', 'calculation_rebuilder', 'scenario_engine', 'vendor_optimizer',
+                    'menu_price_optimizer', 'menu_engineering', 'etl')
+
+@pytest.fixture(scope='module')
+def profile():
+    return profile_import('app')
+
+class TestColdStart:
+    """Test importing app the way a worker boots"""
+
+    def test_heavy_modules_are_deferred(self, profile):
+        assert [name for name in DEFERRED_MODULES if name in profile['loaded']] == []
+
+    def test_admin_blueprints_register_without_admin_objects(self):
+        import inventory_staging_admin
+        assert inventory_staging_admin._admin is None
+        admin = inventory_staging_admin.get_admin()
+        assert inventory_staging_admin.get_admin() is admin
+
+    def test_cold_start_within_budget(self):
+        assert best_of(2)['total_ms'] < COLD_START_BUDGET_MS
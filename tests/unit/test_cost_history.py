@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - Cost History
+Tests change-only snapshots of ingredient prices and recipe costs and as-of queries
+"""
+
+import pytest
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from cost_history import (record_snapshot, value_as_of, values_as_of, history, trend, drift,
+                          to_timestamp, INGREDIENT, RECIPE)
+
+JAN_1 = to_timestamp('2026-01-01')
+DAY = 86400
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'history.db'))
+    conn.executescript('''
+        CREATE TABLE inventory (id INTEGER PRIMARY KEY, item_description TEXT, current_price REAL);
+        CREATE TABLE recipes_actual (recipe_id INTEGER PRIMARY KEY, recipe_name TEXT, food_cost REAL);
+        INSERT INTO inventory VALUES (1, 'Chicken Thigh', 50.0), (2, 'Flour', 20.0), (3, 'Salt', NULL);
+        INSERT INTO recipes_actual VALUES (1, 'Hot Chicken', 3.25), (2, 'Biscuit', 0.5);
+    ''')
+    yield conn
+    conn.close()
+
+def reprice(conn, recorded_at, chicken=None, flour=None, hot_chicken=None):
+    if chicken is not None:
+        conn.execute('UPDATE inventory SET current_price = ? WHERE id = 1', (chicken,))
+    if flour is not None:
+        conn.execute('UPDATE inventory SET current_price = ? WHERE id = 2', (flour,))
+    if hot_chicken is not None:
+        conn.execute('UPDATE recipes_actual SET food_cost = ? WHERE recipe_id = 1', (hot_chicken,))
+    return record_snapshot(conn, 'test', recorded_at)
+
+class TestSnapshots:
+    """Test change-only bulk recording"""
+
+    def test_only_changed_values_are_appended(self, conn):
+        first = reprice(conn, JAN_1)
+        assert (first['ingredients_changed'], first['recipes_changed']) == (2, 2)
+        assert reprice(conn, JAN_1 + DAY)['ingredients_changed'] == 0
+
+        changed = reprice(conn, JAN_1 + 2 * DAY, chicken=55.0, hot_chicken=3.5)
+        assert (changed['ingredients_changed'], changed['recipes_changed']) == (1, 1)
+        assert conn.execute('SELECT COUNT(*) FROM cost_history').fetchone()[0] == 6
+        # Stored as integer micro-units
+        assert conn.execute('''SELECT value_micros FROM cost_history
+                               WHERE kind = ? AND item_id = 1 ORDER BY recorded_at''',
+                            (RECIPE,)).fetchall() == [(3250000,), (3500000,)]
+        assert conn.execute('SELECT COUNT(*) FROM cost_history_snapshots').fetchone()[0] == 3
+
+    def test_recipes_only_snapshot(self, conn):
+        reprice(conn, JAN_1)
+        conn.execute('UPDATE inventory SET current_price = 60 WHERE id = 1')
+        conn.execute('UPDATE recipes_actual SET food_cost = 4 WHERE recipe_id = 1')
+        result = record_snapshot(conn, 'recalculation', JAN_1 + DAY, kinds=(RECIPE,))
+        assert (result['ingredients_changed'], result['recipes_changed']) == (0, 1)
+
+class TestQueries:
+    """Test as-of, history, trend and drift queries"""
+
+    @pytest.fixture
+    def loaded(self, conn):
+        reprice(conn, JAN_1)
+        reprice(conn, to_timestamp('2026-02-15T12:00:00'), chicken=55.0, hot_chicken=3.5)
+        reprice(conn, to_timestamp('2026-03-01T18:00:00'), chicken=44.0, flour=22.0, hot_chicken=3.0)
+        return conn
+
+    def test_as_of(self, loaded):
+        # A bare date includes changes made during that day
+        assert value_as_of(loaded, 'recipe', 1, '2026-03-01') == 3.0
+        assert value_as_of(loaded, 'recipe', 1, '2026-03-01T12:00:00') == 3.5
+        assert value_as_of(loaded, 'recipe', 1, '2025-12-31') is None
+        assert values_as_of(loaded, 'ingredient', '2026-02-20') == {1: 55.0, 2: 20.0}
+        with pytest.raises(ValueError):
+            values_as_of(loaded, 'vendor', '2026-02-20')
+
+    def test_history_opens_with_value_at_start(self, loaded):
+        series = history(loaded, INGREDIENT, '2026-02-01', '2026-12-31')
+        assert series[1] == [('2026-02-01T00:00:00Z', 50.0), ('2026-02-15T12:00:00Z', 55.0),
+                             ('2026-03-01T18:00:00Z', 44.0)]
+        assert series[2] == [('2026-02-01T00:00:00Z', 20.0), ('2026-03-01T18:00:00Z', 22.0)]
+
+    def test_trend_and_drift(self, loaded):
+        rows = trend(loaded, 'recipe', '2026-01-01', '2026-03-31')
+        assert [(row['period'], row['changes'], row['average_value']) for row in rows] == \
+            [('2026-01', 2, 1.875), ('2026-02', 1, 2.0), ('2026-03', 1, 1.75)]
+
+        moves = drift(loaded, 'ingredient', '2026-01-01', '2026-03-31')
+        assert [(row['name'], row['change'], row['change_percent']) for row in moves] == \
+            [('Chicken Thigh', -6.0, -12.0), ('Flour', 2.0, 10.0)]
+
+class TestRecalculation:
+    """Test that batch recalculations record one snapshot"""
+
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        path = str(tmp_path / 'restaurant_calculator.db')
+        conn = sqlite3.connect(path)
+        conn.executescript('''
+            CREATE TABLE inventory (id INTEGER PRIMARY KEY, item_description TEXT, current_price REAL,
+                                    pack_size TEXT, purchase_unit TEXT, recipe_cost_unit TEXT,
+                                    yield_percent REAL);
+            CREATE TABLE recipes (id INTEGER PRIMARY KEY, recipe_name TEXT, portions REAL,
+                                  portions_uom TEXT, food_cost REAL);
+            CREATE TABLE recipe_ingredients (id INTEGER PRIMARY KEY, recipe_id INTEGER, ingredient_id INTEGER,
+                                             ingredient_name TEXT, quantity REAL, unit_of_measure TEXT,
+                                             unit_measure TEXT, cost REAL);
+            CREATE TABLE menu_items (id INTEGER PRIMARY KEY, recipe_id INTEGER, menu_price REAL, food_cost REAL);
+            CREATE TABLE units (unit_name TEXT, unit_type TEXT, to_base_factor REAL);
+            INSERT INTO inventory VALUES (1, 'Chicken Thigh', 40.0, '10 lb', 'case', 'lb', 100);
+            INSERT INTO recipes VALUES (1, 'Hot Chicken', 1, 'each', 0), (2, 'Wings', 1, 'each', 0),
+                                       (3, 'Tenders', 1, 'each', 0);
+            INSERT INTO recipe_ingredients VALUES (1, 1, 1, 'Chicken Thigh', 1, 'lb', 'lb', 0),
+                                                  (2, 2, 1, 'Chicken Thigh', 2, 'lb', 'lb', 0),
+                                                  (3, 3, 1, 'Chicken Thigh', 3, 'lb', 'lb', 0);
+            INSERT INTO menu_items VALUES (1, 1, 12.0, 0);
+        ''')
+        conn.commit()
+        conn.close()
+        return path
+
+    def snapshots(self, db_path):
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute('SELECT source, recipes_changed FROM cost_history_snapshots').fetchall()
+        conn.close()
+        return rows
+
+    def test_cost_calculator_batch(self, db_path):
+        from cost_utils import CostCalculator
+
+        calculator = CostCalculator(db_path)
+        results = calculator.recalculate_recipes()
+        calculator.close()
+        assert sorted(results) == [1, 2, 3]
+        assert self.snapshots(db_path) == [('recalculation', 3)]
+
+    def test_recalculate_all_costs_script(self, db_path, tmp_path, monkeypatch):
+        sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__)))), 'scripts', 'utilities'))
+        from recalculate_all_costs import recalculate_all_costs
+
+        monkeypatch.chdir(tmp_path)
+        recalculate_all_costs()
+        assert self.snapshots(db_path) == [('recalculation', 3)]
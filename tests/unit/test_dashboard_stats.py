@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - Dashboard Statistics
+Tests the trigger-maintained dashboard counters over tables and views
+"""
+
+import pytest
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from dashboard_stats import install_dashboard_stats, get_dashboard_stats, count_source_table
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.executescript('''
+        CREATE TABLE inventory (id INTEGER PRIMARY KEY, item_description TEXT,
+                                created_date TIMESTAMP, updated_date TIMESTAMP);
+        CREATE TABLE recipes_actual (recipe_id INTEGER PRIMARY KEY, recipe_name TEXT,
+                                     created_at TIMESTAMP, updated_at TIMESTAMP);
+        CREATE VIEW recipes AS SELECT recipe_id as id, recipe_name, created_at, updated_at FROM recipes_actual;
+        CREATE TABLE menu_items_actual (menu_item_id INTEGER PRIMARY KEY, recipe_id INTEGER);
+        CREATE VIEW menu_items AS
+            SELECT mi.menu_item_id as id, r.recipe_name
+            FROM menu_items_actual mi LEFT JOIN recipes_actual r ON mi.recipe_id = r.recipe_id;
+        CREATE TABLE vendors (id INTEGER PRIMARY KEY, vendor_name TEXT);
+        INSERT INTO inventory (item_description) VALUES ('Flour'), ('Salt');
+        INSERT INTO recipes_actual (recipe_name) VALUES ('Hot Chicken');
+    ''')
+    yield conn
+    conn.close()
+
+class TestDashboardStats:
+    """Test dashboard counters"""
+
+    def test_views_resolve_to_driving_table(self, conn):
+        assert count_source_table(conn, 'recipes') == 'recipes_actual'
+        assert count_source_table(conn, 'menu_items') == 'menu_items_actual'
+        assert count_source_table(conn, 'vendors') == 'vendors'
+        assert count_source_table(conn, 'missing') is None
+
+    def test_install_counts_existing_rows(self, conn):
+        install_dashboard_stats(conn)
+        assert get_dashboard_stats(conn) == {
+            'inventory_count': 2, 'recipe_count': 1, 'menu_count': 0, 'vendor_count': 0
+        }
+
+    def test_triggers_keep_counts_in_step(self, conn):
+        install_dashboard_stats(conn)
+        conn.execute("INSERT INTO menu_items_actual (recipe_id) VALUES (1)")
+        conn.execute("INSERT INTO vendors (vendor_name) VALUES ('Sysco')")
+        conn.execute("DELETE FROM inventory WHERE item_description = 'Salt'")
+        conn.execute("UPDATE recipes_actual SET recipe_name = 'Nashville Hot'")
+        assert get_dashboard_stats(conn) == {
+            'inventory_count': 1, 'recipe_count': 1, 'menu_count': 1, 'vendor_count': 1
+        }
+
+    def test_recent_change_feed_is_indexed(self, conn):
+        install_dashboard_stats(conn)
+        plan = ' '.join(row[3] for row in conn.execute('''
+            EXPLAIN QUERY PLAN
+            SELECT recipe_name FROM recipes
+            ORDER BY COALESCE(updated_at, created_at) DESC LIMIT 3
+        '''))
+        assert 'idx_recipes_actual_recent_change' in plan
+
+    def test_missing_table_returns_none(self):
+        conn = sqlite3.connect(':memory:')
+        assert get_dashboard_stats(conn) is None
+        conn.close()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - Data Quality Rules
+Tests the set-based rule engine, incremental reruns and parity with DataAuditor
+"""
+
+import pytest
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+pd = pytest.importorskip('pandas')
+
+from audit import DataAuditor
+from data_quality_rules import DataQualityEngine, check_pack_sizes
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'quality.db')
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE inventory (id INTEGER PRIMARY KEY, item_code TEXT, item_description TEXT,
+                                current_price REAL, pack_size TEXT, purchase_unit TEXT,
+                                recipe_cost_unit TEXT, yield_percent REAL);
+        CREATE TABLE recipes_actual (recipe_id INTEGER PRIMARY KEY, recipe_name TEXT);
+        CREATE VIEW recipes AS SELECT recipe_id as id, recipe_name FROM recipes_actual;
+        CREATE TABLE recipe_ingredients_actual (ingredient_id INTEGER PRIMARY KEY, recipe_id INTEGER,
+                                                inventory_id INTEGER, ingredient_name TEXT,
+                                                quantity REAL, unit TEXT, total_cost REAL);
+        CREATE VIEW recipe_ingredients AS
+            SELECT ingredient_id as id, recipe_id, inventory_id as ingredient_id, ingredient_name,
+                   quantity, unit as unit_of_measure, total_cost as cost
+            FROM recipe_ingredients_actual;
+
+        INSERT INTO inventory VALUES (1, 'A100', 'Chicken Thighs', 2.5, '4 x 10 lb', 'case', 'lb', 80),
+                                     (2, NULL, 'Flour', -1, '50 lb', 'bag', 'cups', 100),
+                                     (3, 'A300', 'Kosher Salt', 1.0, 'big bag', 'bag', 'oz', 150);
+        INSERT INTO recipes_actual VALUES (1, 'Hot Chicken');
+        INSERT INTO recipe_ingredients_actual VALUES (1, 1, 1, 'Chicken Thighs', 0.5, 'lb', 1.25),
+                                                     (2, 9, 2, 'Flour', NULL, 'cup', 0.1);
+    ''')
+    conn.commit()
+    conn.close()
+    return path
+
+def rule_rows(engine):
+    return {(finding['rule_name'], finding['row_id']) for finding in engine.findings()}
+
+class TestRules:
+    """Test rule compilation and findings"""
+
+    def test_full_run_finds_violations(self, db_path):
+        engine = DataQualityEngine(db_path)
+        result = engine.run()
+        assert result['mode'] == 'incremental'
+        assert rule_rows(engine) == {
+            ('inventory.missing_item_code', 2),
+            ('inventory.invalid_price', 2),
+            ('inventory.invalid_recipe_cost_unit', 2),
+            ('inventory.invalid_pack_size', 3),
+            ('inventory.invalid_yield_percent', 3),
+            ('recipe_ingredients.invalid_recipe', 2),
+            ('recipe_ingredients.missing_quantity', 2),
+        }
+
+    def test_rerun_only_rechecks_changed_rows(self, db_path):
+        engine = DataQualityEngine(db_path)
+        engine.run()
+        assert engine.run()['rules_run'] == 0
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE inventory SET current_price = 3.0 WHERE id = 2")
+        conn.execute("INSERT INTO inventory VALUES (4, 'A400', 'Pepper', -5, NULL, NULL, NULL, NULL)")
+        conn.commit()
+        conn.close()
+
+        result = engine.run()
+        assert 0 < result['rules_run'] < len(engine.rules)
+        findings = rule_rows(engine)
+        assert ('inventory.invalid_price', 2) not in findings
+        assert ('inventory.invalid_price', 4) in findings
+        assert ('inventory.missing_item_code', 2) in findings
+
+    def test_dependency_change_reruns_rule_in_full(self, db_path):
+        engine = DataQualityEngine(db_path)
+        engine.run()
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("INSERT INTO recipes_actual VALUES (9, 'Fried Chicken')")
+        conn.commit()
+        conn.close()
+
+        engine.run()
+        assert ('recipe_ingredients.invalid_recipe', 2) not in rule_rows(engine)
+
+    def test_plain_tables_are_tracked(self, tmp_path):
+        # The schema app.py's init_database creates: recipes and recipe_ingredients as tables
+        path = str(tmp_path / 'plain.db')
+        conn = sqlite3.connect(path)
+        conn.executescript('''
+            CREATE TABLE inventory (id INTEGER PRIMARY KEY, item_code TEXT, item_description TEXT,
+                                    current_price REAL, pack_size TEXT, purchase_unit TEXT,
+                                    recipe_cost_unit TEXT, yield_percent REAL);
+            CREATE TABLE recipes (id INTEGER PRIMARY KEY, recipe_name TEXT);
+            CREATE TABLE recipe_ingredients (id INTEGER PRIMARY KEY, recipe_id INTEGER, ingredient_id INTEGER,
+                                             ingredient_name TEXT, quantity REAL, unit_of_measure TEXT,
+                                             cost REAL);
+            INSERT INTO recipes VALUES (1, 'Hot Chicken');
+            INSERT INTO recipe_ingredients VALUES (1, 1, 0, 'Water', 1.0, 'cup', 0);
+        ''')
+        conn.commit()
+        engine = DataQualityEngine(path)
+        engine.run()
+        assert rule_rows(engine) == set()
+
+        conn.execute("UPDATE recipe_ingredients SET quantity = -2 WHERE id = 1")
+        conn.commit()
+        conn.close()
+        result = engine.run()
+        assert result['rules_run'] > 0
+        assert ('recipe_ingredients.invalid_quantity', 1) in rule_rows(engine)
+
+    def test_menu_item_rules(self, tmp_path):
+        # Rules whose columns the tables lack (recipe_type, vendor_name) are skipped
+        path = str(tmp_path / 'menu.db')
+        conn = sqlite3.connect(path)
+        conn.executescript('''
+            CREATE TABLE recipes (id INTEGER PRIMARY KEY, recipe_name TEXT, status TEXT, food_cost REAL);
+            CREATE TABLE menu_items (id INTEGER PRIMARY KEY, item_name TEXT, recipe_id INTEGER,
+                                     menu_price REAL, food_cost REAL, food_cost_percent REAL);
+            INSERT INTO recipes VALUES (1, 'Hot  Chicken', 'Complete', 3.0), (2, 'Fries', NULL, 1.0);
+            INSERT INTO menu_items VALUES (1, 'Hot Chicken', 1, 12.0, 3.0, 25.0),
+                                          (2, 'Fries', 2, 4.0, 1.5, 10.0),
+                                          (3, 'Large Fries', 2, 0, 1.0, 0),
+                                          (4, 'Special', 7, 9.0, 0, 0);
+        ''')
+        conn.commit()
+        conn.close()
+        engine = DataQualityEngine(path)
+        engine.run()
+        assert rule_rows(engine) == {
+            ('recipes.extra_spaces', 1),
+            ('recipes.missing_status', 2),
+            ('menu_items.shared_recipe', 2),
+            ('menu_items.shared_recipe', 3),
+            ('menu_items.no_price', 3),
+            ('menu_items.invalid_recipe', 4),
+            ('menu_items.cost_mismatch', 2),
+            ('menu_items.incorrect_food_cost_percent', 2),
+        }
+
+    def test_subset_run_keeps_dirty_rows(self, db_path):
+        engine = DataQualityEngine(db_path)
+        engine.run()
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE inventory SET yield_percent = 90 WHERE id = 3")
+        conn.commit()
+        conn.close()
+
+        engine.run(rule_names=['inventory.invalid_price'])
+        assert ('inventory.invalid_yield_percent', 3) in rule_rows(engine)
+        engine.run()
+        assert ('inventory.invalid_yield_percent', 3) not in rule_rows(engine)
+
+    def test_pack_size_check_matches_auditor(self, db_path):
+        values = ['4 x 10 lb', '2 x 5 zz', '1 x 10', '12oz', '10', 'big bag', '1.5 gal', '3 X 4 OZ', '']
+        messages = check_pack_sizes(pd.Series(values))
+        auditor = DataAuditor(db_path)
+        for value, message in zip(values, messages):
+            valid, error = auditor.parse_pack_size(value) if value else (True, '')
+            assert (error or None) == (message if isinstance(message, str) else None), value
+        auditor.conn.close()
+
+    def test_auditor_reports_rule_findings(self, db_path):
+        auditor = DataAuditor(db_path)
+        auditor.audit_inventory()
+        auditor.conn.close()
+        assert {(failure['pk'], failure['error_message']) for failure in auditor.failures} >= {
+            ('2', 'Invalid price: -1.0'), ('3', 'Invalid pack size format: big bag')
+        }
+
+    def test_auditor_skips_carried_over_rules(self, db_path):
+        conn = sqlite3.connect(db_path)
+        conn.execute("INSERT INTO inventory VALUES (4, 'A400', 'BLACK PEPPER', 4.0, '1 lb', 'lb', 'oz', 100)")
+        conn.commit()
+        conn.close()
+        auditor = DataAuditor(db_path)
+        auditor.audit_inventory()
+        auditor.conn.close()
+        assert ('inventory.uppercase_description', 4) in rule_rows(auditor.engine)
+        assert '4' not in {failure['pk'] for failure in auditor.failures}
+
+    def test_numeric_text_is_numeric(self, tmp_path):
+        # Untyped columns keep text as text; float() accepted these in DataAuditor.validate_numeric
+        path = str(tmp_path / 'text.db')
+        conn = sqlite3.connect(path)
+        conn.executescript('''
+            CREATE TABLE inventory (id INTEGER PRIMARY KEY, item_code, item_description, current_price,
+                                    yield_percent);
+            INSERT INTO inventory VALUES (1, 'A1', 'Flour', '12.5', ' 80 '), (2, 'A2', 'Sugar', '1e1', '100'),
+                                         (3, 'A3', 'Kosher Salt', '12abc', '150'), (4, 'A4', 'Jasmine Rice', '-3', 'n/a');
+        ''')
+        conn.commit()
+        conn.close()
+        engine = DataQualityEngine(path)
+        engine.run()
+        assert rule_rows(engine) == {
+            ('inventory.invalid_price', 3), ('inventory.invalid_yield_percent', 3),
+            ('inventory.invalid_price', 4), ('inventory.invalid_yield_percent', 4),
+        }
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - Database Backups
+Tests online backups, verification, restore, rotation and the scheduler
+"""
+
+import pytest
+import fcntl
+import gzip
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from db_backup import (backup_database, verify_backup, restore_backup, list_backups, rotate_backups,
+                       select_retained, BackupScheduler)
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'live.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE inventory (id INTEGER PRIMARY KEY, item_description TEXT, current_price REAL)')
+    conn.executemany('INSERT INTO inventory (item_description, current_price) VALUES (?, ?)',
+                     [(f'Item {n}', n * 1.5) for n in range(2000)])
+    conn.commit()
+    conn.close()
+    return path
+
+def touch_backup(directory, taken_at):
+    path = directory / f"live_{taken_at:%Y%m%d_%H%M%S}.db.gz"
+    path.write_bytes(b'')
+    return path
+
+class TestBackup:
+    """Test taking, verifying and restoring backups"""
+
+    def test_backup_in_steps(self, db_path, tmp_path):
+        result = backup_database(db_path, str(tmp_path / 'backups'), pages=4, sleep=0)
+        assert result['steps'] > 1
+        assert result['compressed_bytes'] < result['database_bytes']
+        assert list_backups(str(tmp_path / 'backups'))[0]['path'] == result['path']
+        assert verify_backup(result['path']) == []
+        # Only the finished backup is left in the directory
+        assert os.listdir(tmp_path / 'backups') == [os.path.basename(result['path'])]
+
+    def test_restore_replaces_live_database(self, db_path, tmp_path):
+        result = backup_database(db_path, str(tmp_path / 'backups'), sleep=0)
+        live = sqlite3.connect(db_path)
+        live.execute('DELETE FROM inventory')
+        live.commit()
+        restore_backup(result['path'], db_path)
+        assert live.execute('SELECT COUNT(*) FROM inventory').fetchone()[0] == 2000
+        live.close()
+
+    def test_verify_reports_corruption(self, tmp_path):
+        path = tmp_path / 'live_20260101_000000.db.gz'
+        with gzip.open(path, 'wb') as f:
+            f.write(b'SQLite format 3\x00' + b'\xff' * 4080)
+        assert verify_backup(str(path)) != []
+        assert os.listdir(tmp_path) == [path.name]
+
+class TestRotation:
+    """Test the retention schedule and the scheduler guard"""
+
+    def test_keeps_last_and_newest_per_bucket(self):
+        now = datetime(2026, 3, 31, 12, 0)
+        # Hourly for two days, then daily for three months
+        taken = [now - timedelta(hours=hours) for hours in range(48)]
+        taken += [now - timedelta(days=days) for days in range(2, 90)]
+        keep = select_retained(taken, keep_last=3, daily=7, weekly=4, monthly=3)
+        kept = sorted((taken[index] for index in keep), reverse=True)
+        assert kept[:3] == taken[:3]
+        # One per day back to March 25, one per week, and one each for February and January
+        assert len({at.date() for at in kept}) == len(kept) - 2
+        assert min(kept) == datetime(2026, 1, 31, 12, 0)
+
+    def test_rotate_deletes_files(self, tmp_path):
+        now = datetime(2026, 3, 31, 12, 0)
+        for hours in range(10):
+            touch_backup(tmp_path, now - timedelta(hours=hours))
+        removed = rotate_backups(str(tmp_path), keep_last=2, daily=1, weekly=0, monthly=0)
+        assert len(removed) == 8
+        assert [backup['taken_at'] for backup in list_backups(str(tmp_path))] == [now, now - timedelta(hours=1)]
+
+    def test_scheduler_runs_once_per_interval_and_process(self, db_path, tmp_path):
+        scheduler = BackupScheduler(db_path, str(tmp_path / 'backups'), interval_hours=1)
+        assert scheduler.run_once() is not None
+        assert scheduler.run_once() is None  # newest backup is younger than the interval
+
+        scheduler.interval = 0
+        with open(tmp_path / 'backups' / '.backup.lock', 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)  # another worker holds the lock
+            assert scheduler.run_once() is None
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - Fixed-Point Cost Arithmetic
+Tests the integer micro-unit helpers and proves the fixed-point costing paths
+match the Decimal arithmetic they replaced across the whole catalog
+"""
+
+import logging
+import pytest
+import random
+import sqlite3
+import sys
+import os
+from decimal import Decimal, InvalidOperation
+
+# Add parent directory to path for imports
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(REPO_ROOT)
+
+from fixed_point import InexactError, round_ratio, to_decimal, to_micros
+from calculation_rebuilder import CalculationRebuilder, format_step, logger
+from cost_utils import CostCalculator
+from etl import ETLPipeline
+
+CENT = Decimal('0.01')
+MICRO = Decimal('0.000001')
+HALF_MICRO = MICRO / 2
+
+@pytest.fixture(autouse=True)
+def quiet_rebuilder():
+    level = logger.level
+    logger.setLevel(logging.WARNING)
+    yield
+    logger.setLevel(level)
+
+@pytest.fixture(scope='module')
+def catalog_db(tmp_path_factory):
+    """The committed production catalog dump"""
+    path = str(tmp_path_factory.mktemp('catalog') / 'catalog.db')
+    conn = sqlite3.connect(path)
+    with open(os.path.join(REPO_ROOT, 'data', 'production_data.sql')) as f:
+        conn.executescript(f.read())
+    conn.close()
+    return path
+
+@pytest.fixture(scope='module')
+def synthetic_db(tmp_path_factory):
+    """
+    Seeded catalog covering what production data does not: yields, densities,
+    float-noise quantities and zero packs. Nested yields divide evenly, so the
+    Decimal path carries no division residue to compare against.
+    """
+    rng = random.Random(7)
+    path = str(tmp_path_factory.mktemp('synthetic') / 'synthetic.db')
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE inventory (id INTEGER PRIMARY KEY, item_description TEXT, current_price REAL,
+                                pack_size TEXT, purchase_unit TEXT, recipe_cost_unit TEXT,
+                                yield_percent REAL, density_g_per_ml REAL, count_to_weight_g REAL);
+        CREATE TABLE recipes_actual (recipe_id INTEGER PRIMARY KEY, recipe_name TEXT, recipe_type TEXT,
+                                     batch_yield REAL, batch_yield_unit TEXT, serving_size REAL,
+                                     serving_unit TEXT, menu_price REAL, food_cost REAL,
+                                     portions_per_batch REAL);
+        CREATE TABLE recipe_ingredients_actual (ingredient_id INTEGER PRIMARY KEY, recipe_id INTEGER,
+                                                ingredient_name TEXT, quantity REAL, unit TEXT,
+                                                inventory_id INTEGER, unit_cost REAL, total_cost REAL,
+                                                ingredient_order INTEGER);
+    ''')
+    packs = ['10 lb', '4 x 5 lb', '1 gal', '500 g', '12', '6 x 32 oz', '1 l', '2.5 kg', '1 each', '0']
+    units = ['oz', 'lb', 'g', 'kg', 'cup', 'tbsp', 'tsp', 'fl oz', 'l', 'ml', 'each', 'gal', 'qt']
+    for item_id in range(1, 81):
+        conn.execute("INSERT INTO inventory VALUES (?, ?, ?, ?, ?, NULL, ?, ?, ?)", (
+            item_id, f'Item {item_id}', round(rng.uniform(0.5, 120), 2), rng.choice(packs),
+            rng.choice(['case', 'lb', 'each', 'bag', 'gal']), rng.choice([100, 85, 92.5, 70, None]),
+            rng.choice([None, 1.0, 0.92, 1.03, 0]), rng.choice([None, 50, 113.4])
+        ))
+    line_id = 0
+    for recipe_id in range(1, 201):
+        conn.execute("INSERT INTO recipes_actual VALUES (?, ?, 'Mains', ?, 'qt', ?, 'each', NULL, ?, ?)", (
+            recipe_id, f'Recipe {recipe_id}', rng.choice([None, 1, 2, 2.5, 4]), rng.choice([None, 1, 3, 0.75]),
+            rng.choice([None, round(rng.uniform(0.1, 30), 2)]), rng.choice([None, 1, 5])
+        ))
+        for order in range(rng.randint(1, 6)):
+            line_id += 1
+            if recipe_id > 20 and rng.random() < 0.1:
+                name, item_id = f'Recipe {rng.randint(1, recipe_id - 1)}', None
+            else:
+                item_id = rng.randint(1, 80)
+                name = f'Item {item_id}'
+            quantity = rng.choice([round(rng.uniform(0.01, 40), rng.randint(0, 4))] * 4 + [0.1 + 0.2, 0])
+            conn.execute("INSERT INTO recipe_ingredients_actual VALUES (?, ?, ?, ?, ?, ?, NULL, NULL, ?)",
+                         (line_id, recipe_id, name, quantity, rng.choice(units), item_id, order))
+    conn.commit()
+    conn.close()
+    return path
+
+def cost_both_ways(db_path):
+    """Yield (recipe_id, Decimal result, fixed-point result); results may be exceptions"""
+    reference = CalculationRebuilder(db_path, read_only=True, fixed_point=False)
+    fixed = CalculationRebuilder(db_path, read_only=True)
+    conn = sqlite3.connect(db_path)
+    recipe_ids = [row[0] for row in conn.execute("SELECT recipe_id FROM recipes_actual ORDER BY recipe_id")]
+    conn.close()
+    for recipe_id in recipe_ids:
+        results = []
+        for rebuilder in (reference, fixed):
+            try:
+                results.append(rebuilder.calculate_recipe_cost_from_scratch(recipe_id))
+            except Exception as e:
+                results.append(e)
+        yield recipe_id, results[0], results[1]
+
+def assert_same_costs(db_path):
+    compared = 0
+    for recipe_id, expected, actual in cost_both_ways(db_path):
+        if isinstance(expected, Exception):
+            assert isinstance(actual, (InvalidOperation, ZeroDivisionError)), recipe_id
+            continue
+        assert not isinstance(actual, Exception), (recipe_id, actual)
+        assert actual['total_cost'].quantize(CENT) == expected['total_cost'].quantize(CENT), recipe_id
+        assert actual['errors'] == expected['errors'], recipe_id
+        assert actual['warnings'] == expected['warnings'], recipe_id
+        for want, got in zip(expected['ingredients'], actual['ingredients']):
+            if want['ingredient_type'] == 'Prep Recipe':
+                # The Decimal path leaves nested lines unrounded; fixed point holds micro-units
+                want = {key: want[key].quantize(MICRO) for key in ('total_cost', 'unit_cost')}
+            assert (got['total_cost'], got['unit_cost']) == (want['total_cost'], want['unit_cost']), \
+                (recipe_id, got['ingredient_name'])
+        compared += 1
+    return compared
+
+class TestMicroUnits:
+    """Test the integer helpers"""
+
+    def test_round_ratio_is_half_even(self):
+        assert [round_ratio(n, 2) for n in (1, 3, 5, -1, -3)] == [0, 2, 2, 0, -2]
+        assert round_ratio(7, -2) == -4
+
+    def test_to_micros_is_exact_or_raises(self):
+        assert to_micros('2.5') == to_micros(2.5) == to_micros(Decimal('2.50')) == 2_500_000
+        assert to_micros('1E+3') == 1_000_000_000
+        assert to_micros('1.2500000') == 1_250_000
+        with pytest.raises(InexactError):
+            to_micros(0.1 + 0.2)
+        assert to_micros(0.1 + 0.2, exact=False) == 300_000
+        with pytest.raises(InvalidOperation):
+            to_micros(None)
+
+    def test_to_decimal_output_boundaries(self):
+        assert str(to_decimal(2_500_000)) == '2.50'
+        assert str(to_decimal(1_234_500)) == '1.2345'
+        assert str(to_decimal(22_965_000, 2)) == '22.96'
+        assert str(to_decimal(40_000_000, 4)) == '40.0000'
+
+class TestDifferential:
+    """Test fixed-point costing against the Decimal path"""
+
+    def test_whole_catalog_matches_decimal(self, catalog_db):
+        assert assert_same_costs(catalog_db) > 0
+
+    def test_synthetic_catalog_matches_decimal(self, synthetic_db):
+        steps = set()
+        for _, _, actual in cost_both_ways(synthetic_db):
+            if not isinstance(actual, Exception):
+                steps.update(step['step'] for step in actual['calculation_steps'])
+        assert steps >= {'unit_conversion', 'direct_calculation', 'yield_adjustment', 'nested_recipe_cost'}
+        assert assert_same_costs(synthetic_db) > 50
+
+    def test_fixed_steps_format_like_decimal_steps(self):
+        step = {'step': 'direct_calculation', 'micros': True, 'quantity': 500_000, 'unit': 'lb',
+                'unit_cost': 4_000_000, 'result': 2_000_000}
+        assert format_step(step) == {'step': 'direct_calculation', 'formula': '0.50 lb × $4.00/lb',
+                                     'result': '$2.00'}
+
+def decimal_line_cost(quantity, price, pack_qty):
+    """cost_utils' line cost before micro-units: unrounded Decimal"""
+    cost_per_unit = Decimal(str(price)) / Decimal(str(pack_qty)) if pack_qty > 0 else Decimal(str(price))
+    return cost_per_unit * Decimal(str(quantity))
+
+class TestCostUtilsDifferential:
+    """
+    Test CostCalculator line costs against the Decimal arithmetic they replaced
+
+    Lines are now rounded half-even to a micro-unit ($0.000001) where the old
+    result was left unrounded, so each line may differ by up to half a
+    micro-unit and a recipe total by half a micro-unit per line.
+    """
+
+    def setup_method(self):
+        self.calculator = CostCalculator(':memory:')
+        self.parser = ETLPipeline(':memory:')
+
+    def teardown_method(self):
+        self.calculator.close()
+        self.parser.close()
+
+    def assert_within_half_micro(self, lines):
+        total_old, total_new = Decimal('0'), Decimal('0')
+        for quantity, price, pack_size in lines:
+            new = self.calculator._calculate_ingredient_cost(quantity, 'lb', price, pack_size, 'lb', 'lb')
+            old = decimal_line_cost(quantity, price, self.parser.parse_pack_size(pack_size)[0])
+            assert abs(new - old) <= HALF_MICRO, (quantity, price, pack_size, old, new)
+            total_old += old
+            total_new += new
+        assert abs(total_new - total_old) <= HALF_MICRO * len(lines)
+
+    def test_catalog_lines(self, catalog_db):
+        conn = sqlite3.connect(catalog_db)
+        lines = conn.execute('''
+            SELECT ri.quantity, i.current_price, i.pack_size
+            FROM recipe_ingredients_actual ri JOIN inventory i ON i.id = ri.inventory_id
+            WHERE i.current_price AND i.pack_size IS NOT NULL AND ri.quantity IS NOT NULL
+        ''').fetchall()
+        conn.close()
+        assert len(lines) > 100
+        self.assert_within_half_micro(lines)
+
+    def test_synthetic_lines(self):
+        rng = random.Random(34)
+        packs = ['10 lb', '4 x 5 lb', '6 x 32 oz', '27.4 oz', '3 lb', '7', '0', '2.5 kg']
+        lines = [(rng.choice([round(rng.uniform(0.01, 40), rng.randint(0, 4)), 1 / 3, 0.1 + 0.2]),
+                  rng.choice([round(rng.uniform(0.5, 120), 2), 10 / 3]), rng.choice(packs))
+                 for _ in range(2000)]
+        self.assert_within_half_micro(lines)
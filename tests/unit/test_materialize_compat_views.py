@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - Materialized Compatibility Views
+Tests shadow-table materialization, trigger maintenance, write-through and rollback
+"""
+
+import pytest
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from materialize_compat_views import materialize, rollback, get_materialized_views
+from query_plan_report import explain
+
+SCHEMA = '''
+    CREATE TABLE recipes_actual (recipe_id INTEGER PRIMARY KEY, recipe_name TEXT, food_cost REAL);
+    CREATE VIEW recipes AS SELECT recipe_id as id, recipe_name, food_cost FROM recipes_actual;
+    CREATE TABLE menus_actual (menu_id INTEGER PRIMARY KEY AUTOINCREMENT, menu_name TEXT NOT NULL UNIQUE,
+                               menu_version TEXT NOT NULL, status TEXT DEFAULT 'Draft',
+                               effective_date DATE, end_date DATE, description TEXT,
+                               target_food_cost REAL DEFAULT 30.0,
+                               created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                               updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+    CREATE VIEW menus AS
+        SELECT menu_id as id, menu_name, menu_version, status, effective_date, end_date, description,
+               target_food_cost, created_at, updated_at,
+               CASE WHEN status = 'Active' THEN 1 ELSE 0 END as is_active, menu_id as sort_order
+        FROM menus_actual;
+    CREATE TABLE menu_items_actual (menu_item_id INTEGER PRIMARY KEY, item_name TEXT, recipe_id INTEGER,
+                                    menu_category TEXT, current_price REAL, version_id INTEGER DEFAULT 1);
+    CREATE TABLE menu_assignments (assignment_id INTEGER PRIMARY KEY AUTOINCREMENT, menu_id INTEGER NOT NULL,
+                                   menu_item_id INTEGER NOT NULL, category_section TEXT,
+                                   sort_order INTEGER DEFAULT 0, price_override REAL,
+                                   is_active BOOLEAN DEFAULT TRUE,
+                                   added_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                                   UNIQUE(menu_id, menu_item_id));
+    CREATE VIEW menu_menu_items AS
+        SELECT ma.assignment_id as id, ma.menu_id, ma.menu_item_id, ma.sort_order, ma.price_override,
+               ma.is_active as is_available, ma.added_date as created_at, ma.category_section as category,
+               ma.price_override as override_price
+        FROM menu_assignments ma;
+    CREATE VIEW menu_items AS
+        SELECT mi.menu_item_id as id, mi.item_name, mi.menu_category as menu_group, mi.recipe_id,
+               COALESCE((SELECT ma.price_override FROM menu_assignments ma
+                         WHERE ma.menu_item_id = mi.menu_item_id
+                         AND ma.menu_id = (SELECT menu_id FROM menus WHERE status = 'Active' LIMIT 1)
+                         LIMIT 1), mi.current_price) as menu_price,
+               r.food_cost,
+               COALESCE((SELECT ma.menu_id FROM menu_assignments ma
+                         WHERE ma.menu_item_id = mi.menu_item_id LIMIT 1), mi.version_id) as version_id
+        FROM menu_items_actual mi
+        LEFT JOIN recipes_actual r ON mi.recipe_id = r.recipe_id;
+
+    INSERT INTO recipes_actual VALUES (1, 'Hot Chicken', 3.25), (2, 'Fries', 0.5);
+    INSERT INTO menus_actual (menu_name, menu_version, status) VALUES ('Current', 'Current', 'Active');
+    INSERT INTO menu_items_actual VALUES (1, 'Hot Chicken Sandwich', 1, 'Sandwiches', 12.0, 1),
+                                         (2, 'Fries', 2, 'Sides', 4.0, 1);
+    INSERT INTO menu_assignments (menu_id, menu_item_id, price_override) VALUES (1, 1, 11.5);
+'''
+
+VIEWS = ['recipes', 'menus', 'menu_menu_items', 'menu_items']
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.executescript(SCHEMA)
+    yield conn
+    conn.close()
+
+def snapshot(conn, view):
+    return sorted(conn.execute(f'SELECT * FROM {view}').fetchall(), key=repr)
+
+def assert_in_sync(conn):
+    for view in VIEWS:
+        assert snapshot(conn, view) == snapshot(conn, f'{view}_source'), view
+
+class TestMaterialize:
+    """Test materialization and trigger maintenance"""
+
+    def test_views_return_same_rows(self, conn):
+        before = {view: snapshot(conn, view) for view in VIEWS}
+        materialize(conn)
+        assert set(get_materialized_views(conn)) == set(VIEWS)
+        for view in VIEWS:
+            assert snapshot(conn, view) == before[view]
+
+    def test_base_table_writes_resync_shadow_rows(self, conn):
+        materialize(conn)
+        conn.execute("UPDATE recipes_actual SET food_cost = 4.0 WHERE recipe_id = 1")
+        conn.execute("UPDATE menu_assignments SET price_override = 10.0 WHERE assignment_id = 1")
+        conn.execute("INSERT INTO menu_items_actual VALUES (3, 'Slaw', 2, 'Sides', 3.0, 1)")
+        conn.execute("DELETE FROM menu_items_actual WHERE menu_item_id = 2")
+        conn.execute("UPDATE menus_actual SET status = 'Archived'")
+        assert_in_sync(conn)
+        assert conn.execute("SELECT food_cost FROM menu_items WHERE id = 1").fetchone()[0] == 4.0
+
+    def test_writes_through_menu_views(self, conn):
+        materialize(conn)
+        conn.execute("INSERT INTO menus (menu_name, menu_version, is_active) VALUES ('Summer', 'V2', 0)")
+        menu_id = conn.execute("SELECT id FROM menus WHERE menu_name = 'Summer'").fetchone()[0]
+        conn.execute("INSERT INTO menu_menu_items (menu_id, menu_item_id, sort_order) VALUES (?, 2, 1)", (menu_id,))
+        conn.execute("UPDATE menu_menu_items SET is_available = 0 WHERE menu_id = ?", (menu_id,))
+        conn.execute("UPDATE menus SET description = 'Patio menu' WHERE id = ?", (menu_id,))
+
+        assert conn.execute("SELECT description FROM menus_actual WHERE menu_id = ?",
+                            (menu_id,)).fetchone()[0] == 'Patio menu'
+        assert conn.execute("SELECT is_active FROM menu_assignments WHERE menu_id = ?",
+                            (menu_id,)).fetchone()[0] == 0
+        assert_in_sync(conn)
+
+        conn.execute("DELETE FROM menu_menu_items WHERE menu_id = ?", (menu_id,))
+        conn.execute("DELETE FROM menus WHERE id = ?", (menu_id,))
+        assert conn.execute("SELECT COUNT(*) FROM menus_actual").fetchone()[0] == 1
+        assert_in_sync(conn)
+
+    def test_menu_items_reads_are_indexed(self, conn):
+        # Enough rows that ANALYZE does not make a scan the cheaper plan
+        conn.executemany(
+            "INSERT INTO menu_items_actual (item_name, recipe_id, menu_category) VALUES (?, ?, 'Sides')",
+            [(f'Item {n}', n) for n in range(3, 500)]
+        )
+        sql = 'SELECT * FROM menu_items WHERE recipe_id = ?'
+        assert explain(conn, sql)['full_scans']
+        materialize(conn)
+        result = explain(conn, sql)
+        assert result['error'] is None
+        assert result['full_scans'] == []
+        assert any('idx_mv_menu_items_recipe_id' in detail for detail in result['plan'])
+
+    def test_rollback_restores_original_views(self, conn):
+        materialize(conn)
+        conn.execute("UPDATE recipes_actual SET food_cost = 4.0 WHERE recipe_id = 1")
+        expected = {view: snapshot(conn, view) for view in VIEWS}
+        rollback(conn)
+
+        assert get_materialized_views(conn) == []
+        assert conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name LIKE 'mv_%' OR name LIKE 'trg_mv_%'"
+        ).fetchone()[0] == 0
+        for view in VIEWS:
+            assert snapshot(conn, view) == expected[view]
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - Menu Assignments
+Tests the upsert-based bulk edit, toggle and Master Menu writes
+"""
+
+import pytest
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from menu_assignments import (apply_menu_changes, add_to_menu, ensure_assignment_index,
+                              ensure_master_menu_assignment, has_assignment_key, plan_changes,
+                              MenuAssignmentError)
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.executescript('''
+        CREATE TABLE menus_actual (menu_id INTEGER PRIMARY KEY, menu_name TEXT);
+        CREATE VIEW menus AS SELECT menu_id AS id, menu_name FROM menus_actual;
+        CREATE TABLE menu_items_actual (menu_item_id INTEGER PRIMARY KEY, item_name TEXT);
+        CREATE VIEW menu_items AS SELECT menu_item_id AS id, item_name FROM menu_items_actual;
+        CREATE TABLE menu_assignments (
+            assignment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            menu_id INTEGER NOT NULL,
+            menu_item_id INTEGER NOT NULL,
+            category_section TEXT,
+            sort_order INTEGER DEFAULT 0,
+            price_override REAL,
+            UNIQUE(menu_id, menu_item_id)
+        );
+        INSERT INTO menus_actual VALUES (1, 'Master Menu'), (2, 'Current Menu');
+        INSERT INTO menu_items_actual VALUES (10, 'Burger'), (11, 'Fries'), (12, 'Shake');
+        INSERT INTO menu_assignments (menu_id, menu_item_id, category_section, price_override)
+        VALUES (2, 10, 'Mains', 12.0), (1, 10, NULL, NULL);
+    ''')
+    yield conn
+    conn.close()
+
+def assignments(conn, menu_id):
+    return conn.execute('''
+        SELECT menu_item_id, category_section, price_override FROM menu_assignments
+        WHERE menu_id = ? ORDER BY menu_item_id
+    ''', (menu_id,)).fetchall()
+
+class TestBulkEdit:
+    """Test applying a bulk edit as one upsert batch and one delete"""
+
+    def test_upserts_and_removes(self, conn):
+        changes = apply_menu_changes(conn, 2, [
+            {'item_id': 10, 'action': 'add', 'category': 'Burgers', 'override_price': ''},
+            {'item_id': '11', 'action': 'add', 'category': 'Sides', 'override_price': 4.5},
+            {'item_id': 12, 'action': 'add'},
+            {'item_id': 12, 'action': 'remove'},
+        ])
+        assert changes == {'upserted': 2, 'removed': 0}
+        # The existing assignment is updated in place rather than duplicated
+        assert assignments(conn, 2) == [(10, 'Burgers', None), (11, 'Sides', 4.5)]
+
+        assert apply_menu_changes(conn, 2, [{'item_id': 10, 'action': 'remove'},
+                                            {'item_id': 11, 'action': 'remove'}]) == {'upserted': 0, 'removed': 2}
+        assert assignments(conn, 2) == []
+        assert assignments(conn, 1) == [(10, None, None)]
+
+    def test_invalid_item_ids_are_rejected(self):
+        with pytest.raises(MenuAssignmentError):
+            plan_changes([{'item_id': None, 'action': 'add'}])
+        with pytest.raises(MenuAssignmentError):
+            plan_changes(['not an entry'])
+
+    def test_toggle_add_keeps_existing_assignment(self, conn):
+        assert add_to_menu(conn, 2, [10, 11], 'Sides') == 1
+        assert assignments(conn, 2) == [(10, 'Mains', 12.0), (11, 'Sides', None)]
+
+class TestMasterMenu:
+    """Test the set-based Master Menu rule"""
+
+    def test_enforce_for_all_or_some_items(self, conn):
+        assert ensure_master_menu_assignment(conn, [11]) == 1
+        assert ensure_master_menu_assignment(conn) == 1
+        assert ensure_master_menu_assignment(conn) == 0
+        assert [row[0] for row in assignments(conn, 1)] == [10, 11, 12]
+
+class TestIndex:
+    """Test creating the unique index on older databases"""
+
+    def test_duplicates_are_dropped_before_indexing(self):
+        conn = sqlite3.connect(':memory:')
+        conn.executescript('''
+            CREATE TABLE menu_assignments (assignment_id INTEGER PRIMARY KEY, menu_id INTEGER,
+                                           menu_item_id INTEGER, category_section TEXT);
+            INSERT INTO menu_assignments VALUES (1, 2, 10, 'first'), (2, 2, 10, 'second'), (3, 2, 11, NULL);
+        ''')
+        assert not has_assignment_key(conn)
+        assert ensure_assignment_index(conn)
+        assert has_assignment_key(conn)
+        assert conn.execute('SELECT assignment_id FROM menu_assignments ORDER BY 1').fetchall() == [(1,), (3,)]
+        conn.close()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - Menu Engineering
+Tests the Stars/Plowhorses/Puzzles/Dogs matrix and its per-period cache
+"""
+
+import pytest
+import sqlite3
+import sys
+import os
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from menu_engineering import MenuEngineering, classify, ENGINEERING_TABLES
+from response_cache import install_data_version_triggers, resolve_base_tables
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'engineering.db')
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE menus (id INTEGER PRIMARY KEY, menu_name TEXT, status TEXT);
+        CREATE TABLE recipes (id INTEGER PRIMARY KEY, food_cost REAL);
+        CREATE TABLE menu_items (id INTEGER PRIMARY KEY, item_name TEXT, menu_group TEXT,
+                                 menu_price REAL, food_cost REAL, recipe_id INTEGER);
+        CREATE TABLE menu_assignments (assignment_id INTEGER PRIMARY KEY, menu_id INTEGER, menu_item_id INTEGER,
+                                       category_section TEXT, sort_order INTEGER, price_override REAL,
+                                       is_active BOOLEAN);
+        CREATE TABLE sales_mix (menu_item_id INTEGER, sale_date TEXT, quantity REAL, net_sales REAL,
+                                unit_food_cost REAL, PRIMARY KEY (menu_item_id, sale_date));
+        CREATE TABLE sales_mix_daily (sale_date TEXT PRIMARY KEY);
+
+        INSERT INTO menus VALUES (1, 'Current Menu', 'Active');
+        INSERT INTO recipes VALUES (1, 4.0), (2, 3.0), (3, 2.0), (4, 6.0);
+        INSERT INTO menu_items VALUES (1, 'Hot Chicken', 'Mains', 16.0, NULL, 1),
+                                      (2, 'Fries', 'Sides', 5.0, NULL, 2),
+                                      (3, 'Pie', 'Desserts', 12.0, NULL, 3),
+                                      (4, 'Salad', 'Mains', 8.0, NULL, 4);
+        INSERT INTO menu_assignments VALUES (1, 1, 1, NULL, 1, NULL, 1), (2, 1, 2, NULL, 2, NULL, 1),
+                                            (3, 1, 3, NULL, 3, NULL, 1), (4, 1, 4, NULL, 4, NULL, 1);
+        INSERT INTO sales_mix VALUES (1, '2026-03-01', 40, 640, 4), (2, '2026-03-01', 50, 250, 3),
+                                     (3, '2026-03-01', 5, 60, 2), (4, '2026-03-01', 5, 40, 6),
+                                     (3, '2026-03-02', 100, 1200, 2);
+        INSERT INTO sales_mix_daily VALUES ('2026-03-01'), ('2026-03-02');
+    ''')
+    conn.commit()
+    conn.close()
+    return path
+
+def install_versions(db_path):
+    conn = sqlite3.connect(db_path)
+    install_data_version_triggers(conn, resolve_base_tables(conn, ENGINEERING_TABLES))
+    conn.close()
+
+def classes(report):
+    return {row['item_name']: row['classification'] for row in report['items']}
+
+class TestClassify:
+    """Test the vectorized matrix"""
+
+    def test_four_quadrants(self):
+        result = classify(np.array([40.0, 50.0, 5.0, 5.0]), np.array([16.0, 5.0, 12.0, 8.0]),
+                          np.array([4.0, 3.0, 2.0, 6.0]))
+        # (40*12 + 50*2 + 5*10 + 5*2) / 100 = 6.40; popular at 0.7 * 25% = 17.5% of mix
+        assert result['average_margin'] == 6.4
+        assert result['popularity_threshold'] == pytest.approx(0.175)
+        assert list(result['classification']) == ['Star', 'Plowhorse', 'Puzzle', 'Dog']
+        assert list(result['popularity_index']) == [1.6, 2.0, 0.2, 0.2]
+
+    def test_no_sales_ranks_by_margin_alone(self):
+        result = classify(np.zeros(2), np.array([10.0, 10.0]), np.array([2.0, 6.0]))
+        assert list(result['classification']) == ['Puzzle', 'Dog']
+
+class TestReport:
+    """Test the menu and period report and its cache"""
+
+    def test_period_and_default_end(self, db_path):
+        engine = MenuEngineering(db_path)
+        report = engine.report(start='2026-03-01', end='2026-03-01')
+        assert classes(report) == {'Hot Chicken': 'Star', 'Fries': 'Plowhorse', 'Pie': 'Puzzle', 'Salad': 'Dog'}
+        assert (report['menu_name'], report['summary']['total_contribution']) == ('Current Menu', 640.0)
+
+        # The default period ends on the last day with sales and takes in the pie sold there
+        report = engine.report()
+        assert (report['start'], report['end']) == ('2026-02-01', '2026-03-02')
+        assert classes(report)['Pie'] == 'Star'
+
+    def test_cached_until_sales_or_prices_change(self, db_path):
+        install_versions(db_path)
+        engine = MenuEngineering(db_path)
+        first = engine.report(1, '2026-03-01', '2026-03-01')
+        assert engine.report(1, '2026-03-01', '2026-03-01') is first
+        assert engine.stats() == {'entries': 1, 'hits': 1, 'misses': 1}
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE sales_mix SET quantity = 60 WHERE menu_item_id = 3")
+        conn.commit()
+        assert classes(engine.report(1, '2026-03-01', '2026-03-01'))['Pie'] == 'Star'
+
+        conn.execute("UPDATE menu_assignments SET price_override = 30 WHERE menu_item_id = 4")
+        conn.commit()
+        conn.close()
+        assert classes(engine.report(1, '2026-03-01', '2026-03-01'))['Salad'] == 'Puzzle'
+        assert engine.stats()['misses'] == 3
+
+    def test_without_version_triggers_always_recomputes(self, db_path):
+        engine = MenuEngineering(db_path)
+        engine.report(1, '2026-03-01', '2026-03-01')
+        engine.report(1, '2026-03-01', '2026-03-01')
+        assert engine.stats() == {'entries': 0, 'hits': 0, 'misses': 2}
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - Menu Price Optimizer
+Tests whole-menu repricing to blended food-cost targets under constraints
+"""
+
+import pytest
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from menu_price_optimizer import MenuPriceOptimizer, PricingError, normalize_endings
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'pricing.db')
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE menus (id INTEGER PRIMARY KEY, menu_name TEXT, status TEXT);
+        CREATE TABLE recipes (id INTEGER PRIMARY KEY, food_cost REAL);
+        CREATE TABLE menu_items (id INTEGER PRIMARY KEY, item_name TEXT, menu_group TEXT,
+                                 menu_price REAL, food_cost REAL, recipe_id INTEGER);
+        CREATE TABLE menu_assignments (assignment_id INTEGER PRIMARY KEY, menu_id INTEGER, menu_item_id INTEGER,
+                                       category_section TEXT, sort_order INTEGER, price_override REAL,
+                                       is_active BOOLEAN);
+
+        INSERT INTO menus VALUES (1, 'Master Menu', 'Active'), (2, 'Current Menu', 'Active');
+        INSERT INTO recipes VALUES (1, 4.0), (2, 4.0), (3, 3.0);
+        INSERT INTO menu_items VALUES (1, 'Wings', 'Mains', 10.0, NULL, 1),
+                                      (2, 'Sandwich', 'Mains', 20.0, NULL, 2),
+                                      (3, 'Special', 'Mains', 9.0, NULL, 3),
+                                      (4, 'Water', 'Drinks', 0.0, NULL, NULL);
+        INSERT INTO menu_assignments VALUES (1, 2, 1, NULL, 1, NULL, 1),
+                                            (2, 2, 2, NULL, 2, NULL, 1),
+                                            (3, 2, 4, NULL, 3, NULL, 1),
+                                            (4, 1, 1, NULL, 1, NULL, 1),
+                                            (5, 1, 3, 'Specials', 2, 12.0, 1);
+    ''')
+    conn.commit()
+    conn.close()
+    return path
+
+def prices(scenario):
+    return {row['item_name']: row['new_price'] for row in scenario['items']}
+
+class TestOptimize:
+    """Test the blended solve and its constraints"""
+
+    def test_hits_blended_target(self, db_path):
+        # 8 of food cost on 30 of prices is 26.67%; 20% needs 40, split by food cost
+        result = MenuPriceOptimizer(db_path).optimize([20])
+        scenario = result['scenarios'][0]
+        assert (result['menu_id'], result['current_food_cost_percent']) == (2, 26.67)
+        assert prices(scenario) == {'Wings': 15.0, 'Sandwich': 25.0}
+        assert (scenario['feasible'], scenario['achieved_food_cost_percent']) == (True, 20.0)
+        assert (scenario['summary']['revenue_impact'], scenario['summary']['margin_impact']) == (10.0, 10.0)
+
+    def test_many_targets_with_max_change(self, db_path):
+        result = MenuPriceOptimizer(db_path).optimize([20, 25, 40], max_change_percent=20)
+        low, mid, high = result['scenarios']
+        assert prices(low) == {'Wings': 12.0, 'Sandwich': 24.0}
+        assert (low['feasible'], low['achieved_food_cost_percent']) == (False, 22.22)
+        assert mid['achieved_food_cost_percent'] == 25.0
+        # Prices come down to the band for a target above the current blend
+        assert prices(high) == {'Wings': 8.0, 'Sandwich': 16.0}
+        assert prices(MenuPriceOptimizer(db_path).optimize([40], raise_only=True)['scenarios'][0]) == \
+            {'Wings': 10.0, 'Sandwich': 20.0}
+
+    def test_endings_and_ladders(self, db_path):
+        optimizer = MenuPriceOptimizer(db_path)
+        assert prices(optimizer.optimize([20], endings=[99])['scenarios'][0]) == \
+            {'Wings': 14.99, 'Sandwich': 24.99}
+
+        scenario = optimizer.optimize([20], ladders={'mains': [13, 27]}, max_change_percent=30)['scenarios'][0]
+        assert prices(scenario) == {'Wings': 13.0, 'Sandwich': 26.0}
+        # Sandwich has no ladder point inside +/-30%, so keeps the solved price and is flagged
+        assert [row['off_grid'] for row in scenario['items']] == [False, True]
+
+    def test_price_override_is_fixed_and_mix_weights(self, db_path):
+        scenario = MenuPriceOptimizer(db_path).optimize([25], menu_id=1, mix={1: 3})['scenarios'][0]
+        rows = {row['item_name']: row for row in scenario['items']}
+        assert (rows['Special']['fixed'], rows['Special']['new_price']) == (True, 12.0)
+        # Only wings sell: 3 x 4.00 / 3 x 16.00
+        assert rows['Wings']['new_price'] == 16.0
+        assert scenario['summary']['new_revenue'] == 48.0
+
+    def test_invalid_input(self, db_path):
+        optimizer = MenuPriceOptimizer(db_path)
+        for kwargs in ({'targets': []}, {'targets': [0]}, {'targets': ['x']},
+                       {'targets': [30], 'max_change_percent': -5}, {'targets': [30], 'endings': [1.5, 'x']},
+                       {'targets': [30], 'mix': {99: 1}}):
+            with pytest.raises(PricingError):
+                optimizer.optimize(**kwargs)
+        assert list(normalize_endings(['.99', 49, 0.95])) == [0.49, 0.95, 0.99]
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - Metrics
+Tests the Prometheus registry, request metrics and job timing
+"""
+
+import pytest
+import sys
+import os
+
+from flask import Flask
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from metrics import Registry, RequestMetrics, job_timer, job_duration, job_runs, stats_collector
+from query_instrumentation import QueryInstrumentation, connect, connection_stats
+
+class TestRegistry:
+    """Test the text exposition format"""
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry()
+        histogram = registry.histogram('latency_seconds', 'Latency', ('route',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            histogram.observe(value, route='/a')
+        text = registry.render()
+        assert '# TYPE latency_seconds histogram' in text
+        assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{route="/a",le="1"} 3' in text
+        assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in text
+        assert 'latency_seconds_count{route="/a"} 4' in text
+        assert 'latency_seconds_sum{route="/a"} 4.05' in text
+
+    def test_collectors_read_at_scrape_time(self):
+        registry = Registry()
+        stats = {'hits': 1, 'entries': 2}
+        registry.add_collector(stats_collector('cache', lambda: stats, counters=('hits',), gauges=('entries',)))
+        stats['hits'] = 7
+        text = registry.render()
+        assert 'cache_hits_total 7' in text
+        assert 'cache_entries 2' in text
+
+class TestJobs:
+    """Test background job timing"""
+
+    def test_job_outcomes(self):
+        with job_timer('unit_test_job'):
+            pass
+        with pytest.raises(ValueError):
+            with job_timer('unit_test_job'):
+                raise ValueError('bad row')
+        assert job_runs.value(job='unit_test_job', outcome='success') == 1
+        assert job_runs.value(job='unit_test_job', outcome='error') == 1
+        assert job_duration.snapshot(job='unit_test_job')['count'] == 2
+
+class TestRequestMetrics:
+    """Test per-request metrics through the Flask hooks"""
+
+    def test_routes_statuses_and_queries(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)  # the slow-query log is opened in the working directory
+        db_path = str(tmp_path / 'metrics.db')
+        app = Flask(__name__)
+        QueryInstrumentation(app)
+        request_metrics = RequestMetrics(app, registry=Registry())
+
+        @app.route('/items/<int:item_id>')
+        def item(item_id):
+            conn = connect(db_path)
+            conn.execute('SELECT 1')
+            conn.execute('SELECT 2')
+            conn.close()
+            return 'ok'
+
+        client = app.test_client()
+        client.get('/items/1')
+        client.get('/items/2')
+        client.get('/missing')
+
+        assert request_metrics.requests.value(method='GET', route='/items/<int:item_id>', status=200) == 2
+        assert request_metrics.requests.value(method='GET', route='unmatched', status=404) == 1
+        assert request_metrics.queries.snapshot(route='/items/<int:item_id>') == {'count': 2, 'sum': 4}
+        assert request_metrics.in_progress.value() == 0
+
+        response = client.get('/metrics')
+        assert response.content_type.startswith('text/plain; version=0.0.4')
+        assert b'http_request_duration_seconds_count{method="GET",route="/items/<int:item_id>"} 2' in response.data
+
+    def test_connection_counts(self, tmp_path):
+        before = connection_stats()
+        conn = connect(str(tmp_path / 'metrics.db'))
+        assert connection_stats()['open'] == before['open'] + 1
+        conn.close()
+        conn.close()
+        after = connection_stats()
+        assert after['open'] == before['open']
+        assert after['opened'] == before['opened'] + 1
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - Listing Pagination Helpers
+Tests server-side paging, sorting and lazy streaming of listing queries
+"""
+
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from pagination import parse_listing_args, paginate_query, page_to_json, where_clause, LazyRows
+
+SORT_COLUMNS = {
+    'name': 'item_description',
+    'price': 'current_price'
+}
+
+FILTER_COLUMNS = {'price': 'current_price = ?'}
+
+def make_connection():
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.execute('CREATE TABLE inventory (id INTEGER PRIMARY KEY, item_description TEXT, current_price REAL)')
+    conn.executemany(
+        'INSERT INTO inventory (item_description, current_price) VALUES (?, ?)',
+        [(f'Item {i:03d}', float(i % 7)) for i in range(1, 251)]
+    )
+    return conn
+
+class TestParseListingArgs:
+    """Test query argument parsing"""
+
+    def test_defaults(self):
+        args = parse_listing_args({}, SORT_COLUMNS, 'name')
+        assert args == {'page': 1, 'per_page': 100, 'sort': 'name', 'order': 'asc', 'q': '', 'filters': {}}
+
+    def test_unknown_sort_and_bad_numbers_fall_back(self):
+        args = parse_listing_args(
+            {'sort': 'id; DROP TABLE inventory', 'order': 'sideways', 'page': 'x', 'per_page': '-5'},
+            SORT_COLUMNS, 'name'
+        )
+        assert args == {'page': 1, 'per_page': 100, 'sort': 'name', 'order': 'asc', 'q': '', 'filters': {}}
+
+    def test_search_and_whitelisted_filters(self):
+        args = parse_listing_args({'q': ' item 01 ', 'price': '3', 'vendor': 'x', 'sort': 'price'},
+                                  SORT_COLUMNS, 'name', filter_columns=FILTER_COLUMNS)
+        assert args['q'] == 'item 01'
+        assert args['filters'] == {'price': '3'}
+
+    def test_per_page_is_capped(self):
+        args = parse_listing_args({'per_page': '100000'}, SORT_COLUMNS, 'name')
+        assert args['per_page'] == 500
+
+class TestPaginateQuery:
+    """Test paging a listing query"""
+
+    def setup_method(self):
+        self.conn = make_connection()
+
+    def teardown_method(self):
+        self.conn.close()
+
+    def test_first_page(self):
+        page = paginate_query(self.conn, 'SELECT * FROM inventory', (), SORT_COLUMNS,
+                              sort='name', page=1, per_page=100)
+        assert page['total'] == 250
+        assert page['total_pages'] == 3
+        assert len(page['items']) == 100
+        assert page['items'][0]['item_description'] == 'Item 001'
+
+    def test_page_beyond_end_is_clamped(self):
+        page = paginate_query(self.conn, 'SELECT * FROM inventory', (), SORT_COLUMNS,
+                              sort='name', page=99, per_page=100)
+        assert page['page'] == 3
+        assert len(page['items']) == 50
+
+    def test_sort_descending_with_tiebreaker(self):
+        page = paginate_query(self.conn, 'SELECT * FROM inventory', (), SORT_COLUMNS,
+                              sort='price', order='desc', per_page=5, tiebreaker='id')
+        prices = [row['current_price'] for row in page['items']]
+        ids = [row['id'] for row in page['items']]
+        assert prices == [6.0] * 5
+        assert ids == sorted(ids, reverse=True)
+
+    def test_search_and_filter_span_all_pages(self):
+        query = 'SELECT * FROM inventory {where}'
+        page = paginate_query(self.conn, query, (), SORT_COLUMNS, sort='name', per_page=5,
+                              count_query='SELECT COUNT(*) FROM inventory', q='item 1',
+                              filters={'price': '0'}, search_columns=('item_description',),
+                              filter_columns=FILTER_COLUMNS)
+        # Items 100-199 match "item 1"; 105, 112, ... 196 of those are priced 0
+        assert page['total'] == 14
+        assert page['total_pages'] == 3
+        assert [row['item_description'] for row in page['items']][:2] == ['Item 105', 'Item 112']
+        assert page['q'] == 'item 1'
+
+    def test_like_wildcards_are_literal(self):
+        where, params = where_clause('Item_0', search_columns=('item_description', 'id'))
+        assert params == ('%Item\\_0%',) * 2
+        assert self.conn.execute(f'SELECT COUNT(*) FROM inventory {where}', params).fetchone()[0] == 0
+        where, params = where_clause('Item 0', search_columns=('item_description',))
+        assert self.conn.execute(f'SELECT COUNT(*) FROM inventory {where}', params).fetchone()[0] == 99
+        assert where_clause('', {'vendor': 'x'}, ('a',), FILTER_COLUMNS) == ('', ())
+
+    def test_page_to_json(self):
+        page = paginate_query(self.conn, 'SELECT * FROM inventory', (), SORT_COLUMNS,
+                              sort='name', per_page=2, count_query='SELECT COUNT(*) FROM inventory')
+        data = page_to_json(page)
+        assert data['total'] == 250
+        assert data['items'][0] == {'id': 1, 'item_description': 'Item 001', 'current_price': 1.0}
+
+class TestLazyRows:
+    """Test lazily streamed row sources"""
+
+    def test_len_and_repeated_iteration(self, tmp_path):
+        db_path = str(tmp_path / 'listing.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute('CREATE TABLE inventory (id INTEGER PRIMARY KEY, item_description TEXT)')
+        conn.executemany('INSERT INTO inventory (item_description) VALUES (?)',
+                         [(f'Item {i}',) for i in range(1200)])
+        conn.commit()
+        conn.close()
+
+        rows = LazyRows(lambda: sqlite3.connect(db_path), 'SELECT * FROM inventory ORDER BY id')
+        assert len(rows) == 1200
+        assert bool(rows)
+        assert sum(1 for _ in rows) == 1200
+        assert next(iter(rows))[0] == 1
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - Query Instrumentation
+Tests per-request statement recording, N+1 detection, the slow-query log and Server-Timing
+"""
+
+import logging
+import pytest
+import sqlite3
+import sys
+import os
+from functools import partial
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import query_instrumentation
+from query_instrumentation import (
+    connect, recording, current_recorder, log_slow_statements, normalize_sql, QueryInstrumentation,
+    RunningQueryRecorder
+)
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'queries.db')
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE vendors (id INTEGER PRIMARY KEY, vendor_name TEXT);
+        INSERT INTO vendors (vendor_name) VALUES ('Sysco'), ('US Foods'), ('Restaurant Depot');
+    ''')
+    conn.commit()
+    conn.close()
+    return path
+
+class TestRecording:
+    """Test statement recording on instrumented connections"""
+
+    def test_nothing_recorded_without_recorder(self, db_path):
+        conn = connect(db_path)
+        assert current_recorder() is None
+        assert conn.execute('SELECT COUNT(*) FROM vendors').fetchone()[0] == 3
+        conn.close()
+
+    def test_records_expanded_sql_and_time(self, db_path):
+        conn = connect(db_path)
+        conn.row_factory = sqlite3.Row
+        with recording('test') as recorder:
+            row = conn.execute('SELECT vendor_name FROM vendors WHERE id = ?', (2,)).fetchone()
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM vendors')
+            cursor.fetchall()
+        conn.close()
+
+        assert row['vendor_name'] == 'US Foods'
+        summary = recorder.summary()
+        assert summary['query_count'] == 2
+        assert summary['db_ms'] >= 0
+        assert 'SELECT vendor_name FROM vendors WHERE id = 2' in [s['sql'] for s in summary['slowest']]
+
+    def test_repeated_statements_flagged(self, db_path):
+        conn = connect(db_path)
+        with recording() as recorder:
+            for vendor_id in range(12):
+                conn.execute('SELECT * FROM vendors WHERE id = ?', (vendor_id,)).fetchone()
+            conn.execute('SELECT COUNT(*) FROM vendors').fetchone()
+        conn.close()
+
+        repeated = recorder.repeated()
+        assert [(entry['sql'], entry['count']) for entry in repeated] == [('SELECT * FROM vendors WHERE id = ?', 12)]
+
+    def test_normalize_sql(self):
+        assert normalize_sql("SELECT *\n  FROM t WHERE a = 'x' AND b = 12.5") == 'SELECT * FROM t WHERE a = ? AND b = ?'
+
+    def test_slow_statements_logged_with_plan(self, db_path, caplog):
+        conn = connect(db_path)
+        with recording('slow') as recorder:
+            conn.execute('SELECT * FROM vendors WHERE vendor_name = ?', ('Sysco',)).fetchall()
+        conn.close()
+
+        with caplog.at_level(logging.WARNING, logger='slow_queries'):
+            assert log_slow_statements(recorder, threshold_ms=0) == 1
+        assert 'SCAN vendors' in caplog.text
+
+    def test_running_recorder_keeps_only_totals_and_slowest(self, db_path, caplog, monkeypatch):
+        monkeypatch.setattr(query_instrumentation, 'RunningQueryRecorder',
+                            partial(RunningQueryRecorder, threshold_ms=0, keep=3))
+        conn = connect(db_path)
+        with caplog.at_level(logging.WARNING, logger='slow_queries'):
+            with recording('batch', keep_statements=False) as recorder:
+                for vendor_id in range(20):
+                    conn.execute('SELECT * FROM vendors WHERE id = ?', (vendor_id,)).fetchall()
+                assert recorder.logged == 19  # the last statement is logged once the run ends
+        conn.close()
+
+        assert recorder.statements == []
+        assert recorder.logged == 20
+        assert caplog.text.count('SCAN vendors') + caplog.text.count('SEARCH vendors') == 20
+        summary = recorder.summary()
+        assert summary['query_count'] == 20
+        assert len(summary['slowest']) == 3
+        assert summary['repeated'] == []
+
+class TestFlaskIntegration:
+    """Test the per-request hooks"""
+
+    def test_server_timing_header(self, db_path, tmp_path, monkeypatch):
+        flask = pytest.importorskip('flask')
+        monkeypatch.chdir(tmp_path)
+        app = flask.Flask(__name__)
+        instrumentation = QueryInstrumentation(app)
+
+        @app.route('/vendors')
+        def vendors():
+            conn = connect(db_path)
+            names = [row[0] for row in conn.execute('SELECT vendor_name FROM vendors')]
+            conn.close()
+            return ', '.join(names)
+
+        response = app.test_client().get('/vendors')
+        assert response.headers['Server-Timing'].endswith('desc="1 queries"')
+        assert instrumentation.recent_requests()[0]['label'] == 'GET /vendors'
+        assert current_recorder() is None
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - Railway Volume Config
+Tests the backup-API volume migration, the startup schema marker and warm start
+"""
+
+import pytest
+import sqlite3
+import sys
+import os
+import time
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from railway_volume_config import (migrate_database_to_volume, startup_lock, startup_schema_current,
+                                   mark_startup_schema, warm_start)
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'restaurant_calculator.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE inventory (id INTEGER PRIMARY KEY, item_description TEXT)')
+    conn.executemany('INSERT INTO inventory (item_description) VALUES (?)', [(f'Item {n}',) for n in range(500)])
+    conn.commit()
+    conn.close()
+    return path
+
+class TestMigration:
+    """Test copying the database onto the volume"""
+
+    def test_migrates_through_backup_api(self, db_path, tmp_path):
+        volume = tmp_path / 'data'
+        volume.mkdir()
+        volume_path = str(volume / 'restaurant_calculator.db')
+        assert migrate_database_to_volume(volume_path, db_path) is True
+        conn = sqlite3.connect(volume_path)
+        assert conn.execute('SELECT COUNT(*) FROM inventory').fetchone()[0] == 500
+        conn.close()
+        assert os.listdir(volume) == ['restaurant_calculator.db']
+
+    def test_no_volume_skips(self, db_path, tmp_path):
+        assert migrate_database_to_volume(str(tmp_path / 'missing' / 'restaurant_calculator.db'), db_path) is False
+
+class TestStartupSchema:
+    """Test the marker that lets workers skip startup DDL"""
+
+    def test_marker_current_until_schema_changes(self, db_path):
+        assert startup_schema_current(db_path) is False
+        with startup_lock(db_path):
+            mark_startup_schema(db_path)
+        assert startup_schema_current(db_path) is True
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("INSERT INTO inventory (item_description) VALUES ('Data changes keep it current')")
+        conn.commit()
+        assert startup_schema_current(db_path) is True
+        conn.execute('CREATE INDEX idx_inventory_description ON inventory(item_description)')
+        conn.close()
+        assert startup_schema_current(db_path) is False
+
+    def test_warm_start_reports_timings_and_errors(self, db_path):
+        calls = []
+        status = warm_start(db_path, {'cache': lambda: calls.append(1), 'broken': lambda: 1 / 0})
+        deadline = time.time() + 5
+        while status['state'] != 'done' and time.time() < deadline:
+            time.sleep(0.01)
+        assert status['state'] == 'done'
+        assert status['page_cache_bytes'] == os.path.getsize(db_path)
+        assert calls == [1]
+        assert set(status['warmers']) == {'cache', 'broken'}
+        assert 'division by zero' in status['errors']['broken']
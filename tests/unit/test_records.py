@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - Compact Records
+Tests the slotted ingredient, recipe and staging records and the loaders built on them
+"""
+
+import csv
+import pytest
+import sqlite3
+import sys
+import os
+from decimal import Decimal
+
+# Add parent directory to path for imports
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(REPO_ROOT)
+
+from records import CSVIngredientRow, IngredientCost, RecipeCost, staging_row_type
+from csv_recipe_loader_v2 import CSVRecipeLoaderV2
+from inventory_staging_loader import InventoryStagingLoader
+
+class TestRecords:
+    """Test record layout and dict compatibility"""
+
+    def test_records_have_no_instance_dict(self):
+        line = IngredientCost('Salt', 'Inventory Item', Decimal('1'), 'oz')
+        assert not hasattr(line, '__dict__')
+        with pytest.raises(AttributeError):
+            line.notes = 'x'
+
+    def test_lists_are_allocated_on_first_item(self):
+        line = IngredientCost('Salt', 'Inventory Item', Decimal('1'), 'oz')
+        other = IngredientCost('Pepper', 'Inventory Item', Decimal('1'), 'oz')
+        assert line.warnings == () and line.warnings is other.warnings
+
+        line.warn('no price')
+        line.warn('no pack size')
+        assert line.warnings == ['no price', 'no pack size']
+        assert other.warnings == ()
+
+        recipe = RecipeCost(1, 'Fries', 'Sides', '2026-01-01T00:00:00')
+        recipe.add_ingredient(other)
+        assert recipe.warnings == () and recipe.errors == ()
+        recipe.add_ingredient(line)
+        assert recipe.warnings == ['no price', 'no pack size']
+        assert recipe.warnings is not line.warnings
+
+    def test_dict_style_access(self):
+        recipe = RecipeCost(1, 'Fries', 'Sides', '2026-01-01T00:00:00')
+        recipe['total_cost'] = Decimal('2.50')
+        assert recipe['total_cost'] == recipe.get('total_cost') == Decimal('2.50')
+        assert 'errors' in recipe and recipe.get('missing', 'x') == 'x'
+        with pytest.raises(KeyError):
+            recipe['missing']
+
+        recipe.add_ingredient(IngredientCost('Potatoes', 'Inventory Item', Decimal('0.5'), 'lb'))
+        plain = recipe.as_dict()
+        assert plain['ingredients'][0]['ingredient_name'] == 'Potatoes'
+        assert plain['calculation_steps'] == []
+
+    def test_staging_row_defaults_match_table(self):
+        row_type = staging_row_type(['Vendor_Name'])
+        row = row_type(original_row_number=2, import_batch_id='b', source_filename='f.csv',
+                       duplicate_check_hash='h')
+        assert row.as_dict() == {
+            'original_row_number': 2, 'import_batch_id': 'b', 'source_filename': 'f.csv',
+            'duplicate_check_hash': 'h', 'needs_review': False, 'Vendor_Name_raw': None,
+            'Vendor_Name_cleaned': None, 'Vendor_Name_flag': None, 'review_notes': None,
+            'is_duplicate': False, 'duplicate_of_staging_id': None
+        }
+
+class TestLoaders:
+    """Test the staging loaders on records"""
+
+    def test_csv_raw_data_keeps_dict_repr(self):
+        row = CSVIngredientRow('Salt', 'Product', '1 oz', '100%', '100%', '$0.10', 7, '1', 'oz')
+        assert str(row.as_dict()) == str({
+            'name': 'Salt', 'type': 'Product', 'measurement': '1 oz', 'yield': '100%',
+            'usable_yield': '100%', 'cost': '$0.10', 'row_number': 7, 'quantity': '1', 'unit': 'oz',
+            'category': None, 'is_prep_ingredient': False
+        })
+        assert CSVRecipeLoaderV2()._validate_ingredient(row) == []
+
+    def test_inventory_rows_load_with_one_statement(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / 'staging.db')
+        conn = sqlite3.connect(db_path)
+        with open(os.path.join(REPO_ROOT, 'migrations', 'create_staging_inventory_table.sql')) as f:
+            conn.executescript(f.read())
+        conn.execute("ALTER TABLE stg_inventory_items ADD COLUMN source_filename TEXT")
+        conn.close()
+
+        csv_path = tmp_path / 'inventory.csv'
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Product(s)', 'Vendor Name', 'Item Description', 'Last Purchased Price ($)'])
+            writer.writerow(['Chicken Thighs', 'Sysco', 'Chicken thigh, boneless', '40.00'])
+            writer.writerow(['Pickles', '', 'Dill chips', 'n/a'])
+
+        monkeypatch.chdir(REPO_ROOT)
+        loader = InventoryStagingLoader(db_path)
+        batches = iter(['INV_1', 'INV_2'])
+        monkeypatch.setattr(loader, '_create_batch_id', lambda: next(batches))
+        first = loader.load_csv_to_staging(str(csv_path))
+        second = loader.load_csv_to_staging(str(csv_path))
+        assert (first['loaded_rows'], first['duplicates'], first['error_rows']) == (2, 0, 0)
+        assert (second['loaded_rows'], second['duplicates']) == (2, 2)
+
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute("""
+            SELECT FAM_Product_Name_cleaned, Vendor_Name_flag, needs_review, is_duplicate,
+                   duplicate_of_staging_id
+            FROM stg_inventory_items ORDER BY staging_id
+        """).fetchall()
+        conn.close()
+        assert rows[0][:2] == ('Chicken Thighs', None) and rows[0][3:] == (0, None)
+        assert rows[1][1] == 'empty_string' and rows[1][2] == 1
+        assert rows[2][3:] == (1, 1)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - Request Profiler
+Tests token-gated request profiles and the saved profile files
+"""
+
+import sys
+import os
+
+from flask import Flask
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from request_profiler import (RequestProfiler, profiled, profile_token, token_matches, list_profiles,
+                              load_profile, profile_path, prune_profiles, DEV_SECRET_KEY, TOKEN_HEADER)
+
+def busy_work():
+    return sum(i * i for i in range(200000))
+
+class TestToken:
+    """Test the profile token guard"""
+
+    def test_token_matches_secret_key(self):
+        token = profile_token('production-key')
+        assert token_matches(token, 'production-key')
+        assert not token_matches(token, 'another-key')
+        assert not token_matches(None, 'production-key')
+
+    def test_development_key_needs_debug_mode(self):
+        token = profile_token(DEV_SECRET_KEY)
+        assert not token_matches(token, DEV_SECRET_KEY)
+        assert token_matches(token, DEV_SECRET_KEY, debug=True)
+
+class TestSavedProfiles:
+    """Test the files written for a profile"""
+
+    def test_profiled_block_writes_all_files(self, tmp_path):
+        directory = str(tmp_path)
+        with profiled('batch job', directory) as profile:
+            busy_work()
+
+        assert [summary['name'] for summary in list_profiles(directory)] == [profile.name]
+        for extension in ('prof', 'collapsed', 'json'):
+            assert profile_path(profile.name, extension, directory)
+        summary = load_profile(profile.name, directory)
+        assert summary['label'] == 'batch job'
+        assert any('busy_work' in row['function'] for row in summary['top_functions'])
+
+    def test_unsafe_names_are_refused(self, tmp_path):
+        assert load_profile('../secrets', str(tmp_path)) is None
+        assert profile_path('20260101_000000_000000_x', 'py', str(tmp_path)) is None
+
+    def test_prune_keeps_newest(self, tmp_path):
+        directory = str(tmp_path)
+        names = []
+        for label in ('first', 'second', 'third'):
+            with profiled(label, directory, sample_interval=0) as profile:
+                pass
+            names.append(profile.name)
+        assert prune_profiles(directory, keep=2) == 1
+        assert [summary['name'] for summary in list_profiles(directory)] == names[:0:-1]
+
+class TestFlaskHook:
+    """Test profiling requests through the Flask hooks"""
+
+    def test_only_token_requests_are_profiled(self, tmp_path):
+        app = Flask(__name__)
+        app.secret_key = 'production-key'
+        profiler = RequestProfiler(app, directory=str(tmp_path))
+
+        @app.route('/work')
+        def work():
+            return str(busy_work())
+
+        client = app.test_client()
+        assert 'X-Profile' not in client.get('/work').headers
+        assert 'X-Profile' not in client.get('/work', headers={TOKEN_HEADER: 'wrong'}).headers
+
+        response = client.get('/work', headers={TOKEN_HEADER: profile_token('production-key')})
+        name = response.headers['X-Profile']
+        assert load_profile(name, profiler.directory)['label'] == 'GET /work'
+        assert len(list_profiles(profiler.directory)) == 1
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - Response Cache
+Tests data-version triggers, ETag revalidation and the rendered-page LRU
+"""
+
+import pytest
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+flask = pytest.importorskip('flask')
+
+from response_cache import ResponseCache, resolve_base_tables, get_data_versions
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE recipes_actual (recipe_id INTEGER PRIMARY KEY, recipe_name TEXT, food_cost REAL);
+        CREATE VIEW recipes AS SELECT recipe_id as id, recipe_name, food_cost FROM recipes_actual;
+        CREATE TABLE vendors (id INTEGER PRIMARY KEY, vendor_name TEXT);
+        INSERT INTO recipes_actual VALUES (1, 'Hot Chicken', 3.25);
+    ''')
+    conn.commit()
+    conn.close()
+    return path
+
+@pytest.fixture
+def cached_app(db_path):
+    def connect():
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    app = flask.Flask(__name__)
+    app.secret_key = 'test'
+    cache = ResponseCache(connect)
+    calls = []
+
+    @app.route('/recipes/<int:recipe_id>')
+    @cache.cached('recipes')
+    def view_recipe(recipe_id):
+        calls.append(recipe_id)
+        with connect() as conn:
+            recipe = conn.execute('SELECT * FROM recipes WHERE id = ?', (recipe_id,)).fetchone()
+        return f"{recipe['recipe_name']}: {recipe['food_cost']}"
+
+    cache.install()
+    return app, cache, calls
+
+class TestDataVersions:
+    """Test view resolution and version triggers"""
+
+    def test_views_resolve_to_base_tables(self, db_path):
+        conn = sqlite3.connect(db_path)
+        assert resolve_base_tables(conn, ['recipes']) == {'recipes_actual'}
+        assert resolve_base_tables(conn, ['vendors', 'missing']) == {'vendors'}
+        conn.close()
+
+    def test_writes_bump_version(self, cached_app, db_path):
+        conn = sqlite3.connect(db_path)
+        before = get_data_versions(conn, ['recipes_actual'])['recipes_actual']
+        conn.execute("UPDATE recipes_actual SET food_cost = 4.0 WHERE recipe_id = 1")
+        conn.execute("INSERT INTO recipes_actual VALUES (2, 'Fries', 0.5)")
+        conn.commit()
+        assert get_data_versions(conn, ['recipes_actual'])['recipes_actual'] == before + 2
+        conn.close()
+
+class TestResponseCache:
+    """Test cached GET responses"""
+
+    def test_repeat_request_is_served_from_cache(self, cached_app):
+        app, cache, calls = cached_app
+        client = app.test_client()
+        first = client.get('/recipes/1')
+        second = client.get('/recipes/1')
+        assert first.data == second.data == b'Hot Chicken: 3.25'
+        assert first.headers['ETag'] == second.headers['ETag']
+        assert calls == [1]
+        assert cache.stats()['hits'] == 1
+
+    def test_if_none_match_returns_304(self, cached_app):
+        app, cache, calls = cached_app
+        client = app.test_client()
+        etag = client.get('/recipes/1').headers['ETag']
+        response = client.get('/recipes/1', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert calls == [1]
+
+    def test_write_invalidates(self, cached_app, db_path):
+        app, cache, calls = cached_app
+        client = app.test_client()
+        etag = client.get('/recipes/1').headers['ETag']
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE recipes_actual SET food_cost = 4.0 WHERE recipe_id = 1")
+        conn.commit()
+        conn.close()
+
+        response = client.get('/recipes/1', headers={'If-None-Match': etag})
+        assert response.status_code == 200
+        assert response.data == b'Hot Chicken: 4.0'
+        assert response.headers['ETag'] != etag
+        assert calls == [1, 1]
+
+    def test_theme_is_part_of_key(self, cached_app):
+        app, cache, calls = cached_app
+        client = app.test_client()
+        client.get('/recipes/1')
+        client.get('/recipes/1?theme=neo')
+        assert calls == [1, 1]
+
+    def test_lru_evicts_oldest(self, cached_app):
+        app, cache, calls = cached_app
+        cache.max_entries = 1
+        client = app.test_client()
+        client.get('/recipes/1')
+        client.get('/recipes/1?theme=neo')
+        client.get('/recipes/1')
+        assert calls == [1, 1, 1]
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - Sales Mix
+Tests Toast sales export import and theoretical food cost reports
+"""
+
+import pytest
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sales_mix import (import_sales_mix, period_report, recost, parse_sale_date, parse_number,
+                       is_sales_mix_file, SalesMixError)
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'sales.db'))
+    conn.row_factory = sqlite3.Row
+    conn.executescript('''
+        CREATE TABLE recipes_actual (recipe_id INTEGER PRIMARY KEY, recipe_name TEXT, food_cost REAL);
+        CREATE TABLE menu_items_actual (menu_item_id INTEGER PRIMARY KEY, item_name TEXT, recipe_id INTEGER,
+                                        menu_category TEXT);
+        CREATE TABLE menu_assignments (assignment_id INTEGER PRIMARY KEY, menu_id INTEGER, menu_item_id INTEGER,
+                                       is_active BOOLEAN);
+        INSERT INTO recipes_actual VALUES (1, 'Hot Chicken', 3.0), (2, 'Fries', 1.0), (3, 'Wings', NULL);
+        INSERT INTO menu_items_actual VALUES (1, 'Hot Chicken', 1, 'Mains'), (2, 'Fries', 2, 'Sides'),
+                                             (3, 'Fries', 2, 'Kids'), (4, 'Wings', 3, 'Mains');
+        INSERT INTO menu_assignments VALUES (1, 1, 3, 1);
+    ''')
+    yield conn
+    conn.close()
+
+def write_export(tmp_path, name, rows, header='Order Date,Menu Item,Menu Group,Qty,Net Price,Void?'):
+    path = tmp_path / name
+    path.write_text(header + '\n' + '\n'.join(rows) + '\n')
+    return str(path)
+
+class TestImport:
+    """Test streaming the export into the daily fact table"""
+
+    def test_aggregates_per_item_and_day(self, conn, tmp_path):
+        path = write_export(tmp_path, 'ItemSelectionDetails.csv', [
+            '3/1/26 11:02 AM,Hot Chicken,Mains,1,$15.00,false',
+            '3/1/26 12:40 PM,Hot Chicken,Mains,2,"$30.00",false',
+            '3/1/26 12:41 PM,Hot Chicken,Mains,1,$15.00,true',
+            '3/2/26 6:15 PM,fries,Sides,3,$15.00,false',
+            '3/2/26 6:20 PM,Fries,Kids,1,$4.00,false',
+            '3/2/26 6:30 PM,Milkshake,Drinks,2,$12.00,false',
+        ])
+        result = import_sales_mix(conn, path)
+        assert (result['rows_read'], result['rows_skipped'], result['days'], result['unmatched_items']) == (6, 1, 2, 1)
+
+        rows = [tuple(row) for row in conn.execute('SELECT * FROM sales_mix ORDER BY sale_date, menu_item_id')]
+        # Toast menu group picks between the two 'Fries' menu items
+        assert rows == [(1, '2026-03-01', 3.0, 45.0, 3.0), (2, '2026-03-02', 3.0, 15.0, 1.0),
+                        (3, '2026-03-02', 1.0, 4.0, 1.0)]
+        assert [tuple(row) for row in conn.execute('SELECT * FROM sales_mix_unmatched')] == \
+            [('Milkshake', '2026-03-02', 2.0, 12.0)]
+        assert [tuple(row) for row in conn.execute('SELECT * FROM sales_mix_daily ORDER BY sale_date')] == \
+            [('2026-03-01', 3.0, 45.0, 9.0, 0.0), ('2026-03-02', 4.0, 19.0, 4.0, 0.0)]
+
+    def test_reimport_replaces_covered_dates(self, conn, tmp_path):
+        import_sales_mix(conn, write_export(tmp_path, 'a.csv', [
+            '2026-03-01,Hot Chicken,Mains,2,30,', '2026-03-02,Hot Chicken,Mains,2,30,']))
+        import_sales_mix(conn, write_export(tmp_path, 'b.csv', ['2026-03-02,Hot Chicken,Mains,5,75,']))
+        assert [tuple(row) for row in conn.execute('SELECT sale_date, quantity FROM sales_mix ORDER BY 1')] == \
+            [('2026-03-01', 2.0), ('2026-03-02', 5.0)]
+        assert conn.execute('SELECT COUNT(*) FROM sales_mix_imports').fetchone()[0] == 2
+
+    def test_product_mix_without_date_column(self, conn, tmp_path):
+        header = 'Menu Group,Menu Item,Item Qty,Net Amount'
+        path = write_export(tmp_path, 'ProductMix_20260305.csv', ['Mains,Hot Chicken,10,150', ',Total,10,150'],
+                            header=header)
+        assert import_sales_mix(conn, path)['first_date'] == '2026-03-05'
+
+        undated = write_export(tmp_path, 'ProductMix.csv', ['Mains,Hot Chicken,10,150'], header=header)
+        with pytest.raises(SalesMixError):
+            import_sales_mix(conn, undated)
+        assert import_sales_mix(conn, undated, sale_date='03/06/2026')['first_date'] == '2026-03-06'
+
+    def test_parsers(self):
+        assert parse_sale_date('3/2/26 11:32 AM') == '2026-03-02'
+        assert parse_sale_date('2026-03-02T11:32:00') == '2026-03-02'
+        assert parse_sale_date('not a date') is None
+        assert (parse_number('$1,234.50'), parse_number('(12.00)'), parse_number('')) == (1234.5, -12.0, 0.0)
+        assert is_sales_mix_file('ItemSelectionDetails_2026-03-02.csv')
+        assert is_sales_mix_file('Product Mix.csv')
+        assert not is_sales_mix_file('Item_Detail_Report.csv')
+
+class TestReports:
+    """Test period reports and recosting"""
+
+    @pytest.fixture
+    def loaded(self, conn, tmp_path):
+        import_sales_mix(conn, write_export(tmp_path, 'ItemSelectionDetails.csv', [
+            '2026-01-30,Hot Chicken,Mains,10,150,', '2026-01-31,Fries,Sides,20,100,',
+            '2026-02-01,Hot Chicken,Mains,4,60,', '2026-02-01,Wings,Mains,5,65,',
+        ]))
+        return conn
+
+    def test_month_report_with_actual_cost(self, loaded):
+        report = period_report(loaded, '2026-01-01', '2026-02-28', by='month', actual_cost=75.0)
+        assert [(row['period'], row['net_sales'], row['theoretical_cost']) for row in report['rows']] == \
+            [('2026-01', 250.0, 50.0), ('2026-02', 125.0, 12.0)]
+        summary = report['summary']
+        assert (summary['theoretical_cost'], summary['theoretical_food_cost_percent']) == (62.0, 16.53)
+        assert (summary['actual_food_cost_percent'], summary['variance'], summary['uncosted_items']) == (20.0, 13.0, 5.0)
+
+    def test_item_and_category_reports(self, loaded):
+        by_item = period_report(loaded, '2026-01-01', '2026-12-31', by='item')
+        assert [(row['period'], row['items_sold']) for row in by_item['rows']] == \
+            [('Hot Chicken', 14.0), ('Fries', 20.0), ('Wings', 5.0)]
+        by_category = period_report(loaded, '2026-02-01', '2026-02-01', by='category')
+        assert [(row['period'], row['theoretical_cost']) for row in by_category['rows']] == [('Mains', 12.0)]
+        with pytest.raises(SalesMixError):
+            period_report(loaded, '2026-01-01', '2026-12-31', by='hour')
+
+    def test_recost_refreshes_daily_totals(self, loaded):
+        loaded.execute('UPDATE recipes_actual SET food_cost = 4.0 WHERE recipe_id = 1')
+        loaded.execute('UPDATE recipes_actual SET food_cost = 2.0 WHERE recipe_id = 3')
+        loaded.commit()
+        assert recost(loaded, start='2026-02-01') == 2
+        report = period_report(loaded, '2026-01-01', '2026-12-31', by='day')
+        assert [row['theoretical_cost'] for row in report['rows']] == [30.0, 20.0, 26.0]
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - What-If Scenario Engine
+Tests price, vendor and yield overlays costed from the in-memory snapshot
+"""
+
+import pytest
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(REPO_ROOT)
+
+from calculation_rebuilder import CalculationRebuilder
+from fixed_point import to_decimal
+from response_cache import install_data_version_triggers
+from scenario_engine import Scenario, ScenarioEngine, ScenarioError, SNAPSHOT_TABLES
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'scenarios.db')
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE inventory (id INTEGER PRIMARY KEY, item_description TEXT, vendor_name TEXT,
+                                product_categories TEXT, current_price REAL, pack_size TEXT,
+                                purchase_unit TEXT, recipe_cost_unit TEXT, yield_percent REAL,
+                                density_g_per_ml REAL, count_to_weight_g REAL);
+        CREATE TABLE vendors (id INTEGER PRIMARY KEY, vendor_name TEXT);
+        CREATE TABLE vendor_products (id INTEGER PRIMARY KEY, inventory_id INTEGER, vendor_id INTEGER,
+                                      vendor_price REAL, last_purchased_price REAL, pack_size TEXT,
+                                      unit_measure TEXT, is_primary BOOLEAN, is_active BOOLEAN);
+        CREATE TABLE recipes_actual (recipe_id INTEGER PRIMARY KEY, recipe_name TEXT, recipe_type TEXT,
+                                     batch_yield REAL, batch_yield_unit TEXT, serving_size REAL,
+                                     serving_unit TEXT, menu_price REAL, food_cost REAL,
+                                     portions_per_batch REAL);
+        CREATE TABLE recipe_ingredients_actual (ingredient_id INTEGER PRIMARY KEY, recipe_id INTEGER,
+                                                ingredient_name TEXT, quantity REAL, unit TEXT,
+                                                inventory_id INTEGER, unit_cost REAL, total_cost REAL,
+                                                ingredient_order INTEGER);
+        CREATE TABLE menu_items_actual (menu_item_id INTEGER PRIMARY KEY, item_name TEXT, recipe_id INTEGER,
+                                        menu_category TEXT, current_price REAL);
+
+        INSERT INTO inventory VALUES
+            (1, 'Chicken Thighs', 'Sysco', 'Protein, Chicken, Thigh', 40.0, '10 lb', 'case', 'lb', 100, NULL, NULL),
+            (2, 'Heavy Cream', 'Sysco', 'Dairy, Cream, Heavy', 24.0, '4 qt', 'case', 'qt', 100, NULL, NULL),
+            (3, 'Potatoes', 'US Foods', 'Produce, Potatoes', 25.0, '50 lb', 'bag', 'lb', 100, NULL, NULL);
+        INSERT INTO vendors VALUES (1, 'Sysco'), (2, 'US Foods');
+        INSERT INTO vendor_products VALUES (1, 1, 2, 36.0, NULL, '10 lb', 'case', 0, 1),
+                                           (2, 3, 1, 20.0, NULL, '50 lb', 'bag', 0, 1);
+        INSERT INTO recipes_actual VALUES
+            (1, 'Cream Sauce', 'Prep', 2, 'qt', NULL, NULL, NULL, NULL, NULL),
+            (2, 'Hot Chicken', 'Mains', 1, 'each', 1, 'each', NULL, NULL, 1),
+            (3, 'Fries', 'Sides', 1, 'each', 1, 'each', NULL, NULL, 1);
+        INSERT INTO recipe_ingredients_actual VALUES
+            (1, 1, 'Heavy Cream', 2, 'qt', 2, NULL, NULL, 1),
+            (2, 2, 'Chicken Thighs', 0.5, 'lb', 1, NULL, NULL, 1),
+            (3, 2, 'Cream Sauce', 0.5, 'qt', NULL, NULL, NULL, 2),
+            (4, 3, 'Potatoes', 0.5, 'lb', 3, NULL, NULL, 1);
+        INSERT INTO menu_items_actual VALUES (1, 'Hot Chicken Sandwich', 2, 'Mains', 10.0),
+                                             (2, 'Fries', 3, 'Sides', 4.0);
+    ''')
+    conn.commit()
+    conn.close()
+    return path
+
+def by_id(rows, key):
+    return {row[key]: row for row in rows}
+
+class TestBaseline:
+    """Test the snapshot baseline against the rebuilder"""
+
+    def test_baseline_matches_rebuilder(self, db_path):
+        engine = ScenarioEngine(db_path)
+        _, baseline, _ = engine._current()
+        rebuilder = CalculationRebuilder(db_path, read_only=True)
+        for recipe_id in (1, 2, 3):
+            expected = rebuilder.calculate_recipe_cost_from_scratch(recipe_id).total_cost
+            assert to_decimal(baseline[recipe_id]['total_micros']) == expected
+
+    def test_whole_catalog_matches_rebuilder(self, tmp_path):
+        path = str(tmp_path / 'catalog.db')
+        conn = sqlite3.connect(path)
+        with open(os.path.join(REPO_ROOT, 'data', 'production_data.sql')) as f:
+            conn.executescript(f.read())
+        conn.close()
+
+        _, baseline, _ = ScenarioEngine(path)._current()
+        rebuilder = CalculationRebuilder(path, read_only=True)
+        compared = 0
+        for recipe_id, result in baseline.items():
+            try:
+                expected = rebuilder.calculate_recipe_cost_from_scratch(recipe_id).total_cost
+            except Exception:
+                assert 'error' in result, recipe_id
+                continue
+            assert to_decimal(result['total_micros']) == expected, recipe_id
+            compared += 1
+        assert compared > 0
+
+class TestScenarios:
+    """Test overlays, recosting and comparison"""
+
+    def test_category_price_change_reaches_nested_recipes(self, db_path):
+        with open(db_path, 'rb') as f:
+            before = f.read()
+
+        result = ScenarioEngine(db_path).run(Scenario('Cream +50%').change_price(percent=50, category='Dairy'))
+        recipes = by_id(result['recipes'], 'recipe_id')
+
+        assert [item['inventory_id'] for item in result['changed_items']] == [2]
+        assert result['changed_items'][0]['current_price'] == 36.0
+        assert sorted(recipes) == [1, 2]  # Fries does not use cream
+        assert (recipes[1]['base_cost'], recipes[1]['cost']) == (12.0, 18.0)
+        assert (recipes[2]['base_cost'], recipes[2]['cost'], recipes[2]['cost_change']) == (5.0, 6.5, 1.5)
+
+        menu_item = result['menu_items'][0]
+        assert (menu_item['item_name'], menu_item['base_food_cost_percent'], menu_item['food_cost_percent']) == \
+            ('Hot Chicken Sandwich', 50.0, 65.0)
+        with open(db_path, 'rb') as f:
+            assert f.read() == before
+
+    def test_vendor_swap_uses_vendor_products(self, db_path):
+        result = ScenarioEngine(db_path).run(Scenario('All to US Foods').swap_vendor('US Foods'))
+        assert [(item['inventory_id'], item['current_price'], item['vendor_name'])
+                for item in result['changed_items']] == [(1, 36.0, 'US Foods')]
+        assert result['unmatched_items'] == [2]  # no US Foods offer for cream; potatoes already US Foods
+        assert by_id(result['recipes'], 'recipe_id')[2]['cost'] == 4.8
+
+    def test_yield_and_absolute_price_changes_compose(self, db_path):
+        scenario = (Scenario('Potatoes')
+                    .change_price(amount=5, item='Potatoes')
+                    .change_yield(80, item=3))
+        result = ScenarioEngine(db_path).run(scenario)
+        # $30 / 50 lb = $0.60/lb; 0.5 lb = $0.30, at 80% yield $0.375 -> $0.38
+        assert by_id(result['recipes'], 'recipe_id')[3]['cost'] == 0.38
+
+    def test_compare_lines_scenarios_up(self, db_path):
+        comparison = ScenarioEngine(db_path).compare([
+            Scenario('Chicken +10%').change_price(percent=10, item=1),
+            Scenario('Potatoes -20%').change_price(percent=-20, vendor='US Foods'),
+        ])
+        rows = by_id(comparison['menu_items'], 'item_name')
+        assert [s['food_cost'] for s in rows['Hot Chicken Sandwich']['scenarios']] == [5.2, 5.0]
+        assert [s['food_cost'] for s in rows['Fries']['scenarios']] == [0.25, 0.2]
+        assert [s['name'] for s in comparison['scenarios']] == ['Chicken +10%', 'Potatoes -20%']
+
+    def test_snapshot_reloads_on_data_version_change(self, db_path):
+        conn = sqlite3.connect(db_path)
+        install_data_version_triggers(conn, SNAPSHOT_TABLES)
+        engine = ScenarioEngine(db_path)
+        scenario = Scenario('Chicken +10%').change_price(percent=10, item=1)
+        assert by_id(engine.run(scenario)['recipes'], 'recipe_id')[2]['base_cost'] == 5.0
+
+        conn.execute("UPDATE inventory SET current_price = 50.0 WHERE id = 1")
+        conn.commit()
+        conn.close()
+        assert by_id(engine.run(scenario)['recipes'], 'recipe_id')[2]['base_cost'] == 5.5
+
+    def test_malformed_changes_are_rejected(self):
+        with pytest.raises(ScenarioError):
+            Scenario('x').change_price(percent=10, amount=1, item=1)
+        with pytest.raises(ScenarioError):
+            Scenario('x').change_price(percent=10)
+        with pytest.raises(ScenarioError):
+            Scenario.from_dict({'name': 'x', 'changes': [{'type': 'discount'}]})
+        for bad in ('abc', 'nan', [10], True):
+            with pytest.raises(ScenarioError):
+                Scenario.from_dict({'name': 'x', 'changes': [{'type': 'price', 'item': 5, 'percent': bad}]})
+        with pytest.raises(ScenarioError):
+            Scenario('x').change_yield('most', item=5)
+        assert Scenario('x').change_price(amount='1.25', item=5).changes[0]['amount'] == 1.25
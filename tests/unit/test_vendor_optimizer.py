@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+UNIT TESTS - Vendor Optimizer
+Tests pack normalization, cheapest-vendor selection and vendor minimums
+"""
+
+import pytest
+import sqlite3
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from vendor_optimizer import VendorOptimizer, OptimizerError, parse_minimums
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'vendors.db')
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE inventory (id INTEGER PRIMARY KEY, item_description TEXT, item_code TEXT,
+                                current_price REAL, pack_size TEXT, purchase_unit TEXT,
+                                density_g_per_ml REAL, count_to_weight_g REAL);
+        CREATE TABLE vendors (id INTEGER PRIMARY KEY, vendor_name TEXT, active BOOLEAN DEFAULT 1);
+        CREATE TABLE vendor_products (id INTEGER PRIMARY KEY, inventory_id INTEGER, vendor_id INTEGER,
+                                      vendor_item_code TEXT, vendor_price REAL, last_purchased_price REAL,
+                                      pack_size TEXT, unit_measure TEXT, is_primary BOOLEAN,
+                                      is_active BOOLEAN);
+        CREATE TABLE units (unit_id INTEGER PRIMARY KEY, symbol TEXT, dimension TEXT, to_canonical_factor REAL);
+        CREATE TABLE ingredient_unit_equivalents (id INTEGER PRIMARY KEY, inventory_id INTEGER,
+                                                  custom_unit_name TEXT, canonical_quantity REAL,
+                                                  canonical_unit_symbol TEXT);
+
+        INSERT INTO inventory VALUES
+            (1, 'Chicken Thighs', 'CH1', 40.0, '10 lb', 'case', NULL, NULL),
+            (2, 'Heavy Cream', 'HC1', 24.0, '4 x 1 qt', 'case', 1.0, NULL),
+            (3, 'Lemons', 'LE1', 30.0, '1 each', 'cs', NULL, 100),
+            (4, 'Saffron', 'SA1', NULL, '1 g', 'jar', NULL, NULL);
+        INSERT INTO vendors VALUES (1, 'Sysco', 1), (2, 'US Foods', 1), (3, 'Closed Foods', 0);
+        INSERT INTO vendor_products VALUES
+            (1, 1, 1, 'SY-1', 40.0, NULL, '1 each', 'cs', 1, 1),      -- inventory pack: 10 lb
+            (2, 1, 2, 'US-1', 18.0, NULL, '5', 'lb', 0, 1),           -- 5 lb, cheaper per lb
+            (3, 1, 3, 'CL-1', 1.0, NULL, '100 lb', 'case', 0, 1),     -- inactive vendor
+            (4, 2, 1, 'SY-2', 24.0, NULL, '4 x 1', 'qt', 1, 1),
+            (5, 2, 2, 'US-2', NULL, 19.0, '1 gal', 'ea', 0, 1),       -- last purchased price
+            (6, 3, 1, 'SY-3', 30.0, NULL, '1 each', 'cs', 1, 1),      -- cs: ingredient_unit_equivalents
+            (7, 3, 2, 'US-3', 2.0, NULL, '1', 'bag', 0, 0),           -- inactive offer
+            (8, 4, 1, 'SY-4', 0, NULL, '1 g', 'jar', 1, 1);           -- unpriced
+        INSERT INTO units VALUES (1, 'lb', 'WEIGHT', 453.59237), (2, 'qt', 'VOLUME', 946.352946),
+                                 (3, 'dozen', 'COUNT', 12);
+        INSERT INTO ingredient_unit_equivalents VALUES (1, 3, 'cs', 8, 'dozen');
+    ''')
+    conn.commit()
+    conn.close()
+    return path
+
+def lines_by_item(result):
+    return {line['item_description']: dict(line, vendor_name=order['vendor_name'])
+            for order in result['order_guide'] for line in order['lines']}
+
+class TestNormalization:
+    """Test pack sizes normalized to base units"""
+
+    def test_offer_packs(self, db_path):
+        catalog = VendorOptimizer(db_path).current()
+        packs = {offer['vendor_item_code']: (offer['pack_source'], list(pack))
+                 for offer, pack in zip(catalog['offers'], catalog['offer_pack'])}
+        assert sorted(packs) == ['SY-1', 'SY-2', 'SY-3', 'US-1', 'US-2']
+        assert packs['SY-1'][0] == 'inventory'
+        assert packs['SY-1'][1][0] == pytest.approx(4535.9237)
+        assert packs['US-1'][1][0] == pytest.approx(5 * 453.59237)
+        # Density 1.0 gives the cream packs in grams too
+        assert packs['US-2'][1][:2] == pytest.approx([3785.41, 3785.41])
+        # 'cs' is 8 dozen through ingredient_unit_equivalents, 100 g each
+        assert packs['SY-3'][1] == pytest.approx([9600, float('nan'), 96], nan_ok=True)
+        assert catalog['skipped_offers'] == [{'vendor_product_id': 8, 'inventory_id': 4, 'reason': 'no price'}]
+
+class TestOptimize:
+    """Test vendor selection and the order guide"""
+
+    def test_cheapest_vendor_per_item(self, db_path):
+        result = VendorOptimizer(db_path).optimize({1: (12, 'lb'), 2: (3, 'qt'), 3: {'quantity': 2}})
+        lines = lines_by_item(result)
+
+        chicken = lines['Chicken Thighs']
+        assert (chicken['vendor_name'], chicken['packs'], chicken['cost']) == ('US Foods', 3, 54.0)
+        assert (chicken['primary_cost'], chicken['savings'], chicken['pack_quantity']) == (80.0, 26.0, 5.0)
+
+        # 3 qt fits one 4 qt case for $24 or one gallon for $19
+        cream = lines['Heavy Cream']
+        assert (cream['vendor_name'], cream['vendor_item_code'], cream['cost']) == ('US Foods', 'US-2', 19.0)
+
+        # A quantity without a unit is in the purchase unit
+        lemons = lines['Lemons']
+        assert (lemons['unit'], lemons['required_quantity'], lemons['packs']) == ('cs', 2.0, 2)
+
+        assert result['summary']['total_cost'] == 54.0 + 19.0 + 60.0
+        assert result['summary']['savings'] == 26.0 + 5.0
+        assert [order['vendor_name'] for order in result['order_guide']] == ['Sysco', 'US Foods']
+
+    def test_requirement_in_another_dimension(self, db_path):
+        # Lemons by weight via count_to_weight_g; cream by weight via density
+        lines = lines_by_item(VendorOptimizer(db_path).optimize([
+            {'inventory_id': 3, 'quantity': 10, 'unit': 'kg'},
+            {'inventory_id': 2, 'quantity': 5, 'unit': 'kg'},
+        ]))
+        assert lines['Lemons']['packs'] == 2  # 10 kg of 9.6 kg cases
+        assert (lines['Heavy Cream']['vendor_item_code'], lines['Heavy Cream']['packs']) == ('US-2', 2)
+
+    def test_vendor_minimum_moves_items(self, db_path):
+        optimizer = VendorOptimizer(db_path)
+        result = optimizer.optimize({1: (12, 'lb'), 2: (3, 'qt'), 3: (100, 'each')}, minimums={'US Foods': 100})
+        assert [order['vendor_name'] for order in result['order_guide']] == ['Sysco']
+        assert result['summary']['total_cost'] == 80.0 + 24.0 + 60.0
+
+        # Sysco is the only lemon vendor, so it keeps that line and is flagged
+        result = optimizer.optimize({3: (100, 'each')}, minimums={'Sysco': 100})
+        assert result['order_guide'][0]['meets_minimum'] is False
+        assert result['summary']['below_minimum'] == ['Sysco']
+
+    def test_unavailable_and_invalid_requirements(self, db_path):
+        result = VendorOptimizer(db_path).optimize({4: (2, 'g'), 1: (1, 'bunch'), 99: 1})
+        assert [(row['inventory_id'], row['reason']) for row in result['unavailable']] == [
+            (1, "unit 'bunch' does not convert"),
+            (4, 'no active priced offer in a convertible pack'),
+            (99, 'unknown inventory item'),
+        ]
+        assert result['order_guide'] == []
+        with pytest.raises(OptimizerError):
+            VendorOptimizer(db_path).optimize({1: 'lots'})
+        with pytest.raises(OptimizerError):
+            VendorOptimizer(db_path).optimize({1: 1}, minimums={'Nobody': 10})
+        with pytest.raises(OptimizerError):
+            parse_minimums(['Sysco'])
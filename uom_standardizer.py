@@ -10,6 +10,8 @@ from decimal import Decimal
 from typing import Tuple, Dict, Optional, List
 import logging
 
+from fixed_point import SCALE, InexactError, to_micros
+
 logger = logging.getLogger(__name__)
 
 class UOMStandardizer:
@@ -155,10 +157,14 @@ class UOMStandardizer:
         'servings': 'each',
     }
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, read_only: bool = False):
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path)
-        self._init_conversion_tables()
+        if read_only:
+            # Parsing and conversion are in-memory; skip seeding unit_conversions
+            self.conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+        else:
+            self.conn = sqlite3.connect(db_path)
+            self._init_conversion_tables()
     
     def _init_conversion_tables(self):
         """Initialize or update conversion tables in database"""
@@ -365,6 +371,117 @@ class UOMStandardizer:
         
         return None
     
+    # Fixed-point counterparts of parse_measurement / convert_units for the costing
+    # hot loop. They follow the Decimal versions branch for branch (including which
+    # inputs raise) so both paths cost a recipe identically; values finer than a
+    # micro-unit raise InexactError rather than being rounded.
+    
+    _factor_micros = None
+    
+    @classmethod
+    def _factor(cls, unit_type: str, unit: str) -> int:
+        if cls._factor_micros is None:
+            cls._factor_micros = {
+                unit_type: {name: to_micros(factor) for name, factor in conversions.items()}
+                for unit_type, conversions in cls.CONVERSIONS.items()
+            }
+        return cls._factor_micros[unit_type].get(unit, SCALE)
+    
+    def parse_measurement_micros(self, measurement: str) -> Tuple[int, str]:
+        """parse_measurement() returning the quantity in integer micro-units"""
+        if not measurement:
+            return SCALE, 'each'
+        
+        measurement = measurement.strip().lower()
+        
+        if ' x ' in measurement:
+            parts = measurement.split(' x ')
+            if len(parts) == 2:
+                try:
+                    count = to_micros(parts[0].strip())
+                    qty, unit = self.parse_measurement_micros(parts[1])
+                    if (count * qty) % SCALE:
+                        raise InexactError(measurement)
+                    return count * qty // SCALE, unit
+                except InexactError:
+                    raise
+                except:
+                    pass
+        
+        measurement = measurement.replace(',', '')
+        
+        patterns = [
+            r'^([0-9.]+)\s*([a-zA-Z\s.]+)$',
+            r'^([0-9.]+)([a-zA-Z]+)$',
+            r'^([0-9.]+)$',
+        ]
+        
+        for pattern in patterns:
+            match = re.match(pattern, measurement)
+            if match:
+                if len(match.groups()) == 2:
+                    return to_micros(match.group(1)), self.standardize_unit(match.group(2).strip())
+                return to_micros(match.group(1)), 'each'
+        
+        numbers = re.findall(r'[0-9.]+', measurement)
+        if numbers:
+            return to_micros(numbers[0]), 'each'
+        
+        return SCALE, 'each'
+    
+    def conversion_ratio(self, from_unit: str, to_unit: str,
+                         context: Optional[Dict] = None) -> Optional[Tuple[int, int]]:
+        """
+        convert_units() as an exact integer ratio
+        
+        Returns (numerator, denominator) with converted = quantity * numerator / denominator,
+        or None if the conversion is not possible.
+        """
+        from_unit = self.standardize_unit(from_unit)
+        to_unit = self.standardize_unit(to_unit)
+        
+        if from_unit == to_unit:
+            return 1, 1
+        
+        from_type = self.get_unit_type(from_unit)
+        to_type = self.get_unit_type(to_unit)
+        
+        if from_type == to_type and from_type in ['weight', 'volume']:
+            return self._factor(from_type, from_unit), self._factor(to_type, to_unit)
+        
+        if from_type == 'volume' and to_type == 'weight':
+            if context and 'density_g_per_ml' in context:
+                density = to_micros(context['density_g_per_ml'])
+                to_ml = self.conversion_ratio(from_unit, 'ml')
+                to_target = self.conversion_ratio('g', to_unit)
+                return to_ml[0] * density * to_target[0], to_ml[1] * SCALE * to_target[1]
+        
+        if from_type == 'weight' and to_type == 'volume':
+            if context and 'density_g_per_ml' in context:
+                density = to_micros(context['density_g_per_ml'])
+                if density == 0:
+                    raise ZeroDivisionError(f"Zero density converting {from_unit} to {to_unit}")
+                to_g = self.conversion_ratio(from_unit, 'g')
+                to_target = self.conversion_ratio('ml', to_unit)
+                return to_g[0] * SCALE * to_target[0], to_g[1] * density * to_target[1]
+        
+        if from_type == 'count' and to_type == 'weight':
+            if context and 'count_to_weight_g' in context:
+                weight_per_unit = to_micros(context['count_to_weight_g'])
+                to_target = self.conversion_ratio('g', to_unit)
+                return weight_per_unit * to_target[0], SCALE * to_target[1]
+        
+        if from_type == 'package':
+            if context and f'{from_unit}_size' in context:
+                package_size = to_micros(context[f'{from_unit}_size'])
+                if 'package_unit' in context:
+                    inner = self.conversion_ratio(context['package_unit'], to_unit, context)
+                    if inner is None:
+                        return None
+                    return package_size * inner[0], SCALE * inner[1]
+        
+        return None
+    
     def fix_recipe_ingredients_uom(self):
         """Fix UOM separation in recipe_ingredients table"""
         cursor = self.conn.cursor()
@@ -2,6 +2,11 @@
 """
 Comprehensive Inventory Data Validation Script
 Validates inventory data integrity, vendor relationships, and recipe linkages
+
+Row-level checks (missing vendors and item codes, duplicate item codes,
+description and quantity problems, orphaned ingredients) come from the
+data-quality rule engine in data_quality_rules.py; the cross-row analyses
+(vendor naming, duplicate products, mapping files) and metrics stay here.
 """
 
 import sqlite3
@@ -20,6 +25,7 @@ class InventoryDataValidator:
         self.cursor = self.conn.cursor()
         self.validation_results = defaultdict(list)
         self.data_quality_metrics = {}
+        self.engine = None
         
     def run_all_validations(self):
         """Run comprehensive data validation suite"""
@@ -47,6 +53,15 @@ class InventoryDataValidator:
         
         return self.validation_results, self.data_quality_metrics
     
+    def rule_findings(self, *rule_names):
+        """Findings of the named data-quality rules, after one incremental run"""
+        from data_quality_rules import DataQualityEngine
+        
+        if self.engine is None:
+            self.engine = DataQualityEngine(self.db_path)
+            self.engine.run()
+        return self.engine.findings(rule_names=list(rule_names))
+    
     def validate_vendor_product_relationships(self):
         """Analyze current vendor-product pairings"""
         print("\n1. Validating Vendor-Product Relationships...")
@@ -85,14 +100,8 @@ class InventoryDataValidator:
                     })
         
         # Check for illogical vendor-product assignments
-        for vendor, products in vendor_products.items():
-            if vendor == 'NO_VENDOR':
-                for product in products:
-                    self.validation_results['missing_vendor'].append({
-                        'item_id': product['id'],
-                        'item_code': product['item_code'],
-                        'description': product['description']
-                    })
+        for finding in self.rule_findings('inventory.missing_vendor'):
+            self.validation_results['missing_vendor'].append({'item_id': finding['row_id']})
         
         # Look for duplicate products across vendors
         product_vendors = defaultdict(list)
@@ -125,38 +134,22 @@ class InventoryDataValidator:
         print("\n2. Validating Item Codes...")
         
         # Check for duplicate item codes
-        query = """
-        SELECT item_code, COUNT(*) as count, GROUP_CONCAT(id) as ids,
-               GROUP_CONCAT(item_description, ' | ') as descriptions
-        FROM inventory
-        WHERE item_code IS NOT NULL AND item_code != ''
-        GROUP BY item_code
-        HAVING count > 1
-        """
-        duplicates = self.cursor.execute(query).fetchall()
+        duplicates = defaultdict(list)
+        for finding in self.rule_findings('inventory.duplicate_item_code'):
+            duplicates[finding['value']].append(str(finding['row_id']))
         
-        for dup in duplicates:
+        for item_code, ids in duplicates.items():
             self.validation_results['duplicate_item_codes'].append({
-                'item_code': dup['item_code'],
-                'count': dup['count'],
-                'ids': dup['ids'],
-                'descriptions': dup['descriptions']
+                'item_code': item_code,
+                'count': len(ids),
+                'ids': ','.join(ids)
             })
         
         # Check for missing item codes
-        query = """
-        SELECT id, item_description, vendor_name
-        FROM inventory
-        WHERE item_code IS NULL OR item_code = ''
-        """
-        missing = self.cursor.execute(query).fetchall()
+        missing = self.rule_findings('inventory.missing_item_code')
         
-        for item in missing:
-            self.validation_results['missing_item_codes'].append({
-                'id': item['id'],
-                'description': item['item_description'],
-                'vendor': item['vendor_name']
-            })
+        for finding in missing:
+            self.validation_results['missing_item_codes'].append({'id': finding['row_id']})
         
         # Analyze item code formats
         query = "SELECT DISTINCT item_code FROM inventory WHERE item_code IS NOT NULL"
@@ -190,35 +183,14 @@ class InventoryDataValidator:
         items = self.cursor.execute(query).fetchall()
         
         # Check naming convention compliance
-        naming_issues = []
-        unclear_descriptions = []
-        
-        for item in items:
-            desc = item['item_description']
-            
-            # Check for very short descriptions
-            if len(desc) < 5:
-                unclear_descriptions.append({
-                    'id': item['id'],
-                    'description': desc,
-                    'issue': 'Description too short'
-                })
-            
-            # Check for all caps
-            elif desc.isupper() and len(desc) > 3:
-                naming_issues.append({
-                    'id': item['id'],
-                    'description': desc,
-                    'issue': 'All uppercase'
-                })
-            
-            # Check for vendor codes as descriptions
-            elif re.match(r'^[A-Z]{2,4}-\d+$', desc):
-                naming_issues.append({
-                    'id': item['id'],
-                    'description': desc,
-                    'issue': 'Vendor code used as description'
-                })
+        naming_issues = [
+            {'id': f['row_id'], 'description': f['value'], 'issue': 'All uppercase'}
+            for f in self.rule_findings('inventory.uppercase_description')
+        ]
+        unclear_descriptions = [
+            {'id': f['row_id'], 'description': f['value'], 'issue': 'Description too short'}
+            for f in self.rule_findings('inventory.short_description')
+        ]
         
         # Find potential duplicates using fuzzy matching
         descriptions = [item['item_description'].lower().strip() for item in items]
@@ -315,51 +287,27 @@ class InventoryDataValidator:
         print("\n5. Validating Recipe-Ingredient Links...")
         
         # Check for invalid ingredient_id references
-        query = """
-        SELECT ri.*, r.recipe_name
-        FROM recipe_ingredients ri
-        LEFT JOIN recipes r ON ri.recipe_id = r.id
-        LEFT JOIN inventory i ON ri.ingredient_id = i.id
-        WHERE ri.ingredient_id IS NOT NULL 
-        AND ri.ingredient_id != 0
-        AND i.id IS NULL
-        """
-        orphaned = self.cursor.execute(query).fetchall()
+        orphaned = self.rule_findings('recipe_ingredients.invalid_ingredient')
         
-        for item in orphaned:
+        for finding in orphaned:
             self.validation_results['orphaned_ingredients'].append({
-                'id': item['id'],
-                'recipe_name': item['recipe_name'],
-                'invalid_ingredient_id': item['ingredient_id']
+                'id': finding['row_id'],
+                'invalid_ingredient_id': finding['value']
             })
         
         # Check for illogical quantities or units
-        query = """
-        SELECT ri.*, r.recipe_name, i.item_description, i.unit_measure
-        FROM recipe_ingredients ri
-        JOIN recipes r ON ri.recipe_id = r.id
-        JOIN inventory i ON ri.ingredient_id = i.id
-        WHERE ri.quantity <= 0 OR ri.quantity > 1000
-        OR ri.unit_of_measure IS NULL OR ri.unit_of_measure = ''
-        """
-        illogical = self.cursor.execute(query).fetchall()
-        
-        for item in illogical:
-            issue = []
-            if item['quantity'] <= 0:
-                issue.append('zero_or_negative_quantity')
-            elif item['quantity'] > 1000:
-                issue.append('excessive_quantity')
-            if not item['unit_of_measure']:
-                issue.append('missing_unit')
-                
-            self.validation_results['illogical_quantities'].append({
-                'recipe_name': item['recipe_name'],
-                'ingredient': item['item_description'],
-                'quantity': item['quantity'],
-                'unit': item['unit_of_measure'],
-                'issues': issue
-            })
+        issue_names = {
+            'recipe_ingredients.invalid_quantity': 'zero_or_negative_quantity',
+            'recipe_ingredients.zero_quantity': 'zero_or_negative_quantity',
+            'recipe_ingredients.excessive_quantity': 'excessive_quantity',
+            'recipe_ingredients.missing_uom': 'missing_unit',
+        }
+        illogical = defaultdict(list)
+        for finding in self.rule_findings(*issue_names):
+            illogical[finding['row_id']].append(issue_names[finding['rule_name']])
+        
+        for row_id, issues in illogical.items():
+            self.validation_results['illogical_quantities'].append({'id': row_id, 'issues': issues})
         
         # Calculate linkage statistics
         total_links = self.cursor.execute("SELECT COUNT(*) FROM recipe_ingredients").fetchone()[0]
@@ -0,0 +1,540 @@
+#!/usr/bin/env python3
+"""
+vendor_optimizer.py - Cheapest-vendor purchasing over vendor_products
+
+Every active vendor offer is normalized once to a pack quantity in the
+canonical base units (g, ml, each) of the units table, falling back to
+UOMStandardizer.CONVERSIONS for units the table lacks. A pack is read from
+the offer's pack_size and unit_measure; a custom unit with an
+ingredient_unit_equivalents row is converted through it; a pack in a bare
+container unit (cs, case, bag) is taken to be the inventory item's pack.
+Items with a density or count_to_weight_g get the pack in the other
+dimensions too, so requirements may be stated in any convertible unit.
+
+optimize() then costs the whole offer list against the requirements in one
+numpy pass (packs rounded up, times the pack price), reduces it to a
+vendor x item cost matrix and takes the cheapest vendor per item. With
+vendor minimums, the vendor furthest under its minimum is dropped and the
+matrix re-reduced until every vendor used meets its minimum; items only
+that vendor sells stay with it and its order is flagged.
+
+Usage:
+    python vendor_optimizer.py requirements.csv              # inventory_id,quantity,unit rows
+    python vendor_optimizer.py --forecast forecast.csv       # requirements from the BOM engine
+    python vendor_optimizer.py requirements.csv --minimum "Sysco=250" --json
+"""
+
+import argparse
+import csv
+import json
+import math
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from response_cache import get_data_versions
+from uom_standardizer import UOMStandardizer
+
+# Base tables the normalized offers are built from
+OPTIMIZER_TABLES = ('inventory', 'vendors', 'vendor_products', 'units', 'ingredient_unit_equivalents')
+
+# units.dimension -> column of the per-dimension pack arrays
+DIMENSIONS = ('WEIGHT', 'VOLUME', 'COUNT')
+WEIGHT, VOLUME, COUNT = range(3)
+
+# Tolerance so a requirement of exactly n packs is not rounded up to n + 1
+PACK_EPSILON = 1e-9
+
+
+class OptimizerError(ValueError):
+    """Raised for requirements or minimums that cannot be read"""
+
+
+class VendorOptimizer:
+    """Normalize vendor offers once, then pick the cheapest vendor per required item"""
+
+    def __init__(self, db_path: str = 'restaurant_calculator.db'):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.uom = None
+        self.catalog = None
+        self.versions = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _data_versions(self, conn: sqlite3.Connection) -> Optional[Dict[str, int]]:
+        try:
+            return get_data_versions(conn, OPTIMIZER_TABLES)
+        except sqlite3.OperationalError:
+            return None  # data_versions not installed - reload only on load()
+
+    def current(self) -> Dict[str, Any]:
+        """The normalized offers, reloaded first if the data changed"""
+        with self.lock:
+            if self.catalog is not None and self.versions is not None:
+                conn = self._connect()
+                try:
+                    if self._data_versions(conn) != self.versions:
+                        self.catalog = None
+                finally:
+                    conn.close()
+            if self.catalog is None:
+                self.load()
+            return self.catalog
+
+    # ------------------------------------------------------------------
+    # Normalization
+    # ------------------------------------------------------------------
+
+    def _unit_factors(self, conn: sqlite3.Connection) -> Dict[str, Tuple[int, float]]:
+        """unit -> (dimension, factor to the base unit)"""
+        factors = {}
+        for unit_type, dimension in (('weight', WEIGHT), ('volume', VOLUME), ('count', COUNT)):
+            for unit, factor in UOMStandardizer.CONVERSIONS[unit_type].items():
+                factors[unit] = (dimension, float(factor))
+        try:
+            rows = conn.execute("SELECT symbol, dimension, to_canonical_factor FROM units").fetchall()
+        except sqlite3.OperationalError:
+            rows = []  # no units table - the standardizer's factors only
+        for row in rows:
+            if row['dimension'] in DIMENSIONS and row['to_canonical_factor']:
+                factors[row['symbol'].lower()] = (DIMENSIONS.index(row['dimension']),
+                                                  float(row['to_canonical_factor']))
+        return factors
+
+    def _base(self, quantity: float, unit: Optional[str], factors: Dict,
+              equivalents: Dict[str, Tuple[float, str]]) -> Optional[Tuple[int, float]]:
+        """(dimension, base quantity) of quantity x unit, or None for a unit that does not convert"""
+        unit = str(unit or 'each').strip().lower()
+        for name in (unit, self.uom.standardize_unit(unit)):
+            if name in equivalents:
+                per_unit, canonical_unit = equivalents[name]
+                converted = self._base(per_unit, canonical_unit, factors, {})
+                return converted and (converted[0], quantity * converted[1])
+            if name in factors:
+                dimension, factor = factors[name]
+                return dimension, quantity * factor
+        return None
+
+    def _parse_pack(self, pack_size: Any, unit_measure: Optional[str], factors: Dict,
+                    equivalents: Dict) -> Optional[Tuple[int, float]]:
+        """(dimension, base quantity) of one pack, or None if it is only a container unit"""
+        pack_size = str(pack_size or '').strip()
+        if not pack_size:
+            return None
+        try:
+            quantity, unit = self.uom.parse_measurement(pack_size)
+        except (ArithmeticError, ValueError):
+            return None
+        quantity = float(quantity)
+        if quantity <= 0:
+            return None
+        parsed = self._base(quantity, unit, factors, equivalents)
+        if parsed and parsed[0] != COUNT:
+            return parsed  # "24 x 12 oz"
+        if unit_measure:
+            # "1 each" priced per lb converts; "1 each" per cs or case does not
+            return self._base(quantity, unit_measure, factors, equivalents)
+        return parsed
+
+    @staticmethod
+    def _pack_dimensions(dimension: int, quantity: float, item: Dict) -> List[float]:
+        """The pack as [g, ml, each], NaN where the item has no density/count weight to convert"""
+        density = item['density_g_per_ml'] or None
+        each_g = item['count_to_weight_g'] or None
+        grams = {WEIGHT: quantity,
+                 VOLUME: density and quantity * density,
+                 COUNT: each_g and quantity * each_g}[dimension]
+        packs = [math.nan] * 3
+        packs[dimension] = quantity
+        if grams:
+            packs[WEIGHT] = grams
+            if density and dimension != VOLUME:
+                packs[VOLUME] = grams / density
+            if each_g and dimension != COUNT:
+                packs[COUNT] = grams / each_g
+        return packs
+
+    def load(self):
+        """Read and normalize every active offer from an active vendor"""
+        started = time.perf_counter()
+        conn = self._connect()
+        try:
+            versions = self._data_versions(conn)
+            if self.uom is None:
+                self.uom = UOMStandardizer(self.db_path, read_only=True)
+            factors = self._unit_factors(conn)
+            items = {row['id']: dict(row) for row in conn.execute("""
+                SELECT id, item_description, item_code, current_price, pack_size, purchase_unit,
+                       density_g_per_ml, count_to_weight_g
+                FROM inventory
+            """)}
+            equivalents = {}
+            try:
+                for row in conn.execute("""
+                    SELECT inventory_id, custom_unit_name, canonical_quantity, canonical_unit_symbol
+                    FROM ingredient_unit_equivalents
+                """):
+                    equivalents.setdefault(row['inventory_id'], {})[row['custom_unit_name'].strip().lower()] = (
+                        float(row['canonical_quantity']), row['canonical_unit_symbol'])
+            except sqlite3.OperationalError:
+                pass  # table not created on this database
+            vendors = {row['id']: dict(row) for row in conn.execute("""
+                SELECT id, vendor_name FROM vendors WHERE COALESCE(active, 1) = 1
+            """)}
+            rows = conn.execute("""
+                SELECT id, inventory_id, vendor_id, vendor_item_code,
+                       COALESCE(vendor_price, last_purchased_price) AS price,
+                       pack_size, unit_measure, is_primary
+                FROM vendor_products
+                WHERE is_active = 1
+                ORDER BY inventory_id, vendor_id, id
+            """).fetchall()
+        finally:
+            conn.close()
+
+        vendor_ids = sorted(vendors)
+        vendor_index = {vendor_id: n for n, vendor_id in enumerate(vendor_ids)}
+        item_ids = sorted(items)
+        item_index = {item_id: n for n, item_id in enumerate(item_ids)}
+
+        offers, packs, skipped = [], [], []
+        for row in rows:
+            item = items.get(row['inventory_id'])
+            if item is None or row['vendor_id'] not in vendor_index:
+                continue
+            item_equivalents = equivalents.get(row['inventory_id'], {})
+            # The offer's measured pack, the inventory item's, then either as a plain count
+            pack = source = None
+            for source, pack_size, unit_measure in (
+                ('offer', row['pack_size'], row['unit_measure']),
+                ('inventory', item['pack_size'], item['purchase_unit']),
+                ('offer', row['pack_size'], None),
+                ('inventory', item['pack_size'], None),
+            ):
+                pack = self._parse_pack(pack_size, unit_measure, factors, item_equivalents)
+                if pack is not None:
+                    break
+            if pack is None or not row['price'] or row['price'] <= 0:
+                skipped.append({'vendor_product_id': row['id'], 'inventory_id': row['inventory_id'],
+                                'reason': 'no price' if pack else 'pack size does not convert'})
+                continue
+            offers.append({
+                'vendor_product_id': row['id'],
+                'inventory_id': row['inventory_id'],
+                'vendor_id': row['vendor_id'],
+                'vendor_item_code': row['vendor_item_code'],
+                'price': float(row['price']),
+                'pack_size': row['pack_size'],
+                'unit_measure': row['unit_measure'],
+                'pack_source': source,
+                'is_primary': bool(row['is_primary']),
+            })
+            packs.append(self._pack_dimensions(pack[0], pack[1], item))
+
+        self.catalog = {
+            'items': items,
+            'item_index': item_index,
+            'vendors': vendors,
+            'vendor_ids': vendor_ids,
+            'factors': factors,
+            'equivalents': equivalents,
+            'offers': offers,
+            'skipped_offers': skipped,
+            'offer_item': np.array([item_index[o['inventory_id']] for o in offers], dtype=np.int64),
+            'offer_vendor': np.array([vendor_index[o['vendor_id']] for o in offers], dtype=np.int64),
+            'offer_price': np.array([o['price'] for o in offers], dtype=np.float64),
+            'offer_primary': np.array([o['is_primary'] for o in offers], dtype=bool),
+            'offer_pack': np.array(packs, dtype=np.float64).reshape(len(offers), 3),
+            'load_ms': round((time.perf_counter() - started) * 1000, 2),
+        }
+        self.versions = versions
+        return self.catalog
+
+    # ------------------------------------------------------------------
+    # Optimization
+    # ------------------------------------------------------------------
+
+    def _vendor_key(self, catalog: Dict, key: Any) -> int:
+        """Vendor id for a vendor id or name"""
+        if key in catalog['vendors']:
+            return key
+        if str(key).isdigit() and int(key) in catalog['vendors']:
+            return int(key)
+        for vendor_id, vendor in catalog['vendors'].items():
+            if vendor['vendor_name'].lower() == str(key).strip().lower():
+                return vendor_id
+        raise OptimizerError(f"Unknown vendor {key!r}")
+
+    def _requirements(self, catalog: Dict, requirements: Any) -> Tuple[np.ndarray, np.ndarray, Dict, List]:
+        """
+        Base-unit requirement and dimension per catalog item
+
+        requirements is {inventory_id: quantity, (quantity, unit) or
+        {'quantity', 'unit'}} or a list of {'inventory_id', 'quantity', 'unit'}.
+        A quantity without a unit is in the item's purchase unit.
+        """
+        if isinstance(requirements, dict):
+            entries = requirements.items()
+        else:
+            try:
+                entries = [(row['inventory_id'], row) for row in requirements]
+            except (KeyError, TypeError):
+                raise OptimizerError("Requirements need an inventory_id on every row")
+
+        needed = np.full(len(catalog['item_index']), np.nan)
+        dimension = np.zeros(len(catalog['item_index']), dtype=np.int64)
+        stated, unavailable = {}, []
+        for inventory_id, value in entries:
+            if isinstance(value, dict):
+                quantity, unit = value.get('quantity'), value.get('unit')
+            elif isinstance(value, (list, tuple)):
+                quantity, unit = (tuple(value) + (None,))[:2]
+            else:
+                quantity, unit = value, None
+            try:
+                inventory_id, quantity = int(inventory_id), float(quantity)
+            except (TypeError, ValueError):
+                raise OptimizerError(f"Invalid requirement {inventory_id!r}: {value!r}")
+            if quantity <= 0:
+                continue
+            item = catalog['items'].get(inventory_id)
+            if item is None:
+                unavailable.append({'inventory_id': inventory_id, 'item_description': None,
+                                    'quantity': quantity, 'unit': unit, 'reason': 'unknown inventory item'})
+                continue
+            unit = unit or item['purchase_unit'] or 'each'
+            base = self._base(quantity, unit, catalog['factors'], catalog['equivalents'].get(inventory_id, {}))
+            if base is None:
+                unavailable.append({'inventory_id': inventory_id, 'item_description': item['item_description'],
+                                    'quantity': quantity, 'unit': unit, 'reason': f'unit {unit!r} does not convert'})
+                continue
+            col = catalog['item_index'][inventory_id]
+            if not np.isnan(needed[col]) and dimension[col] != base[0]:
+                raise OptimizerError(f"Requirements for item {inventory_id} mix {DIMENSIONS[dimension[col]].lower()} "
+                                     f"and {DIMENSIONS[base[0]].lower()} units")
+            needed[col] = np.nan_to_num(needed[col]) + base[1]
+            dimension[col] = base[0]
+            # Reported in the first unit given for the item
+            stated.setdefault(inventory_id, (unit, base[1] / quantity))
+        return needed, dimension, stated, unavailable
+
+    def optimize(self, requirements: Any, minimums: Optional[Dict[Any, float]] = None,
+                 vendors: Optional[List[Any]] = None) -> Dict[str, Any]:
+        """
+        Cheapest per-vendor order guide for the required quantities
+
+        minimums maps vendor id or name to a minimum order amount; vendors,
+        if given, limits the choice to those vendor ids or names.
+        """
+        started = time.perf_counter()
+        catalog = self.current()
+        needed, dimension, stated, unavailable = self._requirements(catalog, requirements)
+        n_vendors, n_items = len(catalog['vendor_ids']), len(catalog['item_index'])
+        vendor_position = {vendor_id: n for n, vendor_id in enumerate(catalog['vendor_ids'])}
+        minimum = np.zeros(n_vendors)
+        for key, amount in (minimums or {}).items():
+            position = vendor_position[self._vendor_key(catalog, key)]
+            try:
+                minimum[position] = float(amount)
+            except (TypeError, ValueError):
+                raise OptimizerError(f"Invalid minimum for {key!r}: {amount!r}")
+        allowed = np.ones(n_vendors, dtype=bool)
+        if vendors:
+            allowed[:] = False
+            allowed[[vendor_position[self._vendor_key(catalog, key)] for key in vendors]] = True
+
+        # Every offer against its item's requirement at once
+        item, vendor, price = catalog['offer_item'], catalog['offer_vendor'], catalog['offer_price']
+        need = needed[item]
+        pack = catalog['offer_pack'][np.arange(len(item)), dimension[item]]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            packs = np.ceil(need / pack - PACK_EPSILON)
+        cost = packs * price
+        eligible = np.isfinite(cost) & (packs > 0) & allowed[vendor]
+
+        # Cheapest offer per (vendor, item) -> vendor x item cost matrix
+        candidates = np.flatnonzero(eligible)
+        order = candidates[np.lexsort((cost[candidates], item[candidates], vendor[candidates]))]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (vendor[order][1:] != vendor[order][:-1]) | (item[order][1:] != item[order][:-1])
+        best = order[first]
+        matrix = np.full((n_vendors, n_items), np.inf)
+        matrix[vendor[best], item[best]] = cost[best]
+        offer_at = np.full((n_vendors, n_items), -1, dtype=np.int64)
+        offer_at[vendor[best], item[best]] = best
+
+        required = np.flatnonzero(np.isfinite(matrix).any(axis=0))
+        unconstrained = matrix[:, required].argmin(axis=0)
+        open_vendors = np.ones(n_vendors, dtype=bool)
+        while True:
+            masked = np.where(open_vendors[:, None], matrix[:, required], np.inf)
+            choice = np.where(np.isfinite(masked).any(axis=0), masked.argmin(axis=0), unconstrained)
+            totals = np.bincount(choice, weights=matrix[choice, required], minlength=n_vendors)
+            short = np.flatnonzero(open_vendors & (totals > 0) & (totals < minimum))
+            if not len(short):
+                break
+            # Close the vendor furthest under its minimum, then re-pick
+            open_vendors[short[np.argmax(minimum[short] - totals[short])]] = False
+
+        # The primary offer's cost for the same requirement, for savings
+        primary_cost = np.full(n_items, np.nan)
+        primary = np.flatnonzero(catalog['offer_primary'] & np.isfinite(cost) & (packs > 0))
+        primary_cost[item[primary]] = cost[primary]
+
+        guide = {}
+        for col, vendor_col in zip(required, choice):
+            offer_n = offer_at[vendor_col, col]
+            offer = catalog['offers'][offer_n]
+            inventory_id = offer['inventory_id']
+            unit, per_unit = stated[inventory_id]
+            quantity = needed[col] / per_unit
+            line_cost = round(float(cost[offer_n]), 2)
+            baseline = primary_cost[col]
+            vendor_id = catalog['vendor_ids'][vendor_col]
+            order_for = guide.setdefault(vendor_id, {
+                'vendor_id': vendor_id,
+                'vendor_name': catalog['vendors'][vendor_id]['vendor_name'],
+                'minimum': float(minimum[vendor_col]) or None,
+                'lines': [],
+            })
+            order_for['lines'].append({
+                'inventory_id': inventory_id,
+                'item_description': catalog['items'][inventory_id]['item_description'],
+                'vendor_product_id': offer['vendor_product_id'],
+                'vendor_item_code': offer['vendor_item_code'],
+                'required_quantity': round(float(quantity), 4),
+                'unit': unit,
+                'pack_size': offer['pack_size'],
+                'pack_source': offer['pack_source'],
+                'pack_quantity': round(float(pack[offer_n]) / per_unit, 4),
+                'packs': int(packs[offer_n]),
+                'pack_price': offer['price'],
+                'unit_price': round(offer['price'] * per_unit / float(pack[offer_n]), 4),
+                'cost': line_cost,
+                'primary_cost': None if np.isnan(baseline) else round(float(baseline), 2),
+                'savings': None if np.isnan(baseline) else round(float(baseline) - line_cost, 2),
+            })
+
+        order_guide = []
+        for order_for in sorted(guide.values(), key=lambda row: row['vendor_name']):
+            order_for['lines'].sort(key=lambda row: row['item_description'] or '')
+            order_for['subtotal'] = round(sum(line['cost'] for line in order_for['lines']), 2)
+            order_for['meets_minimum'] = order_for['subtotal'] >= (order_for['minimum'] or 0)
+            order_guide.append(order_for)
+
+        ordered = set(catalog['offers'][offer_at[v, c]]['inventory_id'] for c, v in zip(required, choice))
+        for inventory_id, (unit, per_unit) in stated.items():
+            if inventory_id not in ordered:
+                unavailable.append({'inventory_id': inventory_id,
+                                    'item_description': catalog['items'][inventory_id]['item_description'],
+                                    'quantity': round(float(needed[catalog['item_index'][inventory_id]]) / per_unit, 4),
+                                    'unit': unit,
+                                    'reason': 'no active priced offer in a convertible pack'})
+
+        lines = [line for order_for in order_guide for line in order_for['lines']]
+        compared = [line for line in lines if line['savings'] is not None]
+        return {
+            'order_guide': order_guide,
+            'unavailable': sorted(unavailable, key=lambda row: row['inventory_id']),
+            'summary': {
+                'items': len(lines),
+                'vendors': len(order_guide),
+                'total_cost': round(sum(line['cost'] for line in lines), 2),
+                'primary_cost': round(sum(line['primary_cost'] for line in compared), 2),
+                'savings': round(sum(line['savings'] for line in compared), 2),
+                'below_minimum': [row['vendor_name'] for row in order_guide if not row['meets_minimum']],
+            },
+            'offers_evaluated': int(eligible.sum()),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+        }
+
+
+def requirements_from_plan(plan: Dict[str, Any]) -> Dict[int, Tuple[float, str]]:
+    """{inventory_id: (quantity, unit)} from a bom_engine purchase list"""
+    return {row['inventory_id']: (row['required_quantity'], row['unit']) for row in plan['purchase_list']}
+
+
+def read_requirements_csv(path: str) -> List[Dict[str, Any]]:
+    """inventory_id,quantity[,unit] rows"""
+    with open(path, newline='') as f:
+        return [{'inventory_id': int(row['inventory_id']), 'quantity': float(row['quantity'] or 0),
+                 'unit': (row.get('unit') or '').strip() or None}
+                for row in csv.DictReader(f)]
+
+
+def parse_minimums(values: List[str]) -> Dict[str, float]:
+    """["Sysco=250", ...] -> {'Sysco': 250.0}"""
+    minimums = {}
+    for value in values or ():
+        vendor, _, amount = value.rpartition('=')
+        try:
+            minimums[vendor.strip()] = float(amount)
+        except ValueError:
+            raise OptimizerError(f"Minimum must be VENDOR=AMOUNT, got {value!r}")
+    return minimums
+
+
+def print_order_guide(result: Dict[str, Any]):
+    print("=" * 80)
+    print("ORDER GUIDE")
+    print("=" * 80)
+    for order_for in result['order_guide']:
+        minimum = f" (minimum ${order_for['minimum']:.2f}" + \
+            ("" if order_for['meets_minimum'] else " - NOT MET") + ")" if order_for['minimum'] else ""
+        print(f"\n{order_for['vendor_name']}{minimum}")
+        for line in order_for['lines']:
+            savings = f" saves ${line['savings']:.2f}" if line['savings'] else ""
+            print(f"  {(line['vendor_item_code'] or '')[:12]:<12} {line['item_description'][:36]:<36} "
+                  f"{line['packs']:>4} x {line['pack_quantity']:g} {line['unit']:<6} ${line['cost']:>9.2f}{savings}")
+        print(f"  {'Subtotal':<55} ${order_for['subtotal']:>9.2f}")
+
+    summary = result['summary']
+    print(f"\nTotal: ${summary['total_cost']:.2f} for {summary['items']} items from {summary['vendors']} vendors")
+    if summary['savings']:
+        print(f"Savings vs primary vendors: ${summary['savings']:.2f}")
+    if result['unavailable']:
+        print(f"\n{len(result['unavailable'])} items could not be sourced:")
+        for row in result['unavailable']:
+            print(f"  {row['item_description'] or row['inventory_id']}: {row['quantity']} {row['unit']} "
+                  f"({row['reason']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pick the cheapest vendor per item for a set of requirements")
+    parser.add_argument('requirements', nargs='?', help="CSV with inventory_id,quantity,unit columns")
+    parser.add_argument('--forecast', help="Forecast CSV (date,menu_item_id,quantity) exploded by the BOM engine")
+    parser.add_argument('--minimum', action='append', metavar='VENDOR=AMOUNT',
+                        help="Minimum order amount for a vendor (repeatable)")
+    parser.add_argument('--vendor', action='append', help="Only order from this vendor (repeatable)")
+    parser.add_argument('--db', default='restaurant_calculator.db', help="Database path")
+    parser.add_argument('--json', action='store_true', help="Print the order guide as JSON")
+    args = parser.parse_args()
+
+    if bool(args.requirements) == bool(args.forecast):
+        parser.error("give either a requirements CSV or --forecast")
+    if args.forecast:
+        from bom_engine import BOMEngine, read_forecast_csv
+        forecast, days = read_forecast_csv(args.forecast)
+        requirements = requirements_from_plan(BOMEngine(args.db).plan(forecast, days))
+    else:
+        requirements = read_requirements_csv(args.requirements)
+
+    try:
+        result = VendorOptimizer(args.db).optimize(requirements, parse_minimums(args.minimum), args.vendor)
+    except OptimizerError as e:
+        parser.error(str(e))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_order_guide(result)
+
+
+if __name__ == '__main__':
+    main()